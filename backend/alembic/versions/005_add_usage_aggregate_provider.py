@@ -0,0 +1,62 @@
+"""add provider dimension to usage aggregates
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-01-12
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "005"
+down_revision = "004"
+branch_labels = None
+depends_on = None
+
+_OLD_KEY = ("bucket_type", "bucket_start", "user_id", "access_key_id")
+
+
+def _drop_unique_on(columns: tuple[str, ...]) -> None:
+    # 001 created the constraint unnamed; find it by its columns.
+    column_list = ", ".join(f"'{column}'" for column in columns)
+    op.execute(
+        f"""
+        DO $$
+        DECLARE constraint_name text;
+        BEGIN
+            SELECT c.conname INTO constraint_name
+            FROM pg_constraint c
+            WHERE c.conrelid = 'usage_aggregates'::regclass
+              AND c.contype = 'u'
+              AND (
+                  SELECT array_agg(a.attname::text ORDER BY a.attname)
+                  FROM pg_attribute a
+                  WHERE a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+              ) = (SELECT array_agg(x ORDER BY x) FROM unnest(ARRAY[{column_list}]) AS x);
+            IF constraint_name IS NOT NULL THEN
+                EXECUTE format('ALTER TABLE usage_aggregates DROP CONSTRAINT %I', constraint_name);
+            END IF;
+        END $$;
+        """
+    )
+
+
+def upgrade() -> None:
+    op.add_column(
+        "usage_aggregates",
+        sa.Column("provider", sa.String(10), nullable=False, server_default="bedrock"),
+    )
+    _drop_unique_on(_OLD_KEY)
+    op.create_unique_constraint(
+        "uq_usage_aggregates_bucket_provider",
+        "usage_aggregates",
+        [*_OLD_KEY, "provider"],
+    )
+
+
+def downgrade() -> None:
+    # Plan rows have no place in the old key; drop them before restoring it.
+    op.execute("DELETE FROM usage_aggregates WHERE provider <> 'bedrock'")
+    op.drop_constraint("uq_usage_aggregates_bucket_provider", "usage_aggregates", type_="unique")
+    op.create_unique_constraint(None, "usage_aggregates", list(_OLD_KEY))
+    op.drop_column("usage_aggregates", "provider")
@@ -0,0 +1,30 @@
+"""add streaming timing columns to token usage
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-01-14
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "006"
+down_revision = "005"
+branch_labels = None
+depends_on = None
+
+_MS_COLUMNS = ("upstream_connect_ms", "ttfb_ms", "ttft_ms", "stream_duration_ms")
+
+
+def upgrade() -> None:
+    for name in _MS_COLUMNS:
+        op.add_column("token_usage", sa.Column(name, sa.Integer(), nullable=True))
+    op.add_column(
+        "token_usage", sa.Column("output_tokens_per_second", sa.Float(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("token_usage", "output_tokens_per_second")
+    for name in reversed(_MS_COLUMNS):
+        op.drop_column("token_usage", name)
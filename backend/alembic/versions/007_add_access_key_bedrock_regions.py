@@ -0,0 +1,25 @@
+"""add access key bedrock regions
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-01-15
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "access_keys",
+        sa.Column("bedrock_regions", sa.String(255), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("access_keys", "bedrock_regions")
@@ -0,0 +1,105 @@
+"""Minimal local HTTPS upstream used by the benchmarks.
+
+Speaks just enough HTTP/1.1 (keep-alive, Content-Length bodies) to stand in for
+api.anthropic.com or bedrock-runtime without measuring a real network.
+"""
+import asyncio
+import datetime
+import ipaddress
+import ssl
+import tempfile
+from pathlib import Path
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+DEFAULT_BODY = (
+    b'{"id":"msg_stub","type":"message","role":"assistant",'
+    b'"content":[{"type":"text","text":"ok"}],"model":"claude-stub",'
+    b'"stop_reason":"end_turn","stop_sequence":null,'
+    b'"usage":{"input_tokens":10,"output_tokens":2}}'
+)
+
+
+def write_self_signed_cert(directory: Path) -> tuple[Path, Path]:
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = directory / "cert.pem"
+    key_path = directory / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    return cert_path, key_path
+
+
+class StubUpstream:
+    """Async context manager serving a fixed response over TLS on 127.0.0.1."""
+
+    def __init__(self, body: bytes = DEFAULT_BODY, delay: float = 0.0):
+        self._body = body
+        self._delay = delay
+        self._tmp = tempfile.TemporaryDirectory()
+        self._server: asyncio.AbstractServer | None = None
+        self.cert_path: Path | None = None
+        self.url = ""
+
+    async def __aenter__(self) -> "StubUpstream":
+        self.cert_path, key_path = write_self_signed_cert(Path(self._tmp.name))
+        ssl_ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_ctx.load_cert_chain(self.cert_path, key_path)
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0, ssl=ssl_ctx)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"https://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *_exc) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        self._tmp.cleanup()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        header = (
+            b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+            b"content-length: " + str(len(self._body)).encode() + b"\r\n\r\n"
+        )
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                if self._delay:
+                    await asyncio.sleep(self._delay)
+                writer.write(header + self._body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
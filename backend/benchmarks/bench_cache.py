@@ -0,0 +1,110 @@
+"""Bounded LRU/TTL cache vs the previous unbounded TTLCache.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_cache --ops 500000
+
+Reports get/set throughput, memory growth with many distinct keys, and how many
+loader calls a burst of concurrent misses for one key triggers (the previous
+get -> load -> set pattern vs ``get_or_load``).
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import Any
+
+from src.proxy.cache import TTLCache
+
+
+class LegacyTTLCache:
+    """The unbounded dict-based cache this module replaced, kept for comparison."""
+
+    def __init__(self, ttl: int):
+        self._ttl = ttl
+        self._cache: dict[str, tuple[Any, float]] = {}
+
+    def get(self, key: str) -> Any | None:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.time() > expires_at:
+            del self._cache[key]
+            return None
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._cache[key] = (value, time.time() + self._ttl)
+
+
+def _ops_per_sec(label: str, ops: int, fn) -> None:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<24} {ops / elapsed / 1e6:6.2f} M ops/s")
+
+
+def bench_throughput(ops: int) -> None:
+    keys = [f"key-{i}" for i in range(1000)]
+    for name, cache in (
+        ("legacy", LegacyTTLCache(60)),
+        ("lru", TTLCache(60, max_size=10000, jitter=0.1, stale_ttl=30)),
+    ):
+        print(name)
+        _ops_per_sec("set", ops, lambda: [cache.set(keys[i % 1000], i) for i in range(ops)])
+        _ops_per_sec("get (hit)", ops, lambda: [cache.get(keys[i % 1000]) for i in range(ops)])
+        _ops_per_sec("get (miss)", ops, lambda: [cache.get("absent") for _ in range(ops)])
+
+
+def bench_memory(distinct_keys: int) -> None:
+    print(f"memory after {distinct_keys} distinct keys")
+    for name, cache in (
+        ("legacy", LegacyTTLCache(60)),
+        ("lru (max 10000)", TTLCache(60, max_size=10000)),
+    ):
+        tracemalloc.start()
+        for i in range(distinct_keys):
+            cache.set(f"key-{i}", i)
+        current, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {name:<24} {len(cache._cache):>8} entries  {current / 1e6:7.1f} MB")
+
+
+async def bench_herd(concurrency: int) -> None:
+    print(f"thundering herd: {concurrency} concurrent misses, 5 ms loader")
+    calls = 0
+
+    async def loader() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.005)
+        return "value"
+
+    legacy = LegacyTTLCache(60)
+
+    async def legacy_lookup() -> str:
+        value = legacy.get("hot")
+        if value is None:
+            value = await loader()
+            legacy.set("hot", value)
+        return value
+
+    await asyncio.gather(*(legacy_lookup() for _ in range(concurrency)))
+    print(f"  {'legacy':<24} {calls:>8} loader calls")
+
+    calls = 0
+    cache = TTLCache(60)
+    await asyncio.gather(*(cache.get_or_load("hot", loader) for _ in range(concurrency)))
+    print(f"  {'get_or_load':<24} {calls:>8} loader calls")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=500_000)
+    parser.add_argument("--distinct-keys", type=int, default=200_000)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    args = parser.parse_args()
+    bench_throughput(args.ops)
+    bench_memory(args.distinct_keys)
+    asyncio.run(bench_herd(args.concurrency))
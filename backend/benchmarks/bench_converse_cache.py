@@ -0,0 +1,97 @@
+"""Converse request conversion with and without the block cache.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_converse_cache --turns 50 --result-kb 4
+
+Replays a synthetic Claude Code session: every turn resends the system
+prompt, the tool definitions and the whole history plus one new tool call
+and its result, as the client does. Each turn is converted and encoded as
+``BedrockAdapter`` does, once without a cache and once through a
+``ConversationCache``, and the CPU time per turn and cache size are
+reported.
+"""
+import argparse
+import time
+
+from benchmarks.bench_plan_passthrough import TOOLS
+from src import json_codec
+from src.domain import AnthropicRequest
+from src.proxy.bedrock_converse import ConversationCache, build_converse_request
+
+
+def session_requests(turns: int, result_kb: int) -> list[AnthropicRequest]:
+    messages: list[dict] = [
+        {"role": "user", "content": [{"type": "text", "text": "Refactor the payment module."}]}
+    ]
+    requests = []
+    line = "def handler(event):\n    return process(event)\n"
+    for i in range(turns):
+        tool_id = f"toolu_{i:06d}"
+        messages.append(
+            {
+                "role": "assistant",
+                "content": [
+                    {"type": "text", "text": f"Reading file {i}."},
+                    {
+                        "type": "tool_use",
+                        "id": tool_id,
+                        "name": "Read",
+                        "input": {"path": f"src/payments/mod_{i}.py"},
+                    },
+                ],
+            }
+        )
+        messages.append(
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "tool_result",
+                        "tool_use_id": tool_id,
+                        "content": line * (result_kb * 1024 // len(line)),
+                    }
+                ],
+            }
+        )
+        requests.append(
+            AnthropicRequest(
+                model="claude-sonnet-4-5",
+                system=[{"type": "text", "text": "You are a coding assistant. " * 400}],
+                tools=TOOLS,
+                messages=list(messages),
+            )
+        )
+    return requests
+
+
+def replay(
+    requests: list[AnthropicRequest], cache: ConversationCache | None, encode: bool
+) -> float:
+    started = time.process_time()
+    for request in requests:
+        payload = build_converse_request(request, cache, "ak")
+        if encode:
+            json_codec.dumps(payload)
+    return (time.process_time() - started) / len(requests)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--result-kb", type=int, default=4)
+    args = parser.parse_args()
+
+    requests = session_requests(args.turns, args.result_kb)
+    replay(requests[:5], None, encode=True)
+    print(f"{args.turns}-turn session, {args.result_kb} KB tool results")
+
+    for encode in (False, True):
+        label = "convert + encode" if encode else "convert"
+        uncached = replay(requests, None, encode)
+        cache = ConversationCache(max_bytes=64 * 1024 * 1024)
+        cached = replay(requests, cache, encode)
+        print(
+            f"  {label:<17} no cache {uncached * 1000:7.3f} ms/turn   "
+            f"cache {cached * 1000:7.3f} ms/turn   ({cache.size_bytes / 1024:.0f} KiB held)"
+        )
@@ -0,0 +1,102 @@
+"""Fast Converse event-stream decoding vs the botocore-per-event pipeline.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_converse_stream --events 50000 --chunk-size 16384
+
+Encodes a Bedrock ConverseStream response (mostly text deltas with a tool call
+every 20 events) as AWS event-stream frames and reports MB/s and events/s for
+``iter_anthropic_sse`` and for the previous ``ConverseStreamDecoder`` +
+``_convert_converse_event`` + ``_to_sse`` path.
+"""
+import argparse
+import asyncio
+import json
+import struct
+import time
+import zlib
+
+from src.proxy.bedrock_converse import ConverseStreamDecoder, StreamState, iter_anthropic_sse
+from src.proxy.bedrock_converse.stream_decoder import (
+    _convert_converse_event,
+    _message_delta_payloads,
+    _to_sse,
+)
+
+
+def _frame(event_type: str, body: dict) -> bytes:
+    headers = b""
+    for name, value in (
+        (":event-type", event_type),
+        (":content-type", "application/json"),
+        (":message-type", "event"),
+    ):
+        headers += bytes([len(name)]) + name.encode() + b"\x07"
+        headers += struct.pack(">H", len(value)) + value.encode()
+    payload = json.dumps(body, separators=(",", ":")).encode()
+    prelude = struct.pack(">II", 16 + len(headers) + len(payload), len(headers))
+    message = prelude + struct.pack(">I", zlib.crc32(prelude)) + headers + payload
+    return message + struct.pack(">I", zlib.crc32(message))
+
+
+def build_stream(events: int) -> bytes:
+    frames = [_frame("messageStart", {"role": "assistant", "p": "abcdefgh"})]
+    for i in range(events):
+        if i % 20 == 19:
+            delta = {"toolUse": {"input": '{"path": "src/module_%d.py"' % i}}
+        else:
+            delta = {"text": f"word{i} and a few more tokens "}
+        frames.append(
+            _frame("contentBlockDelta", {"contentBlockIndex": 0, "delta": delta, "p": "abcd"})
+        )
+    frames.append(_frame("contentBlockStop", {"contentBlockIndex": 0}))
+    frames.append(_frame("messageStop", {"stopReason": "end_turn"}))
+    frames.append(_frame("metadata", {"usage": {"inputTokens": 100, "outputTokens": events}}))
+    return b"".join(frames)
+
+
+async def _chunks(data: bytes, size: int):
+    for offset in range(0, len(data), size):
+        yield data[offset : offset + size]
+
+
+async def fast(data: bytes, size: int) -> int:
+    total = 0
+    async for out in iter_anthropic_sse(_chunks(data, size), "claude", "msg_bench"):
+        total += len(out)
+    return total
+
+
+async def botocore_path(data: bytes, size: int) -> int:
+    decoder = ConverseStreamDecoder()
+    state = StreamState(message_id="msg_bench")
+    total = 0
+    async for chunk in _chunks(data, size):
+        for event in decoder.feed(chunk):
+            async for payload in _convert_converse_event(event, state, "claude"):
+                total += len(_to_sse(payload))
+    for payload in _message_delta_payloads(state):
+        total += len(_to_sse(payload))
+    return total
+
+
+async def main(events: int, chunk_size: int) -> None:
+    data = build_stream(events)
+    megabytes = len(data) / (1024 * 1024)
+    print(f"{events} events, {megabytes:.1f} MB of event-stream frames, {chunk_size} byte chunks")
+    for label, fn in (("botocore", botocore_path), ("fast", fast)):
+        started = time.perf_counter()
+        produced = await fn(data, chunk_size)
+        elapsed = time.perf_counter() - started
+        print(
+            f"  {label:<10} {megabytes / elapsed:8.1f} MB/s   {events / elapsed:10.0f} events/s"
+            f"   ({produced / (1024 * 1024):.1f} MB SSE out)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--chunk-size", type=int, default=16384)
+    args = parser.parse_args()
+    asyncio.run(main(args.events, args.chunk_size))
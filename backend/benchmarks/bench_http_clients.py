@@ -0,0 +1,75 @@
+"""Pooled vs per-request upstream HTTP clients.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_http_clients --requests 2000 --concurrency 32
+
+Every "per-request" call builds and closes its own ``httpx.AsyncClient`` (the
+old adapter behaviour), paying a TCP + TLS handshake and SSL context setup each
+time. The "pooled" run borrows from ``HttpClientRegistry``.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from src.proxy.http_clients import HttpClientRegistry
+
+from ._stub_upstream import StubUpstream
+
+PAYLOAD = {
+    "model": "claude-stub",
+    "max_tokens": 16,
+    "messages": [{"role": "user", "content": "ping"}],
+}
+
+
+async def _run(label: str, total: int, concurrency: int, call) -> None:
+    latencies: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one() -> None:
+        async with sem:
+            started = time.perf_counter()
+            response = await call()
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{label:<12} {total / elapsed:>9.1f} req/s   p50 {p50:7.2f} ms   p99 {p99:7.2f} ms")
+
+
+async def main(total: int, concurrency: int) -> None:
+    async with StubUpstream() as upstream:
+        url = f"{upstream.url}/v1/messages"
+        verify = str(upstream.cert_path)
+
+        async def per_request():
+            async with httpx.AsyncClient(verify=verify) as client:
+                return await client.post(url, json=PAYLOAD)
+
+        registry = HttpClientRegistry(http2=False)
+
+        async def pooled():
+            return await registry.get(url, verify=verify).post(url, json=PAYLOAD)
+
+        print(f"{total} requests, concurrency {concurrency}, TLS stub at {upstream.url}")
+        await _run("per-request", total, concurrency, per_request)
+        await _run("pooled", total, concurrency, pooled)
+        await registry.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
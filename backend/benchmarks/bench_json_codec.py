@@ -0,0 +1,110 @@
+"""JSON codec vs stdlib ``json`` on the proxy's request and response shapes.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_json_codec --iterations 50
+
+Times each operation the proxy performs per request, the way the stdlib did
+it before and through ``src.json_codec`` (orjson when installed):
+
+- decoding a 200 KB Claude Code ``/v1/messages`` body,
+- encoding the Converse request built from it,
+- decoding a Converse response and rendering the Anthropic response body,
+- encoding the SSE events of a 2,000-delta stream.
+"""
+import argparse
+import json
+import time
+
+from benchmarks.bench_plan_passthrough import build_body
+from src import json_codec
+from src.domain import AnthropicRequest
+from src.proxy.bedrock_converse import build_converse_request, parse_converse_response
+
+CONVERSE_RESPONSE = {
+    "output": {
+        "message": {
+            "role": "assistant",
+            "content": [
+                {"text": "Here is the refactored module. " * 200},
+                {
+                    "toolUse": {
+                        "toolUseId": "tooluse_1",
+                        "name": "Write",
+                        "input": {"path": "src/payments/core.py", "content": "x = 1\n" * 500},
+                    }
+                },
+            ],
+        }
+    },
+    "usage": {"inputTokens": 52000, "outputTokens": 1800},
+    "stopReason": "tool_use",
+}
+
+
+def stream_events(count: int) -> list[dict]:
+    return [
+        {
+            "type": "content_block_delta",
+            "index": 0,
+            "delta": {"type": "text_delta", "text": f"Token {i} of a fairly ordinary sentence. "},
+        }
+        for i in range(count)
+    ]
+
+
+def timed(handler, iterations: int) -> float:
+    handler()
+    started = time.process_time()
+    for _ in range(iterations):
+        handler()
+    return (time.process_time() - started) / iterations
+
+
+def run(label: str, stdlib, codec, iterations: int) -> None:
+    before = timed(stdlib, iterations)
+    after = timed(codec, iterations)
+    print(
+        f"{label:<30} stdlib {before * 1000:8.3f} ms   {json_codec.BACKEND:<6} "
+        f"{after * 1000:8.3f} ms   x{before / after:5.1f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    body = build_body(200 * 1024)
+    converse_request = build_converse_request(AnthropicRequest.model_validate_json(body))
+    converse_body = json.dumps(CONVERSE_RESPONSE).encode()
+    events = stream_events(2000)
+
+    def render(loads, dumps) -> bytes:
+        response, _usage = parse_converse_response(loads(converse_body), "claude-sonnet-4-5")
+        return dumps(response.model_dump())
+
+    run(
+        "decode request body",
+        lambda: json.loads(body),
+        lambda: json_codec.loads(body),
+        args.iterations,
+    )
+    run(
+        "encode Converse request",
+        lambda: json.dumps(converse_request).encode(),
+        lambda: json_codec.dumps(converse_request),
+        args.iterations,
+    )
+    run(
+        "Converse response round-trip",
+        lambda: render(json.loads, lambda value: json.dumps(value).encode()),
+        lambda: render(json_codec.loads, json_codec.dumps),
+        args.iterations,
+    )
+    run(
+        "encode 2000 SSE events",
+        lambda: [f"data: {json.dumps(event)}\n\n".encode() for event in events],
+        lambda: [b"data: " + json_codec.dumps(event) + b"\n\n" for event in events],
+        args.iterations,
+    )
@@ -0,0 +1,126 @@
+"""Plan request handling: full model round-trip vs raw-bytes passthrough.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_plan_passthrough --iterations 20
+
+Builds Claude Code-shaped ``/v1/messages`` bodies of 10 KB, 200 KB and 2 MB
+(a long system prompt, tool definitions and a growing tool_use/tool_result
+history) and reports CPU time per request and peak traced allocations for:
+
+- ``model``: validate into ``AnthropicRequest`` and re-encode it for Plan,
+  which is what every request paid before.
+- ``passthrough``: parse the routing fields and pick the body to forward.
+- ``fallback``: passthrough plus building the full model, the extra cost a
+  request pays only when it falls back to Bedrock.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from src.domain import AnthropicRequest
+from src.proxy.payload import MessagesPayload
+
+SIZES = {"10KB": 10 * 1024, "200KB": 200 * 1024, "2MB": 2 * 1024 * 1024}
+
+TOOLS = [
+    {
+        "name": name,
+        "description": f"{name} tool. " * 20,
+        "input_schema": {
+            "type": "object",
+            "properties": {"path": {"type": "string"}, "content": {"type": "string"}},
+            "required": ["path"],
+        },
+    }
+    for name in ("Read", "Write", "Edit", "Bash", "Grep", "Glob")
+]
+
+
+def build_body(target: int) -> bytes:
+    messages: list[dict] = [{"role": "user", "content": "Refactor the payment module."}]
+    body = {
+        "model": "claude-sonnet-4-5-20250514",
+        "max_tokens": 8192,
+        "stream": True,
+        "system": [{"type": "text", "text": "You are a coding assistant. " * 40}],
+        "tools": TOOLS,
+        "metadata": {"user_id": "user_bench"},
+        "messages": messages,
+    }
+    encoded = json.dumps(body).encode()
+    i = 0
+    while len(encoded) < target:
+        tool_id = f"toolu_{i:06d}"
+        messages.append(
+            {
+                "role": "assistant",
+                "content": [
+                    {"type": "text", "text": f"Reading file {i}."},
+                    {
+                        "type": "tool_use",
+                        "id": tool_id,
+                        "name": "Read",
+                        "input": {"path": f"src/payments/mod_{i}.py"},
+                    },
+                ],
+            }
+        )
+        messages.append(
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "tool_result",
+                        "tool_use_id": tool_id,
+                        "content": f"def handler_{i}(event):\n    return process(event)\n" * 20,
+                    }
+                ],
+            }
+        )
+        encoded = json.dumps(body).encode()
+        i += 1
+    return encoded
+
+
+def via_model(body: bytes) -> bytes:
+    request = AnthropicRequest.model_validate_json(body)
+    payload = request.model_dump(exclude_none=True, exclude={"original_model"})
+    return json.dumps(payload).encode()
+
+
+def via_passthrough(body: bytes) -> bytes:
+    return MessagesPayload.parse(body).upstream_body()
+
+
+def via_fallback(body: bytes) -> AnthropicRequest:
+    return MessagesPayload.parse(body).to_request()
+
+
+def run(label: str, handler, body: bytes, iterations: int) -> None:
+    handler(body)
+    started = time.process_time()
+    for _ in range(iterations):
+        handler(body)
+    cpu = (time.process_time() - started) / iterations
+
+    tracemalloc.start()
+    handler(body)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"  {label:<12} {cpu * 1000:9.3f} ms/request   peak alloc {peak / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, target in SIZES.items():
+        body = build_body(target)
+        print(f"{name} body ({len(body) / 1024:.0f} KiB)")
+        run("model", via_model, body, args.iterations)
+        run("passthrough", via_passthrough, body, args.iterations)
+        run("fallback", via_fallback, body, args.iterations)
@@ -0,0 +1,128 @@
+"""Bytes-level SSE usage scanner vs the previous str-buffer collector.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_sse_scanner --megabytes 8 --chunk-size 16384
+
+Builds a tool-heavy Anthropic SSE stream of the requested size (text deltas
+interleaved with ``input_json_delta`` fragments, the shape Claude Code
+produces), feeds it in fixed-size chunks, and reports CPU seconds per MB and
+peak traced allocations for each collector.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from src.domain import AnthropicUsage
+from src.proxy.streaming_usage import StreamingUsageCollector
+
+
+class LegacyStreamingUsageCollector:
+    """The str-buffer collector this module replaced, kept for comparison."""
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._input_tokens = 0
+        self._usage: AnthropicUsage | None = None
+
+    def feed(self, chunk: bytes) -> None:
+        self._buffer += chunk.decode(errors="ignore")
+        while "\n\n" in self._buffer:
+            event, self._buffer = self._buffer.split("\n\n", 1)
+            for line in event.splitlines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:") :].strip()
+                if not payload or payload == "[DONE]":
+                    continue
+                try:
+                    data = json.loads(payload)
+                except json.JSONDecodeError:
+                    continue
+                if data.get("type") == "message_start":
+                    usage = (data.get("message") or {}).get("usage") or {}
+                    self._input_tokens = usage.get("input_tokens") or 0
+                elif data.get("type") == "message_delta":
+                    usage = data.get("usage") or {}
+                    self._usage = AnthropicUsage(
+                        input_tokens=self._input_tokens,
+                        output_tokens=usage.get("output_tokens") or 0,
+                    )
+
+    def get_usage(self) -> AnthropicUsage | None:
+        return self._usage
+
+
+def _event(payload: dict) -> bytes:
+    return f"event: {payload['type']}\ndata: {json.dumps(payload)}\n\n".encode()
+
+
+def build_stream(megabytes: float) -> bytes:
+    parts = [
+        _event(
+            {
+                "type": "message_start",
+                "message": {"id": "msg_bench", "usage": {"input_tokens": 1200, "output_tokens": 1}},
+            }
+        )
+    ]
+    size = len(parts[0])
+    target = int(megabytes * 1024 * 1024)
+    i = 0
+    while size < target:
+        if i % 4 == 3:
+            delta = {"type": "input_json_delta", "partial_json": '{"path": "src/mod_%d.py", ' % i}
+        else:
+            delta = {"type": "text_delta", "text": f"Token {i} of a fairly ordinary sentence. "}
+        part = _event({"type": "content_block_delta", "index": i % 3, "delta": delta})
+        parts.append(part)
+        size += len(part)
+        i += 1
+    parts.append(
+        _event(
+            {
+                "type": "message_delta",
+                "delta": {"stop_reason": "end_turn"},
+                "usage": {"output_tokens": i},
+            }
+        )
+    )
+    parts.append(_event({"type": "message_stop"}))
+    return b"".join(parts)
+
+
+def run(label: str, factory, stream: bytes, chunk_size: int) -> None:
+    chunks = [stream[i : i + chunk_size] for i in range(0, len(stream), chunk_size)]
+    megabytes = len(stream) / (1024 * 1024)
+
+    collector = factory()
+    started = time.process_time()
+    for chunk in chunks:
+        collector.feed(chunk)
+    cpu = time.process_time() - started
+    assert collector.get_usage() is not None
+
+    tracemalloc.start()
+    collector = factory()
+    for chunk in chunks:
+        collector.feed(chunk)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{label:<10} {cpu / megabytes * 1000:8.2f} ms CPU/MB   "
+        f"{megabytes / cpu:8.1f} MB/s   peak alloc {peak / 1024:8.1f} KiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=float, default=8)
+    parser.add_argument("--chunk-size", type=int, default=16384)
+    args = parser.parse_args()
+
+    stream = build_stream(args.megabytes)
+    print(f"{len(stream) / (1024 * 1024):.1f} MB stream, {args.chunk_size} byte chunks")
+    run("legacy", LegacyStreamingUsageCollector, stream, args.chunk_size)
+    run("scanner", StreamingUsageCollector, stream, args.chunk_size)
@@ -56,6 +56,7 @@ async def issue_access_key(
         key_prefix=key_prefix,
         bedrock_region=data.bedrock_region,
         bedrock_model=settings.bedrock_default_model,
+        bedrock_regions=data.bedrock_regions,
     )
     await session.commit()
 
@@ -114,6 +115,7 @@ async def rotate_access_key(
         key_prefix=key_prefix,
         bedrock_region=old_key.bedrock_region,
         bedrock_model=old_key.bedrock_model,
+        bedrock_regions=old_key.bedrock_regions,
     )
 
     # Transfer Bedrock key from old to new access key
@@ -5,7 +5,13 @@ from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db import get_session
-from ..domain import UsageResponse, UsageBucket, UsageTopUser, CostBreakdownByModel
+from ..domain import (
+    UsageResponse,
+    UsageBucket,
+    UsageTopUser,
+    CostBreakdownByModel,
+    StreamLatencyStats,
+)
 from ..repositories import UsageAggregateRepository, TokenUsageRepository
 from .deps import require_admin
 
@@ -63,6 +69,7 @@ async def get_usage(
     period: str | None = Query(default=None, pattern="^(day|week|month)$"),
     start_date: date | None = None,
     end_date: date | None = None,
+    provider: str | None = Query(default=None, pattern="^(plan|bedrock)$"),
     session: AsyncSession = Depends(get_session),
 ):
     if user_id and team_id and user_id != team_id:
@@ -81,6 +88,7 @@ async def get_usage(
         end_time=end_time,
         user_id=effective_user_id,
         access_key_id=access_key_id,
+        provider=provider,
     )
 
     totals = await repo.get_totals(
@@ -89,6 +97,7 @@ async def get_usage(
         end_time=end_time,
         user_id=effective_user_id,
         access_key_id=access_key_id,
+        provider=provider,
     )
 
     breakdown_rows = await token_repo.get_cost_breakdown_by_model(
@@ -96,6 +105,7 @@ async def get_usage(
         end_time=end_time,
         user_id=effective_user_id,
         access_key_id=access_key_id,
+        provider=provider,
     )
 
     buckets = [
@@ -143,6 +153,30 @@ async def get_usage(
     )
 
 
+@router.get("/latency", response_model=list[StreamLatencyStats])
+async def get_stream_latency(
+    user_id: UUID | None = None,
+    access_key_id: UUID | None = None,
+    period: str | None = Query(default=None, pattern="^(day|week|month)$"),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    provider: str | None = Query(default=None, pattern="^(plan|bedrock)$"),
+    model: str | None = None,
+    session: AsyncSession = Depends(get_session),
+):
+    """p50/p90/p99 of streaming connect, TTFB, TTFT, duration and throughput."""
+    start_time, end_time = _resolve_time_range(period, start_date, end_date)
+    rows = await TokenUsageRepository(session).get_stream_latency_percentiles(
+        start_time=start_time,
+        end_time=end_time,
+        user_id=user_id,
+        access_key_id=access_key_id,
+        provider=provider,
+        model=model,
+    )
+    return [StreamLatencyStats(**row) for row in rows]
+
+
 @router.get("/top-users", response_model=list[UsageTopUser])
 async def get_top_users(
     bucket_type: str = Query(default="hour", pattern="^(minute|hour|day|week|month)$"),
@@ -1,15 +1,33 @@
 import asyncio
 import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+
+import httpx
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db import get_session, async_session_factory
 from ..config import get_settings
-from ..domain import AnthropicRequest, AnthropicError, AnthropicCountTokensResponse, RETRYABLE_ERRORS, RoutingStrategy
+from ..domain import (
+    AnthropicRequest,
+    AnthropicError,
+    AnthropicCountTokensResponse,
+    ErrorType,
+    RETRYABLE_ERRORS,
+    RoutingStrategy,
+)
 from ..logging import get_logger
+from ..telemetry import (
+    HEDGED_REQUESTS,
+    observe_stream,
+    render_metrics,
+    sample_proxy_state,
+    stage_timer,
+)
 from ..repositories import (
-    BedrockKeyRepository,
     TokenUsageRepository,
     UsageAggregateRepository,
     UserRepository,
@@ -22,15 +40,21 @@ from ..proxy import (
     BedrockAdapter,
     UsageRecorder,
     BudgetService,
+    get_proxy_deps,
 )
-from ..proxy.budget import format_budget_exceeded_message
+from ..proxy.budget import BudgetCheckResult, format_budget_exceeded_message
 from ..proxy.adapter_base import AdapterError
-from ..proxy.router import _map_error_type
-from ..proxy.streaming_usage import StreamingUsageCollector
+from ..proxy.hedging import race_with_hedge
+from ..proxy.payload import MessagesPayload, MessagesRequest
+from ..proxy.provider_stats import PROVIDER_FAULTS
+from ..proxy.rate_limit import RateLimited, RateLimiter, StreamSlot, estimate_tokens
+from ..proxy.router import _map_error_type, _should_fallback, record_plan_outcome
+from ..proxy.streaming_usage import StreamingUsageCollector, StreamTiming
+from .responses import FastJSONResponse
 
 logger = get_logger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 _PASSTHROUGH_HEADERS = ("anthropic-version", "anthropic-beta", "content-type")
 
@@ -48,20 +72,43 @@ def _extract_outgoing_headers(raw_request: Request) -> dict[str, str]:
     return headers
 
 
+async def read_messages_payload(raw_request: Request) -> MessagesPayload:
+    """Parse just enough of the body to route it; see ``proxy.payload``."""
+    try:
+        return MessagesPayload.parse(await raw_request.body())
+    except ValueError as exc:
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body",), "msg": str(exc), "input": None}]
+        ) from exc
+
+
 @router.post("/ak/{access_key}/v1/messages")
 async def proxy_messages(
     access_key: str,
-    request: AnthropicRequest,
     raw_request: Request,
+    request: MessagesPayload = Depends(read_messages_payload),
     session: AsyncSession = Depends(get_session),
     auth_service: AuthService = Depends(get_auth_service),
 ):
     start_time = time.time()
+    request_started = time.perf_counter()
 
     # Authenticate
-    ctx = await auth_service.authenticate(access_key)
+    with stage_timer("auth"):
+        ctx = await auth_service.authenticate(access_key)
     if not ctx:
         raise HTTPException(status_code=404, detail="Not found")
+    # Upstream calls can take minutes; no pooled connection is held across
+    # them. Lookups after this point end the session again as they finish.
+    await session.close()
+
+    rate_limiter = get_proxy_deps().rate_limiter
+    with stage_timer("rate_limit"):
+        # Content-Length is free to read; the parsed body would have to be re-measured.
+        body_size = int(raw_request.headers.get("content-length") or 0)
+        limited = await rate_limiter.check(ctx, estimate_tokens(body_size))
+    if limited is not None:
+        return _rate_limited_response(ctx, limited)
 
     outgoing_headers = _extract_outgoing_headers(raw_request)
 
@@ -77,25 +124,33 @@ async def proxy_messages(
     budget_service = BudgetService(UserRepository(session), usage_aggregate_repo)
 
     if request.stream:
-        # Route streaming based on user's routing strategy
-        if ctx.routing_strategy == RoutingStrategy.BEDROCK_ONLY:
-            return await _stream_bedrock_only(
-                ctx, request, session, budget_service, usage_aggregate_repo
+        stream_slot = await rate_limiter.acquire_stream(ctx)
+        if isinstance(stream_slot, RateLimited):
+            return _rate_limited_response(ctx, stream_slot)
+        try:
+            response = await _route_stream(
+                ctx,
+                request,
+                session,
+                outgoing_headers,
+                budget_service,
+                usage_aggregate_repo,
+                StreamTiming(started=request_started),
             )
-
-        # Default: plan_first streaming
-        return await _stream_plan_first(
-            ctx, request, session, outgoing_headers, budget_service, usage_aggregate_repo
-        )
+        except BaseException:
+            if stream_slot is not None:
+                await rate_limiter.release_stream(stream_slot)
+            raise
+        return await _release_slot_on_close(response, stream_slot, rate_limiter)
 
     # Setup adapters
     token_usage_repo = TokenUsageRepository(session)
 
     plan_adapter = PlanAdapter(headers=outgoing_headers)
-    bedrock_adapter = BedrockAdapter(BedrockKeyRepository(session))
+    bedrock_adapter = BedrockAdapter(session_factory=async_session_factory)
 
     async def _budget_checker(ctx):
-        return await budget_service.check_budget(ctx.user_id, fail_open=False)
+        return await _check_budget(budget_service, session, ctx)
 
     proxy_router = ProxyRouter(
         plan_adapter,
@@ -108,30 +163,97 @@ async def proxy_messages(
         session_factory=async_session_factory,
     )
 
-    try:
-        # Route request
+    # Route request
+    with stage_timer("route"):
         response = await proxy_router.route(ctx, request)
 
-        # Calculate latency
-        latency_ms = int((time.time() - start_time) * 1000)
+    # Calculate latency
+    latency_ms = int((time.time() - start_time) * 1000)
 
-        # Record usage
-        await usage_recorder.record(ctx, response, latency_ms, request.model)
-        await session.commit()
+    # Record usage
+    await usage_recorder.record(ctx, response, latency_ms, request.model)
+    await session.commit()
 
-        if response.success and response.response:
-            return response.response.model_dump()
+    if response.success and response.response:
+        return FastJSONResponse(content=response.response.model_dump())
+
+    # Return error with proper HTTP status code
+    error_body = AnthropicError(
+        error={"type": response.error_type, "message": response.error_message},
+        request_id=ctx.request_id,
+    ).model_dump()
+    return FastJSONResponse(content=error_body, status_code=response.status_code)
 
-        # Return error with proper HTTP status code
-        error_body = AnthropicError(
-            error={"type": response.error_type, "message": response.error_message},
-            request_id=ctx.request_id,
-        ).model_dump()
-        return JSONResponse(content=error_body, status_code=response.status_code)
 
+async def _route_stream(
+    ctx,
+    request: MessagesRequest,
+    session: AsyncSession,
+    outgoing_headers: dict[str, str],
+    budget_service: BudgetService,
+    usage_aggregate_repo: UsageAggregateRepository,
+    timing: StreamTiming,
+):
+    """Route a streaming request based on the user's routing strategy."""
+    if ctx.routing_strategy == RoutingStrategy.BEDROCK_ONLY:
+        return await _stream_bedrock_only(
+            ctx, request, session, budget_service, usage_aggregate_repo, timing
+        )
+    if ctx.routing_strategy == RoutingStrategy.ADAPTIVE:
+        return await _stream_adaptive(
+            ctx, request, session, outgoing_headers, budget_service, usage_aggregate_repo, timing
+        )
+    if ctx.routing_strategy == RoutingStrategy.PLAN_HEDGED:
+        return await _stream_plan_hedged(
+            ctx, request, session, outgoing_headers, budget_service, usage_aggregate_repo, timing
+        )
+    # Default: plan_first streaming
+    return await _stream_plan_first(
+        ctx, request, session, outgoing_headers, budget_service, usage_aggregate_repo, timing
+    )
+
+
+async def _check_budget(
+    budget_service: BudgetService, session: AsyncSession, ctx
+) -> BudgetCheckResult:
+    """Check the user's Bedrock budget, then hand the session's connection back."""
+    try:
+        return await budget_service.check_budget(ctx.user_id, fail_open=False)
     finally:
-        await plan_adapter.close()
-        await bedrock_adapter.close()
+        await session.close()
+
+
+def _rate_limited_response(ctx, limited: RateLimited) -> FastJSONResponse:
+    error_body = AnthropicError(
+        error={"type": "rate_limit_error", "message": limited.message},
+        request_id=ctx.request_id,
+    ).model_dump()
+    return FastJSONResponse(
+        content=error_body,
+        status_code=429,
+        headers={"retry-after": limited.retry_after_header},
+    )
+
+
+async def _release_slot_on_close(
+    response: Response, slot: StreamSlot | None, rate_limiter: RateLimiter
+) -> Response:
+    """Hold ``slot`` until a streamed response ends; release it now for any other."""
+    if slot is None:
+        return response
+    if not isinstance(response, StreamingResponse):
+        await rate_limiter.release_stream(slot)
+        return response
+
+    async def _release_after(chunks):
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await rate_limiter.release_stream(slot)
+
+    response.body_iterator = _release_after(response.body_iterator)
+    return response
 
 
 @router.post("/ak/{access_key}/v1/messages/count_tokens")
@@ -161,21 +283,18 @@ async def proxy_count_tokens(
             },
             request_id=ctx.request_id,
         ).model_dump()
-        return JSONResponse(content=error_body, status_code=401)
+        return FastJSONResponse(content=error_body, status_code=401)
 
     plan_adapter = PlanAdapter(headers=outgoing_headers)
-    try:
-        result = await plan_adapter.count_tokens(request)
-        if isinstance(result, AnthropicCountTokensResponse):
-            return result.model_dump()
+    result = await plan_adapter.count_tokens(request)
+    if isinstance(result, AnthropicCountTokensResponse):
+        return result.model_dump()
 
-        error_body = AnthropicError(
-            error={"type": _map_error_type(result.error_type), "message": result.message},
-            request_id=ctx.request_id,
-        ).model_dump()
-        return JSONResponse(content=error_body, status_code=result.status_code)
-    finally:
-        await plan_adapter.close()
+    error_body = AnthropicError(
+        error={"type": _map_error_type(result.error_type), "message": result.message},
+        request_id=ctx.request_id,
+    ).model_dump()
+    return FastJSONResponse(content=error_body, status_code=result.status_code)
 
 
 @router.get("/health")
@@ -183,135 +302,361 @@ async def health():
     return {"status": "healthy"}
 
 
+@router.get("/metrics")
+async def metrics():
+    # Refresh this worker's gauges; other workers' come from the shared directory.
+    sample_proxy_state(get_proxy_deps())
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+async def _accounted_stream(
+    chunks,
+    ctx,
+    request: MessagesRequest,
+    usage_recorder: UsageRecorder,
+    timing: StreamTiming,
+    provider: str,
+    is_fallback: bool,
+    on_close=None,
+):
+    """Relay upstream chunks while collecting usage and stream timing.
+
+    When the stream ends (or the client goes away) the timing is exported to
+    Prometheus and usage is recorded in the background.
+    """
+    usage_collector = StreamingUsageCollector()
+    try:
+        async for chunk in chunks:
+            timing.feed(chunk)
+            usage_collector.feed(chunk)
+            yield chunk
+    finally:
+        if on_close is not None:
+            await on_close()
+        timing.finish()
+        if timing.first_content_at is not None:
+            get_proxy_deps().provider_stats.observe(
+                provider, request.model, ttft_ms=timing.upstream_ttft_ms
+            )
+        usage = usage_collector.get_usage()
+        observe_stream(
+            provider,
+            timing.started,
+            timing.first_byte_at,
+            timing.finished_at,
+            usage.output_tokens if usage else None,
+            first_content_at=timing.first_content_at,
+        )
+        if usage:
+            asyncio.create_task(
+                usage_recorder.record_streaming_usage(
+                    ctx,
+                    usage,
+                    timing.total_ms,
+                    request.model,
+                    is_fallback=is_fallback,
+                    provider=provider,
+                    timing=timing,
+                )
+            )
+        else:
+            logger.warning(
+                "streaming_usage_missing",
+                request_id=ctx.request_id,
+                provider=provider,
+            )
+
+
+def _observe_stream_failure(
+    provider: str, request: MessagesRequest, error: AdapterError
+) -> None:
+    if error.error_type in PROVIDER_FAULTS:
+        get_proxy_deps().provider_stats.observe(provider, request.model, failed=True)
+
+
 async def _stream_plan_first(
     ctx,
-    request: AnthropicRequest,
+    request: MessagesRequest,
     session: AsyncSession,
     outgoing_headers: dict[str, str],
     budget_service: BudgetService,
     usage_aggregate_repo: UsageAggregateRepository,
+    timing: StreamTiming | None = None,
 ):
     """Stream with Plan API first, fallback to Bedrock on retryable errors."""
-    from ..proxy.context import RequestContext
-
-    plan_adapter = PlanAdapter(headers=outgoing_headers)
-    bedrock_adapter = None
-    streaming_started = False
-    try:
-        result = await plan_adapter.stream(request)
-        if isinstance(result, AdapterError):
-            should_fallback = (
-                ctx.has_bedrock_key
-                and result.retryable
-                and result.error_type in RETRYABLE_ERRORS
-            )
-            if should_fallback:
-                budget_result = await budget_service.check_budget(
-                    ctx.user_id, fail_open=False
-                )
-                if not budget_result.allowed:
-                    error_body = AnthropicError(
-                        error={
-                            "type": "rate_limit_error",
-                            "message": format_budget_exceeded_message(budget_result),
-                        },
-                        request_id=ctx.request_id,
-                    ).model_dump()
-                    return JSONResponse(content=error_body, status_code=429)
-
-                bedrock_adapter = BedrockAdapter(BedrockKeyRepository(session))
-                bedrock_result = await bedrock_adapter.stream(ctx, request)
-                if isinstance(bedrock_result, AdapterError):
-                    error_body = AnthropicError(
-                        error={
-                            "type": _map_error_type(bedrock_result.error_type),
-                            "message": bedrock_result.message,
-                        },
-                        request_id=ctx.request_id,
-                    ).model_dump()
-                    return JSONResponse(
-                        content=error_body, status_code=bedrock_result.status_code
-                    )
-
-                streaming_started = True
-                streaming_start = time.time()
-                usage_recorder = UsageRecorder(
-                    TokenUsageRepository(session),
-                    usage_aggregate_repo,
-                    session_factory=async_session_factory,
-                )
-                usage_collector = StreamingUsageCollector()
-
-                async def bedrock_stream_generator():
-                    try:
-                        async for chunk in bedrock_result:
-                            usage_collector.feed(chunk)
-                            yield chunk
-                    finally:
-                        await bedrock_adapter.close()
-                        usage = usage_collector.get_usage()
-                        if usage:
-                            latency_ms = int((time.time() - streaming_start) * 1000)
-                            asyncio.create_task(
-                                usage_recorder.record_streaming_usage(
-                                    ctx,
-                                    usage,
-                                    latency_ms,
-                                    request.model,
-                                    is_fallback=True,
-                                )
-                            )
-                        else:
-                            logger.warning(
-                                "streaming_usage_missing",
-                                request_id=ctx.request_id,
-                                provider="bedrock",
-                            )
-
-                return StreamingResponse(
-                    bedrock_stream_generator(),
-                    media_type="text/event-stream",
-                    headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
-                )
+    timing = timing or StreamTiming()
+    key_id = str(ctx.access_key_id)
+    cb = get_proxy_deps().circuit_breaker
 
+    if await cb.is_open(key_id):
+        logger.info("plan_skipped_circuit_open", access_key_id=key_id)
+        if not ctx.has_bedrock_key:
             error_body = AnthropicError(
                 error={
-                    "type": _map_error_type(result.error_type),
-                    "message": result.message,
+                    "type": "overloaded_error",
+                    "message": "Service unavailable and no fallback configured",
                 },
                 request_id=ctx.request_id,
             ).model_dump()
-            return JSONResponse(content=error_body, status_code=result.status_code)
+            return FastJSONResponse(content=error_body, status_code=503)
+        return await _stream_bedrock(
+            ctx, request, session, budget_service, usage_aggregate_repo, timing, is_fallback=False
+        )
+
+    plan_adapter = PlanAdapter(headers=outgoing_headers)
+    timing.begin_upstream()
+    result = await plan_adapter.stream(request)
+    timing.upstream_connected()
+    if isinstance(result, AdapterError):
+        _observe_stream_failure("plan", request, result)
+        await cb.record_failure(key_id, result.error_type)
+        should_fallback = (
+            ctx.has_bedrock_key
+            and result.retryable
+            and result.error_type in RETRYABLE_ERRORS
+        )
+        if should_fallback:
+            return await _stream_bedrock(
+                ctx,
+                request,
+                session,
+                budget_service,
+                usage_aggregate_repo,
+                timing,
+                is_fallback=True,
+            )
+
+        error_body = AnthropicError(
+            error={
+                "type": _map_error_type(result.error_type),
+                "message": result.message,
+            },
+            request_id=ctx.request_id,
+        ).model_dump()
+        return FastJSONResponse(content=error_body, status_code=result.status_code)
+
+    await cb.record_success(key_id)
+    usage_recorder = UsageRecorder(
+        TokenUsageRepository(session),
+        usage_aggregate_repo,
+        session_factory=async_session_factory,
+    )
+
+    media_type = result.headers.get("content-type", "text/event-stream")
+    return StreamingResponse(
+        _accounted_stream(
+            result.aiter_bytes(),
+            ctx,
+            request,
+            usage_recorder,
+            timing,
+            provider="plan",
+            is_fallback=False,
+            on_close=result.aclose,
+        ),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
+    )
+
+
+@dataclass
+class _OpenedStream:
+    """An upstream stream whose first chunk has already arrived."""
 
-        streaming_started = True
+    first_chunk: bytes
+    chunks: AsyncIterator[bytes]
+    aclose: Callable[[], Awaitable[None]]
+    media_type: str = "text/event-stream"
 
-        async def stream_generator():
-            try:
-                async for chunk in result.aiter_bytes():
-                    yield chunk
-            finally:
-                await result.aclose()
-                await plan_adapter.close()
+    async def __aiter__(self):
+        if self.first_chunk:
+            yield self.first_chunk
+        async for chunk in self.chunks:
+            yield chunk
 
-        media_type = result.headers.get("content-type", "text/event-stream")
+
+async def _first_chunk(
+    chunks: AsyncIterator[bytes], aclose: Callable[[], Awaitable[None]], media_type: str
+) -> _OpenedStream:
+    try:
+        first = await anext(chunks, b"")
+    except BaseException:
+        # Includes cancellation by a hedge race this stream lost.
+        await aclose()
+        raise
+    return _OpenedStream(first, chunks, aclose, media_type)
+
+
+async def _open_plan_stream(
+    plan_adapter: PlanAdapter, request: MessagesRequest
+) -> _OpenedStream | AdapterError:
+    result = await plan_adapter.stream(request)
+    if isinstance(result, AdapterError):
+        _observe_stream_failure("plan", request, result)
+        return result
+    media_type = result.headers.get("content-type", "text/event-stream")
+    try:
+        return await _first_chunk(result.aiter_bytes(), result.aclose, media_type)
+    except httpx.HTTPError as exc:
+        return AdapterError(ErrorType.NETWORK_ERROR, 503, str(exc), True)
+
+
+async def _open_bedrock_stream(
+    ctx,
+    request: MessagesRequest,
+    session: AsyncSession,
+    budget_service: BudgetService,
+) -> _OpenedStream | AdapterError | BudgetCheckResult:
+    budget_result = await _check_budget(budget_service, session, ctx)
+    if not budget_result.allowed:
+        return budget_result
+    result = await BedrockAdapter(session_factory=async_session_factory).stream(ctx, request)
+    if isinstance(result, AdapterError):
+        _observe_stream_failure("bedrock", request, result)
+        return result
+    try:
+        return await _first_chunk(result, result.aclose, "text/event-stream")
+    except httpx.HTTPError as exc:
+        return AdapterError(ErrorType.BEDROCK_UNAVAILABLE, 503, str(exc), False)
+
+
+async def _stream_plan_hedged(
+    ctx,
+    request: MessagesRequest,
+    session: AsyncSession,
+    outgoing_headers: dict[str, str],
+    budget_service: BudgetService,
+    usage_aggregate_repo: UsageAggregateRepository,
+    timing: StreamTiming | None = None,
+):
+    """Stream from Plan, racing Bedrock once Plan's first byte is slower than the hedge delay.
+
+    Only the winning stream reaches the client and is recorded; the Bedrock
+    budget is checked when the hedge starts.
+    """
+    if not ctx.has_bedrock_key:
+        return await _stream_plan_first(
+            ctx, request, session, outgoing_headers, budget_service, usage_aggregate_repo, timing
+        )
+    timing = timing or StreamTiming()
+    key_id = str(ctx.access_key_id)
+    cb = get_proxy_deps().circuit_breaker
+
+    if await cb.is_open(key_id):
+        logger.info("plan_skipped_circuit_open", access_key_id=key_id)
+        return await _stream_bedrock(
+            ctx, request, session, budget_service, usage_aggregate_repo, timing, is_fallback=False
+        )
+
+    def _start_hedge():
+        logger.info("hedge_started", access_key_id=key_id)
+        return _open_bedrock_stream(ctx, request, session, budget_service)
+
+    def _opened(result) -> bool:
+        return isinstance(result, _OpenedStream)
+
+    timing.begin_upstream()
+    race = await race_with_hedge(
+        _open_plan_stream(PlanAdapter(headers=outgoing_headers), request),
+        _start_hedge,
+        get_settings().hedge_delay_ms / 1000,
+        primary_ok=_opened,
+        hedge_ok=_opened,
+        discard=lambda opened: opened.aclose(),
+    )
+    timing.upstream_connected()
+    await record_plan_outcome(cb, key_id, race.primary)
+    if race.hedged:
+        HEDGED_REQUESTS.labels(race.winner or "none").inc()
+
+    if race.winner is not None:
+        plan_won = race.winner == "primary"
+        opened = race.primary if plan_won else race.hedge
+        usage_recorder = UsageRecorder(
+            TokenUsageRepository(session),
+            usage_aggregate_repo,
+            session_factory=async_session_factory,
+        )
         return StreamingResponse(
-            stream_generator(),
-            media_type=media_type,
+            _accounted_stream(
+                opened,
+                ctx,
+                request,
+                usage_recorder,
+                timing,
+                provider="plan" if plan_won else "bedrock",
+                is_fallback=not plan_won,
+                on_close=opened.aclose,
+            ),
+            media_type=opened.media_type,
             headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
         )
-    finally:
-        if not streaming_started:
-            await plan_adapter.close()
-            if bedrock_adapter:
-                await bedrock_adapter.close()
+
+    plan_error = race.primary
+    if _should_fallback(plan_error) and not race.hedged:
+        return await _stream_bedrock(
+            ctx, request, session, budget_service, usage_aggregate_repo, timing, is_fallback=True
+        )
+
+    if not _should_fallback(plan_error):
+        error_type, message, status_code = (
+            _map_error_type(plan_error.error_type), plan_error.message, plan_error.status_code
+        )
+    elif isinstance(race.hedge, BudgetCheckResult):
+        error_type, message, status_code = (
+            "rate_limit_error", format_budget_exceeded_message(race.hedge), 429
+        )
+    else:
+        error_type, message, status_code = (
+            _map_error_type(race.hedge.error_type), race.hedge.message, race.hedge.status_code
+        )
+    error_body = AnthropicError(
+        error={"type": error_type, "message": message},
+        request_id=ctx.request_id,
+    ).model_dump()
+    return FastJSONResponse(content=error_body, status_code=status_code)
+
+
+async def _stream_adaptive(
+    ctx,
+    request: MessagesRequest,
+    session: AsyncSession,
+    outgoing_headers: dict[str, str],
+    budget_service: BudgetService,
+    usage_aggregate_repo: UsageAggregateRepository,
+    timing: StreamTiming | None = None,
+):
+    """Stream from Plan or Bedrock, whichever has the better recent TTFT and error rate."""
+    timing = timing or StreamTiming()
+    stats = get_proxy_deps().provider_stats
+    if ctx.has_bedrock_key and stats.choose(request.model, stream=True) == "bedrock":
+        budget_result = await _check_budget(budget_service, session, ctx)
+        if budget_result.allowed:
+            logger.info("adaptive_routed_bedrock", access_key_id=str(ctx.access_key_id))
+            return await _stream_bedrock(
+                ctx,
+                request,
+                session,
+                budget_service,
+                usage_aggregate_repo,
+                timing,
+                is_fallback=False,
+                budget_result=budget_result,
+            )
+
+    return await _stream_plan_first(
+        ctx, request, session, outgoing_headers, budget_service, usage_aggregate_repo, timing
+    )
 
 
 async def _stream_bedrock_only(
     ctx,
-    request: AnthropicRequest,
+    request: MessagesRequest,
     session: AsyncSession,
     budget_service: BudgetService,
     usage_aggregate_repo: UsageAggregateRepository,
+    timing: StreamTiming | None = None,
 ):
     """Stream directly to Bedrock, skip Plan API entirely."""
     logger.info(
@@ -328,9 +673,32 @@ async def _stream_bedrock_only(
             },
             request_id=ctx.request_id,
         ).model_dump()
-        return JSONResponse(content=error_body, status_code=503)
+        return FastJSONResponse(content=error_body, status_code=503)
 
-    budget_result = await budget_service.check_budget(ctx.user_id, fail_open=False)
+    return await _stream_bedrock(
+        ctx,
+        request,
+        session,
+        budget_service,
+        usage_aggregate_repo,
+        timing or StreamTiming(),
+        is_fallback=False,
+    )
+
+
+async def _stream_bedrock(
+    ctx,
+    request: MessagesRequest,
+    session: AsyncSession,
+    budget_service: BudgetService,
+    usage_aggregate_repo: UsageAggregateRepository,
+    timing: StreamTiming,
+    is_fallback: bool,
+    budget_result: BudgetCheckResult | None = None,
+):
+    """Budget-check (unless the caller already did), then stream from Bedrock."""
+    if budget_result is None:
+        budget_result = await _check_budget(budget_service, session, ctx)
     if not budget_result.allowed:
         error_body = AnthropicError(
             error={
@@ -339,64 +707,41 @@ async def _stream_bedrock_only(
             },
             request_id=ctx.request_id,
         ).model_dump()
-        return JSONResponse(content=error_body, status_code=429)
-
-    bedrock_adapter = BedrockAdapter(BedrockKeyRepository(session))
-    streaming_started = False
-    try:
-        bedrock_result = await bedrock_adapter.stream(ctx, request)
-        if isinstance(bedrock_result, AdapterError):
-            error_body = AnthropicError(
-                error={
-                    "type": _map_error_type(bedrock_result.error_type),
-                    "message": bedrock_result.message,
-                },
-                request_id=ctx.request_id,
-            ).model_dump()
-            return JSONResponse(
-                content=error_body, status_code=bedrock_result.status_code
-            )
-
-        streaming_started = True
-        streaming_start = time.time()
-        usage_recorder = UsageRecorder(
-            TokenUsageRepository(session),
-            usage_aggregate_repo,
-            session_factory=async_session_factory,
+        return FastJSONResponse(content=error_body, status_code=429)
+
+    bedrock_adapter = BedrockAdapter(session_factory=async_session_factory)
+    timing.begin_upstream()
+    bedrock_result = await bedrock_adapter.stream(ctx, request)
+    timing.upstream_connected()
+    if isinstance(bedrock_result, AdapterError):
+        _observe_stream_failure("bedrock", request, bedrock_result)
+        error_body = AnthropicError(
+            error={
+                "type": _map_error_type(bedrock_result.error_type),
+                "message": bedrock_result.message,
+            },
+            request_id=ctx.request_id,
+        ).model_dump()
+        return FastJSONResponse(
+            content=error_body, status_code=bedrock_result.status_code
         )
-        usage_collector = StreamingUsageCollector()
-
-        async def bedrock_stream_generator():
-            try:
-                async for chunk in bedrock_result:
-                    usage_collector.feed(chunk)
-                    yield chunk
-            finally:
-                await bedrock_adapter.close()
-                usage = usage_collector.get_usage()
-                if usage:
-                    latency_ms = int((time.time() - streaming_start) * 1000)
-                    asyncio.create_task(
-                        usage_recorder.record_streaming_usage(
-                            ctx,
-                            usage,
-                            latency_ms,
-                            request.model,
-                            is_fallback=False,
-                        )
-                    )
-                else:
-                    logger.warning(
-                        "streaming_usage_missing",
-                        request_id=ctx.request_id,
-                        provider="bedrock",
-                    )
 
-        return StreamingResponse(
-            bedrock_stream_generator(),
-            media_type="text/event-stream",
-            headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
-        )
-    finally:
-        if not streaming_started:
-            await bedrock_adapter.close()
+    usage_recorder = UsageRecorder(
+        TokenUsageRepository(session),
+        usage_aggregate_repo,
+        session_factory=async_session_factory,
+    )
+
+    return StreamingResponse(
+        _accounted_stream(
+            bedrock_result,
+            ctx,
+            request,
+            usage_recorder,
+            timing,
+            provider="bedrock",
+            is_fallback=is_fallback,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
+    )
@@ -0,0 +1,12 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from ..json_codec import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered with the proxy's JSON codec (orjson when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -10,8 +10,10 @@ from sqlalchemy import (
     Boolean,
     LargeBinary,
     ForeignKey,
+    UniqueConstraint,
     Index,
     Numeric,
+    Float,
     Date,
 )
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, TIMESTAMP
@@ -52,6 +54,7 @@ class AccessKeyModel(Base):
     status: Mapped[str] = mapped_column(String(20), nullable=False, default="active")
     bedrock_region: Mapped[str] = mapped_column(String(32), nullable=False)
     bedrock_model: Mapped[str] = mapped_column(String(128), nullable=False)
+    bedrock_regions: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
     revoked_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     rotation_expires_at: Mapped[datetime | None] = mapped_column(
@@ -95,6 +98,12 @@ class TokenUsageModel(Base):
     provider: Mapped[str] = mapped_column(String(10), nullable=False, default="bedrock")
     is_fallback: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     latency_ms: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Streaming breakdown; NULL for non-streaming requests.
+    upstream_connect_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    ttfb_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    ttft_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    stream_duration_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    output_tokens_per_second: Mapped[float | None] = mapped_column(Float, nullable=True)
     estimated_cost_usd: Mapped[Decimal] = mapped_column(
         Numeric(12, 6), nullable=False, default=Decimal("0")
     )
@@ -145,6 +154,7 @@ class UsageAggregateModel(Base):
     bucket_start: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
     user_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
     access_key_id: Mapped[UUID | None] = mapped_column(PG_UUID(as_uuid=True), nullable=True)
+    provider: Mapped[str] = mapped_column(String(10), nullable=False, default="bedrock")
     total_requests: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     total_input_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
     total_output_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -169,4 +179,12 @@ class UsageAggregateModel(Base):
 
     __table_args__ = (
         Index("idx_usage_aggregates_lookup", "bucket_type", "bucket_start", "user_id"),
+        UniqueConstraint(
+            "bucket_type",
+            "bucket_start",
+            "user_id",
+            "access_key_id",
+            "provider",
+            name="uq_usage_aggregates_bucket_provider",
+        ),
     )
@@ -1,7 +1,11 @@
 from typing import AsyncGenerator
 import ssl
+import time
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from ..config import get_settings
+from ..telemetry import DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUT_SECONDS, DB_POOL_WAIT_SECONDS
 
 settings = get_settings()
 
@@ -13,17 +17,47 @@ if settings.database_url_arn or "amazonaws.com" in settings.database_url:
     ssl_context.check_hostname = False
     ssl_context.verify_mode = ssl.CERT_NONE  # Aurora uses self-signed certs
     connect_args["ssl"] = ssl_context
+if "+asyncpg" in settings.database_url:
+    # Hot lookups are prebuilt statements, so each connection prepares them once.
+    connect_args["prepared_statement_cache_size"] = settings.db_prepared_statement_cache_size
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
+
 
 engine = create_async_engine(
     settings.database_url,
-    pool_size=5,
-    max_overflow=5,
-    pool_timeout=30,
-    pool_recycle=1800,
-    pool_pre_ping=True,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
     connect_args=connect_args,
+    poolclass=TimedQueuePool,
 )
 
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(_dbapi_connection, connection_record, _connection_proxy) -> None:
+    connection_record.info["checked_out_at"] = time.perf_counter()
+    DB_POOL_CHECKED_OUT.inc()
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _on_checkin(_dbapi_connection, connection_record) -> None:
+    checked_out_at = connection_record.info.pop("checked_out_at", None)
+    if checked_out_at is not None:
+        DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - checked_out_at)
+    DB_POOL_CHECKED_OUT.dec()
+
 async_session_factory = async_sessionmaker(engine, expire_on_commit=False)
 
 
@@ -20,6 +20,8 @@ from .schemas import (
     UsageBucket,
     UsageResponse,
     UsageTopUser,
+    LatencyPercentiles,
+    StreamLatencyStats,
     ModelPricingResponse,
     PricingListResponse,
     CostBreakdownByModel,
@@ -58,6 +60,8 @@ __all__ = [
     "UsageBucket",
     "UsageResponse",
     "UsageTopUser",
+    "LatencyPercentiles",
+    "StreamLatencyStats",
     "ModelPricingResponse",
     "PricingListResponse",
     "CostBreakdownByModel",
@@ -31,6 +31,7 @@ class AccessKey:
     created_at: datetime
     revoked_at: datetime | None = None
     rotation_expires_at: datetime | None = None
+    bedrock_regions: str | None = None
 
 
 @dataclass
@@ -70,6 +71,11 @@ class TokenUsage:
     pricing_output_price_per_million: Decimal
     pricing_cache_write_price_per_million: Decimal
     pricing_cache_read_price_per_million: Decimal
+    upstream_connect_ms: int | None = None
+    ttfb_ms: int | None = None
+    ttft_ms: int | None = None
+    stream_duration_ms: int | None = None
+    output_tokens_per_second: float | None = None
 
 
 @dataclass
@@ -90,3 +96,4 @@ class UsageAggregate:
     total_cache_write_cost_usd: Decimal
     total_cache_read_cost_usd: Decimal
     total_estimated_cost_usd: Decimal
+    provider: str = "bedrock"
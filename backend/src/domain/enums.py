@@ -16,6 +16,8 @@ class KeyStatus(str, Enum):
 class RoutingStrategy(str, Enum):
     PLAN_FIRST = "plan_first"
     BEDROCK_ONLY = "bedrock_only"
+    PLAN_HEDGED = "plan_hedged"
+    ADAPTIVE = "adaptive"
 
 
 class ErrorType(str, Enum):
@@ -57,10 +57,13 @@ class AnthropicCountTokensResponse(BaseModel):
 
 
 # Admin API schemas
+RoutingStrategyName = Literal["plan_first", "bedrock_only", "plan_hedged", "adaptive"]
+
+
 class UserCreate(BaseModel):
     name: str = Field(min_length=1, max_length=255)
     description: str | None = None
-    routing_strategy: Literal["plan_first", "bedrock_only"] = "plan_first"
+    routing_strategy: RoutingStrategyName = "plan_first"
     monthly_budget_usd: Decimal | None = Field(
         default=None, ge=Decimal("0.01"), le=Decimal("999999.99")
     )
@@ -87,7 +90,7 @@ class UserResponse(BaseModel):
 
 
 class UserRoutingStrategyUpdate(BaseModel):
-    routing_strategy: Literal["plan_first", "bedrock_only"]
+    routing_strategy: RoutingStrategyName
 
 
 class UserBudgetUpdate(BaseModel):
@@ -106,9 +109,18 @@ class UserBudgetResponse(BaseModel):
     period_end: datetime
 
 
+_BEDROCK_REGION_ENTRY = r"[a-z]{2}(-[a-z]+)+-\d+(:[1-9]\d{0,2})?"
+
+
 class AccessKeyCreate(BaseModel):
     bedrock_region: str = "ap-northeast-2"
     bedrock_model: str | None = None
+    # Ordered failover list, optionally weighted: "us-east-1:3,us-west-2:1"
+    bedrock_regions: str | None = Field(
+        default=None,
+        max_length=255,
+        pattern=rf"^{_BEDROCK_REGION_ENTRY}(,{_BEDROCK_REGION_ENTRY})*$",
+    )
 
 
 class AccessKeyResponse(BaseModel):
@@ -117,6 +129,7 @@ class AccessKeyResponse(BaseModel):
     status: str
     bedrock_region: str
     bedrock_model: str
+    bedrock_regions: str | None = None
     created_at: datetime
     raw_key: str | None = None  # Only on creation
     has_bedrock_key: bool = False
@@ -194,3 +207,20 @@ class UsageTopUser(BaseModel):
     name: str
     total_tokens: int
     total_requests: int
+
+
+class LatencyPercentiles(BaseModel):
+    p50: float | None
+    p90: float | None
+    p99: float | None
+
+
+class StreamLatencyStats(BaseModel):
+    provider: str
+    requests: int
+    upstream_connect_ms: LatencyPercentiles
+    ttfb_ms: LatencyPercentiles
+    ttft_ms: LatencyPercentiles
+    stream_duration_ms: LatencyPercentiles
+    latency_ms: LatencyPercentiles
+    output_tokens_per_second: LatencyPercentiles
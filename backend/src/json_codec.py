@@ -0,0 +1,37 @@
+"""JSON encoding and decoding for the proxy's hot paths.
+
+Request and response bodies, Converse payloads and every SSE event go through
+``dumps``/``loads`` here. orjson is used when it is installed (the ``orjson``
+extra) and the stdlib otherwise; both back ends emit the same bytes for the
+JSON the proxy handles: compact separators and UTF-8 rather than ``\\u``
+escapes. Decode errors are ``ValueError`` with either back end.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised without the extra installed
+    orjson = None
+
+_stdlib_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return _stdlib_encode(obj).encode()
+
+
+def _stdlib_loads(data: bytes | bytearray | memoryview | str) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+    dumps = orjson.dumps
+    loads = orjson.loads
+else:  # pragma: no cover
+    BACKEND = "json"
+    dumps = _stdlib_dumps
+    loads = _stdlib_loads
@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -10,13 +13,91 @@ from .api import (
     admin_usage_router,
     admin_pricing_router,
 )
+from .aws_clients import get_client
+from .config import get_settings
+from .db import async_session_factory
+from .proxy import (
+    CircuitBreaker,
+    MetricsAggregator,
+    RateLimiter,
+    SharedCacheTier,
+    UsageWriter,
+    create_cache_backend,
+    create_circuit_store,
+    create_metric_sink,
+    create_rate_limit_store,
+    get_proxy_deps,
+    warm_bedrock_keys,
+)
+from .proxy.bedrock_converse import preload_stream_parser
+from .telemetry import TelemetrySampler
 
 setup_logging()
 
+
+def _preload_aws() -> None:
+    """Build the AWS clients and service models the request path will need."""
+    settings = get_settings()
+    preload_stream_parser()
+    get_client("cloudwatch", settings.bedrock_region)
+    if settings.kms_key_id:
+        get_client("kms", settings.bedrock_region)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Parsing botocore service models takes tens of milliseconds per service;
+    # do it once here, off the event loop, instead of in the first requests.
+    await asyncio.to_thread(_preload_aws)
+    # deps.http_clients is built from the same settings; it is closed on shutdown.
+    deps = get_proxy_deps()
+    deps.usage_writer = UsageWriter(async_session_factory)
+    deps.usage_writer.start()
+    settings = get_settings()
+    metric_sink = create_metric_sink(settings.metrics_sink)
+    if metric_sink is not None:
+        deps.metrics_aggregator = MetricsAggregator(metric_sink)
+        deps.metrics_aggregator.start()
+    shared_cache_url = settings.shared_cache_url
+    if shared_cache_url:
+        deps.shared_cache = SharedCacheTier(create_cache_backend(shared_cache_url))
+        deps.shared_cache.attach(*deps.shared_caches)
+        await deps.shared_cache.start()
+        deps.circuit_breaker = CircuitBreaker(store=create_circuit_store(shared_cache_url))
+        deps.rate_limiter = RateLimiter(store=create_rate_limit_store(shared_cache_url))
+    # Decrypt Bedrock keys in the background so startup is not held up by KMS.
+    warmup = None
+    if settings.bedrock_key_warmup_concurrency > 0:
+        warmup = asyncio.create_task(
+            warm_bedrock_keys(async_session_factory, settings.bedrock_key_warmup_concurrency)
+        )
+    sampler = TelemetrySampler(deps, settings.prometheus_sample_interval)
+    sampler.start()
+    try:
+        yield
+    finally:
+        if warmup is not None:
+            warmup.cancel()
+            await asyncio.gather(warmup, return_exceptions=True)
+        await sampler.aclose()
+        await deps.usage_writer.drain()
+        deps.usage_writer = None
+        if deps.metrics_aggregator is not None:
+            await deps.metrics_aggregator.drain()
+            deps.metrics_aggregator = None
+        if deps.shared_cache is not None:
+            await deps.shared_cache.aclose()
+            deps.shared_cache = None
+        await deps.circuit_breaker.aclose()
+        await deps.rate_limiter.aclose()
+        await deps.http_clients.aclose()
+
+
 app = FastAPI(
     title="Claude Code Proxy",
     description="Proxy between Claude Code and Amazon Bedrock with automatic failover",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
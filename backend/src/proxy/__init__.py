@@ -2,13 +2,28 @@ from .context import RequestContext
 from .auth import AuthService, get_auth_service, invalidate_access_key_cache
 from .router import ProxyRouter, ProxyResponse
 from .plan_adapter import PlanAdapter
-from .bedrock_adapter import BedrockAdapter, invalidate_bedrock_key_cache
-from .circuit_breaker import CircuitBreaker
-from .budget import BudgetService, BudgetCheckResult, invalidate_budget_cache
+from .bedrock_adapter import (
+    BedrockAdapter,
+    invalidate_bedrock_key_cache,
+    prime_bedrock_key_cache,
+    warm_bedrock_keys,
+)
+from .circuit_breaker import CircuitBreaker, create_circuit_store
+from .rate_limit import RateLimiter, create_rate_limit_store
+from .budget import (
+    BudgetService,
+    BudgetCheckResult,
+    invalidate_budget_cache,
+    record_budget_spend,
+)
 from .dependencies import ProxyDependencies, get_proxy_deps, set_proxy_deps, reset_proxy_deps
 from .usage import UsageRecorder
 from .metrics import CloudWatchMetricsEmitter
-from .cache import TTLCache
+from .metrics_aggregator import MetricsAggregator, create_metric_sink
+from .cache import CacheStats, TTLCache, TwoLevelCache
+from .shared_cache import SharedCacheTier, create_cache_backend
+from .http_clients import HttpClientRegistry
+from .usage_writer import UsageWriter, UsageEvent
 
 __all__ = [
     "RequestContext",
@@ -20,15 +35,30 @@ __all__ = [
     "PlanAdapter",
     "BedrockAdapter",
     "invalidate_bedrock_key_cache",
+    "prime_bedrock_key_cache",
+    "warm_bedrock_keys",
     "CircuitBreaker",
+    "create_circuit_store",
+    "RateLimiter",
+    "create_rate_limit_store",
     "BudgetService",
     "BudgetCheckResult",
     "invalidate_budget_cache",
+    "record_budget_spend",
     "ProxyDependencies",
     "get_proxy_deps",
     "set_proxy_deps",
     "reset_proxy_deps",
     "UsageRecorder",
     "CloudWatchMetricsEmitter",
+    "MetricsAggregator",
+    "create_metric_sink",
     "TTLCache",
+    "CacheStats",
+    "TwoLevelCache",
+    "SharedCacheTier",
+    "create_cache_backend",
+    "HttpClientRegistry",
+    "UsageWriter",
+    "UsageEvent",
 ]
@@ -1,8 +1,9 @@
 from dataclasses import dataclass
 from typing import Protocol
 
-from ..domain import AnthropicRequest, AnthropicResponse, AnthropicUsage, ErrorType
+from ..domain import AnthropicResponse, AnthropicUsage, ErrorType
 from .context import RequestContext
+from .payload import MessagesRequest
 
 
 @dataclass
@@ -27,6 +28,6 @@ class Adapter(Protocol):
     """Protocol for upstream adapters."""
 
     async def invoke(
-        self, ctx: RequestContext, request: AnthropicRequest
+        self, ctx: RequestContext, request: MessagesRequest
     ) -> AdapterResponse | AdapterError:
         ...
@@ -1,4 +1,5 @@
 import uuid
+from datetime import timezone
 from uuid import UUID
 from dataclasses import dataclass
 from fastapi import Depends
@@ -6,8 +7,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db import get_session
 from ..domain import RoutingStrategy
-from ..repositories import AccessKeyRepository, BedrockKeyRepository
+from ..repositories import AccessKeyRepository
 from ..security import KeyHasher
+from ..telemetry import stage_timer
+from .bedrock_adapter import prime_bedrock_key_cache
+from .budget import budget_month_window, prime_budget_cache
+from .cache import DataclassCodec
 from .context import RequestContext
 from .dependencies import get_proxy_deps
 
@@ -21,6 +26,10 @@ class _CachedAccessKey:
     bedrock_model: str
     has_bedrock_key: bool
     routing_strategy: RoutingStrategy
+    bedrock_regions: str | None = None
+
+
+_CACHE_CODEC = DataclassCodec(_CachedAccessKey)
 
 
 class AuthService:
@@ -30,58 +39,58 @@ class AuthService:
         self._session = session
         self._hasher = KeyHasher()
         self._access_key_repo = AccessKeyRepository(session)
-        self._bedrock_key_repo = BedrockKeyRepository(session)
 
     async def authenticate(self, raw_key: str) -> RequestContext | None:
         key_hash = self._hasher.hash(raw_key)
         cache = get_proxy_deps().access_key_cache
 
-        # Check cache
-        cached: _CachedAccessKey | None = cache.get(key_hash)
-        if cached:
-            return RequestContext(
-                request_id=f"req_{uuid.uuid4().hex[:16]}",
-                user_id=cached.user_id,
-                access_key_id=cached.access_key_id,
-                access_key_prefix=cached.access_key_prefix,
-                bedrock_region=cached.bedrock_region,
-                bedrock_model=cached.bedrock_model,
-                has_bedrock_key=cached.has_bedrock_key,
-                routing_strategy=cached.routing_strategy,
-            )
-
-        # Query database
-        result = await self._access_key_repo.get_by_hash_with_user(key_hash)
-        if not result:
+        cached = await cache.get_or_load(
+            key_hash, lambda: self._load_access_key(key_hash), _CACHE_CODEC
+        )
+        if cached is None:
             return None
 
-        access_key, user_id, routing_strategy_str = result
+        return RequestContext(
+            request_id=f"req_{uuid.uuid4().hex[:16]}",
+            user_id=cached.user_id,
+            access_key_id=cached.access_key_id,
+            access_key_prefix=cached.access_key_prefix,
+            bedrock_region=cached.bedrock_region,
+            bedrock_model=cached.bedrock_model,
+            has_bedrock_key=cached.has_bedrock_key,
+            routing_strategy=cached.routing_strategy,
+            bedrock_regions=cached.bedrock_regions,
+        )
 
-        bedrock_key = await self._bedrock_key_repo.get_by_access_key_id(access_key.id)
-        has_bedrock_key = bedrock_key is not None
-        routing_strategy = RoutingStrategy(routing_strategy_str)
+    async def _load_access_key(self, key_hash: str) -> _CachedAccessKey | None:
+        # One round trip for a cold request: the same row seeds the budget
+        # ledger and, for users not on plan_first, the Bedrock key cache.
+        month_start, month_end = budget_month_window()
+        with stage_timer("access_key_load"):
+            row = await self._access_key_repo.get_auth_context(
+                key_hash,
+                month_start.astimezone(timezone.utc),
+                month_end.astimezone(timezone.utc),
+                include_encrypted_key=True,
+            )
+        if not row:
+            return None
 
-        cached_entry = _CachedAccessKey(
-            user_id=user_id,
-            access_key_id=access_key.id,
-            access_key_prefix=access_key.key_prefix,
-            bedrock_region=access_key.bedrock_region,
-            bedrock_model=access_key.bedrock_model,
-            has_bedrock_key=has_bedrock_key,
-            routing_strategy=routing_strategy,
+        routing_strategy = RoutingStrategy(row.routing_strategy)
+        await prime_budget_cache(
+            row.user_id, row.monthly_budget_usd, row.month_usage, month_start, month_end
         )
-
-        # Cache result
-        cache.set(key_hash, cached_entry)
-        return RequestContext(
-            request_id=f"req_{uuid.uuid4().hex[:16]}",
-            user_id=user_id,
-            access_key_id=access_key.id,
-            access_key_prefix=access_key.key_prefix,
-            bedrock_region=access_key.bedrock_region,
-            bedrock_model=access_key.bedrock_model,
-            has_bedrock_key=has_bedrock_key,
+        if row.encrypted_key is not None:
+            prime_bedrock_key_cache(row.id, row.encrypted_key)
+        return _CachedAccessKey(
+            user_id=row.user_id,
+            access_key_id=row.id,
+            access_key_prefix=row.key_prefix,
+            bedrock_region=row.bedrock_region,
+            bedrock_model=row.bedrock_model,
+            has_bedrock_key=row.has_bedrock_key,
             routing_strategy=routing_strategy,
+            bedrock_regions=row.bedrock_regions,
         )
 
 
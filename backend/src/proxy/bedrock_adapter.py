@@ -1,37 +1,62 @@
-import json
-from typing import AsyncIterator
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import TypeVar
 from uuid import UUID
 
 import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from ..config import get_settings
-from ..domain import AnthropicRequest, ErrorType
+from .. import json_codec
+from ..domain import AnthropicRequest, BedrockKey, ErrorType
+from ..logging import get_logger
 from ..repositories import BedrockKeyRepository
 from ..security import KMSEnvelopeEncryption
+from ..telemetry import BEDROCK_REGION_FAILOVERS, stage_timer
 from .adapter_base import AdapterError, AdapterResponse
 from .bedrock_converse import build_converse_request, iter_anthropic_sse, parse_converse_response
+from .bedrock_regions import RegionPlan, parse_region_plan
 from .context import RequestContext
 from .dependencies import get_proxy_deps
+from .http_clients import bedrock_endpoint
+from .payload import MessagesRequest, as_anthropic_request
+
+logger = get_logger(__name__)
+
+R = TypeVar("R")
+
+# Errors worth retrying in another region: throttling, and the region being
+# down or unreachable. Auth and validation errors would fail everywhere.
+REGION_FAULTS = frozenset({ErrorType.BEDROCK_QUOTA_EXCEEDED, ErrorType.BEDROCK_UNAVAILABLE})
 
 
 class BedrockAdapter:
-    """Amazon Bedrock Converse adapter using per-user bearer token."""
+    """Amazon Bedrock Converse adapter using per-user bearer token.
 
-    def __init__(self, bedrock_key_repo: BedrockKeyRepository):
+    Calls go to the access key's regions in the order ``RegionBalancer`` picks,
+    moving on to the next region when one throttles or is unavailable.
+    """
+
+    def __init__(
+        self,
+        bedrock_key_repo: BedrockKeyRepository | None = None,
+        client: httpx.AsyncClient | None = None,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+    ):
+        # With ``session_factory`` a key lookup uses its own short-lived
+        # session, so no connection is held while the upstream call runs.
         self._repo = bedrock_key_repo
+        self._session_factory = session_factory
         self._encryption = KMSEnvelopeEncryption()
-        settings = get_settings()
-        self._client = httpx.AsyncClient(
-            timeout=httpx.Timeout(
-                connect=settings.http_connect_timeout,
-                read=settings.http_read_timeout,
-                write=30.0,
-                pool=10.0,
-            )
-        )
+        self._client = client
+
+    def _client_for(self, region: str) -> httpx.AsyncClient:
+        if self._client is not None:
+            return self._client
+        return get_proxy_deps().http_clients.bedrock(region)
 
     async def invoke(
-        self, ctx: RequestContext, request: AnthropicRequest
+        self, ctx: RequestContext, request: MessagesRequest
     ) -> AdapterResponse | AdapterError:
         api_key = await self._get_decrypted_key(ctx.access_key_id)
         if not api_key:
@@ -42,13 +67,35 @@ class BedrockAdapter:
                 retryable=False,
             )
         try:
-            payload = build_converse_request(request)
-            url = _build_converse_url(ctx.bedrock_region, ctx.bedrock_model, stream=False)
-            headers = _build_headers(api_key)
-            response = await self._client.post(url, json=payload, headers=headers)
+            with stage_timer("build_converse_request"):
+                request = as_anthropic_request(request)
+                converse_request = build_converse_request(
+                    request, get_proxy_deps().converse_cache, str(ctx.access_key_id)
+                )
+                body = json_codec.dumps(converse_request)
+        except ValueError as exc:
+            return _invalid_request(exc)
+        headers = _build_headers(api_key)
+        return await self._with_failover(
+            ctx, lambda region: self._invoke_in(region, ctx, request, body, headers)
+        )
+
+    async def _invoke_in(
+        self,
+        region: str,
+        ctx: RequestContext,
+        request: AnthropicRequest,
+        body: bytes,
+        headers: dict[str, str],
+    ) -> AdapterResponse | AdapterError:
+        try:
+            url = _build_converse_url(region, ctx.bedrock_model, stream=False)
+            client = self._client_for(region)
+            with stage_timer("bedrock_upstream"):
+                response = await client.post(url, content=body, headers=headers)
             if response.status_code != 200:
                 return _classify_http_error(response.status_code, response.text)
-            data = response.json()
+            data = json_codec.loads(response.content)
             anthropic_response, usage = parse_converse_response(data, request.model)
             return AdapterResponse(response=anthropic_response, usage=usage)
         except httpx.TimeoutException:
@@ -65,7 +112,7 @@ class BedrockAdapter:
                 message=str(exc),
                 retryable=False,
             )
-        except (ValueError, json.JSONDecodeError) as exc:
+        except ValueError as exc:
             return AdapterError(
                 error_type=ErrorType.BEDROCK_UNAVAILABLE,
                 status_code=502,
@@ -74,7 +121,7 @@ class BedrockAdapter:
             )
 
     async def stream(
-        self, ctx: RequestContext, request: AnthropicRequest
+        self, ctx: RequestContext, request: MessagesRequest
     ) -> AsyncIterator[bytes] | AdapterError:
         api_key = await self._get_decrypted_key(ctx.access_key_id)
         if not api_key:
@@ -85,16 +132,38 @@ class BedrockAdapter:
                 retryable=False,
             )
         try:
-            payload = build_converse_request(request)
-            url = _build_converse_url(ctx.bedrock_region, ctx.bedrock_model, stream=True)
-            headers = _build_headers(api_key)
-            req = self._client.build_request("POST", url, json=payload, headers=headers)
-            response = await self._client.send(req, stream=True)
+            with stage_timer("build_converse_request"):
+                request = as_anthropic_request(request)
+                converse_request = build_converse_request(
+                    request, get_proxy_deps().converse_cache, str(ctx.access_key_id)
+                )
+                body = json_codec.dumps(converse_request)
+        except ValueError as exc:
+            return _invalid_request(exc)
+        headers = _build_headers(api_key)
+        return await self._with_failover(
+            ctx, lambda region: self._stream_in(region, ctx, request, body, headers)
+        )
+
+    async def _stream_in(
+        self,
+        region: str,
+        ctx: RequestContext,
+        request: AnthropicRequest,
+        body: bytes,
+        headers: dict[str, str],
+    ) -> AsyncIterator[bytes] | AdapterError:
+        try:
+            url = _build_converse_url(region, ctx.bedrock_model, stream=True)
+            client = self._client_for(region)
+            req = client.build_request("POST", url, content=body, headers=headers)
+            with stage_timer("bedrock_upstream_headers"):
+                response = await client.send(req, stream=True)
             if response.status_code != 200:
-                body = await response.aread()
+                error_body = await response.aread()
                 await response.aclose()
                 return _classify_http_error(
-                    response.status_code, body.decode(errors="ignore")
+                    response.status_code, error_body.decode(errors="ignore")
                 )
 
             async def stream_generator():
@@ -122,31 +191,157 @@ class BedrockAdapter:
                 retryable=False,
             )
 
+    async def _with_failover(
+        self, ctx: RequestContext, call: Callable[[str], Awaitable[R | AdapterError]]
+    ) -> R | AdapterError:
+        """Run ``call`` in the key's regions in turn until one isn't throttled or down.
+
+        Only regions the key's model can be called from are tried. Streams
+        fail over only before their first byte. The region that
+        answered is left on ``ctx.served_region`` for usage pricing.
+        """
+        balancer = get_proxy_deps().bedrock_regions
+        key = str(ctx.access_key_id)
+        try:
+            plan = parse_region_plan(
+                ctx.bedrock_region, ctx.bedrock_regions, _normalize_model_id(ctx.bedrock_model)
+            )
+        except ValueError as exc:
+            logger.warning("bedrock_regions_invalid", access_key_id=key, error=str(exc))
+            plan = RegionPlan((ctx.bedrock_region,))
+        regions = balancer.order(key, plan)
+        for attempt, region in enumerate(regions, start=1):
+            result = await call(region)
+            if not isinstance(result, AdapterError):
+                balancer.mark_healthy(key, region)
+                ctx.served_region = region
+                return result
+            if result.error_type not in REGION_FAULTS:
+                return result
+            balancer.mark_unhealthy(key, region)
+            if attempt < len(regions):
+                BEDROCK_REGION_FAILOVERS.labels(region, result.error_type.value).inc()
+                logger.info(
+                    "bedrock_region_failover",
+                    access_key_id=key,
+                    region=region,
+                    next_region=regions[attempt],
+                    error_type=result.error_type.value,
+                )
+        return result
+
     async def _get_decrypted_key(self, access_key_id: UUID) -> str | None:
         cache_key = str(access_key_id)
         cache = get_proxy_deps().bedrock_key_cache
 
-        # Check cache
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
+        async def _load() -> str | None:
+            with stage_timer("bedrock_key_load"):
+                if self._session_factory is not None:
+                    async with self._session_factory() as session:
+                        encrypted_key = await BedrockKeyRepository(session).get_encrypted_key(
+                            access_key_id
+                        )
+                else:
+                    encrypted_key = await self._repo.get_encrypted_key(access_key_id)
+                if not encrypted_key:
+                    return None
+                return await self._encryption.decrypt_async(
+                    encrypted_key, get_proxy_deps().kms_data_key_cache
+                )
+
+        # No codec: decrypted keys stay local and never go to the shared tier
+        return await cache.get_or_load(cache_key, _load)
+
+
+_prime_tasks: set[asyncio.Task] = set()
+
+
+def prime_bedrock_key_cache(access_key_id: UUID, encrypted_key: bytes) -> None:
+    """Start decrypting a Bedrock key that was loaded along with something else.
+
+    The decrypt runs in the background and lands in the Bedrock key cache; an
+    adapter that needs the key meanwhile waits for it instead of loading it again.
+    """
+    deps = get_proxy_deps()
+    cache_key = str(access_key_id)
+    if deps.bedrock_key_cache.get(cache_key) is not None:
+        return
 
-        # Get from database and decrypt
-        bedrock_key = await self._repo.get_by_access_key_id(access_key_id)
-        if not bedrock_key:
-            return None
+    async def _decrypt() -> str:
+        return await KMSEnvelopeEncryption().decrypt_async(encrypted_key, deps.kms_data_key_cache)
 
-        decrypted = self._encryption.decrypt(bedrock_key.encrypted_key)
-        cache.set(cache_key, decrypted)
-        return decrypted
+    async def _prime() -> None:
+        try:
+            await deps.bedrock_key_cache.get_or_load(cache_key, _decrypt)
+        except Exception as exc:
+            # The adapter's own load will retry and report it.
+            logger.warning(
+                "bedrock_key_prime_failed", access_key_id=cache_key, error=str(exc)
+            )
+
+    task = asyncio.create_task(_prime())
+    # The loop keeps only a weak reference to running tasks.
+    _prime_tasks.add(task)
+    task.add_done_callback(_prime_tasks.discard)
 
-    async def close(self) -> None:
-        await self._client.aclose()
+
+async def warm_bedrock_key_cache(
+    bedrock_keys: list[BedrockKey],
+    concurrency: int,
+    encryption: KMSEnvelopeEncryption | None = None,
+) -> int:
+    """Decrypt ``bedrock_keys`` into the Bedrock key cache, ``concurrency`` at a time.
+
+    Keys that fail to decrypt are logged and skipped; their first request
+    loads them as usual. Returns the number of keys cached.
+    """
+    deps = get_proxy_deps()
+    encryption = encryption or KMSEnvelopeEncryption()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _warm(bedrock_key: BedrockKey) -> bool:
+        async with semaphore:
+            try:
+                plaintext = await encryption.decrypt_async(
+                    bedrock_key.encrypted_key, deps.kms_data_key_cache
+                )
+            except Exception as exc:
+                logger.warning(
+                    "bedrock_key_warmup_failed",
+                    access_key_id=str(bedrock_key.access_key_id),
+                    error=str(exc),
+                )
+                return False
+        deps.bedrock_key_cache.set(str(bedrock_key.access_key_id), plaintext)
+        return True
+
+    results = await asyncio.gather(*(_warm(key) for key in bedrock_keys))
+    return sum(results)
+
+
+async def warm_bedrock_keys(
+    session_factory: async_sessionmaker[AsyncSession], concurrency: int
+) -> None:
+    """Startup task: pre-decrypt every usable Bedrock key so no request waits on KMS."""
+    started = time.perf_counter()
+    try:
+        async with session_factory() as session:
+            bedrock_keys = await BedrockKeyRepository(session).list_usable()
+        warmed = await warm_bedrock_key_cache(bedrock_keys, concurrency)
+    except Exception as exc:
+        logger.warning("bedrock_key_warmup_failed", error=str(exc))
+        return
+    logger.info(
+        "bedrock_key_warmup",
+        keys=len(bedrock_keys),
+        warmed=warmed,
+        duration_ms=int((time.perf_counter() - started) * 1000),
+    )
 
 
 def _build_converse_url(region: str, model_id: str, stream: bool) -> str:
     model_id = _normalize_model_id(model_id)
-    endpoint = f"https://bedrock-runtime.{region}.amazonaws.com"
+    endpoint = bedrock_endpoint(region)
     suffix = "converse-stream" if stream else "converse"
     return f"{endpoint}/model/{model_id}/{suffix}"
 
@@ -162,6 +357,16 @@ def _normalize_model_id(model_id: str) -> str:
     return model_id
 
 
+def _invalid_request(exc: ValueError) -> AdapterError:
+    # Plan was sent the raw body unchecked; a fallback is where it first gets validated.
+    return AdapterError(
+        error_type=ErrorType.BEDROCK_VALIDATION,
+        status_code=400,
+        message=str(exc)[:200],
+        retryable=False,
+    )
+
+
 def _classify_http_error(status_code: int, body: str) -> AdapterError:
     if status_code in (401, 403):
         return AdapterError(
@@ -1,18 +1,24 @@
 """Bedrock Converse API conversion utilities."""
+from .conversation_cache import ConversationCache
 from .request_builder import build_converse_request
 from .response_parser import parse_converse_response
 from .stream_decoder import (
     ConverseStreamDecoder,
+    EventStreamFrameDecoder,
     StreamState,
     iter_anthropic_sse,
+    preload_stream_parser,
     _convert_converse_event,
 )
 
 __all__ = [
+    "ConversationCache",
     "build_converse_request",
     "parse_converse_response",
     "ConverseStreamDecoder",
+    "EventStreamFrameDecoder",
     "StreamState",
     "iter_anthropic_sse",
+    "preload_stream_parser",
     "_convert_converse_event",
 ]
@@ -0,0 +1,110 @@
+"""Converted conversations kept for the next turn to reuse.
+
+Claude Code resends the system prompt, the tool definitions and the whole
+history on every turn, so almost everything ``build_converse_request``
+converts it has converted on the previous turn. A conversation is addressed
+by its caller's scope and a digest of its opening message; the next turn
+compares its messages with the stored ones and converts only from the first
+one that differs. Reuse is decided by equality rather than by hashing the
+history, because hashing a block costs more than converting it.
+
+The cache is bounded by the JSON size of the stored Anthropic content.
+Converted values are shared with earlier payloads and must not be mutated.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Any
+
+try:
+    from ...json_codec import dumps
+except ImportError:  # pragma: no cover
+    from json_codec import dumps
+
+
+@dataclass
+class CachedConversation:
+    # (role, content) of each message as the client sent it, and its conversion.
+    sources: list[tuple[str, Any]]
+    messages: list[dict[str, Any]]
+    message_sizes: list[int]
+    system_source: Any
+    system: list[dict[str, Any]]
+    system_size: int
+    tools_source: Any
+    tool_config: dict[str, Any] | None
+    tools_size: int
+
+    @property
+    def size(self) -> int:
+        return self.system_size + self.tools_size + sum(self.message_sizes)
+
+
+class ConversationCache:
+    """Byte-bounded LRU of converted conversations, one entry per conversation."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[bytes, tuple[CachedConversation, int]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def key(self, scope: str, opening: tuple[str, Any]) -> bytes | None:
+        """Key for the conversation that starts with ``opening``, None if uncacheable."""
+        try:
+            raw = dumps(opening)
+        except TypeError:
+            # Only reachable for requests built in code; bodies parsed from JSON always encode.
+            return None
+        return scope.encode() + b"\0" + sha256(raw).digest()
+
+    def get(self, key: bytes) -> CachedConversation | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: bytes, conversation: CachedConversation) -> None:
+        size = conversation.size
+        self._discard(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (conversation, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _key, (_conversation, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def _discard(self, key: bytes) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+
+def source_size(value: Any) -> int:
+    """JSON size of a piece of Anthropic content, as counted against the bound."""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value)
+    try:
+        return len(dumps(value))
+    except TypeError:
+        return len(repr(value))
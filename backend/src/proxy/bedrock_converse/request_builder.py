@@ -1,18 +1,38 @@
 """Build Bedrock Converse API requests from Anthropic format."""
-import json
 from typing import Any
 
 try:
     from ...domain import AnthropicRequest
+    from ...json_codec import dumps
 except ImportError:  # pragma: no cover
     from domain import AnthropicRequest
-
-
-def build_converse_request(request: AnthropicRequest) -> dict[str, Any]:
-    messages = [_normalize_message(msg) for msg in request.messages]
+    from json_codec import dumps
+
+from .conversation_cache import CachedConversation, ConversationCache, source_size
+
+
+def build_converse_request(
+    request: AnthropicRequest,
+    cache: ConversationCache | None = None,
+    scope: str = "",
+) -> dict[str, Any]:
+    """Convert an Anthropic request to a Converse payload.
+
+    With a ``cache``, the conversation's previous turn (looked up within
+    ``scope``) supplies every message, the system prompt and the tool config
+    that are unchanged, so a resent conversation only converts its new turns.
+    The payload may then share objects with earlier payloads; treat it as
+    read-only.
+    """
+    converted = _convert_with_cache(request, cache, scope) if cache is not None else None
+    if converted is None:
+        messages = [_normalize_message(msg) for msg in request.messages]
+        system_blocks = _normalize_system(request.system)
+        tool_config = _build_tool_config(request.tools, request.tool_choice)
+    else:
+        messages, system_blocks, tool_config = converted
     payload: dict[str, Any] = {"messages": messages}
 
-    system_blocks = _normalize_system(request.system)
     if system_blocks:
         payload["system"] = system_blocks
 
@@ -20,7 +40,6 @@ def build_converse_request(request: AnthropicRequest) -> dict[str, Any]:
     if inference_config:
         payload["inferenceConfig"] = inference_config
 
-    tool_config = _build_tool_config(request.tools, request.tool_choice)
     if tool_config:
         payload["toolConfig"] = tool_config
 
@@ -36,6 +55,58 @@ def _normalize_message(message: Any) -> dict[str, Any]:
     return {"role": message.role, "content": content}
 
 
+def _convert_with_cache(
+    request: AnthropicRequest, cache: ConversationCache, scope: str
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], dict[str, Any] | None] | None:
+    sources = [(msg.role, msg.content) for msg in request.messages]
+    key = cache.key(scope, sources[0]) if sources and cache.max_bytes > 0 else None
+    if key is None:
+        return None
+    previous = cache.get(key)
+
+    reused = 0
+    if previous is not None:
+        # Equality runs in C and stops at the first difference; usually the
+        # previous turn's last message, whose cache_control marker moved.
+        for source, seen in zip(sources, previous.sources):
+            if source != seen:
+                break
+            reused += 1
+    messages = previous.messages[:reused] if reused else []
+    message_sizes = previous.message_sizes[:reused] if reused else []
+    for msg in request.messages[reused:]:
+        messages.append(_normalize_message(msg))
+        message_sizes.append(source_size(msg.content))
+
+    if previous is not None and previous.system_source == request.system:
+        system_blocks, system_size = previous.system, previous.system_size
+    else:
+        system_blocks = _normalize_system(request.system)
+        system_size = source_size(request.system)
+    tools_source = (request.tools, request.tool_choice)
+    if previous is not None and previous.tools_source == tools_source:
+        tool_config, tools_size = previous.tool_config, previous.tools_size
+    else:
+        tool_config = _build_tool_config(request.tools, request.tool_choice)
+        tools_size = source_size(tools_source)
+
+    cache.put(
+        key,
+        CachedConversation(
+            sources=sources,
+            messages=messages,
+            message_sizes=message_sizes,
+            system_source=request.system,
+            system=system_blocks,
+            system_size=system_size,
+            tools_source=tools_source,
+            tool_config=tool_config,
+            tools_size=tools_size,
+        ),
+    )
+    return list(messages), system_blocks, tool_config
+
+
 def _normalize_content(content: Any) -> list[dict[str, Any]]:
     if content is None:
         return []
@@ -45,7 +116,7 @@ def _normalize_content(content: Any) -> list[dict[str, Any]]:
         return [_normalize_content_block(content)]
     if isinstance(content, list):
         return [_normalize_content_block(item) for item in content]
-    return [{"text": json.dumps(content)}]
+    return [{"text": _to_text(content)}]
 
 
 def _normalize_system(system: Any) -> list[dict[str, Any]]:
@@ -57,7 +128,7 @@ def _normalize_system(system: Any) -> list[dict[str, Any]]:
         return [_normalize_system_block(system)]
     if isinstance(system, list):
         return [_normalize_system_block(item) for item in system]
-    return [{"text": json.dumps(system)}]
+    return [{"text": _to_text(system)}]
 
 
 def _normalize_system_block(block: Any) -> dict[str, Any]:
@@ -68,14 +139,14 @@ def _normalize_system_block(block: Any) -> dict[str, Any]:
             return {"text": block["text"]}
         if "text" in block:
             return {"text": block["text"]}
-    return {"text": json.dumps(block)}
+    return {"text": _to_text(block)}
 
 
 def _normalize_content_block(block: Any) -> dict[str, Any]:
     if isinstance(block, str):
         return {"text": block}
     if not isinstance(block, dict):
-        return {"text": json.dumps(block)}
+        return {"text": _to_text(block)}
 
     block_type = block.get("type")
     if block_type == "text":
@@ -103,7 +174,7 @@ def _normalize_content_block(block: Any) -> dict[str, Any]:
     if "toolUse" in block or "toolResult" in block:
         return block
 
-    return {"text": json.dumps(block)}
+    return {"text": _to_text(block)}
 
 
 def _normalize_tool_result_content(content: Any) -> list[dict[str, Any]]:
@@ -115,7 +186,7 @@ def _normalize_tool_result_content(content: Any) -> list[dict[str, Any]]:
         return [_normalize_content_block(content)]
     if isinstance(content, list):
         return [_normalize_content_block(item) for item in content]
-    return [{"text": json.dumps(content)}]
+    return [{"text": _to_text(content)}]
 
 
 def _build_inference_config(request: AnthropicRequest) -> dict[str, Any]:
@@ -204,3 +275,8 @@ def _normalize_request_metadata(metadata: dict[str, Any] | None) -> dict[str, st
         if 1 <= len(key) <= 256 and len(value) <= 256:
             cleaned[key] = value
     return cleaned or None
+
+
+def _to_text(value: Any) -> str:
+    """Content of a shape Converse has no block for, passed on as JSON text."""
+    return dumps(value).decode()
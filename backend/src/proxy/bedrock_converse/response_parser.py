@@ -1,11 +1,12 @@
 """Parse Bedrock Converse API responses to Anthropic format."""
-import json
 from typing import Any
 
 try:
     from ...domain import AnthropicResponse, AnthropicUsage
+    from ...json_codec import dumps
 except ImportError:  # pragma: no cover
     from domain import AnthropicResponse, AnthropicUsage
+    from json_codec import dumps
 
 
 def parse_converse_response(
@@ -24,7 +25,7 @@ def parse_converse_response(
     )
 
     response = AnthropicResponse(
-        id=data.get("id", f"msg_{hash(json.dumps(data, sort_keys=True))}"),
+        id=data.get("id", f"msg_{hash(dumps(data))}"),
         content=content_blocks,
         model=model,
         stop_reason=_normalize_stop_reason(data.get("stopReason")),
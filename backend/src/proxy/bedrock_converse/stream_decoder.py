@@ -1,19 +1,26 @@
 """Decode Bedrock Converse stream events to Anthropic SSE format."""
-import json
+import struct
+import zlib
 from dataclasses import dataclass
 from typing import Any, AsyncIterator
 
-from botocore.eventstream import EventStreamBuffer
-from botocore.loaders import Loader
-from botocore.model import ServiceModel
-from botocore.parsers import EventStreamJSONParser
+try:
+    from ...json_codec import dumps, loads
+except ImportError:  # pragma: no cover
+    from json_codec import dumps, loads
 
+# botocore is imported lazily: the fast frame decoder below only hands it
+# exception or malformed frames, so importing it (and parsing the
+# bedrock-runtime service model) is not on the import or request path.
 _response_stream_shape_cache = None
 
 
 def _get_response_stream_shape():
     global _response_stream_shape_cache
     if _response_stream_shape_cache is None:
+        from botocore.loaders import Loader
+        from botocore.model import ServiceModel
+
         loader = Loader()
         service_dict = loader.load_service_model("bedrock-runtime", "service-2")
         service_model = ServiceModel(service_dict)
@@ -21,6 +28,16 @@ def _get_response_stream_shape():
     return _response_stream_shape_cache
 
 
+def preload_stream_parser() -> None:
+    """Import botocore's event-stream parser and load the response shape now.
+
+    Called from the app lifespan so the first throttling or error frame does
+    not pay for parsing the service model JSON.
+    """
+    ConverseStreamDecoder()
+    _get_response_stream_shape()
+
+
 @dataclass
 class StreamState:
     message_id: str
@@ -32,6 +49,9 @@ class StreamState:
 
 class ConverseStreamDecoder:
     def __init__(self) -> None:
+        from botocore.eventstream import EventStreamBuffer
+        from botocore.parsers import EventStreamJSONParser
+
         self._parser = EventStreamJSONParser()
         self._buffer = EventStreamBuffer()
 
@@ -50,27 +70,127 @@ class ConverseStreamDecoder:
                 payload = response_dict["body"]
             if not payload:
                 continue
-            events.append(json.loads(payload.decode()))
+            events.append(_wrap_event(event.headers.get(":event-type"), loads(payload)))
         return events
 
 
+_PRELUDE = struct.Struct(">III")
+_PRELUDE_LENGTH = _PRELUDE.size
+_MIN_MESSAGE_LENGTH = _PRELUDE_LENGTH + 4  # Prelude and message CRC
+_MAX_MESSAGE_LENGTH = 16 * 1024 * 1024
+_STRING_HEADER = 7
+
+
+class EventStreamFrameDecoder:
+    """Splits an AWS event stream into frames without botocore.
+
+    ``feed`` returns ``(event_type, payload, frame)`` tuples. ``event_type`` is
+    the ``:event-type`` header for well-formed event frames and ``None`` for
+    anything else (exceptions, errors, unexpected header types, CRC
+    mismatches), which callers hand to ``ConverseStreamDecoder`` via ``frame``.
+    """
+
+    def __init__(self) -> None:
+        self._pending = b""
+        # Raw header block -> :event-type (None if not a plain event frame).
+        # Bedrock repeats a handful of identical header blocks, so this stays tiny.
+        self._header_cache: dict[bytes, str | None] = {}
+
+    def feed(self, chunk: bytes) -> list[tuple[str | None, bytes, bytes]]:
+        data = self._pending + chunk if self._pending else chunk
+        size = len(data)
+        frames: list[tuple[str | None, bytes, bytes]] = []
+        offset = 0
+        while size - offset >= _PRELUDE_LENGTH:
+            total_length, headers_length, prelude_crc = _PRELUDE.unpack_from(data, offset)
+            if not _MIN_MESSAGE_LENGTH <= total_length <= _MAX_MESSAGE_LENGTH:
+                # Let botocore raise its own error for a frame too short or too
+                # long to be valid; a short one would otherwise never advance.
+                total_length = size - offset
+            elif size - offset < total_length:
+                break
+            end = offset + total_length
+            frame = data[offset:end]
+            offset = end
+            if zlib.crc32(frame[:8]) != prelude_crc or zlib.crc32(
+                frame[:-4]
+            ) != int.from_bytes(frame[-4:], "big"):
+                frames.append((None, b"", frame))
+                continue
+            headers_end = _PRELUDE_LENGTH + headers_length
+            raw_headers = frame[_PRELUDE_LENGTH:headers_end]
+            try:
+                event_type = self._header_cache[raw_headers]
+            except KeyError:
+                event_type = _event_type(raw_headers)
+                if len(self._header_cache) < 64:
+                    self._header_cache[raw_headers] = event_type
+            frames.append((event_type, frame[headers_end:-4] if event_type else b"", frame))
+        self._pending = data[offset:]
+        return frames
+
+
+def _event_type(raw_headers: bytes) -> str | None:
+    """``:event-type`` of an event frame's header block, else None."""
+    headers: dict[str, str] = {}
+    pos, end = 0, len(raw_headers)
+    while pos < end:
+        name_length = raw_headers[pos]
+        name = raw_headers[pos + 1 : pos + 1 + name_length].decode()
+        pos += 1 + name_length
+        if raw_headers[pos] != _STRING_HEADER:
+            return None
+        value_length = int.from_bytes(raw_headers[pos + 1 : pos + 3], "big")
+        headers[name] = raw_headers[pos + 3 : pos + 3 + value_length].decode()
+        pos += 3 + value_length
+    if headers.get(":message-type") != "event":
+        return None
+    return headers.get(":event-type")
+
+
+def _wrap_event(event_type: str | None, body: dict[str, Any]) -> dict[str, Any]:
+    """Key a Converse event body by its type, as ``_convert_converse_event`` expects.
+
+    The wire payload is just the member body (e.g. ``{"contentBlockIndex": 0,
+    "delta": {...}, "p": "..."}``); the type lives in the ``:event-type`` header.
+    """
+    if not event_type or event_type in body:
+        return body
+    return {event_type: body}
+
+
 async def iter_anthropic_sse(
     response_stream: AsyncIterator[bytes],
     model: str,
     message_id: str,
 ) -> AsyncIterator[bytes]:
-    decoder = ConverseStreamDecoder()
+    decoder = EventStreamFrameDecoder()
     state = StreamState(message_id=message_id)
 
     async for chunk in response_stream:
-        for event in decoder.feed(chunk):
-            async for payload in _convert_converse_event(event, state, model):
-                yield _to_sse(payload)
+        out: list[bytes] = []
+        for event_type, payload, frame in decoder.feed(chunk):
+            if event_type is None:
+                # Exceptions and anything unusual go through botocore.
+                for event in ConverseStreamDecoder().feed(frame):
+                    out.extend(_to_sse(p) for p in _convert_event(event, state, model))
+                continue
+            body = loads(payload)
+            if event_type == "contentBlockDelta":
+                text = body.get("delta", {}).get("text")
+                if isinstance(text, str):
+                    out.append(_text_delta_sse(body.get("contentBlockIndex", 0), text))
+                    continue
+            event = _wrap_event(event_type, body)
+            out.extend(_to_sse(p) for p in _convert_event(event, state, model))
+        if out:
+            yield b"".join(out)
 
-    async for payload in _flush_message_delta(state):
-        yield _to_sse(payload)
+    tail = [_to_sse(p) for p in _message_delta_payloads(state)]
     if state.message_started and not state.message_stopped:
-        yield _to_sse({"type": "message_stop"})
+        tail.append(_to_sse({"type": "message_stop"}))
+    if tail:
+        yield b"".join(tail)
 
 
 async def _convert_converse_event(
@@ -78,81 +198,85 @@ async def _convert_converse_event(
     state: StreamState,
     model: str,
 ) -> AsyncIterator[dict[str, Any]]:
+    for payload in _convert_event(event, state, model):
+        yield payload
+
+
+def _convert_event(
+    event: dict[str, Any],
+    state: StreamState,
+    model: str,
+) -> list[dict[str, Any]]:
     if "messageStart" in event and not state.message_started:
         state.message_started = True
-        yield {
-            "type": "message_start",
-            "message": {
-                "id": state.message_id,
-                "type": "message",
-                "role": "assistant",
-                "content": [],
-                "model": model,
-                "stop_reason": None,
-                "stop_sequence": None,
-                "usage": {"input_tokens": 0, "output_tokens": 0},
-            },
-        }
-        return
+        return [
+            {
+                "type": "message_start",
+                "message": {
+                    "id": state.message_id,
+                    "type": "message",
+                    "role": "assistant",
+                    "content": [],
+                    "model": model,
+                    "stop_reason": None,
+                    "stop_sequence": None,
+                    "usage": {"input_tokens": 0, "output_tokens": 0},
+                },
+            }
+        ]
 
     if "contentBlockStart" in event:
         start_event = event["contentBlockStart"]
         index = start_event.get("contentBlockIndex", 0)
         start = start_event.get("start", {})
         content_block = _map_content_block_start(start)
-        if content_block:
-            yield {
-                "type": "content_block_start",
-                "index": index,
-                "content_block": content_block,
-            }
-        return
+        if not content_block:
+            return []
+        return [{"type": "content_block_start", "index": index, "content_block": content_block}]
 
     if "contentBlockDelta" in event:
         delta_event = event["contentBlockDelta"]
         index = delta_event.get("contentBlockIndex", 0)
         delta = delta_event.get("delta", {})
         delta_payload = _map_content_block_delta(delta)
-        if delta_payload:
-            yield {
-                "type": "content_block_delta",
-                "index": index,
-                "delta": delta_payload,
-            }
-        return
+        if not delta_payload:
+            return []
+        return [{"type": "content_block_delta", "index": index, "delta": delta_payload}]
 
     if "contentBlockStop" in event:
         stop_event = event["contentBlockStop"]
-        yield {"type": "content_block_stop", "index": stop_event.get("contentBlockIndex", 0)}
-        return
+        return [{"type": "content_block_stop", "index": stop_event.get("contentBlockIndex", 0)}]
 
     if "messageStop" in event:
         stop_reason = event["messageStop"].get("stopReason")
         state.stop_reason = stop_reason if isinstance(stop_reason, str) else None
-        if state.usage is not None:
-            async for payload in _flush_message_delta(state):
-                yield payload
-            yield {"type": "message_stop"}
-            state.message_stopped = True
-        return
+        if state.usage is None:
+            return []
+        return _finish_message(state)
 
     if "metadata" in event:
         metadata = event["metadata"]
         usage = metadata.get("usage", {})
         state.usage = usage
-        if state.stop_reason is not None:
-            async for payload in _flush_message_delta(state):
-                yield payload
-            yield {"type": "message_stop"}
-            state.message_stopped = True
-        return
+        if state.stop_reason is None:
+            return []
+        return _finish_message(state)
+
+    return []
 
 
-async def _flush_message_delta(state: StreamState) -> AsyncIterator[dict[str, Any]]:
+def _finish_message(state: StreamState) -> list[dict[str, Any]]:
+    payloads = _message_delta_payloads(state)
+    payloads.append({"type": "message_stop"})
+    state.message_stopped = True
+    return payloads
+
+
+def _message_delta_payloads(state: StreamState) -> list[dict[str, Any]]:
     if state.stop_reason is None and not state.usage:
-        return
+        return []
     usage = state.usage or {}
-    yield {
+    payload = {
         "type": "message_delta",
         "delta": {"stop_reason": state.stop_reason, "stop_sequence": None},
         "usage": {
@@ -163,6 +287,7 @@ async def _flush_message_delta(state: StreamState) -> AsyncIterator[dict[str, An
     }
     state.stop_reason = None
     state.usage = None
+    return [payload]
 
 
 def _map_content_block_start(start: dict[str, Any]) -> dict[str, Any] | None:
@@ -188,4 +313,12 @@ def _map_content_block_delta(delta: dict[str, Any]) -> dict[str, Any] | None:
 
 
 def _to_sse(payload: dict[str, Any]) -> bytes:
-    return f"data: {json.dumps(payload)}\n\n".encode()
+    return b"data: " + dumps(payload) + b"\n\n"
+
+
+def _text_delta_sse(index: int, text: str) -> bytes:
+    """``_to_sse`` of a text ``content_block_delta`` without building the dict."""
+    return (
+        b'data: {"type":"content_block_delta","index":%d,'
+        b'"delta":{"type":"text_delta","text":%s}}\n\n' % (index, dumps(text))
+    )
@@ -0,0 +1,127 @@
+"""Per-access-key Bedrock region lists, health tracking and load spreading.
+
+An access key's ``bedrock_regions`` is a comma-separated list of regions,
+each optionally suffixed with ``:weight`` (``us-east-1:3,us-west-2:1``).
+Without weights the list is a failover order: every call starts in the first
+healthy region. With weights, calls are spread across the regions in
+proportion and fail over through the rest in list order. The key's
+``bedrock_region`` always takes part; it goes first when the list omits it.
+
+A geography-scoped inference profile (``us.``, ``eu.``, ``apac.`` ...) can
+only be called from regions in its geography, so other listed regions are left
+out of its plan.
+"""
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from ..config import get_settings
+
+_ENTRY = re.compile(r"^([a-z]{2}(?:-[a-z]+)+-\d+)(?::([1-9]\d{0,2}))?$")
+
+# Inference profile prefix -> region name prefixes it can be called from.
+_PROFILE_REGIONS: dict[str, tuple[str, ...]] = {
+    "us": ("us-east-", "us-west-"),
+    "us-gov": ("us-gov-",),
+    "eu": ("eu-",),
+    "apac": ("ap-",),
+    "jp": ("ap-northeast-1", "ap-northeast-3"),
+    "au": ("ap-southeast-2", "ap-southeast-4"),
+}
+
+
+@dataclass(frozen=True)
+class RegionPlan:
+    """Parsed region list: regions in failover order and their spread weights."""
+
+    regions: tuple[str, ...]
+    # None means failover only: always start at the first healthy region.
+    weights: tuple[int, ...] | None = None
+
+
+@lru_cache(maxsize=1024)
+def parse_region_plan(primary: str, spec: str | None, model_id: str | None = None) -> RegionPlan:
+    """Parse an access key's region list. Raises ValueError on a malformed entry.
+
+    With ``model_id``, listed regions that model cannot be called from are
+    dropped; ``primary`` is always kept.
+    """
+    allowed = _PROFILE_REGIONS.get(model_id.split(".", 1)[0]) if model_id else None
+    regions: list[str] = []
+    weights: list[int] = []
+    weighted = False
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        match = _ENTRY.match(entry)
+        if match is None:
+            raise ValueError(f"Invalid Bedrock region entry: {entry!r}")
+        region, weight = match.groups()
+        if region in regions:
+            continue
+        if allowed is not None and region != primary and not region.startswith(allowed):
+            continue
+        weighted = weighted or weight is not None
+        regions.append(region)
+        weights.append(int(weight) if weight is not None else 1)
+    if primary not in regions:
+        regions.insert(0, primary)
+        weights.insert(0, 1)
+    return RegionPlan(tuple(regions), tuple(weights) if weighted else None)
+
+
+@dataclass
+class RegionBalancer:
+    """Orders the regions each Bedrock call should try, per access key.
+
+    A region that throttles or fails is skipped for ``cooldown`` seconds for
+    that key (quotas belong to the key's AWS account, not the whole proxy).
+    Skipped regions are still tried last, soonest-recovering first, so a key
+    whose every region is cooling down isn't refused outright. Weighted lists
+    use smooth weighted round-robin, which interleaves regions evenly and is
+    deterministic. State is kept per worker.
+    """
+
+    cooldown: float = field(
+        default_factory=lambda: get_settings().bedrock_region_cooldown
+    )
+    clock: Callable[[], float] = time.monotonic
+    _cooling_until: dict[tuple[str, str], float] = field(default_factory=dict)
+    _spread: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def order(self, key: str, plan: RegionPlan) -> list[str]:
+        """Regions to try for one call, best first."""
+        regions = list(plan.regions)
+        if plan.weights is not None and len(regions) > 1:
+            start = self._next_weighted(key, plan)
+            regions.remove(start)
+            regions.insert(0, start)
+        now = self.clock()
+        healthy = [r for r in regions if self._cooling_until.get((key, r), 0.0) <= now]
+        cooling = sorted(
+            (r for r in regions if r not in healthy),
+            key=lambda r: self._cooling_until[(key, r)],
+        )
+        return healthy + cooling
+
+    def mark_unhealthy(self, key: str, region: str) -> None:
+        self._cooling_until[(key, region)] = self.clock() + self.cooldown
+
+    def mark_healthy(self, key: str, region: str) -> None:
+        self._cooling_until.pop((key, region), None)
+
+    def is_healthy(self, key: str, region: str) -> bool:
+        return self._cooling_until.get((key, region), 0.0) <= self.clock()
+
+    def _next_weighted(self, key: str, plan: RegionPlan) -> str:
+        current = self._spread.get(key)
+        if current is None or current.keys() != set(plan.regions):
+            current = self._spread[key] = dict.fromkeys(plan.regions, 0)
+        for region, weight in zip(plan.regions, plan.weights):
+            current[region] += weight
+        chosen = max(plan.regions, key=current.__getitem__)
+        current[chosen] -= sum(plan.weights)
+        return chosen
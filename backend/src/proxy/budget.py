@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal, ROUND_HALF_UP
+from typing import Awaitable, Callable
 from zoneinfo import ZoneInfo
 from uuid import UUID
 
+from ..config import get_settings
 from ..logging import get_logger
 from ..repositories import UserRepository, UsageAggregateRepository
+from ..telemetry import stage_timer
+from .cache import DataclassCodec, TwoLevelCache
 from .dependencies import get_proxy_deps
 
 logger = get_logger(__name__)
@@ -26,6 +31,16 @@ class BudgetCheckResult:
 
 @dataclass
 class CachedBudgetInfo:
+    """Budget ledger entry: a user's running spend for one KST month.
+
+    ``current_usage`` is seeded from usage_aggregates and then advanced by
+    ``record_budget_spend`` as costs are recorded. With a shared tier the seed
+    is stored there unchanged and spend goes to a counter beside it, which
+    workers add when they read the entry. The entry expires
+    ``budget_cache_ttl`` seconds after it was seeded, which re-seeds it from
+    the database and corrects any drift.
+    """
+
     user_id: UUID
     monthly_budget: Decimal | None
     current_usage: Decimal
@@ -34,6 +49,12 @@ class CachedBudgetInfo:
     cached_at: datetime
 
 
+_LEDGER_CODEC = DataclassCodec(CachedBudgetInfo)
+# usage_aggregates keeps six decimal places; a Redis counter is a float and
+# can drift past them.
+_USAGE_QUANTUM = Decimal("0.000001")
+
+
 class BudgetService:
     """Budget checks backed by usage aggregates."""
 
@@ -49,17 +70,10 @@ class BudgetService:
         self._cache = get_proxy_deps().budget_cache
 
     def get_month_window(self, now: datetime | None = None) -> tuple[datetime, datetime]:
-        now_kst = (now or datetime.now(timezone.utc)).astimezone(self.KST)
-        start = now_kst.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        if start.month == 12:
-            end = start.replace(year=start.year + 1, month=1)
-        else:
-            end = start.replace(month=start.month + 1)
-        return start, end
+        return budget_month_window(now)
 
     async def get_user_budget(self, user_id: UUID) -> Decimal | None:
-        user = await self._user_repo.get_by_id(user_id)
-        return user.monthly_budget_usd if user else None
+        return await self._user_repo.get_monthly_budget(user_id)
 
     async def get_current_month_usage(self, user_id: UUID) -> Decimal:
         start_kst, end_kst = self.get_month_window()
@@ -74,42 +88,91 @@ class BudgetService:
         period_end = period_end_exclusive - timedelta(seconds=1)
         cache_key = str(user_id)
 
-        cached = self._cache.get(cache_key)
-        if isinstance(cached, CachedBudgetInfo) and cached.period_start == period_start:
-            return _build_budget_result(
-                cached.monthly_budget,
-                cached.current_usage,
-                cached.period_start,
-                cached.period_end,
-            )
+        async def _seed() -> CachedBudgetInfo:
+            with stage_timer("budget_load"):
+                return _ledger_entry(
+                    user_id,
+                    await self.get_user_budget(user_id),
+                    await self.get_current_month_usage(user_id),
+                    period_start,
+                    period_end_exclusive,
+                )
+
+        async def _load() -> CachedBudgetInfo | None:
+            return await _load_ledger(self._cache, cache_key, _seed)
 
         try:
-            monthly_budget = await self.get_user_budget(user_id)
-            current_usage = await self.get_current_month_usage(user_id)
+            with stage_timer("budget_check"):
+                cached = await self._cache.get_or_load(cache_key, _load)
+                if cached.period_start != period_start:
+                    # Ledger from the previous KST month: drop it everywhere and re-seed.
+                    # The shared copy must be gone first or the reload reads it back.
+                    await self._cache.ainvalidate(cache_key)
+                    cached = await self._cache.get_or_load(cache_key, _load)
         except Exception as exc:
             logger.warning("budget_lookup_failed", user_id=str(user_id), error=str(exc))
             if fail_open:
                 return _build_budget_result(None, Decimal("0"), period_start, period_end)
             raise
 
-        self._cache.set(
-            cache_key,
-            CachedBudgetInfo(
-                user_id=user_id,
-                monthly_budget=monthly_budget,
-                current_usage=current_usage,
-                period_start=period_start,
-                period_end=period_end,
-                cached_at=datetime.now(timezone.utc),
-            ),
+        return _build_budget_result(
+            cached.monthly_budget,
+            cached.current_usage,
+            cached.period_start,
+            cached.period_end,
         )
 
-        return _build_budget_result(monthly_budget, current_usage, period_start, period_end)
-
     def invalidate_cache(self, user_id: UUID) -> None:
         self._cache.invalidate(str(user_id))
 
 
+def budget_month_window(now: datetime | None = None) -> tuple[datetime, datetime]:
+    """[start, end) of the current KST budget month, as KST datetimes."""
+    now_kst = (now or datetime.now(timezone.utc)).astimezone(BudgetService.KST)
+    start = now_kst.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+    return start, end
+
+
+def _ledger_entry(
+    user_id: UUID,
+    monthly_budget: Decimal | None,
+    current_usage: Decimal,
+    period_start: datetime,
+    period_end_exclusive: datetime,
+) -> CachedBudgetInfo:
+    return CachedBudgetInfo(
+        user_id=user_id,
+        monthly_budget=monthly_budget,
+        current_usage=current_usage,
+        period_start=period_start,
+        period_end=period_end_exclusive - timedelta(seconds=1),
+        cached_at=datetime.now(timezone.utc),
+    )
+
+
+def _spend_counter(entry: CachedBudgetInfo) -> str:
+    # One counter per seed, so a re-seed starts counting from zero.
+    return f"{entry.user_id}:spend:{entry.cached_at.isoformat()}"
+
+
+async def _load_ledger(
+    cache: TwoLevelCache,
+    cache_key: str,
+    seed: Callable[[], Awaitable[CachedBudgetInfo | None]],
+) -> CachedBudgetInfo | None:
+    """The shared seed (or a new one from ``seed``) plus the spend recorded against it."""
+    entry = await cache.load_shared(cache_key, seed, _LEDGER_CODEC)
+    if entry is not None:
+        spend = await cache.acounter(_spend_counter(entry))
+        if spend:
+            entry.current_usage += spend.quantize(_USAGE_QUANTUM)
+    return entry
+
+
 def _build_budget_result(
     monthly_budget: Decimal | None,
     current_usage: Decimal,
@@ -163,5 +226,64 @@ def _format_usd(value: Decimal) -> str:
     return f"{value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP):.2f}"
 
 
+async def prime_budget_cache(
+    user_id: UUID,
+    monthly_budget: Decimal | None,
+    current_usage: Decimal,
+    period_start: datetime,
+    period_end_exclusive: datetime,
+) -> None:
+    """Seed the user's ledger from values loaded elsewhere, unless one is cached.
+
+    An existing entry is kept: it may already include spend recorded since it
+    was seeded.
+    """
+    entry = _ledger_entry(
+        user_id, monthly_budget, current_usage, period_start, period_end_exclusive
+    )
+
+    async def _seed() -> CachedBudgetInfo:
+        return entry
+
+    cache = get_proxy_deps().budget_cache
+    cache_key = str(user_id)
+    await cache.get_or_load(cache_key, lambda: _load_ledger(cache, cache_key, _seed))
+
+
 def invalidate_budget_cache(user_id: UUID) -> None:
     get_proxy_deps().budget_cache.invalidate(str(user_id))
+
+
+async def record_budget_spend(
+    user_id: UUID, amount: Decimal, at: datetime | None = None
+) -> None:
+    """Add newly recorded spend to the user's ledger entry, if one is cached.
+
+    With a shared tier the spend is added atomically to the entry's counter
+    there, so concurrent spends from any number of workers all count, and
+    every worker drops its local copy to read the new total through. The
+    counter expires with the entry, which then re-seeds from usage_aggregates.
+    Without a tier, or if it fails, the local entry is advanced in place.
+    Without an entry there is nothing to advance: the next check seeds it from
+    the database.
+
+    Spend from a different KST month than the entry (month rollover) drops the
+    entry so the next check re-seeds it for the new period.
+    """
+    cache = get_proxy_deps().budget_cache
+    cache_key = str(user_id)
+
+    async def _no_seed() -> None:
+        return None
+
+    cached = await cache.get_or_load(cache_key, lambda: _load_ledger(cache, cache_key, _no_seed))
+    if not isinstance(cached, CachedBudgetInfo):
+        return
+    period_start, _ = budget_month_window(at)
+    if cached.period_start != period_start:
+        await cache.ainvalidate(cache_key)
+        return
+    age = (datetime.now(timezone.utc) - cached.cached_at).total_seconds()
+    ttl = math.ceil(get_settings().budget_cache_ttl - age)
+    if ttl <= 0 or await cache.aincrement(cache_key, _spend_counter(cached), amount, ttl) is None:
+        cached.current_usage += amount
@@ -1,29 +1,357 @@
-from time import time
-from typing import Any
+from __future__ import annotations
+
+import asyncio
+import random
+import types
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from time import monotonic
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+from uuid import UUID
+
+from ..json_codec import dumps, loads
+from ..logging import get_logger
+
+if TYPE_CHECKING:
+    from .shared_cache import SharedCacheTier
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class CacheStats:
+    size: int
+    max_size: int | None
+    hits: int
+    misses: int
+    stale_hits: int
+    evictions: int
+    expirations: int
+    loads: int
+    coalesced: int
+    load_errors: int
 
 
 class TTLCache:
-    """Simple in-memory TTL cache."""
+    """In-memory LRU cache with per-entry TTL.
 
-    def __init__(self, ttl: int):
+    Bounded to ``max_size`` entries (least recently used evicted first). Each
+    entry's TTL is shortened by up to ``jitter`` (a fraction) so entries written
+    together do not expire together. After expiry an entry is kept for
+    ``stale_ttl`` more seconds: ``get_or_load`` then returns it while a single
+    caller refreshes it, and falls back to it if that refresh fails.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        max_size: int | None = None,
+        jitter: float = 0.0,
+        stale_ttl: int = 0,
+        clock: Callable[[], float] = monotonic,
+    ):
         self._ttl = ttl
-        self._cache: dict[str, tuple[Any, float]] = {}
+        self._max_size = max_size
+        self._jitter = jitter
+        self._stale_ttl = stale_ttl
+        self._clock = clock
+        # key -> (value, fresh_until, stale_until)
+        self._cache: OrderedDict[str, tuple[Any, float, float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._loads = 0
+        self._coalesced = 0
+        self._load_errors = 0
 
     def get(self, key: str) -> Any | None:
         entry = self._cache.get(key)
-        if entry is None:
-            return None
-        value, expires_at = entry
-        if time() > expires_at:
-            del self._cache[key]
-            return None
-        return value
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            now = self._clock()
+            if now <= fresh_until:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return value
+            if now > stale_until:
+                self._expire(key)
+        self._misses += 1
+        return None
 
     def set(self, key: str, value: Any) -> None:
-        self._cache[key] = (value, time() + self._ttl)
+        ttl = self._ttl * (1 - random.random() * self._jitter) if self._jitter else self._ttl
+        fresh_until = self._clock() + ttl
+        self._cache[key] = (value, fresh_until, fresh_until + self._stale_ttl)
+        self._cache.move_to_end(key)
+        if self._max_size is not None:
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+                self._evictions += 1
 
     def invalidate(self, key: str) -> None:
         self._cache.pop(key, None)
+        # A load that started before the invalidation must not repopulate the key.
+        self._inflight.pop(key, None)
 
     def clear(self) -> None:
         self._cache.clear()
+        self._inflight.clear()
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[T]]) -> T | None:
+        """Return the cached value, calling ``loader`` at most once per key at a time.
+
+        Concurrent misses for the same key wait for the first caller's load.
+        ``None`` results are returned but not cached.
+        """
+        entry = self._cache.get(key)
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            now = self._clock()
+            if now <= fresh_until:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return value
+            if now <= stale_until:
+                self._stale_hits += 1
+                if key in self._inflight:
+                    return value
+                try:
+                    return await self._load(key, loader)
+                except Exception as exc:
+                    logger.warning("cache_refresh_failed_serving_stale", error=str(exc))
+                    return value
+            self._expire(key)
+
+        self._misses += 1
+        while (inflight := self._inflight.get(key)) is not None:
+            self._coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The leading caller was cancelled; take over its load.
+                if not inflight.cancelled():
+                    raise
+        return await self._load(key, loader)
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            size=len(self._cache),
+            max_size=self._max_size,
+            hits=self._hits,
+            misses=self._misses,
+            stale_hits=self._stale_hits,
+            evictions=self._evictions,
+            expirations=self._expirations,
+            loads=self._loads,
+            coalesced=self._coalesced,
+            load_errors=self._load_errors,
+        )
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[T]]) -> T | None:
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._loads += 1
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            self._load_errors += 1
+            future.set_exception(exc)
+            # Waiters re-raise it; mark it retrieved in case there are none.
+            future.exception()
+            raise
+        else:
+            if value is not None and self._inflight.get(key) is future:
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _expire(self, key: str) -> None:
+        del self._cache[key]
+        self._expirations += 1
+
+
+class DataclassCodec(Generic[T]):
+    """JSON codec for flat cache-entry dataclasses.
+
+    Field values are restored from the dataclass type hints, so UUID, Decimal,
+    datetime and Enum fields round-trip through the shared tier.
+    """
+
+    def __init__(self, cls: type[T]):
+        self._cls = cls
+        hints = get_type_hints(cls)
+        self._types = {f.name: _strip_optional(hints[f.name]) for f in fields(cls)}
+
+    def encode(self, value: T) -> bytes:
+        data = {name: _to_json(getattr(value, name)) for name in self._types}
+        return dumps(data)
+
+    def decode(self, raw: bytes) -> T:
+        data = loads(raw)
+        return self._cls(
+            **{name: _from_json(data[name], typ) for name, typ in self._types.items()}
+        )
+
+
+def _strip_optional(hint: Any) -> Any:
+    if get_origin(hint) in (Union, types.UnionType):
+        args = [arg for arg in get_args(hint) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return hint
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _from_json(value: Any, typ: Any) -> Any:
+    if value is None:
+        return None
+    if typ is datetime:
+        return datetime.fromisoformat(value)
+    if typ in (UUID, Decimal) or (isinstance(typ, type) and issubclass(typ, Enum)):
+        return typ(value)
+    return value
+
+
+class TwoLevelCache(TTLCache):
+    """Per-worker TTLCache that can sit in front of a shared cache tier.
+
+    The synchronous ``get``/``set`` only touch the local level. ``aget``/``aset``
+    and ``get_or_load`` also read through to / write to the shared tier when one
+    is attached and a codec is given; entries without a codec stay process-local. ``invalidate``
+    always fans out to every worker through the tier's pub/sub channel. Shared
+    counters (``aincrement``/``acounter``) live only in the tier.
+    """
+
+    def __init__(self, ttl: int, namespace: str, **kwargs: Any):
+        super().__init__(ttl, **kwargs)
+        self.namespace = namespace
+        self._tier: SharedCacheTier | None = None
+
+    def attach(self, tier: SharedCacheTier | None) -> None:
+        self._tier = tier
+
+    async def aget(self, key: str, codec: DataclassCodec[T] | None = None) -> T | None:
+        value = self.get(key)
+        if value is not None or self._tier is None or codec is None:
+            return value
+        value = await self._read_shared(key, codec)
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    async def aset(self, key: str, value: T, codec: DataclassCodec[T] | None = None) -> None:
+        self.set(key, value)
+        if self._tier is not None and codec is not None:
+            await self._tier.set(self.namespace, key, codec.encode(value), self._ttl)
+
+    async def load_shared(
+        self, key: str, loader: Callable[[], Awaitable[T]], codec: DataclassCodec[T]
+    ) -> T | None:
+        """Read ``key`` from the shared tier, else call ``loader`` and store its result there.
+
+        Skips the local level; without a tier this just calls ``loader``.
+        """
+        if self._tier is None:
+            return await loader()
+        value = await self._read_shared(key, codec)
+        if value is None:
+            value = await loader()
+            if value is not None and self._tier is not None:
+                await self._tier.set(self.namespace, key, codec.encode(value), self._ttl)
+        return value
+
+    async def aincrement(
+        self, key: str, counter: str, amount: Decimal, ttl: int
+    ) -> Decimal | None:
+        """Atomically add ``amount`` to a shared counter and drop ``key`` on every worker.
+
+        A new counter expires after ``ttl`` seconds. Returns its total, or None
+        without a tier or when the tier failed.
+        """
+        if self._tier is None:
+            return None
+        total = await self._tier.increment(self.namespace, key, counter, amount, ttl)
+        if total is not None:
+            self.invalidate_local(key)
+        return total
+
+    async def acounter(self, counter: str) -> Decimal:
+        """A shared counter's total; zero when unset, without a tier or on failure."""
+        if self._tier is None:
+            return Decimal("0")
+        raw = await self._tier.get(self.namespace, counter)
+        return Decimal(raw.decode()) if raw is not None else Decimal("0")
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T]],
+        codec: DataclassCodec[T] | None = None,
+    ) -> T | None:
+        """``TTLCache.get_or_load`` that consults the shared tier before ``loader``."""
+        if self._tier is None or codec is None:
+            return await super().get_or_load(key, loader)
+        return await super().get_or_load(key, lambda: self.load_shared(key, loader, codec))
+
+    def invalidate(self, key: str) -> None:
+        self.invalidate_local(key)
+        if self._tier is not None:
+            self._tier.publish_invalidation(self.namespace, key)
+
+    async def ainvalidate(self, key: str) -> None:
+        """``invalidate`` that returns once the shared entry is gone."""
+        self.invalidate_local(key)
+        if self._tier is not None:
+            await self._tier.invalidate(self.namespace, key)
+
+    def invalidate_local(self, key: str) -> None:
+        super().invalidate(key)
+
+    async def _read_shared(self, key: str, codec: DataclassCodec[T]) -> T | None:
+        raw = await self._tier.get(self.namespace, key)
+        if raw is None:
+            return None
+        try:
+            return codec.decode(raw)
+        except Exception as exc:
+            logger.warning("shared_cache_decode_failed", namespace=self.namespace, error=str(exc))
+            return None
+
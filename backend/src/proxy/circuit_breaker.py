@@ -1,9 +1,36 @@
+"""Per-access-key circuit breaker, optionally shared across workers.
+
+A circuit opens when a key's recent Plan calls fail often enough: at least
+``failure_threshold`` circuit-triggering failures within a sliding
+``failure_window`` that also make up ``failure_rate_threshold`` of the calls
+seen in it. After ``reset_timeout`` the circuit goes half-open and admits at
+most ``half_open_max_probes`` probe requests while everything else keeps going
+to Bedrock. A successful probe closes the circuit; a failed one reopens it for
+twice as long, up to ``max_reset_timeout``.
+
+Every worker keeps its own view of each key's circuit. With a ``CircuitStore``
+attached, failures are also counted in the store, the first worker to open a
+circuit opens it for all of them, and half-open probes are capped fleet-wide,
+so a 429 storm seen by one worker is not paid for again by every other one.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import time
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta, timezone
 from enum import Enum
+from typing import Any, Awaitable, Callable, Protocol, TypeVar
 
 from ..config import get_settings
 from ..domain import CIRCUIT_TRIGGERS, ErrorType
+from ..logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_WINDOW_SLOTS = 10
 
 
 class CircuitState(str, Enum):
@@ -12,69 +39,460 @@ class CircuitState(str, Enum):
     HALF_OPEN = "half_open"
 
 
+class OutcomeWindow:
+    """Failure and call counts over a sliding window, in fixed time slots.
+
+    The window advances one slot (a tenth of its length) at a time, so memory
+    and the cost of ``add``/``counts`` stay constant however busy the key is.
+    """
+
+    __slots__ = ("_width", "_epochs", "_failures", "_calls")
+
+    def __init__(self, window: float, slots: int = _WINDOW_SLOTS):
+        self._width = window / slots
+        self._epochs = [-1] * slots
+        self._failures = [0] * slots
+        self._calls = [0] * slots
+
+    def add(self, now: float, failed: bool) -> None:
+        epoch = int(now // self._width)
+        slot = epoch % len(self._epochs)
+        if self._epochs[slot] != epoch:
+            self._epochs[slot] = epoch
+            self._failures[slot] = 0
+            self._calls[slot] = 0
+        self._calls[slot] += 1
+        if failed:
+            self._failures[slot] += 1
+
+    def counts(self, now: float) -> tuple[int, int]:
+        """``(failures, calls)`` inside the window ending at ``now``."""
+        newest = int(now // self._width)
+        oldest = newest - len(self._epochs) + 1
+        failures = calls = 0
+        for slot, epoch in enumerate(self._epochs):
+            if oldest <= epoch <= newest:
+                failures += self._failures[slot]
+                calls += self._calls[slot]
+        return failures, calls
+
+    def clear(self) -> None:
+        for slot in range(len(self._epochs)):
+            self._epochs[slot] = -1
+
+
 @dataclass
 class KeyCircuitState:
+    window: OutcomeWindow
     state: CircuitState = CircuitState.CLOSED
-    failure_count: int = 0
-    last_failure_at: datetime | None = None
-    opened_at: datetime | None = None
+    # Epoch seconds from the breaker's clock.
+    opened_at: float | None = None
+    reset_after: float = 0.0
+    # Admission times of half-open probes still in flight.
+    probes: list[float] = field(default_factory=list)
+    # Clock time of the last shared-store read.
+    synced_at: float | None = None
+
+
+class CircuitStore(Protocol):
+    """Fleet-wide failure counts, open circuits and probe slots, by access key id."""
+
+    async def add_failure(self, key_id: str, window: int) -> int:
+        """Count one failure and return the total.
+
+        The count lapses ``window`` seconds after the most recent failure.
+        """
+        ...
+
+    async def open(
+        self, key_id: str, opened_at: float, reset_after: float, replace: bool = False
+    ) -> tuple[float, float]:
+        """Open the circuit for ``reset_after`` seconds and free its probe slots.
+
+        Unless ``replace`` is set, an already open circuit is left alone. Returns
+        the ``(opened_at, reset_after)`` now in effect, whichever worker set it.
+        """
+        ...
+
+    async def get_open(self, key_id: str) -> tuple[float, float] | None:
+        """``(opened_at, reset_after)`` of an open circuit, or None."""
+        ...
+
+    async def try_probe(self, key_id: str, limit: int, lease: float) -> bool:
+        """Take one of ``limit`` half-open probe slots; a slot lapses after ``lease``."""
+        ...
+
+    async def release_probe(self, key_id: str) -> None:
+        """Give back a probe slot whose outcome said nothing about the key."""
+        ...
+
+    async def reset(self, key_id: str) -> None:
+        """Close the circuit and clear its failure count and probe slots."""
+        ...
+
+    async def aclose(self) -> None: ...
+
+
+class InMemoryCircuitStore:
+    """In-process stand-in for Redis.
+
+    Several breakers sharing one instance behave like workers sharing a Redis
+    server, which is what the tests and ``memory://`` local runs rely on.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
+        self._failures: dict[str, tuple[int, float]] = {}
+        self._open: dict[str, tuple[float, float, float]] = {}
+        self._probes: dict[str, tuple[int, float]] = {}
+
+    async def add_failure(self, key_id: str, window: int) -> int:
+        now = self._clock()
+        count, expires_at = self._failures.get(key_id, (0, 0.0))
+        if now >= expires_at:
+            count = 0
+        count += 1
+        self._failures[key_id] = (count, now + window)
+        return count
+
+    async def open(
+        self, key_id: str, opened_at: float, reset_after: float, replace: bool = False
+    ) -> tuple[float, float]:
+        if not replace:
+            current = await self.get_open(key_id)
+            if current is not None:
+                return current
+        self._open[key_id] = (opened_at, reset_after, self._clock() + reset_after)
+        self._probes.pop(key_id, None)
+        return opened_at, reset_after
+
+    async def get_open(self, key_id: str) -> tuple[float, float] | None:
+        entry = self._open.get(key_id)
+        if entry is None:
+            return None
+        opened_at, reset_after, expires_at = entry
+        if self._clock() >= expires_at:
+            del self._open[key_id]
+            return None
+        return opened_at, reset_after
+
+    async def try_probe(self, key_id: str, limit: int, lease: float) -> bool:
+        now = self._clock()
+        count, expires_at = self._probes.get(key_id, (0, now + lease))
+        if now >= expires_at:
+            count, expires_at = 0, now + lease
+        if count >= limit:
+            return False
+        self._probes[key_id] = (count + 1, expires_at)
+        return True
+
+    async def release_probe(self, key_id: str) -> None:
+        entry = self._probes.get(key_id)
+        if entry is not None:
+            self._probes[key_id] = (max(entry[0] - 1, 0), entry[1])
+
+    async def reset(self, key_id: str) -> None:
+        self._failures.pop(key_id, None)
+        self._open.pop(key_id, None)
+        self._probes.pop(key_id, None)
+
+    async def aclose(self) -> None:
+        return None
+
+
+class RedisCircuitStore:
+    """Store over a ``redis.asyncio.Redis`` client (or anything API-compatible).
+
+    Failure and probe counts are ``INCR`` with an expiry in one MULTI, and the
+    open marker is ``SET NX EX``, so concurrent workers never lose a failure,
+    over-admit probes or disagree on when the circuit opened. Every key
+    expires on its own; nothing needs cleaning up.
+    """
+
+    def __init__(self, client: Any, key_prefix: str | None = None):
+        self._client = client
+        self._prefix = f"{key_prefix or get_settings().shared_cache_key_prefix}:circuit"
+
+    @classmethod
+    def from_url(cls, url: str, key_prefix: str | None = None) -> RedisCircuitStore:
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:  # pragma: no cover - depends on install extras
+            raise RuntimeError(
+                "PROXY_SHARED_CACHE_URL points at Redis but the 'redis' package is not "
+                "installed; install claude-code-proxy[redis]"
+            ) from exc
+        return cls(redis.from_url(url), key_prefix)
+
+    async def add_failure(self, key_id: str, window: int) -> int:
+        key = self._key(key_id, "failures")
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, window)
+            count, _ = await pipe.execute()
+        return int(count)
+
+    async def open(
+        self, key_id: str, opened_at: float, reset_after: float, replace: bool = False
+    ) -> tuple[float, float]:
+        key = self._key(key_id, "open")
+        value = f"{opened_at!r}:{reset_after!r}"
+        if await self._client.set(key, value, ex=max(math.ceil(reset_after), 1), nx=not replace):
+            await self._client.delete(self._key(key_id, "probes"))
+            return opened_at, reset_after
+        current = await self.get_open(key_id)
+        return current if current is not None else (opened_at, reset_after)
+
+    async def get_open(self, key_id: str) -> tuple[float, float] | None:
+        value = await self._client.get(self._key(key_id, "open"))
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            value = value.decode()
+        opened_at, _, reset_after = value.partition(":")
+        return float(opened_at), float(reset_after)
+
+    async def try_probe(self, key_id: str, limit: int, lease: float) -> bool:
+        key = self._key(key_id, "probes")
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.set(key, 0, ex=max(math.ceil(lease), 1), nx=True)
+            pipe.incr(key)
+            _, count = await pipe.execute()
+        if count <= limit:
+            return True
+        await self._client.decr(key)
+        return False
+
+    async def release_probe(self, key_id: str) -> None:
+        key = self._key(key_id, "probes")
+        if await self._client.decr(key) < 0:
+            # The slot had already lapsed; don't leave a negative, unexpiring count.
+            await self._client.delete(key)
+
+    async def reset(self, key_id: str) -> None:
+        await self._client.delete(
+            self._key(key_id, "failures"), self._key(key_id, "open"), self._key(key_id, "probes")
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _key(self, key_id: str, kind: str) -> str:
+        return f"{self._prefix}:{key_id}:{kind}"
+
+
+def create_circuit_store(url: str) -> CircuitStore:
+    """Build a store from ``PROXY_SHARED_CACHE_URL``."""
+    if url.startswith("memory://"):
+        return InMemoryCircuitStore()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCircuitStore.from_url(url)
+    raise ValueError(f"Unsupported circuit store URL scheme: {url.split('://', 1)[0]}")
 
 
 @dataclass
 class CircuitBreaker:
-    """Per-access-key circuit breaker."""
+    """Per-access-key circuit breaker.
+
+    Callers ask ``is_open`` before calling Plan and report the outcome with
+    ``record_success``/``record_failure``; a False from ``is_open`` on a
+    half-open circuit admits the caller as a probe.
+
+    Without a store, state is per worker. With one, each key's shared state is
+    read at most once per ``sync_interval`` while closed or open, and only
+    failures, probes and state changes write to it. Store errors and timeouts
+    are logged and the worker falls back to its local view.
+    """
 
     failure_threshold: int = field(default_factory=lambda: get_settings().circuit_failure_threshold)
     failure_window: int = field(default_factory=lambda: get_settings().circuit_failure_window)
+    failure_rate_threshold: float = field(
+        default_factory=lambda: get_settings().circuit_failure_rate_threshold
+    )
     reset_timeout: int = field(default_factory=lambda: get_settings().circuit_reset_timeout)
+    max_reset_timeout: int = field(
+        default_factory=lambda: get_settings().circuit_max_reset_timeout
+    )
+    half_open_max_probes: int = field(
+        default_factory=lambda: get_settings().circuit_half_open_max_probes
+    )
+    # A probe that never reports back frees its slot after this long.
+    probe_timeout: float = field(default_factory=lambda: get_settings().http_read_timeout)
+    store: CircuitStore | None = None
+    sync_interval: float = field(default_factory=lambda: get_settings().circuit_sync_interval)
+    store_timeout: float = field(default_factory=lambda: get_settings().shared_cache_timeout)
+    clock: Callable[[], float] = time.time
     _states: dict[str, KeyCircuitState] = field(default_factory=dict)
 
-    def is_open(self, key_id: str) -> bool:
+    async def is_open(self, key_id: str) -> bool:
         state = self._states.get(key_id)
-        if not state:
-            return False
+        if state is None:
+            if self.store is None:
+                return False
+            state = self._state(key_id)
+        now = self.clock()
 
         if state.state == CircuitState.OPEN:
-            # Check if should transition to half-open
-            if state.opened_at and datetime.now(timezone.utc) > state.opened_at + timedelta(
-                seconds=self.reset_timeout
-            ):
-                state.state = CircuitState.HALF_OPEN
-                return False
-            return True
+            if now < state.opened_at + state.reset_after:
+                if self._sync_due(state, now) and not await self._still_open(key_id, state):
+                    return False
+                return True
+            state.state = CircuitState.HALF_OPEN
+            state.probes.clear()
+            logger.info("circuit_half_open", access_key_id=key_id)
+
+        if state.state == CircuitState.HALF_OPEN:
+            if self._sync_due(state, now) and await self._reopened_by_peer(key_id, state):
+                return True
+            return not await self._admit_probe(key_id, state, now)
 
+        if self._sync_due(state, now):
+            return await self._reopened_by_peer(key_id, state)
         return False
 
-    def record_success(self, key_id: str) -> None:
-        state = self._states.get(key_id)
-        if state and state.state == CircuitState.HALF_OPEN:
-            # Reset to closed on success in half-open
-            state.state = CircuitState.CLOSED
-            state.failure_count = 0
-            state.opened_at = None
-
-    def record_failure(self, key_id: str, error_type: ErrorType) -> None:
-        # Only circuit-triggering errors count
+    def state_counts(self) -> dict[CircuitState, int]:
+        """Number of tracked keys in each state (every state is present)."""
+        counts = {state: 0 for state in CircuitState}
+        for key_state in self._states.values():
+            counts[key_state.state] += 1
+        return counts
+
+    async def record_success(self, key_id: str) -> None:
+        state = self._state(key_id)
+        if state.state == CircuitState.HALF_OPEN:
+            await self._close(key_id, state)
+            return
+        state.window.add(self.clock(), failed=False)
+
+    async def record_failure(self, key_id: str, error_type: ErrorType) -> None:
+        state = self._state(key_id)
+        now = self.clock()
+
         if error_type not in CIRCUIT_TRIGGERS:
+            # Says nothing about throttling; a probe that got one just frees its slot.
+            if state.state == CircuitState.HALF_OPEN and state.probes:
+                state.probes.pop(0)
+                if self.store is not None:
+                    await self._call_store("release_probe", self.store.release_probe(key_id))
+            return
+
+        if state.state == CircuitState.HALF_OPEN:
+            reset_after = min(state.reset_after * 2, self.max_reset_timeout)
+            await self._open(key_id, state, now, reset_after, replace=True)
+            return
+        if state.state == CircuitState.OPEN:
             return
 
-        now = datetime.now(timezone.utc)
+        state.window.add(now, failed=True)
+        failures, calls = state.window.counts(now)
+        if self.store is not None:
+            shared = await self._call_store(
+                "add_failure", self.store.add_failure(key_id, self.failure_window)
+            )
+            if shared is not None and shared > failures:
+                # Peers' failures count; their successes aren't known here.
+                calls += shared - failures
+                failures = shared
+
+        if failures >= self.failure_threshold and failures >= calls * self.failure_rate_threshold:
+            await self._open(key_id, state, now, float(self.reset_timeout))
+
+    async def aclose(self) -> None:
+        if self.store is not None:
+            await self.store.aclose()
+
+    def _state(self, key_id: str) -> KeyCircuitState:
         state = self._states.get(key_id)
+        if state is None:
+            state = self._states[key_id] = KeyCircuitState(OutcomeWindow(self.failure_window))
+        return state
 
-        if not state:
-            state = KeyCircuitState()
-            self._states[key_id] = state
+    async def _open(
+        self,
+        key_id: str,
+        state: KeyCircuitState,
+        now: float,
+        reset_after: float,
+        replace: bool = False,
+    ) -> None:
+        opened_at = now
+        if self.store is not None:
+            shared = await self._call_store(
+                "open", self.store.open(key_id, now, reset_after, replace=replace)
+            )
+            if shared is not None:
+                opened_at, reset_after = shared
+        state.state = CircuitState.OPEN
+        state.opened_at = opened_at
+        state.reset_after = reset_after
+        state.probes.clear()
+        state.synced_at = now
+        logger.warning("circuit_opened", access_key_id=key_id, reset_after=reset_after)
 
-        # Reset count if outside failure window
-        if state.last_failure_at and now > state.last_failure_at + timedelta(
-            seconds=self.failure_window
-        ):
-            state.failure_count = 0
+    async def _close(self, key_id: str, state: KeyCircuitState) -> None:
+        state.state = CircuitState.CLOSED
+        state.opened_at = None
+        state.reset_after = 0.0
+        state.probes.clear()
+        state.window.clear()
+        if self.store is not None:
+            await self._call_store("reset", self.store.reset(key_id))
+        logger.info("circuit_closed", access_key_id=key_id)
 
-        state.failure_count += 1
-        state.last_failure_at = now
+    async def _admit_probe(self, key_id: str, state: KeyCircuitState, now: float) -> bool:
+        expired_before = now - self.probe_timeout
+        state.probes[:] = [started for started in state.probes if started > expired_before]
+        if len(state.probes) >= self.half_open_max_probes:
+            return False
+        if self.store is not None:
+            admitted = await self._call_store(
+                "try_probe",
+                self.store.try_probe(key_id, self.half_open_max_probes, self.probe_timeout),
+            )
+            # Without the store, fall back to this worker's own slot count.
+            if admitted is False:
+                return False
+        state.probes.append(now)
+        return True
+
+    def _sync_due(self, state: KeyCircuitState, now: float) -> bool:
+        if self.store is None:
+            return False
+        if state.synced_at is not None and now - state.synced_at < self.sync_interval:
+            return False
+        state.synced_at = now
+        return True
+
+    async def _reopened_by_peer(self, key_id: str, state: KeyCircuitState) -> bool:
+        """Adopt a circuit another worker opened after this worker's own view."""
+        shared = await self._call_store("get_open", self.store.get_open(key_id))
+        if shared is None:
+            return False
+        opened_at, reset_after = shared
+        if state.opened_at is not None and opened_at <= state.opened_at:
+            return False
+        state.state = CircuitState.OPEN
+        state.opened_at = opened_at
+        state.reset_after = reset_after
+        state.probes.clear()
+        logger.info("circuit_opened_by_peer", access_key_id=key_id)
+        return True
+
+    async def _still_open(self, key_id: str, state: KeyCircuitState) -> bool:
+        """False when a peer's probe closed the circuit this worker sees open."""
+        try:
+            shared = await asyncio.wait_for(self.store.get_open(key_id), self.store_timeout)
+        except Exception as exc:
+            logger.warning("circuit_store_failed", operation="get_open", error=repr(exc))
+            return True
+        if shared is not None:
+            return True
+        await self._close(key_id, state)
+        return False
 
-        # Open circuit if threshold reached
-        if state.failure_count >= self.failure_threshold:
-            state.state = CircuitState.OPEN
-            state.opened_at = now
+    async def _call_store(self, operation: str, call: Awaitable[T]) -> T | None:
+        try:
+            return await asyncio.wait_for(call, self.store_timeout)
+        except Exception as exc:
+            logger.warning("circuit_store_failed", operation=operation, error=repr(exc))
+            return None
@@ -16,3 +16,11 @@ class RequestContext:
     bedrock_model: str
     has_bedrock_key: bool
     routing_strategy: RoutingStrategy = RoutingStrategy.PLAN_FIRST
+    # Extra Bedrock regions to fail over to or spread across; see bedrock_regions.py
+    bedrock_regions: str | None = None
+    # Region of the Bedrock call that served the request, set by BedrockAdapter
+    served_region: str | None = None
+
+    @property
+    def pricing_region(self) -> str:
+        return self.served_region or self.bedrock_region
@@ -2,8 +2,27 @@
 from dataclasses import dataclass, field
 
 from ..config import get_settings
-from .cache import TTLCache
+from .bedrock_converse import ConversationCache
+from .bedrock_regions import RegionBalancer
+from .cache import TTLCache, TwoLevelCache
 from .circuit_breaker import CircuitBreaker
+from .http_clients import HttpClientRegistry
+from .metrics_aggregator import MetricsAggregator
+from .provider_stats import ProviderScoreboard
+from .rate_limit import RateLimiter
+from .shared_cache import SharedCacheTier
+from .usage_writer import UsageWriter
+
+
+def _build_cache(ttl: int, namespace: str) -> TwoLevelCache:
+    settings = get_settings()
+    return TwoLevelCache(
+        ttl,
+        namespace,
+        max_size=settings.cache_max_entries,
+        jitter=settings.cache_ttl_jitter,
+        stale_ttl=settings.cache_stale_ttl,
+    )
 
 
 @dataclass
@@ -11,22 +30,50 @@ class ProxyDependencies:
     """Container for proxy-wide dependencies. Enables test isolation."""
 
     circuit_breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
-    access_key_cache: TTLCache = field(
-        default_factory=lambda: TTLCache(get_settings().access_key_cache_ttl)
+    access_key_cache: TwoLevelCache = field(
+        default_factory=lambda: _build_cache(get_settings().access_key_cache_ttl, "access_key")
     )
-    bedrock_key_cache: TTLCache = field(
-        default_factory=lambda: TTLCache(get_settings().bedrock_key_cache_ttl)
+    bedrock_key_cache: TwoLevelCache = field(
+        default_factory=lambda: _build_cache(get_settings().bedrock_key_cache_ttl, "bedrock_key")
     )
-    budget_cache: TTLCache = field(
-        default_factory=lambda: TTLCache(get_settings().budget_cache_ttl)
+    budget_cache: TwoLevelCache = field(
+        default_factory=lambda: _build_cache(get_settings().budget_cache_ttl, "budget")
     )
+    # Plaintext data keys: never attached to the shared tier.
+    kms_data_key_cache: TTLCache = field(
+        default_factory=lambda: TTLCache(
+            get_settings().kms_data_key_cache_ttl, max_size=get_settings().cache_max_entries
+        )
+    )
+    http_clients: HttpClientRegistry = field(default_factory=HttpClientRegistry)
+    provider_stats: ProviderScoreboard = field(default_factory=ProviderScoreboard)
+    bedrock_regions: RegionBalancer = field(default_factory=RegionBalancer)
+    converse_cache: ConversationCache = field(
+        default_factory=lambda: ConversationCache(get_settings().converse_cache_max_bytes)
+    )
+    rate_limiter: RateLimiter = field(default_factory=RateLimiter)
+    # Started by the app lifespan; None means usage is written inline.
+    usage_writer: UsageWriter | None = None
+    # Started by the app lifespan when PROXY_SHARED_CACHE_URL is set.
+    shared_cache: SharedCacheTier | None = None
+    # Started by the app lifespan; None means one PutMetricData call per request.
+    metrics_aggregator: MetricsAggregator | None = None
+
+    @property
+    def shared_caches(self) -> tuple[TwoLevelCache, ...]:
+        return (self.access_key_cache, self.bedrock_key_cache, self.budget_cache)
 
     def reset(self) -> None:
         """Reset all state. Useful for testing."""
         self.circuit_breaker = CircuitBreaker()
+        self.provider_stats = ProviderScoreboard()
+        self.bedrock_regions = RegionBalancer()
+        self.rate_limiter = RateLimiter()
         self.access_key_cache.clear()
         self.bedrock_key_cache.clear()
         self.budget_cache.clear()
+        self.kms_data_key_cache.clear()
+        self.converse_cache.clear()
 
 
 # Global instance (per-process)
@@ -0,0 +1,82 @@
+"""Hedged upstream calls: race a slow primary against a delayed backup."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Generic, Literal, TypeVar
+
+P = TypeVar("P")
+H = TypeVar("H")
+
+
+@dataclass
+class HedgeRace(Generic[P, H]):
+    """Outcome of ``race_with_hedge``.
+
+    ``primary``/``hedge`` hold each call's result, or None if it was cancelled
+    as the loser or (for the hedge) never started. ``winner`` is None when
+    every call that ran failed.
+    """
+
+    primary: P | None
+    hedge: H | None
+    hedged: bool
+    winner: Literal["primary", "hedge"] | None
+
+
+async def race_with_hedge(
+    primary: Awaitable[P],
+    start_hedge: Callable[[], Awaitable[H]],
+    delay: float,
+    primary_ok: Callable[[P], bool],
+    hedge_ok: Callable[[H], bool],
+    discard: Callable[[P | H], Awaitable[None]] | None = None,
+) -> HedgeRace[P, H]:
+    """Run ``primary``; if it hasn't finished after ``delay`` seconds, start the hedge.
+
+    The first call to finish successfully wins and the other is cancelled. A
+    call that fails doesn't end the race while the other is still running.
+    Callables that hold resources must release them when cancelled; if both
+    calls succeed in the same tick, the loser's result goes to ``discard``.
+    """
+    primary_task = asyncio.ensure_future(primary)
+    hedge_task: asyncio.Future | None = None
+    try:
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done:
+            result = primary_task.result()
+            return HedgeRace(result, None, False, "primary" if primary_ok(result) else None)
+
+        hedge_task = asyncio.ensure_future(start_hedge())
+        pending = {primary_task, hedge_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer the primary when both land together.
+            if primary_task in done and primary_ok(primary_task.result()):
+                await _drop(hedge_task, hedge_ok, discard)
+                return HedgeRace(primary_task.result(), None, True, "primary")
+            if hedge_task in done and hedge_ok(hedge_task.result()):
+                await _drop(primary_task, primary_ok, discard)
+                return HedgeRace(None, hedge_task.result(), True, "hedge")
+        return HedgeRace(primary_task.result(), hedge_task.result(), True, None)
+    finally:
+        for task in (primary_task, hedge_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+async def _drop(
+    task: asyncio.Future,
+    ok: Callable,
+    discard: Callable[..., Awaitable[None]] | None,
+) -> None:
+    if not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return
+    if discard is not None and ok(task.result()):
+        await discard(task.result())
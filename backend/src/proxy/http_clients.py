@@ -0,0 +1,107 @@
+"""Process-wide pooled HTTP clients for upstream providers."""
+import importlib.util
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import httpx
+
+from ..config import get_settings
+from ..logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class _ClientKey:
+    origin: str
+    verify: bool | str
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class HttpClientRegistry:
+    """Long-lived httpx clients keyed by upstream origin and TLS settings.
+
+    Adapters borrow clients from the registry instead of creating their own, so
+    TCP/TLS connections and SSL contexts are reused across requests. Bedrock
+    regions map to distinct origins and therefore get separate pools.
+    """
+
+    def __init__(
+        self,
+        max_connections: int | None = None,
+        max_keepalive_connections: int | None = None,
+        keepalive_expiry: float | None = None,
+        http2: bool | None = None,
+    ):
+        settings = get_settings()
+        self._limits = httpx.Limits(
+            max_connections=(
+                max_connections
+                if max_connections is not None
+                else settings.http_max_connections
+            ),
+            max_keepalive_connections=(
+                max_keepalive_connections
+                if max_keepalive_connections is not None
+                else settings.http_max_keepalive_connections
+            ),
+            keepalive_expiry=(
+                keepalive_expiry
+                if keepalive_expiry is not None
+                else settings.http_keepalive_expiry
+            ),
+        )
+        self._timeout = httpx.Timeout(
+            connect=settings.http_connect_timeout,
+            read=settings.http_read_timeout,
+            write=30.0,
+            pool=10.0,
+        )
+        use_http2 = settings.http_http2 if http2 is None else http2
+        if use_http2 and not _http2_available():
+            logger.warning("http2_unavailable", reason="h2 package not installed")
+            use_http2 = False
+        self._http2 = use_http2
+        self._clients: dict[_ClientKey, httpx.AsyncClient] = {}
+
+    def get(self, url: str, verify: bool | str = True) -> httpx.AsyncClient:
+        """Return the pooled client for the origin of ``url``."""
+        parts = urlsplit(url)
+        key = _ClientKey(origin=f"{parts.scheme}://{parts.netloc}", verify=verify)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                verify=verify,
+                http2=self._http2,
+                limits=self._limits,
+                timeout=self._timeout,
+            )
+            self._clients[key] = client
+            if verify is False:
+                logger.warning("http_client_ssl_verification_disabled", origin=key.origin)
+            logger.info(
+                "http_client_created",
+                origin=key.origin,
+                verify=verify if isinstance(verify, bool) else "custom_ca_bundle",
+                http2=self._http2,
+            )
+        return client
+
+    def bedrock(self, region: str) -> httpx.AsyncClient:
+        return self.get(bedrock_endpoint(region))
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+def bedrock_endpoint(region: str) -> str:
+    return f"https://bedrock-runtime.{region}.amazonaws.com"
@@ -3,8 +3,7 @@ import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from typing import Protocol
 
-import boto3
-
+from ..aws_clients import get_client
 from ..logging import get_logger
 from ..config import get_settings
 
@@ -28,7 +27,14 @@ class CloudWatchMetricsEmitter:
     def __init__(self, namespace: str = "ClaudeCodeProxy", region: str | None = None):
         self._namespace = namespace
         self._region = region or get_settings().bedrock_region
-        self._cw = boto3.client("cloudwatch", region_name=self._region)
+        self._cw = None
+
+    @property
+    def client(self):
+        """The shared CloudWatch client, built on first use."""
+        if self._cw is None:
+            self._cw = get_client("cloudwatch", self._region)
+        return self._cw
 
     async def emit(self, response: ProxyResponseProtocol, latency_ms: int) -> None:
         """Emit metrics asynchronously (non-blocking)."""
@@ -89,4 +95,4 @@ class CloudWatchMetricsEmitter:
                 },
             ])
 
-        self._cw.put_metric_data(Namespace=self._namespace, MetricData=metrics)
+        self.client.put_metric_data(Namespace=self._namespace, MetricData=metrics)
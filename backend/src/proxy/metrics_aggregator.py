@@ -0,0 +1,417 @@
+"""In-process aggregation of request metrics with batched publishing."""
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import IO, Protocol
+
+from ..aws_clients import get_client
+from ..config import get_settings
+from ..logging import get_logger
+from .metrics import ProxyResponseProtocol
+
+logger = get_logger(__name__)
+
+# PutMetricData accepts at most 1000 datums and 1 MB per call, and at most 150
+# distinct values per datum.
+MAX_DATUMS_PER_CALL = 1000
+MAX_VALUES_PER_CALL = 10000
+MAX_VALUES_PER_DATUM = 150
+# EMF accepts at most 100 values per metric in one record.
+MAX_VALUES_PER_EMF_RECORD = 100
+
+Dimensions = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class MetricSeries:
+    """One metric and dimension set accumulated over a flush interval.
+
+    Counters keep CloudWatch ``StatisticValues`` (count, sum, min, max).
+    Distributions keep a ``value -> count`` histogram instead, published as
+    ``Values``/``Counts`` so percentiles survive aggregation; values are rounded
+    to three significant figures to bound the number of distinct entries.
+    """
+
+    name: str
+    unit: str
+    dimensions: Dimensions
+    sample_count: int = 0
+    total: float = 0.0
+    minimum: float = float("inf")
+    maximum: float = float("-inf")
+    values: dict[float, int] | None = None
+
+    def add(self, value: float) -> None:
+        self.sample_count += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        if self.values is not None:
+            rounded = float(f"{value:.3g}")
+            self.values[rounded] = self.values.get(rounded, 0) + 1
+
+
+@dataclass(frozen=True)
+class _Sample:
+    name: str
+    value: float
+    unit: str
+    dimensions: Dimensions
+    distribution: bool
+
+
+@dataclass
+class MetricsAggregatorStats:
+    queue_depth: int
+    max_queue_size: int
+    recorded: int
+    dropped: int
+    flushes: int
+    flushed_series: int
+    failed_flushes: int
+    last_flush_ms: float | None
+
+
+class MetricSink(Protocol):
+    async def publish(self, namespace: str, series: list[MetricSeries]) -> int:
+        """Publish one interval's series; returns the number of calls/records written."""
+        ...
+
+
+class CloudWatchSink:
+    """Publishes series with ``PutMetricData``, up to 1000 datums per call."""
+
+    def __init__(self, region: str | None = None, client=None):
+        self._region = region or get_settings().bedrock_region
+        self._client = client
+
+    async def publish(self, namespace: str, series: list[MetricSeries]) -> int:
+        client = self._client or get_client("cloudwatch", self._region)
+        timestamp = datetime.now(timezone.utc)
+        calls = 0
+        for batch in _batched(_to_datums(series, timestamp)):
+            await asyncio.to_thread(client.put_metric_data, Namespace=namespace, MetricData=batch)
+            calls += 1
+        return calls
+
+
+class EmfSink:
+    """Writes series as CloudWatch Embedded Metric Format lines.
+
+    The CloudWatch agent or Lambda/ECS log drivers turn these into metrics
+    without any API calls from the proxy. EMF has no statistic sets, so
+    counters are written as their interval sum.
+    """
+
+    def __init__(self, stream: IO[str] | None = None):
+        self._stream = stream
+
+    async def publish(self, namespace: str, series: list[MetricSeries]) -> int:
+        stream = self._stream or sys.stdout
+        records = _to_emf_records(namespace, series, int(time.time() * 1000))
+        for record in records:
+            stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+        stream.flush()
+        return len(records)
+
+
+def create_metric_sink(kind: str) -> MetricSink | None:
+    """Build the sink named by ``PROXY_METRICS_SINK`` (None disables metrics)."""
+    if kind == "cloudwatch":
+        return CloudWatchSink()
+    if kind == "emf":
+        return EmfSink()
+    if kind in ("", "none"):
+        return None
+    raise ValueError(f"Unsupported metrics sink: {kind}")
+
+
+class MetricsAggregator:
+    """Accumulates request metrics in-process and flushes them periodically.
+
+    ``record`` only appends to a bounded queue; a background task folds queued
+    samples into per-series statistics and hands them to the sink every
+    ``flush_interval`` seconds. When the sink falls behind and the queue is
+    full, samples are dropped and counted rather than blocking requests.
+    """
+
+    def __init__(
+        self,
+        sink: MetricSink,
+        namespace: str | None = None,
+        flush_interval: float | None = None,
+        max_queue_size: int | None = None,
+    ):
+        settings = get_settings()
+        self._sink = sink
+        self._namespace = namespace or settings.metrics_namespace
+        self._flush_interval = flush_interval or settings.metrics_flush_interval
+        self._max_queue_size = max_queue_size or settings.metrics_queue_max_size
+        self._queue: asyncio.Queue[tuple[_Sample, ...]] = asyncio.Queue(
+            maxsize=self._max_queue_size
+        )
+        self._series: dict[tuple[str, str, Dimensions], MetricSeries] = {}
+        self._task: asyncio.Task | None = None
+        self._stop = asyncio.Event()
+        self._recorded = 0
+        self._dropped = 0
+        self._flushes = 0
+        self._flushed_series = 0
+        self._failed_flushes = 0
+        self._last_flush_ms: float | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stop.clear()
+            self._task = asyncio.create_task(self._run())
+
+    def record(self, response: ProxyResponseProtocol, latency_ms: int) -> bool:
+        """Queue the metrics for one proxied request. Returns False if dropped."""
+        provider = (("Provider", response.provider),)
+        samples = [
+            _Sample("RequestCount", 1, "Count", provider, False),
+            _Sample("RequestLatency", latency_ms, "Milliseconds", provider, True),
+        ]
+        if response.error_type:
+            samples.append(
+                _Sample(
+                    "ErrorCount",
+                    1,
+                    "Count",
+                    (("ErrorType", response.error_type), ("Provider", response.provider)),
+                    False,
+                )
+            )
+        if response.is_fallback:
+            samples.append(_Sample("FallbackCount", 1, "Count", (), False))
+        if response.usage and response.provider == "bedrock":
+            samples.append(
+                _Sample(
+                    "BedrockTokensUsed",
+                    response.usage.input_tokens,
+                    "Count",
+                    (("TokenType", "input"),),
+                    False,
+                )
+            )
+            samples.append(
+                _Sample(
+                    "BedrockTokensUsed",
+                    response.usage.output_tokens,
+                    "Count",
+                    (("TokenType", "output"),),
+                    False,
+                )
+            )
+        return self._submit(tuple(samples))
+
+    def record_value(
+        self,
+        name: str,
+        value: float,
+        unit: str = "Count",
+        dimensions: dict[str, str] | None = None,
+        distribution: bool = False,
+    ) -> bool:
+        """Queue a single metric value. Returns False if dropped."""
+        dims = tuple(sorted((dimensions or {}).items()))
+        return self._submit((_Sample(name, value, unit, dims, distribution),))
+
+    async def emit(self, response: ProxyResponseProtocol, latency_ms: int) -> None:
+        """``CloudWatchMetricsEmitter``-compatible entry point."""
+        self.record(response, latency_ms)
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """Stop the background task and flush everything already queued."""
+        self._stop.set()
+        if self._task is None:
+            await self._flush()
+            return
+        try:
+            await asyncio.wait_for(self._task, timeout or get_settings().usage_drain_timeout)
+        except asyncio.TimeoutError:
+            logger.error("metrics_drain_timeout", pending=self._queue.qsize())
+        finally:
+            self._task = None
+
+    @property
+    def stats(self) -> MetricsAggregatorStats:
+        return MetricsAggregatorStats(
+            queue_depth=self._queue.qsize(),
+            max_queue_size=self._max_queue_size,
+            recorded=self._recorded,
+            dropped=self._dropped,
+            flushes=self._flushes,
+            flushed_series=self._flushed_series,
+            failed_flushes=self._failed_flushes,
+            last_flush_ms=self._last_flush_ms,
+        )
+
+    def _submit(self, samples: tuple[_Sample, ...]) -> bool:
+        if self._stop.is_set():
+            self._record_drop("stopping")
+            return False
+        try:
+            self._queue.put_nowait(samples)
+        except asyncio.QueueFull:
+            self._record_drop("queue_full")
+            return False
+        self._recorded += 1
+        return True
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self._flush()
+
+    def _fold_queued(self) -> None:
+        series = self._series
+        while not self._queue.empty():
+            for sample in self._queue.get_nowait():
+                key = (sample.name, sample.unit, sample.dimensions)
+                entry = series.get(key)
+                if entry is None:
+                    entry = series[key] = MetricSeries(
+                        sample.name,
+                        sample.unit,
+                        sample.dimensions,
+                        values={} if sample.distribution else None,
+                    )
+                entry.add(sample.value)
+
+    async def _flush(self) -> None:
+        self._fold_queued()
+        if not self._series:
+            return
+        series = list(self._series.values())
+        self._series = {}
+        started = time.perf_counter()
+        try:
+            await self._sink.publish(self._namespace, series)
+        except Exception as exc:
+            self._failed_flushes += 1
+            logger.warning("metrics_flush_failed", error=str(exc), series=len(series))
+            return
+        self._last_flush_ms = (time.perf_counter() - started) * 1000
+        self._flushes += 1
+        self._flushed_series += len(series)
+
+    def _record_drop(self, reason: str) -> None:
+        self._dropped += 1
+        if self._dropped == 1 or self._dropped % 1000 == 0:
+            logger.warning(
+                "metrics_sample_dropped",
+                reason=reason,
+                dropped_total=self._dropped,
+                queue_depth=self._queue.qsize(),
+            )
+
+
+def _to_datums(series: list[MetricSeries], timestamp: datetime) -> list[dict]:
+    datums: list[dict] = []
+    for entry in series:
+        base = {
+            "MetricName": entry.name,
+            "Dimensions": [{"Name": name, "Value": value} for name, value in entry.dimensions],
+            "Unit": entry.unit,
+            "Timestamp": timestamp,
+        }
+        if entry.values is None:
+            datums.append(
+                {
+                    **base,
+                    "StatisticValues": {
+                        "SampleCount": entry.sample_count,
+                        "Sum": entry.total,
+                        "Minimum": entry.minimum,
+                        "Maximum": entry.maximum,
+                    },
+                }
+            )
+            continue
+        items = sorted(entry.values.items())
+        for offset in range(0, len(items), MAX_VALUES_PER_DATUM):
+            chunk = items[offset : offset + MAX_VALUES_PER_DATUM]
+            datums.append(
+                {
+                    **base,
+                    "Values": [value for value, _count in chunk],
+                    "Counts": [float(count) for _value, count in chunk],
+                }
+            )
+    return datums
+
+
+def _batched(datums: list[dict]) -> list[list[dict]]:
+    batches: list[list[dict]] = []
+    batch: list[dict] = []
+    values = 0
+    for datum in datums:
+        size = len(datum.get("Values", ())) or 1
+        if batch and (len(batch) >= MAX_DATUMS_PER_CALL or values + size > MAX_VALUES_PER_CALL):
+            batches.append(batch)
+            batch, values = [], 0
+        batch.append(datum)
+        values += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _to_emf_records(namespace: str, series: list[MetricSeries], timestamp_ms: int) -> list[dict]:
+    by_dimensions: dict[Dimensions, list[MetricSeries]] = {}
+    for entry in series:
+        by_dimensions.setdefault(entry.dimensions, []).append(entry)
+
+    records: list[dict] = []
+    for dimensions, entries in by_dimensions.items():
+        # Values for one metric name must share a record, so counters sharing
+        # a dimension set go in the first record and distributions are split.
+        pending: list[tuple[MetricSeries, list[float] | float]] = []
+        for entry in entries:
+            if entry.values is None:
+                pending.append((entry, entry.total))
+                continue
+            expanded = [
+                value for value, count in sorted(entry.values.items()) for _ in range(count)
+            ]
+            for offset in range(0, len(expanded), MAX_VALUES_PER_EMF_RECORD):
+                pending.append((entry, expanded[offset : offset + MAX_VALUES_PER_EMF_RECORD]))
+
+        while pending:
+            record_metrics: dict[str, tuple[MetricSeries, list[float] | float]] = {}
+            remaining: list[tuple[MetricSeries, list[float] | float]] = []
+            for entry, value in pending:
+                if entry.name in record_metrics:
+                    remaining.append((entry, value))
+                else:
+                    record_metrics[entry.name] = (entry, value)
+            pending = remaining
+            record: dict = {
+                "_aws": {
+                    "Timestamp": timestamp_ms,
+                    "CloudWatchMetrics": [
+                        {
+                            "Namespace": namespace,
+                            "Dimensions": [[name for name, _value in dimensions]],
+                            "Metrics": [
+                                {"Name": name, "Unit": entry.unit}
+                                for name, (entry, _value) in record_metrics.items()
+                            ],
+                        }
+                    ],
+                },
+                **dict(dimensions),
+            }
+            for name, (_entry, value) in record_metrics.items():
+                record[name] = value
+            records.append(record)
+    return records
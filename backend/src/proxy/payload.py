@@ -0,0 +1,95 @@
+"""``/v1/messages`` bodies kept as the client's bytes.
+
+Claude Code requests carry hundreds of KB of message history. Validating all
+of it into an ``AnthropicRequest``, dumping it back out and re-encoding it for
+Plan costs several times what forwarding it does, so the Plan path sends the
+client's bytes on as they are. Only the fields routing reads (``model``,
+``stream``, ``metadata``) are checked up front; the full ``AnthropicRequest``
+is built on first use, which only a Bedrock call needs.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from ..domain import AnthropicRequest
+from ..json_codec import dumps, loads
+
+_DEFAULT_MAX_TOKENS = AnthropicRequest.model_fields["max_tokens"].default
+# Top-level fields Plan is sent; anything else was never forwarded.
+_UPSTREAM_FIELDS = frozenset(AnthropicRequest.model_fields) - {"original_model"}
+
+
+class MessagesPayload:
+    """A parsed-on-demand ``/v1/messages`` body.
+
+    Quacks like ``AnthropicRequest`` for the attributes routing and usage
+    recording read; anything else goes through ``to_request``.
+    """
+
+    __slots__ = ("body", "model", "stream", "metadata", "_data", "_request")
+
+    def __init__(self, body: bytes, data: dict[str, Any]):
+        self.body = body
+        self.model: str = data["model"]
+        self.stream: bool = data.get("stream", False)
+        self.metadata: dict[str, Any] | None = data.get("metadata")
+        self._data = data
+        self._request: AnthropicRequest | None = None
+
+    @classmethod
+    def parse(cls, body: bytes) -> MessagesPayload:
+        """Raises ValueError unless ``body`` is a JSON object with a usable ``model``."""
+        data = loads(body)
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        if not isinstance(data.get("model"), str):
+            raise ValueError("model: a string is required")
+        if not isinstance(data.get("stream", False), bool):
+            raise ValueError("stream: must be a boolean")
+        metadata = data.get("metadata")
+        if metadata is not None and not isinstance(metadata, dict):
+            raise ValueError("metadata: must be an object")
+        return cls(body, data)
+
+    def upstream_body(self) -> bytes:
+        """The body to send to Plan: the client's bytes, unless a field needs rewriting.
+
+        At the top level this sends what ``AnthropicRequest.model_dump(
+        exclude_none=True, exclude={"original_model"})`` would: null,
+        proxy-internal and unknown fields are dropped, and a missing
+        ``max_tokens`` gets the model's default (an explicit null stays
+        absent). A missing ``stream`` stays missing, which the API reads as
+        false, and messages go as the client sent them. Clients rarely
+        send any of those, so this is usually a dictionary scan and no encoding
+        at all.
+        """
+        data = self._data
+        if (
+            "max_tokens" in data
+            and data.keys() <= _UPSTREAM_FIELDS
+            and None not in data.values()
+        ):
+            return self.body
+        rewritten = {
+            key: value
+            for key, value in data.items()
+            if value is not None and key in _UPSTREAM_FIELDS
+        }
+        if "max_tokens" not in data:
+            rewritten["max_tokens"] = _DEFAULT_MAX_TOKENS
+        return dumps(rewritten)
+
+    def to_request(self) -> AnthropicRequest:
+        """The validated request, built once. Raises pydantic's ValidationError."""
+        if self._request is None:
+            self._request = AnthropicRequest.model_validate(self._data)
+        return self._request
+
+
+MessagesRequest = AnthropicRequest | MessagesPayload
+
+
+def as_anthropic_request(request: MessagesRequest) -> AnthropicRequest:
+    if isinstance(request, MessagesPayload):
+        return request.to_request()
+    return request
@@ -1,6 +1,4 @@
 import httpx
-import os
-import ssl
 
 from ..domain import (
     AnthropicRequest,
@@ -9,10 +7,14 @@ from ..domain import (
     AnthropicCountTokensResponse,
     ErrorType,
 )
+from .. import json_codec
 from ..config import get_settings
 from ..logging import get_logger
+from ..telemetry import stage_timer
 from .context import RequestContext
 from .adapter_base import AdapterResponse, AdapterError
+from .dependencies import get_proxy_deps
+from .payload import MessagesPayload, MessagesRequest
 
 logger = get_logger(__name__)
 
@@ -26,10 +28,32 @@ def _handle_request_error(e: Exception, url: str) -> AdapterError:
     return AdapterError(ErrorType.NETWORK_ERROR, 503, str(e), True)
 
 
+def _body_kwargs(request: MessagesRequest) -> dict:
+    """httpx content for a request: the client's own bytes when we still have them."""
+    if isinstance(request, MessagesPayload):
+        return {"content": request.upstream_body()}
+    payload = request.model_dump(exclude_none=True, exclude={"original_model"})
+    return {"content": json_codec.dumps(payload)}
+
+
+def _resolve_verify(settings) -> bool | str:
+    """TLS verification setting for the Plan API client."""
+    if settings.plan_ca_bundle:
+        return settings.plan_ca_bundle
+    if not settings.plan_verify_ssl:
+        return False
+    return True
+
+
 class PlanAdapter:
     """Anthropic Plan API adapter."""
 
-    def __init__(self, api_key: str | None = None, headers: dict | None = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        headers: dict | None = None,
+        client: httpx.AsyncClient | None = None,
+    ):
         settings = get_settings()
         self._api_key = api_key or settings.plan_api_key
         self._base_url = settings.plan_api_url
@@ -52,47 +76,24 @@ class PlanAdapter:
             has_anthropic_beta="anthropic-beta" in header_keys,
             has_anthropic_version="anthropic-version" in header_keys,
         )
-        verify: bool | str = True
-        if settings.plan_ca_bundle:
-            verify = settings.plan_ca_bundle
-            logger.info("plan_ssl_custom_ca_bundle", path=settings.plan_ca_bundle)
-        elif not settings.plan_verify_ssl:
-            verify = False
-            logger.warning("plan_ssl_verification_disabled")
-        else:
-            default_paths = ssl.get_default_verify_paths()
-            logger.info(
-                "plan_ssl_verify_paths",
-                cafile=default_paths.cafile,
-                capath=default_paths.capath,
-                env_ssl_cert_file=os.environ.get(default_paths.openssl_cafile_env),
-                env_ssl_cert_dir=os.environ.get(default_paths.openssl_capath_env),
-            )
-        self._client = httpx.AsyncClient(
-            verify=verify,
-            timeout=httpx.Timeout(
-                connect=settings.http_connect_timeout,
-                read=settings.http_read_timeout,
-                write=30.0,
-                pool=10.0,
-            )
+        self._client = client or get_proxy_deps().http_clients.get(
+            self._base_url, verify=_resolve_verify(settings)
         )
 
     async def invoke(
-        self, ctx: RequestContext, request: AnthropicRequest
+        self, ctx: RequestContext, request: MessagesRequest
     ) -> AdapterResponse | AdapterError:
         try:
             url = f"{self._base_url}/v1/messages"
-            response = await self._client.post(
-                url,
-                json=request.model_dump(exclude_none=True, exclude={"original_model"}),
-                headers=self._headers,
-            )
+            with stage_timer("plan_upstream"):
+                response = await self._client.post(
+                    url, headers=self._headers, **_body_kwargs(request)
+                )
             logger.info("plan_request", url=url, status_code=response.status_code)
 
             if response.status_code == 200:
                 try:
-                    data = response.json()
+                    data = json_codec.loads(response.content)
                 except ValueError:
                     logger.info(
                         "plan_response_invalid_json",
@@ -115,16 +116,14 @@ class PlanAdapter:
         except (httpx.TimeoutException, httpx.RequestError) as e:
             return _handle_request_error(e, url)
 
-    async def stream(self, request: AnthropicRequest) -> httpx.Response | AdapterError:
+    async def stream(self, request: MessagesRequest) -> httpx.Response | AdapterError:
         try:
             url = f"{self._base_url}/v1/messages"
             http_request = self._client.build_request(
-                "POST",
-                url,
-                json=request.model_dump(exclude_none=True, exclude={"original_model"}),
-                headers=self._headers,
+                "POST", url, headers=self._headers, **_body_kwargs(request)
             )
-            response = await self._client.send(http_request, stream=True)
+            with stage_timer("plan_upstream_headers"):
+                response = await self._client.send(http_request, stream=True)
             logger.info("plan_request", url=url, status_code=response.status_code)
 
             if response.status_code == 200:
@@ -144,13 +143,15 @@ class PlanAdapter:
             url = f"{self._base_url}/v1/messages/count_tokens"
             response = await self._client.post(
                 url,
-                json=request.model_dump(exclude_none=True, exclude={"original_model"}),
+                content=json_codec.dumps(
+                    request.model_dump(exclude_none=True, exclude={"original_model"})
+                ),
                 headers=self._headers,
             )
             logger.info("plan_request", url=url, status_code=response.status_code)
 
             if response.status_code == 200:
-                return AnthropicCountTokensResponse(**response.json())
+                return AnthropicCountTokensResponse(**json_codec.loads(response.content))
 
             return self._classify_error(response.status_code, response.text)
 
@@ -186,6 +187,3 @@ class PlanAdapter:
             message=body[:200],
             retryable=False,
         )
-
-    async def close(self) -> None:
-        await self._client.aclose()
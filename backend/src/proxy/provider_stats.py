@@ -0,0 +1,136 @@
+"""Rolling per-provider, per-model latency and error statistics.
+
+The router records every upstream call it makes here, whatever the user's
+routing strategy, and the ``adaptive`` strategy reads the numbers back to pick
+a provider for each request. Stats are exponentially weighted moving averages
+that decay with time rather than with the number of observations, so a
+provider seen rarely (one only probed now and then) catches up as quickly as a
+busy one. They are kept per worker.
+"""
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from ..config import get_settings
+from ..domain import RETRYABLE_ERRORS, ErrorType
+
+# Adapter errors that say the provider, not the request, is at fault.
+PROVIDER_FAULTS = RETRYABLE_ERRORS | {
+    ErrorType.BEDROCK_QUOTA_EXCEEDED,
+    ErrorType.BEDROCK_MODEL_ERROR,
+    ErrorType.BEDROCK_UNAVAILABLE,
+}
+
+# Share of an average each observation replaces at least, however busy the
+# provider, so a burst of errors registers within a couple of requests.
+_MIN_WEIGHT = 0.2
+
+
+@dataclass
+class ProviderStats:
+    latency_ms: float | None = None
+    ttft_ms: float | None = None
+    error_rate: float = 0.0
+    samples: int = 0
+    updated_at: float = 0.0
+
+    def metric(self, stream: bool) -> float | None:
+        """TTFT for streams, total latency otherwise, whichever is known."""
+        if stream:
+            return self.ttft_ms if self.ttft_ms is not None else self.latency_ms
+        return self.latency_ms if self.latency_ms is not None else self.ttft_ms
+
+
+def _ewma(current: float | None, value: float, weight: float) -> float:
+    return value if current is None else current + weight * (value - current)
+
+
+@dataclass
+class ProviderScoreboard:
+    """EWMA stats per ``(provider, model)`` and the adaptive routing decision.
+
+    ``choose`` prefers Plan, which costs nothing per request. Bedrock wins when
+    Plan's recent error rate reaches ``max_plan_error_rate`` (well before the
+    circuit breaker's threshold) or when its expected latency, counting the
+    fallback that follows a Plan error, beats Plan's by ``bedrock_margin``.
+    Both sides' error rates count, so a Bedrock outage sends traffic back.
+    While Bedrock is preferred, every ``plan_probe_interval``-th request still
+    goes to Plan so its stats keep up with recovery.
+    """
+
+    # Seconds after which an observation carries half its original weight.
+    half_life: float = field(default_factory=lambda: get_settings().adaptive_half_life)
+    bedrock_margin: float = field(
+        default_factory=lambda: get_settings().adaptive_bedrock_margin
+    )
+    max_plan_error_rate: float = field(
+        default_factory=lambda: get_settings().adaptive_max_plan_error_rate
+    )
+    min_samples: int = field(default_factory=lambda: get_settings().adaptive_min_samples)
+    plan_probe_interval: int = field(
+        default_factory=lambda: get_settings().adaptive_plan_probe_interval
+    )
+    clock: Callable[[], float] = time.monotonic
+    _stats: dict[tuple[str, str], ProviderStats] = field(default_factory=dict)
+    _bedrock_streak: dict[str, int] = field(default_factory=dict)
+
+    def observe(
+        self,
+        provider: str,
+        model: str,
+        latency_ms: float | None = None,
+        ttft_ms: float | None = None,
+        failed: bool = False,
+    ) -> None:
+        """Record one upstream call. Failures only move the error rate."""
+        now = self.clock()
+        stats = self._stats.get((provider, model))
+        if stats is None:
+            stats = self._stats[(provider, model)] = ProviderStats(updated_at=now)
+        # The new value takes the share of the old average that has decayed
+        # since the last observation.
+        weight = max(1 - 0.5 ** ((now - stats.updated_at) / self.half_life), _MIN_WEIGHT)
+        stats.updated_at = now
+        stats.samples += 1
+        stats.error_rate = _ewma(
+            stats.error_rate if stats.samples > 1 else None, float(failed), weight
+        )
+        if failed:
+            return
+        if latency_ms is not None:
+            stats.latency_ms = _ewma(stats.latency_ms, latency_ms, weight)
+        if ttft_ms is not None:
+            stats.ttft_ms = _ewma(stats.ttft_ms, ttft_ms, weight)
+
+    def stats(self, provider: str, model: str) -> ProviderStats | None:
+        return self._stats.get((provider, model))
+
+    def choose(self, model: str, stream: bool) -> str:
+        """``"plan"`` or ``"bedrock"`` for the next request for ``model``."""
+        if not self._prefers_bedrock(model, stream):
+            self._bedrock_streak.pop(model, None)
+            return "plan"
+        streak = self._bedrock_streak.get(model, 0) + 1
+        if streak >= self.plan_probe_interval:
+            self._bedrock_streak[model] = 0
+            return "plan"
+        self._bedrock_streak[model] = streak
+        return "bedrock"
+
+    def _prefers_bedrock(self, model: str, stream: bool) -> bool:
+        plan = self.stats("plan", model)
+        if plan is None or plan.samples < self.min_samples:
+            return False
+        bedrock = self.stats("bedrock", model)
+        if plan.error_rate >= self.max_plan_error_rate:
+            return bedrock is None or bedrock.error_rate < plan.error_rate
+        if bedrock is None or bedrock.samples < self.min_samples:
+            return False
+        plan_ms, bedrock_ms = plan.metric(stream), bedrock.metric(stream)
+        if plan_ms is None or bedrock_ms is None:
+            return False
+        # A failed Plan call is followed by a Bedrock fallback; a failed
+        # Bedrock call is a failed request, priced here as a Plan retry.
+        expected_plan_ms = plan_ms + plan.error_rate * bedrock_ms
+        expected_bedrock_ms = bedrock_ms + bedrock.error_rate * plan_ms
+        return expected_bedrock_ms * (1 + self.bedrock_margin) < expected_plan_ms
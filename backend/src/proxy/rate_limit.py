@@ -0,0 +1,400 @@
+"""Per-access-key and per-user rate limits, optionally shared across workers.
+
+Three kinds of limit, each applied per access key and per user:
+
+* requests per second, a token bucket holding ``request_burst_seconds`` worth
+  of requests;
+* estimated input tokens per minute, a bucket holding one minute's worth;
+* concurrent streams, leased slots released when the stream ends.
+
+Buckets use the generic cell rate algorithm: a bucket is a single timestamp,
+the time at which it will be full again, so a check is O(1) in time and
+space whatever the rate. Every bucket a request touches is checked and
+charged together, so a request refused by one limit costs nothing against the
+others. A limit of 0 is off.
+
+With a ``RedisRateLimitStore`` the limits hold across the fleet; store errors
+and timeouts are logged and let the request through.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Protocol, TypeVar
+
+from ..config import get_settings
+from ..logging import get_logger
+from ..telemetry import RATE_LIMITED_REQUESTS
+from .context import RequestContext
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Rough request-body bytes per input token, for the tokens-per-minute buckets.
+_BYTES_PER_TOKEN = 4
+# Streams hold no bucket to compute a wait from; clients retry after this.
+_STREAM_RETRY_AFTER = 1.0
+
+# KEYS: bucket keys. ARGV: now, then rate, capacity and cost for each bucket.
+# Mirrors Bucket.arrival and _charge; returns nil when admitted, else
+# {0-based index of the refusing bucket, wait in seconds as a string}.
+_TAKE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local updated = {}
+local refused, wait = 0, 0
+for i, key in ipairs(KEYS) do
+  local rate = tonumber(ARGV[i * 3 - 1])
+  local capacity = tonumber(ARGV[i * 3])
+  local cost = math.min(tonumber(ARGV[i * 3 + 1]), capacity)
+  local full_at = tonumber(redis.call('GET', key)) or now
+  updated[i] = math.max(full_at, now) + cost / rate
+  local bucket_wait = updated[i] - now - capacity / rate
+  if bucket_wait > wait then
+    refused, wait = i, bucket_wait
+  end
+end
+if refused > 0 then
+  return {refused - 1, tostring(wait)}
+end
+for i, key in ipairs(KEYS) do
+  local ttl = math.max(math.ceil((updated[i] - now) * 1000), 1)
+  redis.call('SET', key, string.format('%.6f', updated[i]), 'PX', ttl)
+end
+return nil
+"""
+
+
+def estimate_tokens(body_size: int) -> int:
+    """Input tokens a request body of ``body_size`` bytes is likely to cost."""
+    return max(body_size // _BYTES_PER_TOKEN, 1)
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """One token bucket charged ``cost`` tokens by the current request."""
+
+    key: str
+    rate: float  # Tokens per second
+    capacity: float
+    cost: float
+
+    def arrival(self, full_at: float, now: float) -> tuple[float, float]:
+        """``(new full-at time, seconds to wait)``; no wait means admitted.
+
+        A cost above the capacity is charged as the capacity, so an oversized
+        request waits for a full bucket rather than being refused forever.
+        """
+        cost = min(self.cost, self.capacity)
+        new_full_at = max(full_at, now) + cost / self.rate
+        return new_full_at, new_full_at - now - self.capacity / self.rate
+
+
+@dataclass(frozen=True)
+class RateLimited:
+    """Why a request was refused and when to retry."""
+
+    limit: str
+    retry_after: float
+
+    @property
+    def message(self) -> str:
+        scope, _, kind = self.limit.partition("_")
+        what = {
+            "requests": "requests per second",
+            "tokens": "input tokens per minute",
+            "streams": "concurrent streams",
+        }[kind]
+        owner = "access key" if scope == "key" else "user"
+        return (
+            f"Rate limit of {what} exceeded for this {owner}; "
+            f"retry after {self.retry_after_header} seconds"
+        )
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(math.ceil(self.retry_after), 1))
+
+
+@dataclass(frozen=True)
+class StreamSlot:
+    """Concurrency slots held by one stream, to hand back to ``release_stream``."""
+
+    keys: tuple[str, ...]
+    token: str
+
+
+def _charge(
+    buckets: Sequence[Bucket], full_at: Sequence[float | None], now: float
+) -> tuple[list[float], int | None, float]:
+    """New full-at times, and the index and wait of the tightest refusing bucket."""
+    updated: list[float] = []
+    refused, wait = None, 0.0
+    for index, (bucket, current) in enumerate(zip(buckets, full_at)):
+        new_full_at, bucket_wait = bucket.arrival(current if current is not None else now, now)
+        updated.append(new_full_at)
+        if bucket_wait > wait:
+            refused, wait = index, bucket_wait
+    return updated, refused, wait
+
+
+class RateLimitStore(Protocol):
+    """Token buckets and concurrency slots, by bucket key."""
+
+    async def take(self, buckets: Sequence[Bucket]) -> tuple[int, float] | None:
+        """Charge every bucket, or none of them.
+
+        Returns None when admitted, else the index of the bucket that refused
+        (the one with the longest wait) and the seconds until it would admit.
+        """
+        ...
+
+    async def acquire(
+        self, limits: Sequence[tuple[str, int]], token: str, lease: float
+    ) -> int | None:
+        """Take a slot in every ``(key, limit)`` pool, or none of them.
+
+        A slot lapses after ``lease`` seconds if never released. Returns None
+        when acquired, else the index of a pool that was full.
+        """
+        ...
+
+    async def release(self, keys: Sequence[str], token: str) -> None: ...
+
+    async def aclose(self) -> None: ...
+
+
+class InMemoryRateLimitStore:
+    """Per-worker store; also what the tests use in place of Redis."""
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
+        self._full_at: dict[str, float] = {}
+        self._slots: dict[str, dict[str, float]] = {}
+
+    async def take(self, buckets: Sequence[Bucket]) -> tuple[int, float] | None:
+        now = self._clock()
+        current = [self._full_at.get(bucket.key) for bucket in buckets]
+        updated, refused, wait = _charge(buckets, current, now)
+        if refused is not None:
+            return refused, wait
+        for bucket, full_at in zip(buckets, updated):
+            self._full_at[bucket.key] = full_at
+        return None
+
+    async def acquire(
+        self, limits: Sequence[tuple[str, int]], token: str, lease: float
+    ) -> int | None:
+        now = self._clock()
+        for index, (key, limit) in enumerate(limits):
+            slots = self._slots.get(key)
+            if slots is None:
+                continue
+            for held, expires_at in list(slots.items()):
+                if expires_at <= now:
+                    del slots[held]
+            if len(slots) >= limit:
+                return index
+        for key, _ in limits:
+            self._slots.setdefault(key, {})[token] = now + lease
+        return None
+
+    async def release(self, keys: Sequence[str], token: str) -> None:
+        for key in keys:
+            slots = self._slots.get(key)
+            if slots is None:
+                continue
+            slots.pop(token, None)
+            if not slots:
+                del self._slots[key]
+
+    async def aclose(self) -> None:
+        return None
+
+
+class RedisRateLimitStore:
+    """Store over a ``redis.asyncio.Redis`` client (or anything API-compatible).
+
+    A bucket is one string key holding its full-at time, expiring when the
+    bucket is full again. All of a request's buckets are checked and charged
+    by one Lua script: one round trip, atomic however many workers share the
+    key. Stream slots are sorted sets of lease expiries, taken in a MULTI.
+    Times come from the worker clocks, which are assumed to be NTP-synced.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        key_prefix: str | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._client = client
+        self._prefix = f"{key_prefix or get_settings().shared_cache_key_prefix}:ratelimit"
+        self._clock = clock
+        self._take_script = client.register_script(_TAKE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str, key_prefix: str | None = None) -> RedisRateLimitStore:
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:  # pragma: no cover - depends on install extras
+            raise RuntimeError(
+                "PROXY_SHARED_CACHE_URL points at Redis but the 'redis' package is not "
+                "installed; install claude-code-proxy[redis]"
+            ) from exc
+        return cls(redis.from_url(url), key_prefix)
+
+    async def take(self, buckets: Sequence[Bucket]) -> tuple[int, float] | None:
+        args: list[float] = [self._clock()]
+        for bucket in buckets:
+            args += [bucket.rate, bucket.capacity, bucket.cost]
+        refused = await self._take_script(
+            keys=[self._key(bucket.key) for bucket in buckets], args=args
+        )
+        if refused is None:
+            return None
+        index, wait = refused
+        return int(index), float(wait)
+
+    async def acquire(
+        self, limits: Sequence[tuple[str, int]], token: str, lease: float
+    ) -> int | None:
+        now = self._clock()
+        keys = [self._key(key) for key, _ in limits]
+        async with self._client.pipeline(transaction=True) as pipe:
+            for key in keys:
+                pipe.zremrangebyscore(key, "-inf", now)
+                pipe.zadd(key, {token: now + lease})
+                pipe.zcard(key)
+                pipe.expire(key, max(math.ceil(lease), 1))
+            results = await pipe.execute()
+        counts = results[2::4]
+        for index, ((_, limit), count) in enumerate(zip(limits, counts)):
+            if count > limit:
+                await self.release([key for key, _ in limits], token)
+                return index
+        return None
+
+    async def release(self, keys: Sequence[str], token: str) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.zrem(self._key(key), token)
+            await pipe.execute()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}:{key}"
+
+
+def create_rate_limit_store(url: str) -> RateLimitStore:
+    """Build a store from ``PROXY_SHARED_CACHE_URL``."""
+    if url.startswith("memory://"):
+        return InMemoryRateLimitStore()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisRateLimitStore.from_url(url)
+    raise ValueError(f"Unsupported rate limit store URL scheme: {url.split('://', 1)[0]}")
+
+
+@dataclass
+class RateLimiter:
+    """Checks requests and stream starts against the configured limits."""
+
+    key_requests_per_second: float = field(
+        default_factory=lambda: get_settings().rate_limit_key_requests_per_second
+    )
+    user_requests_per_second: float = field(
+        default_factory=lambda: get_settings().rate_limit_user_requests_per_second
+    )
+    # Seconds of requests a bucket holds, i.e. how big a burst it admits.
+    request_burst_seconds: float = field(
+        default_factory=lambda: get_settings().rate_limit_request_burst_seconds
+    )
+    key_tokens_per_minute: int = field(
+        default_factory=lambda: get_settings().rate_limit_key_tokens_per_minute
+    )
+    user_tokens_per_minute: int = field(
+        default_factory=lambda: get_settings().rate_limit_user_tokens_per_minute
+    )
+    key_max_streams: int = field(default_factory=lambda: get_settings().rate_limit_key_max_streams)
+    user_max_streams: int = field(
+        default_factory=lambda: get_settings().rate_limit_user_max_streams
+    )
+    # A stream slot never released (a crashed worker) lapses after this long.
+    stream_lease: float = field(default_factory=lambda: get_settings().rate_limit_stream_lease)
+    store: RateLimitStore = field(default_factory=InMemoryRateLimitStore)
+    store_timeout: float = field(default_factory=lambda: get_settings().shared_cache_timeout)
+
+    async def check(self, ctx: RequestContext, estimated_tokens: int) -> RateLimited | None:
+        """Charge one request of ``estimated_tokens`` input tokens; None if admitted."""
+        buckets: list[Bucket] = []
+        limits: list[str] = []
+        for scope, owner, per_second, per_minute in (
+            ("key", ctx.access_key_id, self.key_requests_per_second, self.key_tokens_per_minute),
+            ("user", ctx.user_id, self.user_requests_per_second, self.user_tokens_per_minute),
+        ):
+            if per_second > 0:
+                capacity = max(per_second * self.request_burst_seconds, 1.0)
+                buckets.append(Bucket(f"{scope}:{owner}:requests", per_second, capacity, 1))
+                limits.append(f"{scope}_requests")
+            if per_minute > 0:
+                buckets.append(
+                    Bucket(f"{scope}:{owner}:tokens", per_minute / 60, per_minute, estimated_tokens)
+                )
+                limits.append(f"{scope}_tokens")
+        if not buckets:
+            return None
+        refused = await self._call_store("take", self.store.take(buckets))
+        if refused is None:
+            return None
+        index, wait = refused
+        return self._refuse(ctx, limits[index], wait)
+
+    async def acquire_stream(self, ctx: RequestContext) -> StreamSlot | RateLimited | None:
+        """Hold a concurrent-stream slot; None when streams aren't capped."""
+        pools = [
+            (f"{scope}:{owner}:streams", limit, f"{scope}_streams")
+            for scope, owner, limit in (
+                ("key", ctx.access_key_id, self.key_max_streams),
+                ("user", ctx.user_id, self.user_max_streams),
+            )
+            if limit > 0
+        ]
+        if not pools:
+            return None
+        token = uuid.uuid4().hex
+        full = await self._call_store(
+            "acquire",
+            self.store.acquire([(key, limit) for key, limit, _ in pools], token, self.stream_lease),
+        )
+        if full is not None:
+            return self._refuse(ctx, pools[full][2], _STREAM_RETRY_AFTER)
+        return StreamSlot(tuple(key for key, _, _ in pools), token)
+
+    async def release_stream(self, slot: StreamSlot) -> None:
+        await self._call_store("release", self.store.release(slot.keys, slot.token))
+
+    async def aclose(self) -> None:
+        await self.store.aclose()
+
+    def _refuse(self, ctx: RequestContext, limit: str, wait: float) -> RateLimited:
+        RATE_LIMITED_REQUESTS.labels(limit).inc()
+        logger.info(
+            "rate_limited",
+            access_key_id=str(ctx.access_key_id),
+            limit=limit,
+            retry_after=round(wait, 3),
+        )
+        return RateLimited(limit, wait)
+
+    async def _call_store(self, operation: str, call: Awaitable[T]) -> T | None:
+        try:
+            return await asyncio.wait_for(call, self.store_timeout)
+        except Exception as exc:
+            logger.warning("rate_limit_store_failed", operation=operation, error=repr(exc))
+            return None
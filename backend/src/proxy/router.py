@@ -1,12 +1,19 @@
+import time
 from dataclasses import dataclass
 from collections.abc import Awaitable, Callable
 
-from ..domain import AnthropicRequest, AnthropicResponse, AnthropicUsage, RETRYABLE_ERRORS, ErrorType, RoutingStrategy
+from ..config import get_settings
+from ..domain import AnthropicResponse, AnthropicUsage, RETRYABLE_ERRORS, ErrorType, RoutingStrategy
 from ..logging import get_logger
+from ..telemetry import HEDGED_REQUESTS
 from .context import RequestContext
 from .budget import BudgetCheckResult, format_budget_exceeded_message
 from .adapter_base import AdapterResponse, AdapterError, Adapter
+from .circuit_breaker import CircuitBreaker
 from .dependencies import get_proxy_deps
+from .hedging import race_with_hedge
+from .payload import MessagesRequest
+from .provider_stats import PROVIDER_FAULTS
 
 logger = get_logger(__name__)
 
@@ -30,6 +37,25 @@ def _map_error_type(error_type: ErrorType) -> str:
     return ANTHROPIC_ERROR_TYPE_MAP.get(error_type, "api_error")
 
 
+def _should_fallback(error: AdapterError) -> bool:
+    return error.retryable and error.error_type in RETRYABLE_ERRORS
+
+
+async def record_plan_outcome(cb: CircuitBreaker, key_id: str, result: object) -> None:
+    """Report a Plan call's result to the circuit breaker.
+
+    Anything but an ``AdapterError`` or None is a success. None means the call
+    was cancelled after losing a hedge race: slow, not failing, so it only
+    gives back a half-open probe slot if it held one.
+    """
+    if result is None:
+        await cb.record_failure(key_id, ErrorType.TIMEOUT)
+    elif isinstance(result, AdapterError):
+        await cb.record_failure(key_id, result.error_type)
+    else:
+        await cb.record_success(key_id)
+
+
 @dataclass
 class ProxyResponse:
     """Final proxy response."""
@@ -52,65 +78,56 @@ class ProxyRouter:
         plan_adapter: Adapter,
         bedrock_adapter: Adapter,
         budget_checker: Callable[[RequestContext], Awaitable[BudgetCheckResult]] | None = None,
+        hedge_delay: float | None = None,
+        clock: Callable[[], float] = time.perf_counter,
     ):
         self._plan = plan_adapter
         self._bedrock = bedrock_adapter
         self._budget_checker = budget_checker
+        self._hedge_delay = (
+            hedge_delay if hedge_delay is not None else get_settings().hedge_delay_ms / 1000
+        )
+        self._clock = clock
 
     async def route(
-        self, ctx: RequestContext, request: AnthropicRequest
+        self, ctx: RequestContext, request: MessagesRequest
     ) -> ProxyResponse:
         # Route based on user's routing strategy
         if ctx.routing_strategy == RoutingStrategy.BEDROCK_ONLY:
             return await self._route_bedrock_only(ctx, request)
+        if ctx.routing_strategy == RoutingStrategy.PLAN_HEDGED:
+            return await self._route_plan_hedged(ctx, request)
+        if ctx.routing_strategy == RoutingStrategy.ADAPTIVE:
+            return await self._route_adaptive(ctx, request)
 
         # Default: plan_first
         return await self._route_plan_first(ctx, request)
 
     async def _route_plan_first(
-        self, ctx: RequestContext, request: AnthropicRequest
+        self, ctx: RequestContext, request: MessagesRequest
     ) -> ProxyResponse:
         """Plan API first, fallback to Bedrock on retryable errors."""
         key_id = str(ctx.access_key_id)
         cb = get_proxy_deps().circuit_breaker
         plan_attempted = False
 
-        if not cb.is_open(key_id):
+        if not await cb.is_open(key_id):
             plan_attempted = True
-            result = await self._plan.invoke(ctx, request)
+            result = await self._call("plan", self._plan, ctx, request)
 
             if isinstance(result, AdapterResponse):
-                cb.record_success(key_id)
+                await cb.record_success(key_id)
                 return self._success_response("plan", result, is_fallback=False)
 
-            cb.record_failure(key_id, result.error_type)
+            await cb.record_failure(key_id, result.error_type)
 
-            should_fallback = result.retryable and result.error_type in RETRYABLE_ERRORS
-            if not should_fallback:
+            if not _should_fallback(result):
                 return self._error_response("plan", result, is_fallback=False)
         else:
             logger.info("plan_skipped_circuit_open", access_key_id=key_id)
 
         if ctx.has_bedrock_key:
-            if self._budget_checker:
-                budget_result = await self._budget_checker(ctx)
-                if not budget_result.allowed:
-                    return ProxyResponse(
-                        success=False,
-                        response=None,
-                        usage=None,
-                        provider="bedrock",
-                        is_fallback=plan_attempted,
-                        status_code=429,
-                        error_type="rate_limit_error",
-                        error_message=format_budget_exceeded_message(budget_result),
-                    )
-            result = await self._bedrock.invoke(ctx, request)
-
-            if isinstance(result, AdapterResponse):
-                return self._success_response("bedrock", result, is_fallback=plan_attempted)
-
-            return self._error_response("bedrock", result, is_fallback=plan_attempted)
+            return await self._invoke_bedrock(ctx, request, is_fallback=plan_attempted)
 
         return ProxyResponse(
             success=False,
@@ -123,8 +140,73 @@ class ProxyRouter:
             error_message="Service unavailable and no fallback configured",
         )
 
+    async def _route_plan_hedged(
+        self, ctx: RequestContext, request: MessagesRequest
+    ) -> ProxyResponse:
+        """Plan API first, racing Bedrock once Plan is slower than the hedge delay."""
+        if not ctx.has_bedrock_key:
+            return await self._route_plan_first(ctx, request)
+
+        key_id = str(ctx.access_key_id)
+        cb = get_proxy_deps().circuit_breaker
+        if await cb.is_open(key_id):
+            logger.info("plan_skipped_circuit_open", access_key_id=key_id)
+            return await self._invoke_bedrock(ctx, request, is_fallback=False)
+
+        async def _hedge() -> AdapterResponse | AdapterError | ProxyResponse:
+            logger.info("hedge_started", access_key_id=key_id, delay=self._hedge_delay)
+            denied = await self._check_budget(ctx, is_fallback=True)
+            if denied is not None:
+                return denied
+            return await self._call("bedrock", self._bedrock, ctx, request)
+
+        race = await race_with_hedge(
+            self._call("plan", self._plan, ctx, request),
+            _hedge,
+            self._hedge_delay,
+            primary_ok=lambda r: isinstance(r, AdapterResponse),
+            hedge_ok=lambda r: isinstance(r, AdapterResponse),
+        )
+        await record_plan_outcome(cb, key_id, race.primary)
+        if race.hedged:
+            HEDGED_REQUESTS.labels(race.winner or "none").inc()
+
+        if race.winner == "primary":
+            return self._success_response("plan", race.primary, is_fallback=False)
+        if race.winner == "hedge":
+            return self._success_response("bedrock", race.hedge, is_fallback=True)
+
+        plan_error = race.primary
+        if not _should_fallback(plan_error):
+            return self._error_response("plan", plan_error, is_fallback=False)
+        if not race.hedged:
+            return await self._invoke_bedrock(ctx, request, is_fallback=True)
+        if isinstance(race.hedge, ProxyResponse):
+            return race.hedge
+        return self._error_response("bedrock", race.hedge, is_fallback=True)
+
+    async def _route_adaptive(
+        self, ctx: RequestContext, request: MessagesRequest
+    ) -> ProxyResponse:
+        """Plan or Bedrock, whichever the recent provider stats favour.
+
+        Bedrock is only chosen within the user's budget.
+        """
+        if not ctx.has_bedrock_key:
+            return await self._route_plan_first(ctx, request)
+
+        choice = get_proxy_deps().provider_stats.choose(request.model, stream=False)
+        if choice == "bedrock" and await self._check_budget(ctx, is_fallback=False) is None:
+            logger.info("adaptive_routed_bedrock", access_key_id=str(ctx.access_key_id))
+            result = await self._call("bedrock", self._bedrock, ctx, request)
+            if isinstance(result, AdapterResponse):
+                return self._success_response("bedrock", result, is_fallback=False)
+            return self._error_response("bedrock", result, is_fallback=False)
+
+        return await self._route_plan_first(ctx, request)
+
     async def _route_bedrock_only(
-        self, ctx: RequestContext, request: AnthropicRequest
+        self, ctx: RequestContext, request: MessagesRequest
     ) -> ProxyResponse:
         """Bedrock only, skip Plan API entirely."""
         logger.info(
@@ -145,26 +227,55 @@ class ProxyRouter:
                 error_message="Bedrock key not configured for bedrock_only routing",
             )
 
-        if self._budget_checker:
-            budget_result = await self._budget_checker(ctx)
-            if not budget_result.allowed:
-                return ProxyResponse(
-                    success=False,
-                    response=None,
-                    usage=None,
-                    provider="bedrock",
-                    is_fallback=False,
-                    status_code=429,
-                    error_type="rate_limit_error",
-                    error_message=format_budget_exceeded_message(budget_result),
-                )
-
-        result = await self._bedrock.invoke(ctx, request)
+        return await self._invoke_bedrock(ctx, request, is_fallback=False)
+
+    async def _invoke_bedrock(
+        self, ctx: RequestContext, request: MessagesRequest, is_fallback: bool
+    ) -> ProxyResponse:
+        denied = await self._check_budget(ctx, is_fallback)
+        if denied is not None:
+            return denied
+
+        result = await self._call("bedrock", self._bedrock, ctx, request)
 
         if isinstance(result, AdapterResponse):
-            return self._success_response("bedrock", result, is_fallback=False)
+            return self._success_response("bedrock", result, is_fallback=is_fallback)
+
+        return self._error_response("bedrock", result, is_fallback=is_fallback)
 
-        return self._error_response("bedrock", result, is_fallback=False)
+    async def _call(
+        self, provider: str, adapter: Adapter, ctx: RequestContext, request: MessagesRequest
+    ) -> AdapterResponse | AdapterError:
+        """Invoke an adapter and record how it did in the provider stats."""
+        started = self._clock()
+        result = await adapter.invoke(ctx, request)
+        get_proxy_deps().provider_stats.observe(
+            provider,
+            request.model,
+            latency_ms=(self._clock() - started) * 1000,
+            failed=isinstance(result, AdapterError) and result.error_type in PROVIDER_FAULTS,
+        )
+        return result
+
+    async def _check_budget(
+        self, ctx: RequestContext, is_fallback: bool
+    ) -> ProxyResponse | None:
+        """The 429 to return if the user may not spend on Bedrock, else None."""
+        if not self._budget_checker:
+            return None
+        budget_result = await self._budget_checker(ctx)
+        if budget_result.allowed:
+            return None
+        return ProxyResponse(
+            success=False,
+            response=None,
+            usage=None,
+            provider="bedrock",
+            is_fallback=is_fallback,
+            status_code=429,
+            error_type="rate_limit_error",
+            error_message=format_budget_exceeded_message(budget_result),
+        )
 
     def _success_response(
         self, provider: str, result: AdapterResponse, is_fallback: bool
@@ -0,0 +1,329 @@
+"""Shared cross-worker cache tier and invalidation fan-out.
+
+Every uvicorn worker keeps its own ``TwoLevelCache`` instances; the tier adds a
+shared key/value store behind them (Redis in production) and a pub/sub channel
+that carries invalidations to every worker.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from decimal import Decimal
+from time import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Protocol
+
+from ..config import get_settings
+from ..logging import get_logger
+
+if TYPE_CHECKING:
+    from .cache import TwoLevelCache
+
+logger = get_logger(__name__)
+
+INVALIDATION_CHANNEL = "cache-invalidate"
+
+# INCRBYFLOAT, plus an expiry when the counter is new, as one atomic step.
+_INCREMENT_SCRIPT = """
+local total = redis.call('INCRBYFLOAT', KEYS[1], ARGV[1])
+if redis.call('TTL', KEYS[1]) < 0 then
+  redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return total
+"""
+
+
+class CacheSubscription(Protocol):
+    def __aiter__(self) -> AsyncIterator[str]: ...
+
+    async def aclose(self) -> None: ...
+
+
+class CacheBackend(Protocol):
+    """Minimal Redis-shaped interface used by ``SharedCacheTier``."""
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def increment(self, key: str, amount: str, ttl: int) -> bytes:
+        """Atomically add a decimal ``amount`` to a counter and return the total.
+
+        A new counter expires after ``ttl`` seconds; increments keep that expiry.
+        """
+        ...
+
+    async def publish(self, channel: str, message: str) -> None: ...
+
+    async def subscribe(self, channel: str) -> CacheSubscription:
+        """Return once the subscription is active."""
+        ...
+
+    async def aclose(self) -> None: ...
+
+
+class InMemoryCacheBackend:
+    """In-process stand-in for Redis.
+
+    Several tiers sharing one instance behave like workers sharing a Redis
+    server, which is what the tests and ``memory://`` local runs rely on.
+    """
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[bytes, float]] = {}
+        self._subscribers: dict[str, set[asyncio.Queue[str]]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time() > expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._data[key] = (value, time() + ttl)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def increment(self, key: str, amount: str, ttl: int) -> bytes:
+        entry = self._data.get(key)
+        if entry is None or time() > entry[1]:
+            entry = (b"0", time() + ttl)
+        total = str(Decimal(entry[0].decode()) + Decimal(amount)).encode()
+        self._data[key] = (total, entry[1])
+        return total
+
+    async def publish(self, channel: str, message: str) -> None:
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> CacheSubscription:
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        self._subscribers.setdefault(channel, set()).add(queue)
+        return _QueueSubscription(queue, lambda: self._subscribers[channel].discard(queue))
+
+    async def aclose(self) -> None:
+        return None
+
+
+class _QueueSubscription:
+    def __init__(self, queue: asyncio.Queue[str], unsubscribe) -> None:
+        self._queue = queue
+        self._unsubscribe = unsubscribe
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        while True:
+            yield await self._queue.get()
+
+    async def aclose(self) -> None:
+        self._unsubscribe()
+
+
+class RedisCacheBackend:
+    """Backend over a ``redis.asyncio.Redis`` client (or anything API-compatible)."""
+
+    def __init__(self, client: Any):
+        self._client = client
+        self._increment_script = client.register_script(_INCREMENT_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> RedisCacheBackend:
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:  # pragma: no cover - depends on install extras
+            raise RuntimeError(
+                "PROXY_SHARED_CACHE_URL points at Redis but the 'redis' package is not "
+                "installed; install claude-code-proxy[redis]"
+            ) from exc
+        return cls(redis.from_url(url))
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self._client.set(key, value, ex=ttl)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+    async def increment(self, key: str, amount: str, ttl: int) -> bytes:
+        return await self._increment_script(keys=[key], args=[amount, ttl])
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._client.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> CacheSubscription:
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(channel)
+        return _RedisSubscription(pubsub)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub: Any) -> None:
+        self._pubsub = pubsub
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        async for message in self._pubsub.listen():
+            if message["type"] == "message":
+                data = message["data"]
+                yield data.decode() if isinstance(data, bytes) else data
+
+    async def aclose(self) -> None:
+        await self._pubsub.aclose()
+
+
+def create_cache_backend(url: str) -> CacheBackend:
+    """Build a backend from ``PROXY_SHARED_CACHE_URL``."""
+    if url.startswith("memory://"):
+        return InMemoryCacheBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend.from_url(url)
+    raise ValueError(f"Unsupported shared cache URL scheme: {url.split('://', 1)[0]}")
+
+
+class SharedCacheTier:
+    """Second cache level shared by all workers, plus invalidation fan-out.
+
+    Shared-tier failures never fail a request: reads degrade to a miss and
+    writes are skipped, with a warning. If the invalidation subscription drops,
+    attached local caches are cleared after resubscribing because messages
+    published in the gap are lost.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        key_prefix: str | None = None,
+        timeout: float | None = None,
+        retry_delay: float = 1.0,
+    ):
+        settings = get_settings()
+        self._backend = backend
+        self._prefix = key_prefix or settings.shared_cache_key_prefix
+        self._timeout = timeout or settings.shared_cache_timeout
+        self._retry_delay = retry_delay
+        self._channel = f"{self._prefix}:{INVALIDATION_CHANNEL}"
+        self._caches: dict[str, TwoLevelCache] = {}
+        self._subscription: CacheSubscription | None = None
+        self._listener: asyncio.Task | None = None
+        self._pending: set[asyncio.Task] = set()
+
+    def attach(self, *caches: TwoLevelCache) -> None:
+        for cache in caches:
+            self._caches[cache.namespace] = cache
+            cache.attach(self)
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._subscription = await self._backend.subscribe(self._channel)
+            self._listener = asyncio.create_task(self._listen())
+
+    async def aclose(self) -> None:
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        if self._subscription is not None:
+            with contextlib.suppress(Exception):
+                await self._subscription.aclose()
+            self._subscription = None
+        for cache in self._caches.values():
+            cache.attach(None)
+        await self._backend.aclose()
+
+    async def get(self, namespace: str, key: str) -> bytes | None:
+        try:
+            return await asyncio.wait_for(
+                self._backend.get(self._key(namespace, key)), self._timeout
+            )
+        except Exception as exc:
+            logger.warning("shared_cache_get_failed", namespace=namespace, error=repr(exc))
+            return None
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: int) -> None:
+        try:
+            await asyncio.wait_for(
+                self._backend.set(self._key(namespace, key), value, ttl), self._timeout
+            )
+        except Exception as exc:
+            logger.warning("shared_cache_set_failed", namespace=namespace, error=repr(exc))
+
+    async def invalidate(self, namespace: str, key: str) -> None:
+        """Drop the shared entry and tell every worker to drop its local copy."""
+        try:
+            await self._backend.delete(self._key(namespace, key))
+            await self._backend.publish(self._channel, f"{namespace}:{key}")
+        except Exception as exc:
+            logger.error("shared_cache_invalidate_failed", namespace=namespace, error=repr(exc))
+
+    async def increment(
+        self, namespace: str, key: str, counter: str, amount: Decimal, ttl: int
+    ) -> Decimal | None:
+        """Add ``amount`` to a shared counter and tell every worker to drop ``key``.
+
+        Returns the counter's new total, or None if the tier failed.
+        """
+        try:
+            total = await asyncio.wait_for(
+                self._backend.increment(self._key(namespace, counter), str(amount), ttl),
+                self._timeout,
+            )
+            await self._backend.publish(self._channel, f"{namespace}:{key}")
+        except Exception as exc:
+            logger.warning("shared_cache_increment_failed", namespace=namespace, error=repr(exc))
+            return None
+        return Decimal(total.decode() if isinstance(total, bytes) else total)
+
+    def publish_invalidation(self, namespace: str, key: str) -> None:
+        """Schedule ``invalidate`` from synchronous code on the running loop."""
+        try:
+            task = asyncio.get_running_loop().create_task(self.invalidate(namespace, key))
+        except RuntimeError:
+            logger.warning("shared_cache_invalidate_skipped", namespace=namespace)
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self._prefix}:{namespace}:{key}"
+
+    def _apply(self, message: str) -> None:
+        namespace, _, key = message.partition(":")
+        cache = self._caches.get(namespace)
+        if cache is not None:
+            cache.invalidate_local(key)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for message in self._subscription:
+                    self._apply(message)
+            except Exception as exc:
+                logger.warning("shared_cache_subscription_lost", error=repr(exc))
+            with contextlib.suppress(Exception):
+                await self._subscription.aclose()
+            self._subscription = await self._resubscribe()
+
+    async def _resubscribe(self) -> CacheSubscription:
+        while True:
+            await asyncio.sleep(self._retry_delay)
+            try:
+                subscription = await self._backend.subscribe(self._channel)
+            except Exception as exc:
+                logger.warning("shared_cache_resubscribe_failed", error=repr(exc))
+                continue
+            for cache in self._caches.values():
+                cache.clear()
+            logger.info("shared_cache_resubscribed")
+            return subscription
@@ -1,51 +1,198 @@
-import json
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 
 from ..domain import AnthropicUsage
+from ..json_codec import loads
+
+_EVENT_END = b"\n\n"
+_MESSAGE_MARKER = b"message_"
+_MESSAGE_PREFIX = b'"message_'
+_USAGE_EVENT_SUFFIXES = (b'start"', b'delta"')
+_USAGE_EVENT_NAMES = (b"message_start", b"message_delta")
+_CONTENT_DELTA_MARKER = b"content_block_delta"
+
+# ``token_usage`` columns filled from a StreamTiming; NULL for non-streaming rows.
+STREAM_TIMING_COLUMNS = (
+    "upstream_connect_ms",
+    "ttfb_ms",
+    "ttft_ms",
+    "stream_duration_ms",
+    "output_tokens_per_second",
+)
 
 
 @dataclass
 class StreamingUsageCollector:
-    """Collect usage metadata from Anthropic-compatible SSE."""
+    """Collect usage metadata from Anthropic-compatible SSE.
+
+    Works on raw bytes: chunks are appended to a bytearray and scanned in place.
+    Only events mentioning ``message_`` are inspected and only
+    ``message_start``/``message_delta`` are JSON-decoded, so content deltas cost
+    one C-level substring search and the cost per byte stays flat however long
+    the stream runs.
+    """
 
-    _buffer: str = ""
+    _buffer: bytearray = field(default_factory=bytearray)
+    _scan_from: int = 0
     _input_tokens: int = 0
+    _cache_read_input_tokens: int | None = None
+    _cache_creation_input_tokens: int | None = None
     _usage: AnthropicUsage | None = None
 
     def feed(self, chunk: bytes) -> None:
-        self._buffer += chunk.decode(errors="ignore")
-        while "\n\n" in self._buffer:
-            event, self._buffer = self._buffer.split("\n\n", 1)
-            for line in event.splitlines():
-                if not line.startswith("data:"):
-                    continue
-                payload = line[len("data:") :].strip()
-                if not payload or payload == "[DONE]":
-                    continue
-                try:
-                    data = json.loads(payload)
-                except json.JSONDecodeError:
-                    continue
-                self._handle_event(data)
+        buffer = self._buffer
+        buffer += chunk
+        last = buffer.rfind(_EVENT_END, self._scan_from)
+        if last < 0:
+            # A terminator may straddle this chunk and the next one.
+            self._scan_from = max(len(buffer) - 1, 0)
+            return
+        complete = last + len(_EVENT_END)
+
+        # Only events mentioning "message_" can carry usage; jump between those
+        # instead of walking every content delta.
+        pos = buffer.find(_MESSAGE_MARKER, 0, complete)
+        while pos >= 0:
+            boundary = buffer.rfind(_EVENT_END, 0, pos)
+            start = 0 if boundary < 0 else boundary + len(_EVENT_END)
+            end = buffer.find(_EVENT_END, pos, complete)
+            if self._is_usage_event(buffer, start, end):
+                self._decode_event(buffer, start, end)
+            pos = buffer.find(_MESSAGE_MARKER, end, complete)
+
+        # Dropping a bytearray prefix only moves its start offset.
+        del buffer[:complete]
+        self._scan_from = max(len(buffer) - 1, 0)
 
     def get_usage(self) -> AnthropicUsage | None:
         return self._usage
 
+    @staticmethod
+    def _is_usage_event(buffer: bytearray, start: int, end: int) -> bool:
+        if buffer.startswith(b"event:", start, end):
+            name_at = start + 6
+            if buffer[name_at : name_at + 1] == b" ":
+                name_at += 1
+            return buffer.startswith(_USAGE_EVENT_NAMES, name_at, end)
+        pos = buffer.find(_MESSAGE_PREFIX, start, end)
+        while pos >= 0:
+            suffix_at = pos + len(_MESSAGE_PREFIX)
+            if buffer.startswith(_USAGE_EVENT_SUFFIXES, suffix_at, end):
+                return True
+            pos = buffer.find(_MESSAGE_PREFIX, suffix_at, end)
+        return False
+
+    def _decode_event(self, buffer: bytearray, start: int, end: int) -> None:
+        pos = start
+        while pos < end:
+            line_end = buffer.find(b"\n", pos, end)
+            if line_end < 0:
+                line_end = end
+            if buffer.startswith(b"data:", pos, line_end):
+                payload = bytes(buffer[pos + 5 : line_end]).strip()
+                if payload and payload != b"[DONE]":
+                    try:
+                        data = loads(payload)
+                    except ValueError:
+                        data = None
+                    if isinstance(data, dict):
+                        self._handle_event(data)
+            pos = line_end + 1
+
     def _handle_event(self, data: dict) -> None:
         if data.get("type") == "message_start":
             message = data.get("message") or {}
             usage = message.get("usage") or {}
             if "input_tokens" in usage:
                 self._input_tokens = usage.get("input_tokens") or 0
+            self._cache_read_input_tokens = usage.get("cache_read_input_tokens")
+            self._cache_creation_input_tokens = usage.get("cache_creation_input_tokens")
             return
 
         if data.get("type") == "message_delta":
             usage = data.get("usage") or {}
             if "output_tokens" not in usage:
                 return
+            # Newer API versions repeat cumulative input/cache counts here.
             self._usage = AnthropicUsage(
-                input_tokens=self._input_tokens,
+                input_tokens=usage.get("input_tokens") or self._input_tokens,
                 output_tokens=usage.get("output_tokens") or 0,
-                cache_read_input_tokens=usage.get("cache_read_input_tokens"),
-                cache_creation_input_tokens=usage.get("cache_creation_input_tokens"),
+                cache_read_input_tokens=usage.get(
+                    "cache_read_input_tokens", self._cache_read_input_tokens
+                ),
+                cache_creation_input_tokens=usage.get(
+                    "cache_creation_input_tokens", self._cache_creation_input_tokens
+                ),
             )
+
+
+def _ms(start: float | None, end: float | None) -> int | None:
+    if start is None or end is None:
+        return None
+    return round((end - start) * 1000)
+
+
+@dataclass
+class StreamTiming:
+    """Timestamps of one streamed response, as ``time.perf_counter()`` values.
+
+    ``started`` is request arrival. ``upstream_started``/``connected_at``
+    bracket the call that returned the serving upstream's response headers.
+    The first content delta is found with one substring search per chunk until
+    it is seen; after that ``feed`` returns immediately.
+    """
+
+    started: float = field(default_factory=time.perf_counter)
+    upstream_started: float | None = None
+    connected_at: float | None = None
+    first_byte_at: float | None = None
+    first_content_at: float | None = None
+    finished_at: float | None = None
+    _tail: bytes = b""
+
+    def begin_upstream(self) -> None:
+        self.upstream_started = time.perf_counter()
+
+    def upstream_connected(self) -> None:
+        self.connected_at = time.perf_counter()
+
+    def feed(self, chunk: bytes) -> None:
+        if self.first_content_at is not None:
+            return
+        now = time.perf_counter()
+        if self.first_byte_at is None:
+            self.first_byte_at = now
+        window = self._tail + chunk if self._tail else chunk
+        if _CONTENT_DELTA_MARKER in window:
+            self.first_content_at = now
+            self._tail = b""
+        else:
+            # The marker may straddle this chunk and the next one.
+            self._tail = bytes(window[-(len(_CONTENT_DELTA_MARKER) - 1) :])
+
+    def finish(self) -> None:
+        self.finished_at = time.perf_counter()
+
+    @property
+    def total_ms(self) -> int:
+        return _ms(self.started, self.finished_at or time.perf_counter())
+
+    @property
+    def upstream_ttft_ms(self) -> int | None:
+        """First content delta measured from the serving upstream's call."""
+        return _ms(self.upstream_started, self.first_content_at)
+
+    def columns(self, output_tokens: int | None) -> dict[str, int | float | None]:
+        """Values for ``STREAM_TIMING_COLUMNS``; unknown stages are None."""
+        tokens_per_second = None
+        if output_tokens and self.first_byte_at is not None and self.finished_at is not None:
+            duration = self.finished_at - self.first_byte_at
+            if duration > 0:
+                tokens_per_second = round(output_tokens / duration, 2)
+        return {
+            "upstream_connect_ms": _ms(self.upstream_started, self.connected_at),
+            "ttfb_ms": _ms(self.started, self.first_byte_at),
+            "ttft_ms": _ms(self.started, self.first_content_at),
+            "stream_duration_ms": _ms(self.first_byte_at, self.finished_at),
+            "output_tokens_per_second": tokens_per_second,
+        }
@@ -8,12 +8,19 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from ..logging import get_logger
 from ..domain import AnthropicUsage, CostCalculator, PricingConfig
 from ..repositories import TokenUsageRepository, UsageAggregateRepository
+from ..telemetry import stage_timer
 from .context import RequestContext
 from .router import ProxyResponse
 from .metrics import CloudWatchMetricsEmitter
+from .dependencies import get_proxy_deps
+from .budget import record_budget_spend
+from .usage_writer import UsageEvent, UsageWriter
+from .streaming_usage import STREAM_TIMING_COLUMNS, StreamTiming
 
 logger = get_logger(__name__)
 
+BUCKET_TYPES = ("minute", "hour", "day", "week", "month")
+
 
 def _get_bucket_start(ts: datetime, bucket_type: str, tz: ZoneInfo) -> datetime:
     local_ts = ts.astimezone(tz)
@@ -45,11 +52,18 @@ class UsageRecorder:
         usage_aggregate_repo: UsageAggregateRepository,
         metrics_emitter: CloudWatchMetricsEmitter | None = None,
         session_factory: async_sessionmaker[AsyncSession] | None = None,
+        usage_writer: UsageWriter | None = None,
     ):
         self._repo = token_usage_repo
         self._agg_repo = usage_aggregate_repo
+        # An explicit emitter wins; otherwise aggregate when the lifespan
+        # started an aggregator.
+        self._metrics_aggregator = (
+            None if metrics_emitter is not None else get_proxy_deps().metrics_aggregator
+        )
         self._metrics = metrics_emitter or CloudWatchMetricsEmitter()
         self._session_factory = session_factory
+        self._usage_writer = usage_writer or get_proxy_deps().usage_writer
 
     async def record(
         self,
@@ -72,13 +86,21 @@ class UsageRecorder:
         )
 
         # Emit metrics (fire and forget)
-        asyncio.create_task(self._metrics.emit(response, latency_ms))
+        if self._metrics_aggregator is not None:
+            self._metrics_aggregator.record(response, latency_ms)
+        else:
+            asyncio.create_task(self._metrics.emit(response, latency_ms))
 
-        # Record token usage to DB (Bedrock success only)
-        if response.success and response.provider == "bedrock" and response.usage:
-            asyncio.create_task(
-                self._record_usage_with_cost(ctx, response, latency_ms, model)
-            )
+        # Record token usage to DB (successful responses from either provider)
+        if response.success and response.usage:
+            if self._usage_writer:
+                # Only enqueues; the writer persists off the request path.
+                with stage_timer("usage_record"):
+                    await self._record_usage_with_cost(ctx, response, latency_ms, model)
+            else:
+                asyncio.create_task(
+                    self._record_usage_with_cost(ctx, response, latency_ms, model)
+                )
 
     async def record_streaming_usage(
         self,
@@ -87,16 +109,19 @@ class UsageRecorder:
         latency_ms: int,
         model: str,
         is_fallback: bool,
+        provider: str = "bedrock",
+        timing: StreamTiming | None = None,
     ) -> None:
         response = ProxyResponse(
             success=True,
             response=None,
             usage=usage,
-            provider="bedrock",
+            provider=provider,
             is_fallback=is_fallback,
             status_code=200,
         )
-        await self._record_usage_with_cost(ctx, response, latency_ms, model)
+        stream_timing = timing.columns(usage.output_tokens) if timing else None
+        await self._record_usage_with_cost(ctx, response, latency_ms, model, stream_timing)
 
     async def _record_usage_with_cost(
         self,
@@ -104,6 +129,7 @@ class UsageRecorder:
         response: ProxyResponse,
         latency_ms: int,
         model: str,
+        stream_timing: dict | None = None,
     ) -> None:
         try:
             now_utc = datetime.now(timezone.utc)
@@ -116,7 +142,7 @@ class UsageRecorder:
 
             cost_breakdown, pricing = self._calculate_cost_safe(
                 model,
-                ctx.bedrock_region,
+                ctx.pricing_region,
                 input_tokens,
                 output_tokens,
                 cache_write_tokens,
@@ -125,8 +151,43 @@ class UsageRecorder:
             pricing_model_id = (
                 pricing.model_id if pricing else PricingConfig.normalize_model_id(model)
             )
+            if response.provider == "bedrock":
+                # Plan cost is a Bedrock-equivalent estimate; budgets cap real spend.
+                await record_budget_spend(ctx.user_id, cost_breakdown.total_cost, now_utc)
 
-            if self._session_factory:
+            if self._usage_writer:
+                self._usage_writer.submit(
+                    UsageEvent(
+                        token_usage={
+                            "timestamp": now_utc,
+                            **self._token_usage_fields(
+                                ctx=ctx,
+                                response=response,
+                                latency_ms=latency_ms,
+                                model=model,
+                                pricing=pricing,
+                                pricing_model_id=pricing_model_id,
+                                cost_breakdown=cost_breakdown,
+                                input_tokens=input_tokens,
+                                output_tokens=output_tokens,
+                                total_tokens=total_tokens,
+                                stream_timing=stream_timing,
+                            ),
+                        },
+                        aggregates=self._aggregate_rows(
+                            ctx=ctx,
+                            provider=response.provider,
+                            cost_breakdown=cost_breakdown,
+                            input_tokens=input_tokens,
+                            output_tokens=output_tokens,
+                            total_tokens=total_tokens,
+                            cache_write_tokens=cache_write_tokens,
+                            cache_read_tokens=cache_read_tokens,
+                            now_kst=now_kst,
+                        ),
+                    )
+                )
+            elif self._session_factory:
                 async with self._session_factory() as session:
                     try:
                         token_repo = TokenUsageRepository(session)
@@ -147,6 +208,7 @@ class UsageRecorder:
                             cache_write_tokens=cache_write_tokens,
                             cache_read_tokens=cache_read_tokens,
                             now_kst=now_kst,
+                            stream_timing=stream_timing,
                         )
                         await session.commit()
                     except Exception:
@@ -169,6 +231,7 @@ class UsageRecorder:
                     cache_write_tokens=cache_write_tokens,
                     cache_read_tokens=cache_read_tokens,
                     now_kst=now_kst,
+                    stream_timing=stream_timing,
                 )
         except Exception as exc:
             logger.error(
@@ -222,8 +285,64 @@ class UsageRecorder:
         cache_write_tokens: int,
         cache_read_tokens: int,
         now_kst: datetime,
+        stream_timing: dict | None = None,
     ) -> None:
         await token_repo.create(
+            **self._token_usage_fields(
+                ctx=ctx,
+                response=response,
+                latency_ms=latency_ms,
+                model=model,
+                pricing=pricing,
+                pricing_model_id=pricing_model_id,
+                cost_breakdown=cost_breakdown,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                total_tokens=total_tokens,
+                stream_timing=stream_timing,
+            )
+        )
+
+        for bucket_type in BUCKET_TYPES:
+            bucket_start_kst = _get_bucket_start(now_kst, bucket_type, tz=self.KST)
+            bucket_start = bucket_start_kst.astimezone(timezone.utc)
+            await agg_repo.increment(
+                bucket_type=bucket_type,
+                bucket_start=bucket_start,
+                user_id=ctx.user_id,
+                access_key_id=ctx.access_key_id,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                total_tokens=total_tokens,
+                cache_write_tokens=cache_write_tokens,
+                cache_read_tokens=cache_read_tokens,
+                total_estimated_cost_usd=cost_breakdown.total_cost,
+                total_input_cost_usd=cost_breakdown.input_cost,
+                total_output_cost_usd=cost_breakdown.output_cost,
+                total_cache_write_cost_usd=cost_breakdown.cache_write_cost,
+                total_cache_read_cost_usd=cost_breakdown.cache_read_cost,
+                provider=response.provider,
+            )
+
+    def _token_usage_fields(
+        self,
+        ctx: RequestContext,
+        response: ProxyResponse,
+        latency_ms: int,
+        model: str,
+        pricing,
+        pricing_model_id: str,
+        cost_breakdown,
+        input_tokens: int,
+        output_tokens: int,
+        total_tokens: int,
+        stream_timing: dict | None = None,
+    ) -> dict:
+        # Every row carries the timing keys so multi-row inserts share one shape.
+        timing_fields = dict.fromkeys(STREAM_TIMING_COLUMNS)
+        if stream_timing:
+            timing_fields.update(stream_timing)
+        return dict(
             request_id=ctx.request_id,
             user_id=ctx.user_id,
             access_key_id=ctx.access_key_id,
@@ -231,6 +350,7 @@ class UsageRecorder:
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             total_tokens=total_tokens,
+            provider=response.provider,
             is_fallback=response.is_fallback,
             latency_ms=latency_ms,
             cache_read_input_tokens=response.usage.cache_read_input_tokens,
@@ -240,7 +360,7 @@ class UsageRecorder:
             output_cost_usd=cost_breakdown.output_cost,
             cache_write_cost_usd=cost_breakdown.cache_write_cost,
             cache_read_cost_usd=cost_breakdown.cache_read_cost,
-            pricing_region=pricing.region if pricing else ctx.bedrock_region,
+            pricing_region=pricing.region if pricing else ctx.pricing_region,
             pricing_model_id=pricing_model_id,
             pricing_effective_date=pricing.effective_date if pricing else None,
             pricing_input_price_per_million=pricing.input_price_per_million
@@ -255,24 +375,43 @@ class UsageRecorder:
             pricing_cache_read_price_per_million=pricing.cache_read_price_per_million
             if pricing
             else Decimal("0"),
+            **timing_fields,
         )
 
-        for bucket_type in ("minute", "hour", "day", "week", "month"):
+    def _aggregate_rows(
+        self,
+        ctx: RequestContext,
+        provider: str,
+        cost_breakdown,
+        input_tokens: int,
+        output_tokens: int,
+        total_tokens: int,
+        cache_write_tokens: int,
+        cache_read_tokens: int,
+        now_kst: datetime,
+    ) -> list[dict]:
+        """Per-bucket ``usage_aggregates`` deltas, keyed by column name."""
+        rows = []
+        for bucket_type in BUCKET_TYPES:
             bucket_start_kst = _get_bucket_start(now_kst, bucket_type, tz=self.KST)
-            bucket_start = bucket_start_kst.astimezone(timezone.utc)
-            await agg_repo.increment(
-                bucket_type=bucket_type,
-                bucket_start=bucket_start,
-                user_id=ctx.user_id,
-                access_key_id=ctx.access_key_id,
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                total_tokens=total_tokens,
-                cache_write_tokens=cache_write_tokens,
-                cache_read_tokens=cache_read_tokens,
-                total_estimated_cost_usd=cost_breakdown.total_cost,
-                total_input_cost_usd=cost_breakdown.input_cost,
-                total_output_cost_usd=cost_breakdown.output_cost,
-                total_cache_write_cost_usd=cost_breakdown.cache_write_cost,
-                total_cache_read_cost_usd=cost_breakdown.cache_read_cost,
+            rows.append(
+                {
+                    "bucket_type": bucket_type,
+                    "bucket_start": bucket_start_kst.astimezone(timezone.utc),
+                    "user_id": ctx.user_id,
+                    "access_key_id": ctx.access_key_id,
+                    "provider": provider,
+                    "total_requests": 1,
+                    "total_input_tokens": input_tokens,
+                    "total_output_tokens": output_tokens,
+                    "total_tokens": total_tokens,
+                    "total_cache_write_tokens": cache_write_tokens,
+                    "total_cache_read_tokens": cache_read_tokens,
+                    "total_input_cost_usd": cost_breakdown.input_cost,
+                    "total_output_cost_usd": cost_breakdown.output_cost,
+                    "total_cache_write_cost_usd": cost_breakdown.cache_write_cost,
+                    "total_cache_read_cost_usd": cost_breakdown.cache_read_cost,
+                    "total_estimated_cost_usd": cost_breakdown.total_cost,
+                }
             )
+        return rows
@@ -0,0 +1,256 @@
+"""Write-behind batching of usage records."""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..config import get_settings
+from ..logging import get_logger
+from ..repositories import TokenUsageRepository, UsageAggregateRepository
+from ..repositories.usage_repository import AGGREGATE_SUM_COLUMNS
+from ..telemetry import STAGE_SECONDS
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class UsageEvent:
+    """One request's usage, ready to persist.
+
+    ``token_usage`` holds the ``token_usage`` row (including ``timestamp``);
+    ``aggregates`` holds one ``usage_aggregates`` delta per bucket, keyed by
+    column name.
+    """
+
+    token_usage: dict[str, Any]
+    aggregates: list[dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class UsageWriterStats:
+    queue_depth: int
+    max_queue_size: int
+    enqueued: int
+    dropped: int
+    flushed_events: int
+    flushed_batches: int
+    failed_events: int
+    last_flush_ms: float | None
+
+
+class UsageWriter:
+    """Bounded in-process queue that flushes usage in batches.
+
+    Events are coalesced for up to ``flush_interval`` seconds (or
+    ``max_batch_size`` events), then written with one multi-row INSERT into
+    ``token_usage`` and one multi-row upsert of pre-summed aggregate deltas.
+    When the queue is full, new events are dropped and counted rather than
+    blocking the request path.
+
+    A batch that hits a transient database error (lost connection, timeout)
+    is retried once after ``retry_delay`` seconds. A batch that fails on its
+    rows (constraint or data errors) is split in half and each half written on
+    its own, down to single events, so only the rows that cannot be written
+    are lost.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_queue_size: int | None = None,
+        flush_interval: float | None = None,
+        max_batch_size: int | None = None,
+        retry_delay: float | None = None,
+    ):
+        settings = get_settings()
+        self._session_factory = session_factory
+        self._max_queue_size = max_queue_size or settings.usage_queue_max_size
+        self._flush_interval = flush_interval or settings.usage_flush_interval
+        self._max_batch_size = max_batch_size or settings.usage_flush_max_batch
+        self._retry_delay = (
+            retry_delay if retry_delay is not None else settings.usage_flush_retry_delay
+        )
+        self._queue: asyncio.Queue[UsageEvent] = asyncio.Queue(maxsize=self._max_queue_size)
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._enqueued = 0
+        self._dropped = 0
+        self._flushed_events = 0
+        self._flushed_batches = 0
+        self._failed_events = 0
+        self._last_flush_ms: float | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    def submit(self, event: UsageEvent) -> bool:
+        """Enqueue without blocking. Returns False if the event was dropped."""
+        if self._stopping:
+            self._record_drop("stopping")
+            return False
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._record_drop("queue_full")
+            return False
+        self._enqueued += 1
+        return True
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """Stop accepting events and flush everything already queued."""
+        self._stopping = True
+        if self._task is None:
+            await self._flush_remaining()
+            return
+        try:
+            await asyncio.wait_for(
+                self._task, timeout or get_settings().usage_drain_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.error("usage_writer_drain_timeout", pending=self._queue.qsize())
+        finally:
+            self._task = None
+
+    @property
+    def stats(self) -> UsageWriterStats:
+        return UsageWriterStats(
+            queue_depth=self._queue.qsize(),
+            max_queue_size=self._max_queue_size,
+            enqueued=self._enqueued,
+            dropped=self._dropped,
+            flushed_events=self._flushed_events,
+            flushed_batches=self._flushed_batches,
+            failed_events=self._failed_events,
+            last_flush_ms=self._last_flush_ms,
+        )
+
+    async def _run(self) -> None:
+        while not (self._stopping and self._queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    async def _flush_remaining(self) -> None:
+        while not self._queue.empty():
+            await self._flush(self._take_ready())
+
+    def _take_ready(self) -> list[UsageEvent]:
+        batch: list[UsageEvent] = []
+        while len(batch) < self._max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _collect(self) -> list[UsageEvent]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._flush_interval
+        batch: list[UsageEvent] = []
+        while len(batch) < self._max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if self._stopping or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch: list[UsageEvent]) -> None:
+        started = time.perf_counter()
+        written = await self._write_salvaging(batch)
+        if not written:
+            return
+
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels("usage_flush").observe(elapsed)
+        self._last_flush_ms = elapsed * 1000
+        self._flushed_events += written
+        self._flushed_batches += 1
+
+    async def _write_salvaging(self, batch: list[UsageEvent]) -> int:
+        """Write ``batch``, retrying or splitting it on failure. Returns events written."""
+        try:
+            await self._write(batch)
+            return len(batch)
+        except Exception as exc:
+            error = exc
+        if _is_transient(error):
+            await asyncio.sleep(self._retry_delay)
+            try:
+                await self._write(batch)
+                return len(batch)
+            except Exception as exc:
+                error = exc
+        # Still failing after a retry means the database is down: splitting won't help.
+        if len(batch) == 1 or _is_transient(error):
+            self._failed_events += len(batch)
+            logger.error(
+                "usage_batch_flush_failed",
+                error=str(error),
+                batch_size=len(batch),
+                request_ids=[event.token_usage.get("request_id") for event in batch[:10]],
+            )
+            return 0
+        middle = len(batch) // 2
+        return await self._write_salvaging(batch[:middle]) + await self._write_salvaging(
+            batch[middle:]
+        )
+
+    async def _write(self, batch: list[UsageEvent]) -> None:
+        async with self._session_factory() as session:
+            try:
+                await TokenUsageRepository(session).bulk_create(
+                    [event.token_usage for event in batch]
+                )
+                await UsageAggregateRepository(session).bulk_increment(
+                    sum_aggregate_deltas(batch)
+                )
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    def _record_drop(self, reason: str) -> None:
+        self._dropped += 1
+        if self._dropped == 1 or self._dropped % 1000 == 0:
+            logger.warning(
+                "usage_event_dropped",
+                reason=reason,
+                dropped_total=self._dropped,
+                queue_depth=self._queue.qsize(),
+            )
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Whether ``exc`` is about reaching the database rather than the rows sent."""
+    if isinstance(exc, DBAPIError) and exc.connection_invalidated:
+        return True
+    return isinstance(exc, (OperationalError, InterfaceError, OSError, asyncio.TimeoutError))
+
+
+def sum_aggregate_deltas(batch: list[UsageEvent]) -> list[dict[str, Any]]:
+    """Collapse aggregate deltas that share a bucket key into one row each."""
+    totals: dict[tuple, dict[str, Any]] = {}
+    for event in batch:
+        for row in event.aggregates:
+            key = (
+                row["bucket_type"],
+                row["bucket_start"],
+                row["user_id"],
+                row["access_key_id"],
+                row.get("provider", "bedrock"),
+            )
+            acc = totals.get(key)
+            if acc is None:
+                totals[key] = dict(row)
+                continue
+            for column in AGGREGATE_SUM_COLUMNS:
+                acc[column] += row[column]
+    return list(totals.values())
@@ -1,11 +1,75 @@
 from datetime import datetime
 from uuid import UUID
-from sqlalchemy import select, update, or_
+from sqlalchemy import Row, bindparam, case, func, select, update, or_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
 
-from ..db.models import AccessKeyModel
-from ..domain import AccessKey, KeyStatus
+from ..db.models import AccessKeyModel, BedrockKeyModel, UsageAggregateModel, UserModel
+from ..domain import AccessKey, KeyStatus, RoutingStrategy, UserStatus
+
+_access_keys = AccessKeyModel.__table__
+_users = UserModel.__table__
+_bedrock_keys = BedrockKeyModel.__table__
+_usage_aggregates = UsageAggregateModel.__table__
+
+# The user's Bedrock spend in [month_start, month_end), as budgets count it.
+_MONTH_USAGE = (
+    select(func.coalesce(func.sum(_usage_aggregates.c.total_estimated_cost_usd), 0))
+    .where(
+        _usage_aggregates.c.bucket_type == "month",
+        _usage_aggregates.c.bucket_start >= bindparam("month_start"),
+        _usage_aggregates.c.bucket_start < bindparam("month_end"),
+        _usage_aggregates.c.user_id == _users.c.id,
+        _usage_aggregates.c.provider == "bedrock",
+    )
+    .scalar_subquery()
+)
+
+# Every access-key cache miss runs this, so it is built once with bound
+# parameters (one compiled form, one prepared statement per connection). One
+# round trip returns what authentication, the budget ledger and the Bedrock
+# key cache need, as a plain row.
+_AUTH_CONTEXT = (
+    select(
+        _access_keys.c.id,
+        _access_keys.c.user_id,
+        _access_keys.c.key_prefix,
+        _access_keys.c.bedrock_region,
+        _access_keys.c.bedrock_model,
+        _access_keys.c.bedrock_regions,
+        _users.c.routing_strategy,
+        _users.c.monthly_budget_usd,
+        _MONTH_USAGE.label("month_usage"),
+        _bedrock_keys.c.access_key_id.is_not(None).label("has_bedrock_key"),
+    )
+    .select_from(
+        _access_keys.join(_users, _users.c.id == _access_keys.c.user_id).outerjoin(
+            _bedrock_keys, _bedrock_keys.c.access_key_id == _access_keys.c.id
+        )
+    )
+    .where(
+        _access_keys.c.key_hash == bindparam("key_hash"),
+        _users.c.status == UserStatus.ACTIVE.value,
+        or_(
+            _access_keys.c.status == KeyStatus.ACTIVE.value,
+            # ROTATING keys must not be expired
+            (_access_keys.c.status == KeyStatus.ROTATING.value)
+            & (
+                _access_keys.c.rotation_expires_at.is_(None)
+                | (_access_keys.c.rotation_expires_at > bindparam("now"))
+            ),
+        ),
+    )
+)
+# plan_first users reach Bedrock only on fallback and decrypt on demand, so
+# their blob is not sent back.
+_AUTH_CONTEXT_WITH_KEY = _AUTH_CONTEXT.add_columns(
+    case(
+        (
+            _users.c.routing_strategy != RoutingStrategy.PLAN_FIRST.value,
+            _bedrock_keys.c.encrypted_key,
+        ),
+    ).label("encrypted_key")
+)
 
 
 class AccessKeyRepository:
@@ -19,6 +83,7 @@ class AccessKeyRepository:
         key_prefix: str,
         bedrock_region: str,
         bedrock_model: str,
+        bedrock_regions: str | None = None,
     ) -> AccessKey:
         model = AccessKeyModel(
             user_id=user_id,
@@ -27,6 +92,7 @@ class AccessKeyRepository:
             status=KeyStatus.ACTIVE.value,
             bedrock_region=bedrock_region,
             bedrock_model=bedrock_model,
+            bedrock_regions=bedrock_regions,
             created_at=datetime.utcnow(),
         )
         self.session.add(model)
@@ -40,32 +106,34 @@ class AccessKeyRepository:
         model = result.scalar_one_or_none()
         return self._to_entity(model) if model else None
 
-    async def get_by_hash_with_user(
-        self, key_hash: str
-    ) -> tuple[AccessKey, UUID, str] | None:
-        """Returns (access_key, user_id, routing_strategy) or None."""
-        now = datetime.utcnow()
+    async def get_auth_context(
+        self,
+        key_hash: str,
+        month_start: datetime,
+        month_end: datetime,
+        include_encrypted_key: bool = False,
+    ) -> Row | None:
+        """The usable key with this hash and its active user, or None.
+
+        The row has the key's ``id``, ``user_id``, ``key_prefix``,
+        ``bedrock_region``, ``bedrock_model`` and ``bedrock_regions``; the
+        user's ``routing_strategy``, ``monthly_budget_usd`` and Bedrock spend
+        between ``month_start`` and ``month_end`` (``month_usage``); and
+        ``has_bedrock_key``. ``encrypted_key`` is added when
+        ``include_encrypted_key`` is set; it is None without a Bedrock key and
+        for plan_first users.
+        """
+        statement = _AUTH_CONTEXT_WITH_KEY if include_encrypted_key else _AUTH_CONTEXT
         result = await self.session.execute(
-            select(AccessKeyModel)
-            .options(joinedload(AccessKeyModel.user))
-            .where(
-                AccessKeyModel.key_hash == key_hash,
-                or_(
-                    AccessKeyModel.status == KeyStatus.ACTIVE.value,
-                    # ROTATING keys must not be expired
-                    (
-                        AccessKeyModel.status == KeyStatus.ROTATING.value
-                    ) & (
-                        (AccessKeyModel.rotation_expires_at == None) |
-                        (AccessKeyModel.rotation_expires_at > now)
-                    ),
-                ),
-            )
+            statement,
+            {
+                "key_hash": key_hash,
+                "now": datetime.utcnow(),
+                "month_start": month_start,
+                "month_end": month_end,
+            },
         )
-        model = result.scalar_one_or_none()
-        if not model or model.user.status != "active":
-            return None
-        return self._to_entity(model), model.user_id, model.user.routing_strategy
+        return result.one_or_none()
 
     async def get_by_id(self, key_id: UUID) -> AccessKey | None:
         result = await self.session.execute(
@@ -121,4 +189,5 @@ class AccessKeyRepository:
             created_at=model.created_at,
             revoked_at=model.revoked_at,
             rotation_expires_at=model.rotation_expires_at,
+            bedrock_regions=model.bedrock_regions,
         )
@@ -1,10 +1,19 @@
 from datetime import datetime
 from uuid import UUID
-from sqlalchemy import select, delete
+from sqlalchemy import Row, bindparam, select, delete, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db.models import BedrockKeyModel
-from ..domain import BedrockKey
+from ..db.models import AccessKeyModel, BedrockKeyModel, UserModel
+from ..domain import BedrockKey, KeyStatus, UserStatus
+
+_bedrock_keys = BedrockKeyModel.__table__
+
+_FOR_ACCESS_KEY = _bedrock_keys.c.access_key_id == bindparam("access_key_id")
+# Prebuilt, returning plain rows. Every Bedrock key cache miss runs the
+# encrypted-key lookup, which reads just the blob; the entity lookup is for
+# the admin API.
+_BY_ACCESS_KEY_ID = select(*_bedrock_keys.c).where(_FOR_ACCESS_KEY)
+_ENCRYPTED_KEY_BY_ACCESS_KEY_ID = select(_bedrock_keys.c.encrypted_key).where(_FOR_ACCESS_KEY)
 
 
 class BedrockKeyRepository:
@@ -26,10 +35,16 @@ class BedrockKeyRepository:
 
     async def get_by_access_key_id(self, access_key_id: UUID) -> BedrockKey | None:
         result = await self.session.execute(
-            select(BedrockKeyModel).where(BedrockKeyModel.access_key_id == access_key_id)
+            _BY_ACCESS_KEY_ID, {"access_key_id": access_key_id}
         )
-        model = result.scalar_one_or_none()
-        return self._to_entity(model) if model else None
+        row = result.one_or_none()
+        return self._to_entity(row) if row else None
+
+    async def get_encrypted_key(self, access_key_id: UUID) -> bytes | None:
+        result = await self.session.execute(
+            _ENCRYPTED_KEY_BY_ACCESS_KEY_ID, {"access_key_id": access_key_id}
+        )
+        return result.scalar_one_or_none()
 
     async def update(
         self, access_key_id: UUID, encrypted_key: bytes, key_hash: str
@@ -62,7 +77,28 @@ class BedrockKeyRepository:
         )
         return set(result.scalars().all())
 
-    def _to_entity(self, model: BedrockKeyModel) -> BedrockKey:
+    async def list_usable(self) -> list[BedrockKey]:
+        """Bedrock keys whose access key can currently authenticate."""
+        now = datetime.utcnow()
+        result = await self.session.execute(
+            select(BedrockKeyModel)
+            .join(AccessKeyModel, AccessKeyModel.id == BedrockKeyModel.access_key_id)
+            .join(UserModel, UserModel.id == AccessKeyModel.user_id)
+            .where(
+                UserModel.status == UserStatus.ACTIVE.value,
+                or_(
+                    AccessKeyModel.status == KeyStatus.ACTIVE.value,
+                    (AccessKeyModel.status == KeyStatus.ROTATING.value)
+                    & (
+                        AccessKeyModel.rotation_expires_at.is_(None)
+                        | (AccessKeyModel.rotation_expires_at > now)
+                    ),
+                ),
+            )
+        )
+        return [self._to_entity(model) for model in result.scalars().all()]
+
+    def _to_entity(self, model: BedrockKeyModel | Row) -> BedrockKey:
         return BedrockKey(
             access_key_id=model.access_key_id,
             encrypted_key=model.encrypted_key,
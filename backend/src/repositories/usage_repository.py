@@ -1,7 +1,7 @@
 from datetime import date, datetime, timezone
 from decimal import Decimal
 from uuid import UUID, uuid4
-from sqlalchemy import select, func, desc
+from sqlalchemy import bindparam, select, func, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
 
@@ -9,6 +9,53 @@ from ..db.models import TokenUsageModel, UsageAggregateModel, UserModel
 from ..domain import TokenUsage, UsageAggregate, UserStatus
 
 
+AGGREGATE_SUM_COLUMNS = (
+    "total_requests",
+    "total_input_tokens",
+    "total_output_tokens",
+    "total_tokens",
+    "total_cache_write_tokens",
+    "total_cache_read_tokens",
+    "total_input_cost_usd",
+    "total_output_cost_usd",
+    "total_cache_write_cost_usd",
+    "total_cache_read_cost_usd",
+    "total_estimated_cost_usd",
+)
+
+_usage_aggregates = UsageAggregateModel.__table__
+
+# Seeds every budget ledger on a cache miss; prebuilt with bound parameters.
+_MONTHLY_BEDROCK_TOTAL = select(func.sum(_usage_aggregates.c.total_estimated_cost_usd)).where(
+    _usage_aggregates.c.bucket_type == "month",
+    _usage_aggregates.c.bucket_start >= bindparam("start_time"),
+    _usage_aggregates.c.bucket_start < bindparam("end_time"),
+    _usage_aggregates.c.user_id == bindparam("user_id"),
+    # Budgets cap Bedrock spend; Plan traffic is billed by subscription.
+    _usage_aggregates.c.provider == "bedrock",
+)
+
+# Percentiles reported for each streaming latency column.
+LATENCY_PERCENTILES = (0.5, 0.9, 0.99)
+STREAM_LATENCY_METRICS = (
+    "upstream_connect_ms",
+    "ttfb_ms",
+    "ttft_ms",
+    "stream_duration_ms",
+    "latency_ms",
+    "output_tokens_per_second",
+)
+
+AGGREGATE_KEY_COLUMNS = ("bucket_type", "bucket_start", "user_id", "access_key_id", "provider")
+
+# Rows per multi-row statement; keeps bind parameters under asyncpg's 32767 limit.
+_BULK_CHUNK_ROWS = 1000
+
+
+def _chunks(rows: list[dict]) -> list[list[dict]]:
+    return [rows[i : i + _BULK_CHUNK_ROWS] for i in range(0, len(rows), _BULK_CHUNK_ROWS)]
+
+
 class TokenUsageRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -38,6 +85,12 @@ class TokenUsageRepository:
         pricing_output_price_per_million: Decimal = Decimal("0"),
         pricing_cache_write_price_per_million: Decimal = Decimal("0"),
         pricing_cache_read_price_per_million: Decimal = Decimal("0"),
+        provider: str = "bedrock",
+        upstream_connect_ms: int | None = None,
+        ttfb_ms: int | None = None,
+        ttft_ms: int | None = None,
+        stream_duration_ms: int | None = None,
+        output_tokens_per_second: float | None = None,
     ) -> TokenUsage:
         db_model = TokenUsageModel(
             id=uuid4(),
@@ -51,9 +104,14 @@ class TokenUsageRepository:
             cache_read_input_tokens=cache_read_input_tokens,
             cache_creation_input_tokens=cache_creation_input_tokens,
             total_tokens=total_tokens,
-            provider="bedrock",
+            provider=provider,
             is_fallback=is_fallback,
             latency_ms=latency_ms,
+            upstream_connect_ms=upstream_connect_ms,
+            ttfb_ms=ttfb_ms,
+            ttft_ms=ttft_ms,
+            stream_duration_ms=stream_duration_ms,
+            output_tokens_per_second=output_tokens_per_second,
             estimated_cost_usd=estimated_cost_usd,
             input_cost_usd=input_cost_usd,
             output_cost_usd=output_cost_usd,
@@ -71,6 +129,22 @@ class TokenUsageRepository:
         await self.session.flush()
         return self._to_entity(db_model)
 
+    async def bulk_create(self, rows: list[dict]) -> None:
+        """Insert many usage rows in one statement.
+
+        Each row holds the same fields as ``create`` plus ``timestamp``; ``provider``
+        defaults to bedrock. Rows whose request_id already exists are skipped so a
+        retried batch is harmless.
+        """
+        for chunk in _chunks(rows):
+            values = [{"id": uuid4(), "provider": "bedrock", **row} for row in chunk]
+            stmt = (
+                insert(TokenUsageModel)
+                .values(values)
+                .on_conflict_do_nothing(index_elements=["request_id"])
+            )
+            await self.session.execute(stmt)
+
     def _to_entity(self, model: TokenUsageModel) -> TokenUsage:
         return TokenUsage(
             id=model.id,
@@ -99,6 +173,11 @@ class TokenUsageRepository:
             pricing_output_price_per_million=model.pricing_output_price_per_million,
             pricing_cache_write_price_per_million=model.pricing_cache_write_price_per_million,
             pricing_cache_read_price_per_million=model.pricing_cache_read_price_per_million,
+            upstream_connect_ms=model.upstream_connect_ms,
+            ttfb_ms=model.ttfb_ms,
+            ttft_ms=model.ttft_ms,
+            stream_duration_ms=model.stream_duration_ms,
+            output_tokens_per_second=model.output_tokens_per_second,
         )
 
     async def get_cost_breakdown_by_model(
@@ -107,6 +186,7 @@ class TokenUsageRepository:
         end_time: datetime,
         user_id: UUID | None = None,
         access_key_id: UUID | None = None,
+        provider: str | None = None,
     ) -> list[dict]:
         query = select(
             TokenUsageModel.pricing_model_id.label("pricing_model_id"),
@@ -123,6 +203,8 @@ class TokenUsageRepository:
             query = query.where(TokenUsageModel.user_id == user_id)
         if access_key_id:
             query = query.where(TokenUsageModel.access_key_id == access_key_id)
+        if provider:
+            query = query.where(TokenUsageModel.provider == provider)
         query = query.group_by(TokenUsageModel.pricing_model_id).order_by(
             TokenUsageModel.pricing_model_id
         )
@@ -140,6 +222,62 @@ class TokenUsageRepository:
             for row in result
         ]
 
+    async def get_stream_latency_percentiles(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        user_id: UUID | None = None,
+        access_key_id: UUID | None = None,
+        provider: str | None = None,
+        model: str | None = None,
+    ) -> list[dict]:
+        """Per-provider percentiles of the streaming timing columns.
+
+        Only streamed requests (``ttfb_ms`` recorded) are included. Each metric
+        maps to ``{"p50": ..., "p90": ..., "p99": ...}``; values are None when
+        no row in range recorded that stage.
+        """
+        labels = {
+            (metric, percentile): f"{metric}_p{round(percentile * 100)}"
+            for metric in STREAM_LATENCY_METRICS
+            for percentile in LATENCY_PERCENTILES
+        }
+        query = select(
+            TokenUsageModel.provider.label("provider"),
+            func.count().label("requests"),
+            *(
+                func.percentile_cont(percentile)
+                .within_group(getattr(TokenUsageModel, metric))
+                .label(label)
+                for (metric, percentile), label in labels.items()
+            ),
+        ).where(
+            TokenUsageModel.timestamp >= start_time,
+            TokenUsageModel.timestamp < end_time,
+            TokenUsageModel.ttfb_ms.is_not(None),
+        )
+        if user_id:
+            query = query.where(TokenUsageModel.user_id == user_id)
+        if access_key_id:
+            query = query.where(TokenUsageModel.access_key_id == access_key_id)
+        if provider:
+            query = query.where(TokenUsageModel.provider == provider)
+        if model:
+            query = query.where(TokenUsageModel.model == model)
+        query = query.group_by(TokenUsageModel.provider).order_by(TokenUsageModel.provider)
+
+        result = await self.session.execute(query)
+        rows = []
+        for row in result:
+            entry: dict = {"provider": row.provider, "requests": row.requests}
+            for (metric, percentile), label in labels.items():
+                value = getattr(row, label)
+                entry.setdefault(metric, {})[f"p{round(percentile * 100)}"] = (
+                    None if value is None else float(value)
+                )
+            rows.append(entry)
+        return rows
+
 
 class UsageAggregateRepository:
     def __init__(self, session: AsyncSession):
@@ -152,6 +290,7 @@ class UsageAggregateRepository:
         end_time: datetime,
         user_id: UUID | None = None,
         access_key_id: UUID | None = None,
+        provider: str | None = None,
     ) -> list[UsageAggregate]:
         query = select(UsageAggregateModel).where(
             UsageAggregateModel.bucket_type == bucket_type,
@@ -162,6 +301,8 @@ class UsageAggregateRepository:
             query = query.where(UsageAggregateModel.user_id == user_id)
         if access_key_id:
             query = query.where(UsageAggregateModel.access_key_id == access_key_id)
+        if provider:
+            query = query.where(UsageAggregateModel.provider == provider)
         query = query.order_by(UsageAggregateModel.bucket_start)
 
         result = await self.session.execute(query)
@@ -174,6 +315,7 @@ class UsageAggregateRepository:
         end_time: datetime,
         user_id: UUID | None = None,
         access_key_id: UUID | None = None,
+        provider: str | None = None,
     ) -> list[dict]:
         query = select(
             UsageAggregateModel.bucket_start.label("bucket_start"),
@@ -207,6 +349,8 @@ class UsageAggregateRepository:
             query = query.where(UsageAggregateModel.user_id == user_id)
         if access_key_id:
             query = query.where(UsageAggregateModel.access_key_id == access_key_id)
+        if provider:
+            query = query.where(UsageAggregateModel.provider == provider)
 
         query = query.group_by(UsageAggregateModel.bucket_start).order_by(
             UsageAggregateModel.bucket_start
@@ -237,6 +381,7 @@ class UsageAggregateRepository:
         end_time: datetime,
         user_id: UUID | None = None,
         access_key_id: UUID | None = None,
+        provider: str | None = None,
     ) -> dict:
         query = select(
             func.sum(UsageAggregateModel.total_requests),
@@ -259,6 +404,8 @@ class UsageAggregateRepository:
             query = query.where(UsageAggregateModel.user_id == user_id)
         if access_key_id:
             query = query.where(UsageAggregateModel.access_key_id == access_key_id)
+        if provider:
+            query = query.where(UsageAggregateModel.provider == provider)
 
         result = await self.session.execute(query)
         row = result.one()
@@ -282,13 +429,10 @@ class UsageAggregateRepository:
         start_time: datetime,
         end_time: datetime,
     ) -> Decimal:
-        query = select(func.sum(UsageAggregateModel.total_estimated_cost_usd)).where(
-            UsageAggregateModel.bucket_type == "month",
-            UsageAggregateModel.bucket_start >= start_time,
-            UsageAggregateModel.bucket_start < end_time,
-            UsageAggregateModel.user_id == user_id,
+        result = await self.session.execute(
+            _MONTHLY_BEDROCK_TOTAL,
+            {"user_id": user_id, "start_time": start_time, "end_time": end_time},
         )
-        result = await self.session.execute(query)
         total = result.scalar_one_or_none()
         return total or Decimal("0")
 
@@ -308,6 +452,7 @@ class UsageAggregateRepository:
         total_output_cost_usd: Decimal = Decimal("0"),
         total_cache_write_cost_usd: Decimal = Decimal("0"),
         total_cache_read_cost_usd: Decimal = Decimal("0"),
+        provider: str = "bedrock",
     ) -> None:
         stmt = insert(UsageAggregateModel).values(
             id=uuid4(),
@@ -315,6 +460,7 @@ class UsageAggregateRepository:
             bucket_start=bucket_start,
             user_id=user_id,
             access_key_id=access_key_id,
+            provider=provider,
             total_requests=1,
             total_input_tokens=input_tokens,
             total_output_tokens=output_tokens,
@@ -327,7 +473,7 @@ class UsageAggregateRepository:
             total_cache_read_cost_usd=total_cache_read_cost_usd,
             total_estimated_cost_usd=total_estimated_cost_usd,
         ).on_conflict_do_update(
-            index_elements=["bucket_type", "bucket_start", "user_id", "access_key_id"],
+            index_elements=list(AGGREGATE_KEY_COLUMNS),
             set_={
                 "total_requests": UsageAggregateModel.total_requests + 1,
                 "total_input_tokens": UsageAggregateModel.total_input_tokens + input_tokens,
@@ -351,6 +497,26 @@ class UsageAggregateRepository:
         )
         await self.session.execute(stmt)
 
+    async def bulk_increment(self, rows: list[dict]) -> None:
+        """Apply pre-summed aggregate deltas as one multi-row upsert.
+
+        Rows are keyed by column name and must be unique per
+        ``AGGREGATE_KEY_COLUMNS``; PostgreSQL rejects an upsert that touches the
+        same row twice. ``provider`` defaults to bedrock.
+        """
+        for chunk in _chunks(rows):
+            stmt = insert(UsageAggregateModel).values(
+                [{"id": uuid4(), "provider": "bedrock", **row} for row in chunk]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(AGGREGATE_KEY_COLUMNS),
+                set_={
+                    column: getattr(UsageAggregateModel, column) + stmt.excluded[column]
+                    for column in AGGREGATE_SUM_COLUMNS
+                },
+            )
+            await self.session.execute(stmt)
+
     async def get_top_users(
         self,
         bucket_type: str,
@@ -406,4 +572,5 @@ class UsageAggregateRepository:
             total_cache_write_cost_usd=model.total_cache_write_cost_usd,
             total_cache_read_cost_usd=model.total_cache_read_cost_usd,
             total_estimated_cost_usd=model.total_estimated_cost_usd,
+            provider=model.provider,
         )
@@ -1,6 +1,6 @@
 from datetime import datetime
 from uuid import UUID
-from sqlalchemy import select, update
+from sqlalchemy import Row, bindparam, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db.models import UserModel
@@ -8,6 +8,19 @@ from decimal import Decimal
 
 from ..domain import User, UserStatus, RoutingStrategy
 
+_users = UserModel.__table__
+
+_LIVE_USER = (
+    _users.c.id == bindparam("user_id"),
+    _users.c.deleted_at.is_(None),
+    _users.c.status != UserStatus.DELETED.value,
+)
+# Prebuilt Core statements skip statement construction and ORM hydration. The
+# entity lookup needs every column; budget checks, which run on every budget
+# cache miss, read only the budget.
+_BY_ID = select(*_users.c).where(*_LIVE_USER)
+_BUDGET_BY_ID = select(_users.c.monthly_budget_usd).where(*_LIVE_USER)
+
 
 class UserRepository:
     def __init__(self, session: AsyncSession):
@@ -35,15 +48,14 @@ class UserRepository:
         return self._to_entity(model)
 
     async def get_by_id(self, user_id: UUID) -> User | None:
-        result = await self.session.execute(
-            select(UserModel).where(
-                UserModel.id == user_id,
-                UserModel.deleted_at.is_(None),
-                UserModel.status != UserStatus.DELETED.value,
-            )
-        )
-        model = result.scalar_one_or_none()
-        return self._to_entity(model) if model else None
+        result = await self.session.execute(_BY_ID, {"user_id": user_id})
+        row = result.one_or_none()
+        return self._to_entity(row) if row else None
+
+    async def get_monthly_budget(self, user_id: UUID) -> Decimal | None:
+        """The user's monthly budget; None without a budget or a live user."""
+        result = await self.session.execute(_BUDGET_BY_ID, {"user_id": user_id})
+        return result.scalar_one_or_none()
 
     async def list_active(self, limit: int = 100, offset: int = 0) -> list[User]:
         result = await self.session.execute(
@@ -88,7 +100,7 @@ class UserRepository:
         )
         return result.rowcount > 0
 
-    def _to_entity(self, model: UserModel) -> User:
+    def _to_entity(self, model: UserModel | Row) -> User:
         return User(
             id=model.id,
             name=model.name,
@@ -1,10 +1,15 @@
-import boto3
+import asyncio
 import hashlib
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import os
+from typing import TYPE_CHECKING
 
+from ..aws_clients import get_client
 from ..config import get_settings
 
+if TYPE_CHECKING:
+    from ..proxy.cache import TTLCache
+
 
 class KMSEnvelopeEncryption:
     """KMS envelope encryption for Bedrock API keys."""
@@ -13,9 +18,16 @@ class KMSEnvelopeEncryption:
         settings = get_settings()
         self._kms_key_id = kms_key_id or settings.kms_key_id
         self._local_key = self._get_local_key(settings)
-        self._kms = None
-        if self._kms_key_id:
-            self._kms = boto3.client("kms", region_name=region or settings.bedrock_region)
+        self._region = region or settings.bedrock_region
+        self._client = None
+
+    @property
+    def _kms(self):
+        # Every instance shares one KMS client per region; it is built lazily so
+        # constructing an adapter never touches botocore.
+        if self._client is None:
+            self._client = get_client("kms", self._region)
+        return self._client
 
     def _get_local_key(self, settings) -> bytes | None:
         if settings.local_encryption_key:
@@ -67,18 +79,42 @@ class KMSEnvelopeEncryption:
             plaintext = aesgcm.decrypt(nonce, ciphertext, None)
             return plaintext.decode()
 
-        # Parse blob
-        edk_len = int.from_bytes(blob[:2], "big")
-        encrypted_data_key = blob[2 : 2 + edk_len]
-        nonce = blob[2 + edk_len : 2 + edk_len + 12]
-        ciphertext = blob[2 + edk_len + 12 :]
+        encrypted_data_key, nonce, ciphertext = _split_blob(blob)
+        data_key = self._unwrap_data_key(encrypted_data_key)
+        return AESGCM(data_key).decrypt(nonce, ciphertext, None).decode()
+
+    async def decrypt_async(self, blob: bytes, data_keys: "TTLCache | None" = None) -> str:
+        """``decrypt`` for the event loop: the KMS call runs in a worker thread.
+
+        With ``data_keys``, unwrapped data keys are cached by their encrypted
+        form, so re-decrypting a blob (e.g. when the decrypted-key cache
+        expires) makes no KMS call, and concurrent decrypts under one data
+        key share a single call.
+        """
+        if not self._kms_key_id:
+            # Local mode is a single AES-GCM operation; no I/O to move off the loop.
+            return self.decrypt(blob)
+
+        encrypted_data_key, nonce, ciphertext = _split_blob(blob)
+
+        async def _unwrap() -> bytes:
+            return await asyncio.to_thread(self._unwrap_data_key, encrypted_data_key)
+
+        if data_keys is None:
+            data_key = await _unwrap()
+        else:
+            data_key = await data_keys.get_or_load(encrypted_data_key.hex(), _unwrap)
+        return AESGCM(data_key).decrypt(nonce, ciphertext, None).decode()
 
-        # Decrypt data key with KMS
+    def _unwrap_data_key(self, encrypted_data_key: bytes) -> bytes:
         response = self._kms.decrypt(CiphertextBlob=encrypted_data_key)
-        data_key = response["Plaintext"]
+        return response["Plaintext"]
 
-        # Decrypt with data key
-        aesgcm = AESGCM(data_key)
-        plaintext = aesgcm.decrypt(nonce, ciphertext, None)
 
-        return plaintext.decode()
+def _split_blob(blob: bytes) -> tuple[bytes, bytes, bytes]:
+    """(encrypted data key, nonce, ciphertext) of a KMS-mode blob."""
+    edk_len = int.from_bytes(blob[:2], "big")
+    encrypted_data_key = blob[2 : 2 + edk_len]
+    nonce = blob[2 + edk_len : 2 + edk_len + 12]
+    ciphertext = blob[2 + edk_len + 12 :]
+    return encrypted_data_key, nonce, ciphertext
@@ -0,0 +1,291 @@
+"""Prometheus instrumentation for the proxy hot path.
+
+Metrics are module-level ``prometheus_client`` objects. When
+``PROMETHEUS_MULTIPROC_DIR`` is set before the workers start, every uvicorn
+worker writes its samples to memory-mapped files in that directory and
+``/metrics`` merges them, so a scrape sees all workers whichever one answers.
+
+Per-process state that lives in plain Python objects (cache statistics,
+circuit states, queue depths) is copied into metrics by ``sample_proxy_state``,
+which the app lifespan runs periodically and ``/metrics`` runs on scrape.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import TYPE_CHECKING
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from .logging import get_logger
+
+if TYPE_CHECKING:
+    from .proxy.dependencies import ProxyDependencies
+
+logger = get_logger(__name__)
+
+# Hot-path stages sit in the 1 ms - 1 s range; upstream calls reach minutes.
+_STAGE_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    30.0, 60.0, 120.0, 300.0,
+)
+_TOKENS_PER_SECOND_BUCKETS = (5, 10, 20, 30, 40, 50, 60, 80, 100, 150, 200, 300, 500)
+
+STAGE_SECONDS = Histogram(
+    "proxy_stage_seconds",
+    "Time spent in each request-handling stage",
+    ["stage"],
+    buckets=_STAGE_BUCKETS,
+)
+TTFB_SECONDS = Histogram(
+    "proxy_stream_ttfb_seconds",
+    "Time from request arrival to the first streamed byte sent to the client",
+    ["provider"],
+    buckets=_STAGE_BUCKETS,
+)
+TTFT_SECONDS = Histogram(
+    "proxy_stream_ttft_seconds",
+    "Time from request arrival to the first content delta sent to the client",
+    ["provider"],
+    buckets=_STAGE_BUCKETS,
+)
+STREAM_DURATION_SECONDS = Histogram(
+    "proxy_stream_duration_seconds",
+    "Time from the first to the last streamed byte",
+    ["provider"],
+    buckets=_STAGE_BUCKETS,
+)
+STREAM_TOKENS_PER_SECOND = Histogram(
+    "proxy_stream_output_tokens_per_second",
+    "Output tokens per second over the streamed portion of a response",
+    ["provider"],
+    buckets=_TOKENS_PER_SECOND_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "proxy_cache_lookups_total",
+    "Local cache lookups by result",
+    ["cache", "result"],
+)
+CACHE_EVICTIONS = Counter(
+    "proxy_cache_evictions_total",
+    "Entries evicted from a local cache to respect its size bound",
+    ["cache"],
+)
+CACHE_ENTRIES = Gauge(
+    "proxy_cache_entries",
+    "Entries held in a local cache",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+# Every worker tracks the same circuits (shared through the circuit store when
+# one is configured), so summing workers would count each circuit once per worker.
+CIRCUITS = Gauge(
+    "proxy_circuits",
+    "Circuit breakers tracked, by state",
+    ["state"],
+    multiprocess_mode="livemax",
+)
+HEDGED_REQUESTS = Counter(
+    "proxy_hedged_requests_total",
+    "Requests that started a hedged Bedrock call, by which call won",
+    ["winner"],
+)
+BEDROCK_REGION_FAILOVERS = Counter(
+    "proxy_bedrock_region_failovers_total",
+    "Bedrock calls retried in another region, by the region that failed and why",
+    ["region", "error_type"],
+)
+RATE_LIMITED_REQUESTS = Counter(
+    "proxy_rate_limited_requests_total",
+    "Requests refused with a 429 by the proxy's own rate limits, by limit",
+    ["limit"],
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "proxy_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a database connection from the pool",
+    buckets=_STAGE_BUCKETS,
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "proxy_db_pool_checkout_seconds",
+    "Time a database connection stayed checked out of the pool",
+    buckets=_STAGE_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "proxy_db_pool_checked_out",
+    "Database connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+USAGE_QUEUE_DEPTH = Gauge(
+    "proxy_usage_queue_depth",
+    "Usage events waiting to be written",
+    multiprocess_mode="livesum",
+)
+USAGE_DROPPED = Counter(
+    "proxy_usage_events_dropped_total",
+    "Usage events dropped because the write-behind queue was full",
+)
+
+_stage_children: dict[str, Histogram] = {}
+
+
+class _StageTimer:
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+        self._started = 0.0
+
+    def __enter__(self) -> _StageTimer:
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc) -> bool:
+        self._histogram.observe(time.perf_counter() - self._started)
+        return False
+
+
+def stage_timer(stage: str) -> _StageTimer:
+    """Context manager observing the wrapped block in ``proxy_stage_seconds``."""
+    child = _stage_children.get(stage)
+    if child is None:
+        child = _stage_children[stage] = STAGE_SECONDS.labels(stage)
+    return _StageTimer(child)
+
+
+def observe_stream(
+    provider: str,
+    request_started: float,
+    first_byte_at: float | None,
+    finished_at: float,
+    output_tokens: int | None,
+    first_content_at: float | None = None,
+) -> None:
+    """Record TTFB, TTFT, stream duration and output throughput for one stream.
+
+    Timestamps are ``time.perf_counter()`` values.
+    """
+    if first_byte_at is None:
+        return
+    TTFB_SECONDS.labels(provider).observe(first_byte_at - request_started)
+    if first_content_at is not None:
+        TTFT_SECONDS.labels(provider).observe(first_content_at - request_started)
+    duration = finished_at - first_byte_at
+    STREAM_DURATION_SECONDS.labels(provider).observe(duration)
+    if output_tokens and duration > 0:
+        STREAM_TOKENS_PER_SECOND.labels(provider).observe(output_tokens / duration)
+
+
+class _CounterDeltas:
+    """Feeds monotonically increasing totals into a Counter as increments."""
+
+    def __init__(self, counter: Counter):
+        self._counter = counter
+        self._last: dict[tuple[str, ...], float] = {}
+
+    def update(self, labels: tuple[str, ...], total: float) -> None:
+        previous = self._last.get(labels, 0)
+        # A smaller total means the source was recreated; count it afresh.
+        delta = total - previous if total >= previous else total
+        self._last[labels] = total
+        if delta:
+            self._counter.labels(*labels).inc(delta)
+
+
+_cache_lookups = _CounterDeltas(CACHE_LOOKUPS)
+_cache_evictions = _CounterDeltas(CACHE_EVICTIONS)
+_usage_dropped = _CounterDeltas(USAGE_DROPPED)
+
+
+def sample_proxy_state(deps: ProxyDependencies) -> None:
+    """Copy per-process cache, circuit and queue state into metrics."""
+    caches = {
+        "access_key": deps.access_key_cache,
+        "bedrock_key": deps.bedrock_key_cache,
+        "budget": deps.budget_cache,
+    }
+    for name, cache in caches.items():
+        stats = cache.stats
+        _cache_lookups.update((name, "hit"), stats.hits)
+        _cache_lookups.update((name, "miss"), stats.misses)
+        _cache_lookups.update((name, "stale_hit"), stats.stale_hits)
+        _cache_evictions.update((name,), stats.evictions)
+        CACHE_ENTRIES.labels(name).set(stats.size)
+
+    converse = deps.converse_cache
+    _cache_lookups.update(("converse", "hit"), converse.hits)
+    _cache_lookups.update(("converse", "miss"), converse.misses)
+    _cache_evictions.update(("converse",), converse.evictions)
+    CACHE_ENTRIES.labels("converse").set(len(converse))
+
+    for state, count in deps.circuit_breaker.state_counts().items():
+        CIRCUITS.labels(state.value).set(count)
+
+    if deps.usage_writer is not None:
+        stats = deps.usage_writer.stats
+        USAGE_QUEUE_DEPTH.set(stats.queue_depth)
+        _usage_dropped.update((), stats.dropped)
+
+
+class TelemetrySampler:
+    """Runs ``sample_proxy_state`` every ``interval`` seconds in this worker.
+
+    Every worker runs one and samples its own state. Counters add up across
+    workers; each sampled gauge declares how the multiprocess collector
+    combines the workers' values (live sum for per-worker caches and queues,
+    live max for circuits every worker sees).
+    """
+
+    def __init__(self, deps: ProxyDependencies, interval: float):
+        self._deps = deps
+        self._interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if multiprocess_dir():
+            multiprocess.mark_process_dead(os.getpid())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sample_proxy_state(self._deps)
+            except Exception as exc:
+                logger.warning("telemetry_sample_failed", error=str(exc))
+            await asyncio.sleep(self._interval)
+
+
+def multiprocess_dir() -> str | None:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get(
+        "prometheus_multiproc_dir"
+    )
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Exposition-format payload and content type for ``/metrics``."""
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
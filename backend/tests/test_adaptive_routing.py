@@ -0,0 +1,312 @@
+"""Tests for the adaptive routing strategy and its trace-replay simulator."""
+import csv
+import importlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import pytest
+from fastapi.responses import StreamingResponse
+
+from src.domain import AnthropicRequest, ErrorType, RoutingStrategy
+from src.proxy.adapter_base import AdapterError, AdapterResponse
+from src.proxy.budget import _build_budget_result
+from src.proxy.circuit_breaker import CircuitBreaker, InMemoryCircuitStore
+from src.proxy.context import RequestContext
+from src.proxy.dependencies import ProxyDependencies, reset_proxy_deps, set_proxy_deps
+from src.proxy.provider_stats import ProviderScoreboard
+from src.proxy.router import ProxyRouter
+
+TRACES = Path(__file__).parent / "fixtures" / "latency_traces"
+MODEL = "claude-test"
+
+proxy_router = importlib.import_module("src.api.proxy_router")
+
+
+def _scoreboard(clock=lambda: 0.0, **overrides) -> ProviderScoreboard:
+    fields = dict(
+        half_life=30.0,
+        bedrock_margin=0.2,
+        max_plan_error_rate=0.25,
+        min_samples=3,
+        plan_probe_interval=20,
+        clock=clock,
+    )
+    fields.update(overrides)
+    return ProviderScoreboard(**fields)
+
+
+def _feed(board: ProviderScoreboard, provider: str, latency_ms: float, times: int = 5, **kw):
+    for _ in range(times):
+        board.observe(provider, MODEL, latency_ms=latency_ms, **kw)
+
+
+def test_prefers_plan_until_bedrock_is_clearly_faster() -> None:
+    board = _scoreboard()
+    assert board.choose(MODEL, stream=False) == "plan"
+
+    _feed(board, "plan", 1000)
+    _feed(board, "bedrock", 900)
+    # Within the 20% margin Plan keeps the traffic: it costs nothing per request.
+    assert board.choose(MODEL, stream=False) == "plan"
+
+    _feed(board, "plan", 3000, times=20)
+    assert board.choose(MODEL, stream=False) == "bedrock"
+
+
+def test_plan_errors_shift_traffic_before_latency_does() -> None:
+    board = _scoreboard()
+    _feed(board, "plan", 500)
+
+    board.observe("plan", MODEL, failed=True)
+    assert board.choose(MODEL, stream=False) == "plan"
+    board.observe("plan", MODEL, failed=True)
+
+    # Two failures are under the circuit breaker's threshold of three.
+    assert board.stats("plan", MODEL).error_rate >= 0.25
+    assert board.choose(MODEL, stream=False) == "bedrock"
+
+
+def test_bedrock_outage_sends_traffic_back_to_plan() -> None:
+    board = _scoreboard()
+    _feed(board, "plan", 3000)
+    _feed(board, "bedrock", 1000)
+    assert board.choose(MODEL, stream=False) == "bedrock"
+
+    for _ in range(5):
+        board.observe("bedrock", MODEL, failed=True)
+
+    assert board.choose(MODEL, stream=False) == "plan"
+
+
+def test_streams_compare_ttft() -> None:
+    board = _scoreboard()
+    _feed(board, "plan", 20_000, ttft_ms=400)
+    _feed(board, "bedrock", 10_000, ttft_ms=1500)
+
+    assert board.choose(MODEL, stream=True) == "plan"
+    assert board.choose(MODEL, stream=False) == "bedrock"
+
+
+def test_plan_is_probed_while_bedrock_is_preferred() -> None:
+    board = _scoreboard(plan_probe_interval=4)
+    _feed(board, "plan", 3000)
+    _feed(board, "bedrock", 1000)
+
+    choices = [board.choose(MODEL, stream=False) for _ in range(8)]
+
+    assert choices == ["bedrock"] * 3 + ["plan"] + ["bedrock"] * 3 + ["plan"]
+
+
+@dataclass
+class FakeClock:
+    now: float = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@dataclass
+class TraceRow:
+    plan_ms: int
+    plan_status: int
+    bedrock_ms: int
+
+
+def _load_trace(name: str) -> list[TraceRow]:
+    with (TRACES / name).open() as f:
+        return [TraceRow(*(int(value) for value in row.values())) for row in csv.DictReader(f)]
+
+
+@dataclass
+class TraceAdapter:
+    """Answers from the current trace row, advancing the fake clock by its latency."""
+
+    provider: str
+    clock: FakeClock
+    row: TraceRow | None = None
+    calls: int = 0
+
+    async def invoke(self, ctx, request):
+        self.calls += 1
+        if self.provider == "bedrock":
+            self.clock.now += self.row.bedrock_ms / 1000
+            return AdapterResponse(response=Mock(), usage=Mock())
+        self.clock.now += self.row.plan_ms / 1000
+        if self.row.plan_status == 429:
+            return AdapterError(ErrorType.RATE_LIMIT, 429, "Rate limit exceeded", True)
+        return AdapterResponse(response=Mock(), usage=Mock())
+
+
+@dataclass
+class SimulationResult:
+    latencies_ms: list[float] = field(default_factory=list)
+    bedrock_calls: int = 0
+
+    def stalls(self, threshold_ms: float = 5000) -> int:
+        return sum(latency > threshold_ms for latency in self.latencies_ms)
+
+    def percentile(self, q: float, start: int = 0, end: int | None = None) -> float:
+        window = sorted(self.latencies_ms[start:end])
+        return window[min(int(q * len(window)), len(window) - 1)]
+
+
+async def _simulate(
+    trace: list[TraceRow], strategy: RoutingStrategy, interarrival_s: float = 2.0
+) -> SimulationResult:
+    """Replay ``trace`` one request at a time through a ProxyRouter on a fake clock."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        failure_threshold=3,
+        failure_window=60,
+        failure_rate_threshold=0.5,
+        reset_timeout=120,
+        max_reset_timeout=960,
+        half_open_max_probes=1,
+        probe_timeout=300,
+        store=InMemoryCircuitStore(clock),
+        sync_interval=0,
+        clock=clock,
+    )
+    set_proxy_deps(
+        ProxyDependencies(circuit_breaker=breaker, provider_stats=_scoreboard(clock))
+    )
+    plan, bedrock = TraceAdapter("plan", clock), TraceAdapter("bedrock", clock)
+    router = ProxyRouter(
+        plan,
+        bedrock,
+        budget_checker=AsyncMock(return_value=Mock(allowed=True)),
+        clock=clock,
+    )
+    ctx = RequestContext(
+        request_id="req-sim",
+        user_id=uuid4(),
+        access_key_id=uuid4(),
+        access_key_prefix="ak",
+        bedrock_region="ap-northeast-2",
+        bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+        has_bedrock_key=True,
+        routing_strategy=strategy,
+    )
+    request = Mock(spec=AnthropicRequest, model=MODEL)
+
+    result = SimulationResult()
+    try:
+        for row in trace:
+            plan.row = bedrock.row = row
+            started = clock.now
+            response = await router.route(ctx, request)
+            assert response.success
+            result.latencies_ms.append((clock.now - started) * 1000)
+            clock.now += interarrival_s
+    finally:
+        reset_proxy_deps()
+    result.bedrock_calls = bedrock.calls
+    return result
+
+
+@pytest.fixture
+def brownout_trace() -> list[TraceRow]:
+    # 200 healthy requests, 200 with Plan stalling and returning 429s, 200 healthy.
+    return _load_trace("plan_brownout.csv")
+
+
+async def test_adaptive_routing_cuts_tail_latency_on_recorded_trace(brownout_trace) -> None:
+    plan_first = await _simulate(brownout_trace, RoutingStrategy.PLAN_FIRST)
+    adaptive = await _simulate(brownout_trace, RoutingStrategy.ADAPTIVE)
+
+    assert adaptive.percentile(0.5) <= plan_first.percentile(0.5)
+    assert adaptive.percentile(0.99) < plan_first.percentile(0.99) * 0.6
+    # In the brownout only the occasional Plan probe still waits out a stall.
+    assert adaptive.percentile(0.95, 200, 400) < plan_first.percentile(0.95, 200, 400) / 4
+    assert adaptive.stalls() < plan_first.stalls()
+
+
+async def test_adaptive_routing_keeps_healthy_traffic_on_plan(brownout_trace) -> None:
+    healthy = brownout_trace[:200]
+
+    adaptive = await _simulate(healthy, RoutingStrategy.ADAPTIVE)
+
+    assert adaptive.bedrock_calls == 0
+
+
+async def test_simulation_is_deterministic(brownout_trace) -> None:
+    first = await _simulate(brownout_trace, RoutingStrategy.ADAPTIVE)
+    second = await _simulate(brownout_trace, RoutingStrategy.ADAPTIVE)
+
+    assert first.latencies_ms == second.latencies_ms
+
+
+async def test_router_stays_within_budget() -> None:
+    board = _scoreboard()
+    _feed(board, "plan", 3000)
+    _feed(board, "bedrock", 1000)
+    set_proxy_deps(ProxyDependencies(provider_stats=board))
+    plan, bedrock = Mock(), Mock()
+    plan.invoke = AsyncMock(return_value=AdapterResponse(response=Mock(), usage=Mock()))
+    bedrock.invoke = AsyncMock()
+    now = datetime.now(timezone.utc)
+    exhausted = _build_budget_result(Decimal("10"), Decimal("10"), now, now)
+    router = ProxyRouter(plan, bedrock, budget_checker=AsyncMock(return_value=exhausted))
+    ctx = Mock(spec=RequestContext)
+    ctx.access_key_id = uuid4()
+    ctx.has_bedrock_key = True
+    ctx.routing_strategy = RoutingStrategy.ADAPTIVE
+
+    try:
+        response = await router.route(ctx, Mock(spec=AnthropicRequest, model=MODEL))
+    finally:
+        reset_proxy_deps()
+
+    assert response.provider == "plan"
+    bedrock.invoke.assert_not_called()
+
+
+async def test_stream_routed_to_bedrock_checks_the_budget_once(monkeypatch) -> None:
+    board = _scoreboard()
+    _feed(board, "plan", 3000)
+    _feed(board, "bedrock", 1000)
+    set_proxy_deps(ProxyDependencies(provider_stats=board))
+    now = datetime.now(timezone.utc)
+    budget_service = Mock()
+    budget_service.check_budget = AsyncMock(
+        return_value=_build_budget_result(None, Decimal("0"), now, now)
+    )
+
+    class FakeBedrockAdapter:
+        def __init__(self, **_kwargs) -> None:
+            return None
+
+        async def stream(self, ctx, request):
+            async def _gen():
+                yield b"event: bedrock\n\n"
+
+            return _gen()
+
+    monkeypatch.setattr(proxy_router, "BedrockAdapter", FakeBedrockAdapter)
+    ctx = RequestContext(
+        request_id="req-adaptive",
+        user_id=uuid4(),
+        access_key_id=uuid4(),
+        access_key_prefix="ak",
+        bedrock_region="ap-northeast-2",
+        bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+        has_bedrock_key=True,
+        routing_strategy=RoutingStrategy.ADAPTIVE,
+    )
+    request = AnthropicRequest(
+        model=MODEL, messages=[{"role": "user", "content": "hello"}], stream=True
+    )
+
+    try:
+        response = await proxy_router._stream_adaptive(
+            ctx, request, AsyncMock(), {}, budget_service, Mock()
+        )
+    finally:
+        reset_proxy_deps()
+
+    assert isinstance(response, StreamingResponse)
+    budget_service.check_budget.assert_awaited_once()
@@ -1,16 +1,13 @@
-from datetime import date, datetime, timezone, timedelta
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from uuid import uuid4
-import sys
-from pathlib import Path
 
 import pytest
-
-root = Path(__file__).resolve().parents[1]
-sys.path.append(str(root))
+from sqlalchemy.dialects import postgresql
 
 from src.api import admin_usage
-from src.domain import UsageResponse
+from src.domain import StreamLatencyStats, UsageResponse
+from src.repositories.usage_repository import TokenUsageRepository
 
 
 class FakeUsageAggregateRepository:
@@ -183,3 +180,83 @@ async def test_get_top_users_maps_results(monkeypatch: pytest.MonkeyPatch) -> No
     assert results[0].name == "bravo"
     assert results[0].total_tokens == 450
     assert results[0].total_requests == 3
+
+
+def _percentiles(p50, p90, p99) -> dict:
+    return {"p50": p50, "p90": p90, "p99": p99}
+
+
+@pytest.mark.asyncio
+async def test_get_stream_latency_returns_percentiles_per_provider(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[dict] = []
+
+    class LatencyRepo:
+        def __init__(self, _session) -> None:
+            return None
+
+        async def get_stream_latency_percentiles(self, **kwargs):
+            calls.append(kwargs)
+            return [
+                {
+                    "provider": "plan",
+                    "requests": 42,
+                    "upstream_connect_ms": _percentiles(180.0, 260.0, 410.0),
+                    "ttfb_ms": _percentiles(210.0, 300.0, 480.0),
+                    "ttft_ms": _percentiles(900.0, 1500.0, 2800.0),
+                    "stream_duration_ms": _percentiles(8000.0, 20000.0, 45000.0),
+                    "latency_ms": _percentiles(9000.0, 21000.0, 47000.0),
+                    "output_tokens_per_second": _percentiles(55.0, 72.0, 80.0),
+                }
+            ]
+
+    monkeypatch.setattr(admin_usage, "TokenUsageRepository", LatencyRepo)
+
+    results = await admin_usage.get_stream_latency(
+        user_id=None,
+        access_key_id=None,
+        period=None,
+        start_date=date(2025, 1, 1),
+        end_date=date(2025, 1, 1),
+        provider="plan",
+        model=None,
+        session=None,
+    )
+
+    assert isinstance(results[0], StreamLatencyStats)
+    assert results[0].ttft_ms.p99 == 2800.0
+    assert calls[0]["provider"] == "plan"
+    assert calls[0]["start_time"] == datetime(2024, 12, 31, 15, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_stream_latency_query_uses_ordered_set_percentiles() -> None:
+    class Row:
+        provider = "bedrock"
+        requests = 3
+
+        def __getattr__(self, name):
+            return None if name.startswith("ttft_ms") else 100
+
+    session = type("Session", (), {})()
+    statements: list = []
+
+    async def execute(statement):
+        statements.append(statement)
+        return [Row()]
+
+    session.execute = execute
+
+    rows = await TokenUsageRepository(session).get_stream_latency_percentiles(
+        start_time=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        end_time=datetime(2025, 1, 2, tzinfo=timezone.utc),
+        provider="bedrock",
+    )
+
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "percentile_cont" in sql and "WITHIN GROUP (ORDER BY token_usage.ttft_ms)" in sql
+    assert "token_usage.ttfb_ms IS NOT NULL" in sql
+    assert "GROUP BY token_usage.provider" in sql
+    assert rows[0]["ttfb_ms"] == {"p50": 100.0, "p90": 100.0, "p99": 100.0}
+    assert rows[0]["ttft_ms"]["p50"] is None
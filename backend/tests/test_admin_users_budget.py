@@ -30,6 +30,9 @@ class FakeUserRepository:
     async def get_by_id(self, _user_id):
         return self.user
 
+    async def get_monthly_budget(self, _user_id):
+        return self.user.monthly_budget_usd
+
     async def update_budget(self, _user_id, budget):
         self.updated_budget = budget
         self.user = User(
@@ -0,0 +1,115 @@
+"""Tests for the single-query authentication context load."""
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from src.domain import RoutingStrategy
+from src.proxy import auth
+from src.proxy.auth import AuthService
+from src.proxy.budget import BudgetService, CachedBudgetInfo, budget_month_window
+from src.proxy.dependencies import ProxyDependencies, reset_proxy_deps, set_proxy_deps
+
+
+@pytest.fixture
+def deps():
+    deps = ProxyDependencies()
+    set_proxy_deps(deps)
+    yield deps
+    reset_proxy_deps()
+
+
+@pytest.fixture
+def primed(monkeypatch) -> list:
+    calls: list = []
+    monkeypatch.setattr(
+        auth, "prime_bedrock_key_cache", lambda *args: calls.append(args)
+    )
+    return calls
+
+
+def _row(
+    routing_strategy: str = "bedrock_only",
+    encrypted_key: bytes | None = b"blob",
+    has_bedrock_key: bool = True,
+):
+    return SimpleNamespace(
+        id=uuid4(),
+        user_id=uuid4(),
+        key_prefix="ak_test",
+        bedrock_region="us-east-1",
+        bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+        bedrock_regions=None,
+        routing_strategy=routing_strategy,
+        monthly_budget_usd=Decimal("50.00"),
+        month_usage=Decimal("12.50"),
+        has_bedrock_key=has_bedrock_key,
+        encrypted_key=encrypted_key,
+    )
+
+
+def _service(row) -> AuthService:
+    result = MagicMock()
+    result.one_or_none = MagicMock(return_value=row)
+    session = AsyncMock()
+    session.execute = AsyncMock(return_value=result)
+    return AuthService(session)
+
+
+async def test_cold_authentication_is_one_query_that_seeds_every_cache(deps, primed) -> None:
+    row = _row()
+    service = _service(row)
+
+    ctx = await service.authenticate("ak_raw")
+
+    assert service._session.execute.await_count == 1
+    assert ctx.access_key_id == row.id
+    assert ctx.has_bedrock_key is True
+    assert ctx.routing_strategy == RoutingStrategy.BEDROCK_ONLY
+    assert primed == [(row.id, b"blob")]
+
+    ledger = deps.budget_cache.get(str(row.user_id))
+    assert isinstance(ledger, CachedBudgetInfo)
+    assert ledger.current_usage == Decimal("12.50")
+    assert ledger.period_start == budget_month_window()[0]
+
+    budget_service = BudgetService(AsyncMock(), AsyncMock())
+    result = await budget_service.check_budget(row.user_id)
+    assert result.remaining == Decimal("37.50")
+    budget_service._user_repo.get_monthly_budget.assert_not_called()
+
+
+async def test_plan_first_users_decrypt_their_bedrock_key_on_demand(deps, primed) -> None:
+    # The query returns no blob for plan_first users.
+    ctx = await _service(_row("plan_first", encrypted_key=None)).authenticate("ak_raw")
+
+    assert ctx.has_bedrock_key is True
+    assert primed == []
+
+
+async def test_seeding_keeps_a_ledger_that_is_already_cached(deps, primed) -> None:
+    row = _row()
+    month_start, month_end = budget_month_window()
+    existing = CachedBudgetInfo(
+        user_id=row.user_id,
+        monthly_budget=Decimal("50.00"),
+        current_usage=Decimal("20.00"),
+        period_start=month_start,
+        period_end=month_end,
+        cached_at=datetime.now(timezone.utc),
+    )
+    deps.budget_cache.set(str(row.user_id), existing)
+
+    await _service(row).authenticate("ak_raw")
+
+    assert deps.budget_cache.get(str(row.user_id)) is existing
+    assert existing.current_usage == Decimal("20.00")
+
+
+async def test_unknown_key_seeds_nothing(deps, primed) -> None:
+    assert await _service(None).authenticate("ak_raw") is None
+    assert len(deps.budget_cache) == 0
+    assert primed == []
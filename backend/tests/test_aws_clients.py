@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src import aws_clients
+from src.aws_clients import get_client, reset_clients
+from src.proxy.metrics import CloudWatchMetricsEmitter
+from src.security import KMSEnvelopeEncryption
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Generous enough for a loaded CI runner; the app imported in ~1.4s when this
+# was written. Eager boto3/botocore imports alone used to add ~0.3s.
+IMPORT_TIME_BUDGET_US = 4_000_000
+
+
+class _StubSession:
+    def __init__(self) -> None:
+        self.created: list[tuple[str, str | None]] = []
+
+    def client(self, service: str, region_name: str | None = None):
+        self.created.append((service, region_name))
+        return SimpleNamespace(service=service, region=region_name, calls=[])
+
+
+@pytest.fixture
+def stub_session(monkeypatch):
+    reset_clients()
+    session = _StubSession()
+    monkeypatch.setattr(aws_clients, "_session", session)
+    yield session
+    reset_clients()
+
+
+def _import_times(module: str) -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONPATH": str(BACKEND_DIR)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, total, name = line[len("import time:") :].split("|")
+        cumulative[name.strip()] = int(total)
+    return cumulative
+
+
+def test_app_import_does_not_load_boto() -> None:
+    times = _import_times("src.main")
+
+    assert "src.main" in times
+    assert not [name for name in times if name.split(".")[0] in ("boto3", "botocore")]
+    assert times["src.main"] < IMPORT_TIME_BUDGET_US
+
+
+def test_registry_builds_one_client_per_service_and_region(stub_session) -> None:
+    first = get_client("kms", "ap-northeast-2")
+    second = get_client("kms", "ap-northeast-2")
+    other_region = get_client("kms", "us-east-1")
+
+    assert first is second
+    assert other_region is not first
+    assert stub_session.created == [("kms", "ap-northeast-2"), ("kms", "us-east-1")]
+
+
+def test_emitters_share_a_lazily_built_cloudwatch_client(stub_session) -> None:
+    emitters = [CloudWatchMetricsEmitter(region="ap-northeast-2") for _ in range(5)]
+    assert stub_session.created == []
+
+    clients = {id(emitter.client) for emitter in emitters}
+
+    assert len(clients) == 1
+    assert stub_session.created == [("cloudwatch", "ap-northeast-2")]
+
+
+def test_kms_encryption_shares_client_across_instances(stub_session) -> None:
+    instances = [
+        KMSEnvelopeEncryption(kms_key_id="alias/test", region="ap-northeast-2") for _ in range(3)
+    ]
+    assert stub_session.created == []
+
+    assert instances[0]._kms is instances[2]._kms
+    assert stub_session.created == [("kms", "ap-northeast-2")]
@@ -2,6 +2,7 @@ import pytest
 
 from domain import AnthropicRequest
 from bedrock_converse import (
+    ConversationCache,
     StreamState,
     _convert_converse_event,
     build_converse_request,
@@ -160,3 +161,103 @@ async def test_stream_event_translation_end_turn_with_usage():
     assert events[4]["delta"]["stop_reason"] == "end_turn"
     assert events[4]["usage"]["output_tokens"] == 5
     assert events[5]["type"] == "message_stop"
+
+
+def _session(turns, system="System prompt"):
+    messages = [{"role": "user", "content": [{"type": "text", "text": "Fix the bug"}]}]
+    for i in range(turns):
+        messages.append(
+            {
+                "role": "assistant",
+                "content": [
+                    {"type": "tool_use", "id": f"tu_{i}", "name": "Read", "input": {"n": i}}
+                ],
+            }
+        )
+        messages.append(
+            {
+                "role": "user",
+                "content": [{"type": "tool_result", "tool_use_id": f"tu_{i}", "content": "x" * i}],
+            }
+        )
+    return AnthropicRequest(
+        model="claude-test",
+        messages=messages,
+        system=[{"type": "text", "text": system}],
+        tools=[{"name": "Read", "input_schema": {"type": "object"}}],
+        tool_choice={"type": "auto"},
+    )
+
+
+def _counting_normalizer(monkeypatch):
+    from bedrock_converse import request_builder
+
+    converted = []
+    original = request_builder._normalize_message
+
+    def _normalize(message):
+        converted.append(message)
+        return original(message)
+
+    monkeypatch.setattr(request_builder, "_normalize_message", _normalize)
+    return converted
+
+
+def test_build_converse_request_cache_matches_uncached_conversion():
+    cache = ConversationCache(max_bytes=1 << 20)
+
+    for turns in (1, 2, 3, 2):
+        request = _session(turns)
+        assert build_converse_request(request, cache, "ak") == build_converse_request(request)
+
+
+def test_build_converse_request_cache_converts_only_new_turns(monkeypatch):
+    cache = ConversationCache(max_bytes=1 << 20)
+    build_converse_request(_session(10), cache, "ak")
+    converted = _counting_normalizer(monkeypatch)
+
+    payload = build_converse_request(_session(11), cache, "ak")
+
+    assert [m.content[0]["type"] for m in converted] == ["tool_use", "tool_result"]
+    assert len(payload["messages"]) == 23
+    assert cache.hits == 1
+
+
+def test_build_converse_request_cache_reconverts_from_first_change(monkeypatch):
+    cache = ConversationCache(max_bytes=1 << 20)
+    build_converse_request(_session(5), cache, "ak")
+    edited = _session(5, system="New system prompt")
+    edited.messages[4].content[0]["content"] = "edited"
+    converted = _counting_normalizer(monkeypatch)
+
+    payload = build_converse_request(edited, cache, "ak")
+
+    assert len(converted) == len(edited.messages) - 4
+    assert payload["system"] == [{"text": "New system prompt"}]
+    assert payload["messages"][4]["content"][0]["toolResult"]["content"] == [{"text": "edited"}]
+
+
+def test_build_converse_request_cache_is_scoped(monkeypatch):
+    cache = ConversationCache(max_bytes=1 << 20)
+    build_converse_request(_session(3), cache, "ak-1")
+    converted = _counting_normalizer(monkeypatch)
+
+    build_converse_request(_session(3), cache, "ak-2")
+
+    assert len(converted) == 7
+    assert len(cache) == 2
+
+
+def test_conversation_cache_is_bounded_by_source_bytes():
+    cache = ConversationCache(max_bytes=600)
+
+    for opening in ("first", "second", "third"):
+        request = AnthropicRequest(
+            model="claude-test",
+            messages=[{"role": "user", "content": [{"type": "text", "text": opening * 40}]}],
+        )
+        build_converse_request(request, cache, "ak")
+
+    assert cache.size_bytes <= 600
+    assert len(cache) < 3
+    assert cache.evictions == 3 - len(cache)
@@ -0,0 +1,242 @@
+"""Tests for multi-region Bedrock failover and load spreading."""
+from dataclasses import dataclass
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from src.domain import AccessKeyCreate, AnthropicRequest, ErrorType
+from src.proxy.adapter_base import AdapterError
+from src.proxy.bedrock_adapter import BedrockAdapter
+from src.proxy.bedrock_regions import RegionBalancer, RegionPlan, parse_region_plan
+from src.proxy.context import RequestContext
+from src.proxy.dependencies import ProxyDependencies, reset_proxy_deps, set_proxy_deps
+
+CONVERSE_OK = {
+    "output": {"message": {"content": [{"text": "ok"}]}},
+    "usage": {"inputTokens": 1, "outputTokens": 1},
+    "stopReason": "end_turn",
+}
+
+
+@dataclass
+class FakeClock:
+    now: float = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_parse_puts_the_primary_region_first_when_unlisted() -> None:
+    plan = parse_region_plan("ap-northeast-2", "us-east-1, us-west-2")
+
+    assert plan == RegionPlan(("ap-northeast-2", "us-east-1", "us-west-2"))
+
+
+def test_parse_keeps_listed_order_and_weights() -> None:
+    plan = parse_region_plan("us-west-2", "us-east-1:3,us-west-2")
+
+    assert plan == RegionPlan(("us-east-1", "us-west-2"), (3, 1))
+
+
+def test_parse_rejects_malformed_entries() -> None:
+    with pytest.raises(ValueError):
+        parse_region_plan("us-east-1", "us-west-2:0")
+
+
+def test_parse_keeps_geo_profiles_inside_their_geography() -> None:
+    model = "us.anthropic.claude-sonnet-4-5-20250514-v1:0"
+
+    plan = parse_region_plan("us-east-1", "us-west-2:2,eu-central-1,us-gov-west-1:1", model)
+
+    assert plan == RegionPlan(("us-east-1", "us-west-2"), (1, 2))
+    assert parse_region_plan("eu-west-1", "ap-northeast-2", "eu.model") == RegionPlan(
+        ("eu-west-1",)
+    )
+    # Plain model IDs and global profiles run in any region.
+    assert len(parse_region_plan("us-east-1", "eu-central-1", "anthropic.model").regions) == 2
+    assert len(parse_region_plan("us-east-1", "eu-central-1", "global.model").regions) == 2
+
+
+def test_access_key_create_validates_region_list() -> None:
+    assert AccessKeyCreate(bedrock_regions="us-east-1:2,eu-central-1").bedrock_regions
+    with pytest.raises(ValueError):
+        AccessKeyCreate(bedrock_regions="us-east-1;us-west-2")
+
+
+def test_unweighted_list_always_starts_at_the_first_region() -> None:
+    balancer = RegionBalancer(cooldown=30, clock=FakeClock())
+    plan = RegionPlan(("us-east-1", "us-west-2"))
+
+    assert balancer.order("key", plan) == ["us-east-1", "us-west-2"]
+    assert balancer.order("key", plan) == ["us-east-1", "us-west-2"]
+
+
+def test_weighted_list_spreads_starts_in_proportion() -> None:
+    balancer = RegionBalancer(cooldown=30, clock=FakeClock())
+    plan = RegionPlan(("us-east-1", "us-west-2"), (3, 1))
+
+    starts = [balancer.order("key", plan)[0] for _ in range(8)]
+
+    assert starts.count("us-east-1") == 6
+    assert starts.count("us-west-2") == 2
+    # Smooth round-robin interleaves rather than sending bursts.
+    assert starts[:4] == ["us-east-1", "us-east-1", "us-west-2", "us-east-1"]
+
+
+def test_throttled_region_is_skipped_until_its_cooldown_ends() -> None:
+    clock = FakeClock()
+    balancer = RegionBalancer(cooldown=30, clock=clock)
+    plan = RegionPlan(("us-east-1", "us-west-2", "eu-central-1"))
+
+    balancer.mark_unhealthy("key", "us-east-1")
+    assert balancer.order("key", plan) == ["us-west-2", "eu-central-1", "us-east-1"]
+    # Health is per access key: another key's quota is its own.
+    assert balancer.order("other", plan)[0] == "us-east-1"
+
+    clock.now += 31
+    assert balancer.order("key", plan)[0] == "us-east-1"
+
+
+def test_cooling_regions_are_tried_soonest_recovering_first() -> None:
+    clock = FakeClock()
+    balancer = RegionBalancer(cooldown=30, clock=clock)
+    plan = RegionPlan(("us-east-1", "us-west-2"))
+
+    balancer.mark_unhealthy("key", "us-east-1")
+    clock.now += 10
+    balancer.mark_unhealthy("key", "us-west-2")
+
+    assert balancer.order("key", plan) == ["us-east-1", "us-west-2"]
+
+
+class RegionalBedrock:
+    """Mock transport answering each region with a queued status code."""
+
+    def __init__(self, **statuses: list[int]):
+        self.statuses = {region.replace("_", "-"): codes for region, codes in statuses.items()}
+        self.seen: list[str] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        region = request.url.host.split(".")[1]
+        self.seen.append(region)
+        status = self.statuses[region].pop(0)
+        if status != 200:
+            return httpx.Response(status, text="Too many requests")
+        if request.url.path.endswith("converse-stream"):
+            return httpx.Response(200, content=b"")
+        return httpx.Response(200, json=CONVERSE_OK)
+
+
+@pytest.fixture
+def clock():
+    clock = FakeClock()
+    set_proxy_deps(ProxyDependencies(bedrock_regions=RegionBalancer(cooldown=30, clock=clock)))
+    yield clock
+    reset_proxy_deps()
+
+
+def _adapter(transport: RegionalBedrock) -> BedrockAdapter:
+    adapter = BedrockAdapter(
+        bedrock_key_repo=None,
+        client=httpx.AsyncClient(transport=httpx.MockTransport(transport)),
+    )
+
+    async def _fake_key(_access_key_id):
+        return "bedrock-key"
+
+    adapter._get_decrypted_key = _fake_key
+    return adapter
+
+
+def _ctx(bedrock_regions: str | None) -> RequestContext:
+    return RequestContext(
+        request_id="req-regions",
+        user_id=uuid4(),
+        access_key_id=uuid4(),
+        access_key_prefix="ak",
+        bedrock_region="us-east-1",
+        bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+        has_bedrock_key=True,
+        bedrock_regions=bedrock_regions,
+    )
+
+
+def _ctx_for(ctx: RequestContext) -> RequestContext:
+    """A new request on the same access key."""
+    follow_up = _ctx(ctx.bedrock_regions)
+    follow_up.access_key_id = ctx.access_key_id
+    return follow_up
+
+
+REQUEST = AnthropicRequest(model="claude-test", messages=[{"role": "user", "content": "hi"}])
+
+
+async def test_throttled_call_is_retried_in_the_next_region(clock) -> None:
+    transport = RegionalBedrock(us_east_1=[429], us_west_2=[200, 200])
+    adapter = _adapter(transport)
+    ctx = _ctx("us-west-2")
+
+    result = await adapter.invoke(ctx, REQUEST)
+
+    assert result.response.content == [{"type": "text", "text": "ok"}]
+    assert transport.seen == ["us-east-1", "us-west-2"]
+    assert ctx.served_region == "us-west-2"
+    assert ctx.pricing_region == "us-west-2"
+
+    # The throttled region is skipped for the rest of its cooldown.
+    await adapter.invoke(_ctx_for(ctx), REQUEST)
+    assert transport.seen == ["us-east-1", "us-west-2", "us-west-2"]
+
+
+async def test_unavailable_region_fails_over_for_streams(clock) -> None:
+    transport = RegionalBedrock(us_east_1=[503], eu_central_1=[200])
+    ctx = _ctx("eu-central-1")
+
+    result = await _adapter(transport).stream(ctx, REQUEST)
+
+    assert not isinstance(result, AdapterError)
+    await result.aclose()
+    assert transport.seen == ["us-east-1", "eu-central-1"]
+    assert ctx.served_region == "eu-central-1"
+
+
+async def test_geo_profile_fails_over_only_within_its_geography(clock) -> None:
+    transport = RegionalBedrock(us_east_1=[429], us_west_2=[200])
+    ctx = _ctx("eu-central-1,us-west-2")
+    ctx.bedrock_model = "us.anthropic.claude-sonnet-4-5-20250514-v1:0"
+
+    result = await _adapter(transport).invoke(ctx, REQUEST)
+
+    assert not isinstance(result, AdapterError)
+    assert transport.seen == ["us-east-1", "us-west-2"]
+
+
+async def test_client_errors_are_not_retried_elsewhere(clock) -> None:
+    transport = RegionalBedrock(us_east_1=[400], us_west_2=[200])
+    ctx = _ctx("us-west-2")
+
+    result = await _adapter(transport).invoke(ctx, REQUEST)
+
+    assert result.error_type == ErrorType.BEDROCK_VALIDATION
+    assert transport.seen == ["us-east-1"]
+    assert ctx.served_region is None
+
+
+async def test_every_region_throttling_returns_the_last_error(clock) -> None:
+    transport = RegionalBedrock(us_east_1=[429], us_west_2=[429])
+
+    result = await _adapter(transport).invoke(_ctx("us-west-2"), REQUEST)
+
+    assert result.error_type == ErrorType.BEDROCK_QUOTA_EXCEEDED
+    assert transport.seen == ["us-east-1", "us-west-2"]
+
+
+async def test_single_region_keys_are_unchanged(clock) -> None:
+    transport = RegionalBedrock(us_east_1=[429])
+    ctx = _ctx(None)
+
+    result = await _adapter(transport).invoke(ctx, REQUEST)
+
+    assert result.status_code == 429
+    assert transport.seen == ["us-east-1"]
@@ -0,0 +1,152 @@
+"""Golden-file tests for the Converse event-stream to Anthropic SSE conversion.
+
+Each ``fixtures/converse_stream/<name>.json`` lists ``[event_type, body]``
+frames as Bedrock sends them; ``<name>.sse`` is the expected SSE output. The
+fast frame decoder and the botocore reference path must both reproduce it for
+every chunking of the wire bytes.
+"""
+import asyncio
+import json
+import struct
+import zlib
+from pathlib import Path
+
+import pytest
+from bedrock_converse import (
+    ConverseStreamDecoder,
+    EventStreamFrameDecoder,
+    StreamState,
+    iter_anthropic_sse,
+)
+from bedrock_converse.stream_decoder import (
+    _convert_converse_event,
+    _message_delta_payloads,
+    _to_sse,
+)
+from botocore.eventstream import ChecksumMismatch
+
+FIXTURES = Path(__file__).parent / "fixtures" / "converse_stream"
+GOLDEN_NAMES = sorted(path.stem for path in FIXTURES.glob("*.json"))
+MODEL = "claude-sonnet-4-5"
+MESSAGE_ID = "msg_golden"
+
+
+def _header(name: str, value: str) -> bytes:
+    raw_name, raw_value = name.encode(), value.encode()
+    return (
+        bytes([len(raw_name)]) + raw_name + b"\x07" + struct.pack(">H", len(raw_value)) + raw_value
+    )
+
+
+def encode_frame(headers: dict[str, str], payload: bytes) -> bytes:
+    raw_headers = b"".join(_header(k, v) for k, v in headers.items())
+    prelude = struct.pack(">II", 12 + len(raw_headers) + len(payload) + 4, len(raw_headers))
+    message = prelude + struct.pack(">I", zlib.crc32(prelude)) + raw_headers + payload
+    return message + struct.pack(">I", zlib.crc32(message))
+
+
+def event_frame(event_type: str, body: dict) -> bytes:
+    return encode_frame(
+        {
+            ":event-type": event_type,
+            ":content-type": "application/json",
+            ":message-type": "event",
+        },
+        json.dumps(body, separators=(",", ":"), ensure_ascii=False).encode(),
+    )
+
+
+def wire_bytes(name: str) -> bytes:
+    events = json.loads((FIXTURES / f"{name}.json").read_text())
+    return b"".join(event_frame(event_type, body) for event_type, body in events)
+
+
+async def _chunks(data: bytes, size: int):
+    for offset in range(0, len(data), size):
+        yield data[offset : offset + size]
+
+
+async def fast_path(data: bytes, size: int) -> bytes:
+    out = [chunk async for chunk in iter_anthropic_sse(_chunks(data, size), MODEL, MESSAGE_ID)]
+    return b"".join(out)
+
+
+async def reference_path(data: bytes, size: int) -> bytes:
+    """The original botocore-per-event pipeline."""
+    decoder = ConverseStreamDecoder()
+    state = StreamState(message_id=MESSAGE_ID)
+    out: list[bytes] = []
+    async for chunk in _chunks(data, size):
+        for event in decoder.feed(chunk):
+            async for payload in _convert_converse_event(event, state, MODEL):
+                out.append(_to_sse(payload))
+    out.extend(_to_sse(payload) for payload in _message_delta_payloads(state))
+    if state.message_started and not state.message_stopped:
+        out.append(_to_sse({"type": "message_stop"}))
+    return b"".join(out)
+
+
+@pytest.mark.parametrize("name", GOLDEN_NAMES)
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, 1 << 20])
+async def test_fast_path_matches_golden(name: str, chunk_size: int) -> None:
+    golden = (FIXTURES / f"{name}.sse").read_bytes()
+
+    assert await fast_path(wire_bytes(name), chunk_size) == golden
+
+
+@pytest.mark.parametrize("name", GOLDEN_NAMES)
+async def test_reference_path_matches_golden(name: str) -> None:
+    golden = (FIXTURES / f"{name}.sse").read_bytes()
+
+    assert await reference_path(wire_bytes(name), 64) == golden
+
+
+async def test_golden_output_is_valid_anthropic_sse() -> None:
+    golden = (FIXTURES / "text_end_turn.sse").read_bytes()
+    events = [json.loads(block[len(b"data: ") :]) for block in golden.split(b"\n\n") if block]
+
+    text = "".join(e["delta"]["text"] for e in events if e["type"] == "content_block_delta")
+    assert text == 'Hello, "quoted" line\nnext\ttab \\ back 안녕하세요 – ünïcode 🚀'
+    assert [e["type"] for e in events][-2:] == ["message_delta", "message_stop"]
+
+
+async def test_exception_frame_falls_back_to_botocore_error() -> None:
+    data = event_frame("messageStart", {"role": "assistant"}) + encode_frame(
+        {
+            ":exception-type": "throttlingException",
+            ":content-type": "application/json",
+            ":message-type": "exception",
+        },
+        b'{"message":"Too many requests"}',
+    )
+
+    with pytest.raises(ValueError, match="Too many requests"):
+        await fast_path(data, 16)
+
+
+async def test_corrupt_frame_falls_back_to_botocore_checksum_error() -> None:
+    frame = bytearray(event_frame("contentBlockDelta", {"delta": {"text": "hi"}}))
+    frame[-5] ^= 0xFF
+
+    with pytest.raises(ChecksumMismatch):
+        await fast_path(bytes(frame), 1024)
+
+
+def _short_prelude(total_length: int) -> bytes:
+    prelude = struct.pack(">II", total_length, 0)
+    return prelude + struct.pack(">I", zlib.crc32(prelude)) + b"\x00" * 4
+
+
+@pytest.mark.parametrize("data", [b"\x00" * 16, _short_prelude(8)], ids=["zero", "short"])
+async def test_frames_shorter_than_a_prelude_fail_instead_of_hanging(data: bytes) -> None:
+    frames = EventStreamFrameDecoder().feed(data)
+
+    assert frames == [(None, b"", data)]
+    with pytest.raises(ChecksumMismatch):
+        await asyncio.wait_for(fast_path(data, 1024), 1)
+
+
+async def test_reference_decoder_keys_bodies_by_event_type() -> None:
+    events = ConverseStreamDecoder().feed(event_frame("contentBlockStop", {"contentBlockIndex": 2}))
+
+    assert events == [{"contentBlockStop": {"contentBlockIndex": 2}}]
@@ -57,8 +57,8 @@ async def test_budget_value_round_trip(budget):
     )
 
     class FakeUserRepo:
-        async def get_by_id(self, _user_id):
-            return user
+        async def get_monthly_budget(self, _user_id):
+            return user.monthly_budget_usd
 
     class FakeUsageRepo:
         async def get_monthly_usage_total(self, *_args, **_kwargs):
@@ -10,8 +10,7 @@ import pytest
 root = Path(__file__).resolve().parents[1]
 sys.path.append(str(root))
 
-from src.domain import User, UserStatus
-from src.proxy.budget import BudgetService, CachedBudgetInfo
+from src.proxy.budget import BudgetService, CachedBudgetInfo, record_budget_spend
 from src.proxy.dependencies import ProxyDependencies, set_proxy_deps, reset_proxy_deps
 
 
@@ -23,19 +22,6 @@ def proxy_deps():
     reset_proxy_deps()
 
 
-def _build_user(budget: Decimal | None) -> User:
-    now = datetime.now(timezone.utc)
-    return User(
-        id=uuid4(),
-        name="user",
-        description=None,
-        status=UserStatus.ACTIVE,
-        monthly_budget_usd=budget,
-        created_at=now,
-        updated_at=now,
-    )
-
-
 @pytest.mark.asyncio
 async def test_budget_service_uses_cache_on_hit(proxy_deps):
     user_id = uuid4()
@@ -62,7 +48,7 @@ async def test_budget_service_uses_cache_on_hit(proxy_deps):
 
     assert result.monthly_budget == Decimal("100.00")
     assert result.current_usage == Decimal("10.00")
-    user_repo.get_by_id.assert_not_called()
+    user_repo.get_monthly_budget.assert_not_called()
     usage_repo.get_monthly_usage_total.assert_not_called()
 
 
@@ -71,7 +57,7 @@ async def test_budget_service_refreshes_cache_on_month_change(proxy_deps):
     user_id = uuid4()
     user_repo = AsyncMock()
     usage_repo = AsyncMock()
-    user_repo.get_by_id.return_value = _build_user(Decimal("50.00"))
+    user_repo.get_monthly_budget.return_value = Decimal("50.00")
     usage_repo.get_monthly_usage_total.return_value = Decimal("5.00")
 
     budget_service = BudgetService(user_repo, usage_repo)
@@ -93,7 +79,7 @@ async def test_budget_service_refreshes_cache_on_month_change(proxy_deps):
 
     assert result.monthly_budget == Decimal("50.00")
     assert result.current_usage == Decimal("5.00")
-    user_repo.get_by_id.assert_awaited()
+    user_repo.get_monthly_budget.assert_awaited()
     usage_repo.get_monthly_usage_total.assert_awaited()
 
 
@@ -102,7 +88,7 @@ async def test_budget_service_fail_open_on_lookup_error(proxy_deps):
     user_id = uuid4()
     user_repo = AsyncMock()
     usage_repo = AsyncMock()
-    user_repo.get_by_id.side_effect = RuntimeError("db unavailable")
+    user_repo.get_monthly_budget.side_effect = RuntimeError("db unavailable")
 
     budget_service = BudgetService(user_repo, usage_repo)
     result = await budget_service.check_budget(user_id)
@@ -117,7 +103,7 @@ async def test_budget_cache_invalidation_refreshes(proxy_deps):
     user_id = uuid4()
     user_repo = AsyncMock()
     usage_repo = AsyncMock()
-    user_repo.get_by_id.return_value = _build_user(Decimal("200.00"))
+    user_repo.get_monthly_budget.return_value = Decimal("200.00")
     usage_repo.get_monthly_usage_total.return_value = Decimal("20.00")
 
     budget_service = BudgetService(user_repo, usage_repo)
@@ -142,3 +128,58 @@ async def test_budget_cache_invalidation_refreshes(proxy_deps):
 
     assert result.monthly_budget == Decimal("200.00")
     assert result.current_usage == Decimal("20.00")
+
+
+def _seed_ledger(proxy_deps, budget_service, user_id, budget: str, usage: str) -> None:
+    period_start, period_end_exclusive = budget_service.get_month_window()
+    proxy_deps.budget_cache.set(
+        str(user_id),
+        CachedBudgetInfo(
+            user_id=user_id,
+            monthly_budget=Decimal(budget),
+            current_usage=Decimal(usage),
+            period_start=period_start,
+            period_end=period_end_exclusive - timedelta(seconds=1),
+            cached_at=datetime.now(timezone.utc),
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_recorded_spend_is_visible_before_reconcile(proxy_deps):
+    user_id = uuid4()
+    user_repo = AsyncMock()
+    usage_repo = AsyncMock()
+    budget_service = BudgetService(user_repo, usage_repo)
+    _seed_ledger(proxy_deps, budget_service, user_id, "10.00", "9.00")
+
+    await record_budget_spend(user_id, Decimal("0.60"))
+    await record_budget_spend(user_id, Decimal("0.50"))
+    result = await budget_service.check_budget(user_id)
+
+    assert result.current_usage == Decimal("10.10")
+    assert result.allowed is False
+    usage_repo.get_monthly_usage_total.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_record_budget_spend_without_entry_is_noop(proxy_deps):
+    user_id = uuid4()
+
+    await record_budget_spend(user_id, Decimal("1.00"))
+
+    assert proxy_deps.budget_cache.get(str(user_id)) is None
+
+
+@pytest.mark.asyncio
+async def test_record_budget_spend_drops_entry_on_kst_month_rollover(proxy_deps):
+    user_id = uuid4()
+    budget_service = BudgetService(AsyncMock(), AsyncMock())
+    _seed_ledger(proxy_deps, budget_service, user_id, "10.00", "1.00")
+    _period_start, period_end_exclusive = budget_service.get_month_window()
+
+    # First instant of next month in KST.
+    await record_budget_spend(user_id, Decimal("1.00"), at=period_end_exclusive)
+
+    assert proxy_deps.budget_cache.get(str(user_id)) is None
+
@@ -0,0 +1,199 @@
+"""Tests for the bounded LRU/TTL cache and its single-flight loader."""
+import asyncio
+
+import pytest
+
+from src.proxy.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_evicts_least_recently_used_when_full() -> None:
+    cache = TTLCache(60, max_size=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+
+
+def test_expired_entries_are_dropped_and_counted() -> None:
+    clock = FakeClock()
+    cache = TTLCache(10, clock=clock)
+    cache.set("a", 1)
+
+    clock.now += 10
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a") is None
+
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.expirations, stats.size) == (1, 1, 1, 0)
+
+
+def test_jitter_only_shortens_ttl() -> None:
+    clock = FakeClock()
+    cache = TTLCache(100, jitter=0.5, clock=clock)
+
+    for i in range(200):
+        cache.set(str(i), i)
+    expiries = {fresh_until - clock.now for _value, fresh_until, _stale in cache._cache.values()}
+
+    assert all(50 <= ttl <= 100 for ttl in expiries)
+    assert len(expiries) > 1
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_coalesces_concurrent_misses() -> None:
+    cache = TTLCache(60)
+    calls = 0
+    release = asyncio.Event()
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    tasks = [asyncio.create_task(cache.get_or_load("k", loader)) for _ in range(50)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert results == ["value"] * 50
+    assert calls == 1
+    assert cache.stats.coalesced == 49
+    assert await cache.get_or_load("k", loader) == "value"
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_does_not_cache_none() -> None:
+    cache = TTLCache(60)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return None
+
+    assert await cache.get_or_load("k", loader) is None
+    assert await cache.get_or_load("k", loader) is None
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_loader_error_reaches_waiters_and_next_call_retries() -> None:
+    cache = TTLCache(60)
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise RuntimeError("db down")
+
+    tasks = [asyncio.create_task(cache.get_or_load("k", failing)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cache.stats.load_errors == 1
+
+    async def ok():
+        return "recovered"
+
+    assert await cache.get_or_load("k", ok) == "recovered"
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_while_one_caller_refreshes() -> None:
+    clock = FakeClock()
+    cache = TTLCache(10, stale_ttl=30, clock=clock)
+    cache.set("k", "old")
+    clock.now += 15
+    release = asyncio.Event()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "new"
+
+    refresher = asyncio.create_task(cache.get_or_load("k", loader))
+    await asyncio.sleep(0)
+
+    assert await cache.get_or_load("k", loader) == "old"
+    release.set()
+    assert await refresher == "new"
+    assert cache.get("k") == "new"
+    assert calls == 1
+    assert cache.stats.stale_hits == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_falls_back_to_stale_value() -> None:
+    clock = FakeClock()
+    cache = TTLCache(10, stale_ttl=30, clock=clock)
+    cache.set("k", "old")
+    clock.now += 15
+
+    async def failing():
+        raise RuntimeError("kms throttled")
+
+    assert await cache.get_or_load("k", failing) == "old"
+
+    clock.now += 30
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("k", failing)
+
+
+@pytest.mark.asyncio
+async def test_invalidate_during_load_skips_caching_result() -> None:
+    cache = TTLCache(60)
+    release = asyncio.Event()
+
+    async def loader():
+        await release.wait()
+        return "revoked"
+
+    task = asyncio.create_task(cache.get_or_load("k", loader))
+    await asyncio.sleep(0)
+    cache.invalidate("k")
+    release.set()
+
+    assert await task == "revoked"
+    assert cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_when_leading_caller_is_cancelled() -> None:
+    cache = TTLCache(60)
+    never = asyncio.Event()
+
+    async def hangs():
+        await never.wait()
+
+    async def loads():
+        return "value"
+
+    leader = asyncio.create_task(cache.get_or_load("k", hangs))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_load("k", loads))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await waiter == "value"
+    assert cache.get("k") == "value"
@@ -0,0 +1,425 @@
+"""Tests for the circuit breaker and its cross-worker store."""
+import asyncio
+import importlib
+import os
+import socket
+import subprocess
+import sys
+import textwrap
+import threading
+from pathlib import Path
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import fakeredis
+import pytest
+from fakeredis import TcpFakeServer
+from fastapi.responses import StreamingResponse
+
+from src.domain import AnthropicRequest, ErrorType
+from src.proxy.circuit_breaker import (
+    CircuitBreaker,
+    CircuitState,
+    InMemoryCircuitStore,
+    RedisCircuitStore,
+    create_circuit_store,
+)
+from src.proxy.context import RequestContext
+from src.proxy.dependencies import ProxyDependencies, reset_proxy_deps, set_proxy_deps
+
+proxy_router = importlib.import_module("src.api.proxy_router")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def _breaker(clock: FakeClock, store=None, **overrides) -> CircuitBreaker:
+    fields = dict(
+        failure_threshold=3,
+        failure_window=60,
+        failure_rate_threshold=0.5,
+        reset_timeout=600,
+        max_reset_timeout=2400,
+        half_open_max_probes=2,
+        probe_timeout=30,
+        store=store,
+        sync_interval=0,
+        store_timeout=1.0,
+        clock=clock,
+    )
+    fields.update(overrides)
+    return CircuitBreaker(**fields)
+
+
+async def _trip(breaker: CircuitBreaker, key_id: str = "key-1") -> None:
+    for _ in range(breaker.failure_threshold):
+        await breaker.record_failure(key_id, ErrorType.RATE_LIMIT)
+
+
+async def _admitted(breaker: CircuitBreaker, callers: int, key_id: str = "key-1") -> int:
+    return sum([not await breaker.is_open(key_id) for _ in range(callers)])
+
+
+async def test_opens_on_failure_count_and_rate(clock) -> None:
+    breaker = _breaker(clock)
+
+    await breaker.record_failure("key-1", ErrorType.RATE_LIMIT)
+    await breaker.record_failure("key-1", ErrorType.CLIENT_ERROR)
+    await breaker.record_failure("key-1", ErrorType.RATE_LIMIT)
+    assert not await breaker.is_open("key-1")
+
+    await breaker.record_failure("key-1", ErrorType.SERVER_ERROR)
+
+    assert await breaker.is_open("key-1")
+
+
+async def test_low_failure_rate_keeps_circuit_closed(clock) -> None:
+    breaker = _breaker(clock)
+    for _ in range(10):
+        await breaker.record_success("key-1")
+
+    await _trip(breaker)
+
+    # 3 failures in 13 calls is under the 50% failure rate, as is 9 in 19.
+    assert not await breaker.is_open("key-1")
+    await _trip(breaker)
+    await _trip(breaker)
+    assert not await breaker.is_open("key-1")
+    await breaker.record_failure("key-1", ErrorType.RATE_LIMIT)
+    assert await breaker.is_open("key-1")
+
+
+async def test_failures_slide_out_of_the_window(clock) -> None:
+    breaker = _breaker(clock)
+
+    await breaker.record_failure("key-1", ErrorType.RATE_LIMIT)
+    await breaker.record_failure("key-1", ErrorType.RATE_LIMIT)
+    clock.advance(45)
+    await breaker.record_failure("key-1", ErrorType.RATE_LIMIT)
+    assert await breaker.is_open("key-1")
+
+    other = _breaker(clock)
+    await other.record_failure("key-1", ErrorType.RATE_LIMIT)
+    await other.record_failure("key-1", ErrorType.RATE_LIMIT)
+    clock.advance(61)
+    await other.record_failure("key-1", ErrorType.RATE_LIMIT)
+    assert not await other.is_open("key-1")
+
+
+async def test_half_open_admits_limited_probes(clock) -> None:
+    breaker = _breaker(clock)
+    await _trip(breaker)
+
+    clock.advance(599)
+    assert await _admitted(breaker, 10) == 0
+    clock.advance(1)
+
+    # Two probes go to Plan; the rest of the burst skips straight to Bedrock.
+    assert await _admitted(breaker, 10) == 2
+    assert breaker.state_counts()[CircuitState.HALF_OPEN] == 1
+
+    await breaker.record_success("key-1")
+
+    assert await _admitted(breaker, 10) == 10
+    assert breaker.state_counts()[CircuitState.CLOSED] == 1
+
+
+async def test_inconclusive_probe_frees_its_slot(clock) -> None:
+    breaker = _breaker(clock, half_open_max_probes=1)
+    await _trip(breaker)
+    clock.advance(600)
+
+    assert await _admitted(breaker, 3) == 1
+    await breaker.record_failure("key-1", ErrorType.TIMEOUT)
+
+    assert await _admitted(breaker, 3) == 1
+
+
+async def test_lost_probe_slot_lapses_after_probe_timeout(clock) -> None:
+    breaker = _breaker(clock, half_open_max_probes=1)
+    await _trip(breaker)
+    clock.advance(600)
+    assert await _admitted(breaker, 1) == 1
+
+    clock.advance(29)
+    assert await _admitted(breaker, 1) == 0
+    clock.advance(2)
+    assert await _admitted(breaker, 1) == 1
+
+
+async def test_failed_probes_back_off_exponentially(clock) -> None:
+    breaker = _breaker(clock)
+    await _trip(breaker)
+
+    waits = []
+    for _ in range(4):
+        opened_at = clock.now
+        while await breaker.is_open("key-1"):
+            clock.advance(100)
+        waits.append(clock.now - opened_at)
+        await breaker.record_failure("key-1", ErrorType.RATE_LIMIT)
+
+    assert waits == [600, 1200, 2400, 2400]
+
+    while await breaker.is_open("key-1"):
+        clock.advance(100)
+    await breaker.record_success("key-1")
+    await _trip(breaker)
+    assert breaker._states["key-1"].reset_after == 600
+
+
+async def test_one_workers_failures_open_the_circuit_for_its_peers(clock) -> None:
+    store = InMemoryCircuitStore(clock)
+    first, second = _breaker(clock, store), _breaker(clock, store)
+
+    await first.record_failure("key-1", ErrorType.RATE_LIMIT)
+    await second.record_failure("key-1", ErrorType.RATE_LIMIT)
+    assert not await first.is_open("key-1")
+    await second.record_failure("key-1", ErrorType.RATE_LIMIT)
+
+    # Three failures across two workers reach the fleet-wide threshold.
+    assert await first.is_open("key-1")
+    assert await second.is_open("key-1")
+    assert first._states["key-1"].opened_at == second._states["key-1"].opened_at
+
+
+async def test_probes_are_capped_across_workers(clock) -> None:
+    store = InMemoryCircuitStore(clock)
+    workers = [_breaker(clock, store) for _ in range(4)]
+    await _trip(workers[0])
+    for worker in workers[1:]:
+        assert await worker.is_open("key-1")
+
+    clock.advance(600)
+
+    assert sum([await _admitted(worker, 5) for worker in workers]) == 2
+
+
+async def test_peer_probe_outcomes_reach_other_workers(clock) -> None:
+    store = InMemoryCircuitStore(clock)
+    prober, other = _breaker(clock, store), _breaker(clock, store)
+    await _trip(prober)
+    assert await other.is_open("key-1")
+    clock.advance(600)
+    assert await _admitted(prober, 1) == 1
+
+    # A failed probe reopens the circuit for the worker that didn't probe too.
+    await prober.record_failure("key-1", ErrorType.RATE_LIMIT)
+    assert await other.is_open("key-1")
+    assert other._states["key-1"].reset_after == 1200
+
+    clock.advance(1200)
+    assert await _admitted(prober, 1) == 1
+    assert await _admitted(other, 3) == 1
+    await prober.record_success("key-1")
+    await other.record_success("key-1")
+    assert await _admitted(prober, 3) == 3
+    assert await _admitted(other, 3) == 3
+
+
+async def test_closed_keys_consult_the_store_once_per_sync_interval(clock) -> None:
+    store = InMemoryCircuitStore(clock)
+    store.get_open = AsyncMock(wraps=store.get_open)
+    breaker = _breaker(clock, store, sync_interval=1)
+
+    for _ in range(10):
+        assert not await breaker.is_open("key-1")
+    assert store.get_open.await_count == 1
+
+    await _trip(_breaker(clock, store))
+
+    assert not await breaker.is_open("key-1")
+    clock.advance(1)
+    assert await breaker.is_open("key-1")
+
+
+async def test_store_errors_fall_back_to_local_state(clock) -> None:
+    store = InMemoryCircuitStore(clock)
+    for method in ("add_failure", "open", "get_open", "try_probe", "reset"):
+        setattr(store, method, AsyncMock(side_effect=ConnectionError("redis down")))
+    breaker = _breaker(clock, store)
+
+    assert not await breaker.is_open("key-1")
+    await _trip(breaker)
+    assert await breaker.is_open("key-1")
+
+    clock.advance(600)
+    assert await _admitted(breaker, 5) == 2
+
+
+async def test_redis_store_counts_atomically_and_first_opener_wins() -> None:
+    client = fakeredis.FakeAsyncRedis()
+    store = RedisCircuitStore(client, key_prefix="test")
+
+    counts = await asyncio.gather(*(store.add_failure("key-1", 60) for _ in range(20)))
+    first = await store.open("key-1", 100.0, 600.0)
+    second = await store.open("key-1", 200.0, 600.0)
+    replaced = await store.open("key-1", 300.0, 1200.0, replace=True)
+
+    assert sorted(counts) == list(range(1, 21))
+    assert 0 < await client.ttl("test:circuit:key-1:failures") <= 60
+    assert 0 < await client.ttl("test:circuit:key-1:open") <= 1200
+    assert (first, second, replaced) == ((100.0, 600.0), (100.0, 600.0), (300.0, 1200.0))
+    assert await store.get_open("key-1") == (300.0, 1200.0)
+
+
+async def test_redis_store_caps_probe_slots() -> None:
+    store = RedisCircuitStore(fakeredis.FakeAsyncRedis(), key_prefix="test")
+
+    admitted = await asyncio.gather(*(store.try_probe("key-1", 2, 30) for _ in range(10)))
+    await store.release_probe("key-1")
+
+    assert sum(admitted) == 2
+    assert await store.try_probe("key-1", 2, 30)
+    assert not await store.try_probe("key-1", 2, 30)
+    await store.open("key-1", 100.0, 600.0)
+    assert await store.try_probe("key-1", 2, 30)
+
+
+def test_create_circuit_store() -> None:
+    assert isinstance(create_circuit_store("memory://"), InMemoryCircuitStore)
+    assert isinstance(create_circuit_store("redis://localhost:6379/0"), RedisCircuitStore)
+    with pytest.raises(ValueError):
+        create_circuit_store("postgres://db")
+
+
+@pytest.fixture
+def redis_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{port}/0"
+    server.shutdown()
+    server.server_close()
+
+
+def test_circuit_opened_in_one_process_stops_upstream_calls_in_others(redis_url) -> None:
+    worker = textwrap.dedent(
+        """
+        import asyncio
+        import sys
+
+        from src.domain import ErrorType
+        from src.proxy.circuit_breaker import CircuitBreaker, RedisCircuitStore
+
+        upstream_calls = 0
+
+
+        async def rate_limited_upstream() -> ErrorType:
+            global upstream_calls
+            upstream_calls += 1
+            return ErrorType.RATE_LIMIT
+
+
+        async def main() -> None:
+            breaker = CircuitBreaker(
+                failure_threshold=3,
+                failure_window=60,
+                reset_timeout=600,
+                store=RedisCircuitStore.from_url(sys.argv[1], key_prefix="mp"),
+                sync_interval=0,
+                store_timeout=2.0,
+            )
+            for _ in range(5):
+                if await breaker.is_open("plan-key"):
+                    continue
+                await breaker.record_failure("plan-key", await rate_limited_upstream())
+            await breaker.aclose()
+            print(upstream_calls)
+
+
+        asyncio.run(main())
+        """
+    )
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR)}
+
+    calls = [
+        int(
+            subprocess.run(
+                [sys.executable, "-c", worker, redis_url],
+                cwd=BACKEND_DIR,
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.splitlines()[-1]
+        )
+        for _ in range(3)
+    ]
+
+    # Per-process breakers would have sent 3 failing calls from every worker.
+    assert calls == [3, 0, 0]
+
+
+async def test_streaming_skips_plan_while_circuit_is_open(monkeypatch) -> None:
+    bedrock_calls: list = []
+
+    class FailingPlanAdapter:
+        def __init__(self, headers) -> None:
+            return None
+
+        async def stream(self, _request):  # pragma: no cover - must not be called
+            raise AssertionError("plan called with the circuit open")
+
+    class FakeBedrockAdapter:
+        def __init__(self, **_kwargs) -> None:
+            return None
+
+        async def stream(self, ctx, request):
+            bedrock_calls.append(ctx)
+
+            async def _gen():
+                yield b"data: {}\n\n"
+
+            return _gen()
+
+    ctx = RequestContext(
+        request_id="req-circuit",
+        user_id=uuid4(),
+        access_key_id=uuid4(),
+        access_key_prefix="ak",
+        bedrock_region="ap-northeast-2",
+        bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+        has_bedrock_key=True,
+    )
+    breaker = _breaker(FakeClock())
+    await _trip(breaker, str(ctx.access_key_id))
+    budget_service = AsyncMock()
+    budget_service.check_budget.return_value.allowed = True
+    monkeypatch.setattr(proxy_router, "PlanAdapter", FailingPlanAdapter)
+    monkeypatch.setattr(proxy_router, "BedrockAdapter", FakeBedrockAdapter)
+    set_proxy_deps(ProxyDependencies(circuit_breaker=breaker))
+    try:
+        response = await proxy_router._stream_plan_first(
+            ctx,
+            AnthropicRequest(
+                model="claude-test", messages=[{"role": "user", "content": "hi"}], stream=True
+            ),
+            AsyncMock(),
+            {},
+            budget_service,
+            AsyncMock(),
+        )
+    finally:
+        reset_proxy_deps()
+
+    assert isinstance(response, StreamingResponse)
+    assert bedrock_calls == [ctx]
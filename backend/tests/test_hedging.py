@@ -0,0 +1,257 @@
+"""Tests for hedged Plan/Bedrock routing."""
+import asyncio
+import importlib
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+import pytest
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from src.domain import AnthropicRequest, ErrorType, RoutingStrategy
+from src.proxy.adapter_base import AdapterError, AdapterResponse
+from src.proxy.budget import _build_budget_result
+from src.proxy.circuit_breaker import CircuitBreaker
+from src.proxy.context import RequestContext
+from src.proxy.dependencies import ProxyDependencies, reset_proxy_deps, set_proxy_deps
+from src.proxy.hedging import race_with_hedge
+from src.proxy.router import ProxyRouter
+
+proxy_router = importlib.import_module("src.api.proxy_router")
+
+DELAY = 0.01
+RATE_LIMITED = AdapterError(ErrorType.RATE_LIMIT, 429, "Rate limit exceeded", True)
+
+
+class SlowCall:
+    """Returns ``result`` after ``after`` seconds, remembering if it was cancelled."""
+
+    def __init__(self, result, after: float = 0.0):
+        self.result = result
+        self.after = after
+        self.started = False
+        self.cancelled = False
+
+    async def __call__(self, *_args):
+        self.started = True
+        try:
+            await asyncio.sleep(self.after)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.result
+
+
+def _ok(result) -> bool:
+    return isinstance(result, AdapterResponse)
+
+
+def _success(text: str) -> AdapterResponse:
+    return AdapterResponse(response=Mock(text=text), usage=Mock())
+
+
+@pytest.fixture
+def circuit_breaker():
+    cb = Mock(spec=CircuitBreaker)
+    cb.is_open.return_value = False
+    set_proxy_deps(ProxyDependencies(circuit_breaker=cb))
+    yield cb
+    reset_proxy_deps()
+
+
+@pytest.fixture
+def ctx() -> RequestContext:
+    return RequestContext(
+        request_id="req-hedge",
+        user_id=uuid4(),
+        access_key_id=uuid4(),
+        access_key_prefix="ak",
+        bedrock_region="ap-northeast-2",
+        bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+        has_bedrock_key=True,
+        routing_strategy=RoutingStrategy.PLAN_HEDGED,
+    )
+
+
+async def test_fast_primary_never_starts_the_hedge() -> None:
+    hedge = SlowCall(_success("bedrock"))
+
+    race = await race_with_hedge(SlowCall(_success("plan"))(), hedge, DELAY, _ok, _ok)
+
+    assert (race.winner, race.hedged, hedge.started) == ("primary", False, False)
+
+
+async def test_slow_primary_loses_to_the_hedge_and_is_cancelled() -> None:
+    primary = SlowCall(_success("plan"), after=10)
+
+    race = await race_with_hedge(primary(), SlowCall(_success("bedrock")), DELAY, _ok, _ok)
+
+    assert (race.winner, race.hedged, race.primary) == ("hedge", True, None)
+    assert primary.cancelled
+
+
+async def test_failed_hedge_waits_for_the_primary() -> None:
+    race = await race_with_hedge(
+        SlowCall(_success("plan"), after=5 * DELAY)(), SlowCall(RATE_LIMITED), DELAY, _ok, _ok
+    )
+
+    assert race.winner == "primary"
+
+
+async def test_both_failing_reports_both_results() -> None:
+    hedge_error = AdapterError(ErrorType.BEDROCK_UNAVAILABLE, 503, "down", False)
+
+    race = await race_with_hedge(
+        SlowCall(RATE_LIMITED, after=2 * DELAY)(), SlowCall(hedge_error), DELAY, _ok, _ok
+    )
+
+    assert race.winner is None
+    assert (race.primary, race.hedge) == (RATE_LIMITED, hedge_error)
+
+
+async def test_router_serves_the_hedge_and_frees_the_plan_probe(circuit_breaker, ctx) -> None:
+    plan, bedrock = Mock(), Mock()
+    plan.invoke = SlowCall(_success("plan"), after=10)
+    bedrock.invoke = SlowCall(_success("bedrock"))
+    budget_checker = AsyncMock(return_value=Mock(allowed=True))
+    router = ProxyRouter(plan, bedrock, budget_checker=budget_checker, hedge_delay=DELAY)
+
+    response = await router.route(ctx, Mock(spec=AnthropicRequest, model="claude-test"))
+
+    assert (response.provider, response.is_fallback, response.success) == ("bedrock", True, True)
+    assert plan.invoke.cancelled
+    budget_checker.assert_awaited_once()
+    # A cancelled Plan call is slow, not failing: a non-triggering outcome.
+    circuit_breaker.record_failure.assert_awaited_once_with(
+        str(ctx.access_key_id), ErrorType.TIMEOUT
+    )
+
+
+async def test_router_skips_bedrock_spend_when_plan_is_fast(circuit_breaker, ctx) -> None:
+    plan, bedrock = Mock(), Mock()
+    plan.invoke = SlowCall(_success("plan"))
+    bedrock.invoke = SlowCall(_success("bedrock"))
+    budget_checker = AsyncMock(return_value=Mock(allowed=True))
+    router = ProxyRouter(plan, bedrock, budget_checker=budget_checker, hedge_delay=DELAY)
+
+    response = await router.route(ctx, Mock(spec=AnthropicRequest, model="claude-test"))
+
+    assert (response.provider, response.is_fallback) == ("plan", False)
+    assert not bedrock.invoke.started
+    budget_checker.assert_not_awaited()
+    circuit_breaker.record_success.assert_awaited_once()
+
+
+async def test_router_keeps_waiting_for_plan_when_budget_denies_the_hedge(
+    circuit_breaker, ctx
+) -> None:
+    plan, bedrock = Mock(), Mock()
+    plan.invoke = SlowCall(_success("plan"), after=5 * DELAY)
+    bedrock.invoke = SlowCall(_success("bedrock"))
+    now = datetime.now(timezone.utc)
+    exhausted = _build_budget_result(Decimal("10"), Decimal("10"), now, now)
+    router = ProxyRouter(
+        plan, bedrock, budget_checker=AsyncMock(return_value=exhausted), hedge_delay=DELAY
+    )
+
+    response = await router.route(ctx, Mock(spec=AnthropicRequest, model="claude-test"))
+
+    assert response.provider == "plan"
+    assert not bedrock.invoke.started
+
+
+async def test_router_falls_back_after_a_fast_plan_failure(circuit_breaker, ctx) -> None:
+    plan, bedrock = Mock(), Mock()
+    plan.invoke = SlowCall(RATE_LIMITED)
+    bedrock.invoke = SlowCall(_success("bedrock"))
+    router = ProxyRouter(plan, bedrock, hedge_delay=10)
+
+    response = await router.route(ctx, Mock(spec=AnthropicRequest, model="claude-test"))
+
+    assert (response.provider, response.is_fallback) == ("bedrock", True)
+    circuit_breaker.record_failure.assert_awaited_once_with(
+        str(ctx.access_key_id), ErrorType.RATE_LIMIT
+    )
+
+
+async def _fake_check_budget(self, _user_id, *, fail_open: bool = True):
+    now = datetime.now(timezone.utc)
+    return _build_budget_result(None, Decimal("0"), now, now)
+
+
+async def test_stream_serves_only_the_winner(monkeypatch, circuit_breaker, ctx) -> None:
+    plan_closed = asyncio.Event()
+
+    class StalledPlanResponse:
+        status_code = 200
+        headers = {"content-type": "text/event-stream"}
+
+        async def aiter_bytes(self):
+            await asyncio.sleep(10)
+            yield b"event: plan\n\n"
+
+        async def aclose(self) -> None:
+            plan_closed.set()
+
+    class FakePlanAdapter:
+        def __init__(self, headers=None) -> None:
+            return None
+
+        async def stream(self, request):
+            return StalledPlanResponse()
+
+    class FakeBedrockAdapter:
+        def __init__(self, **_kwargs) -> None:
+            return None
+
+        async def stream(self, ctx, request):
+            async def _gen():
+                yield b"event: bedrock\n\n"
+
+            return _gen()
+
+    monkeypatch.setattr(proxy_router, "PlanAdapter", FakePlanAdapter)
+    monkeypatch.setattr(proxy_router, "BedrockAdapter", FakeBedrockAdapter)
+    monkeypatch.setattr(proxy_router.BudgetService, "check_budget", _fake_check_budget)
+    monkeypatch.setattr(proxy_router.get_settings(), "hedge_delay_ms", 10)
+
+    request = AnthropicRequest(
+        model="claude-test", messages=[{"role": "user", "content": "hello"}], stream=True
+    )
+    response = await proxy_router._stream_plan_hedged(
+        ctx,
+        request,
+        AsyncMock(),
+        {},
+        proxy_router.BudgetService(Mock(), Mock()),
+        Mock(),
+    )
+
+    assert isinstance(response, StreamingResponse)
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    assert body == b"event: bedrock\n\n"
+    assert plan_closed.is_set()
+
+
+async def test_stream_returns_plan_client_errors_without_hedging(
+    monkeypatch, circuit_breaker, ctx
+) -> None:
+    class FakePlanAdapter:
+        def __init__(self, headers=None) -> None:
+            return None
+
+        async def stream(self, request):
+            return AdapterError(ErrorType.CLIENT_ERROR, 400, "bad request", False)
+
+    monkeypatch.setattr(proxy_router, "PlanAdapter", FakePlanAdapter)
+
+    request = AnthropicRequest(
+        model="claude-test", messages=[{"role": "user", "content": "hello"}], stream=True
+    )
+    response = await proxy_router._stream_plan_hedged(
+        ctx, request, AsyncMock(), {}, Mock(), Mock()
+    )
+
+    assert isinstance(response, JSONResponse)
+    assert response.status_code == 400
@@ -0,0 +1,134 @@
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from src.domain import AnthropicRequest
+from src.proxy.bedrock_adapter import BedrockAdapter
+from src.proxy.context import RequestContext
+from src.proxy.dependencies import ProxyDependencies, reset_proxy_deps, set_proxy_deps
+from src.proxy.http_clients import HttpClientRegistry
+from src.proxy.plan_adapter import PlanAdapter
+
+
+@pytest.fixture
+def proxy_deps():
+    deps = ProxyDependencies(http_clients=HttpClientRegistry(http2=False))
+    set_proxy_deps(deps)
+    yield deps
+    reset_proxy_deps()
+
+
+@pytest.mark.asyncio
+async def test_registry_reuses_client_per_origin_and_tls() -> None:
+    registry = HttpClientRegistry(http2=False)
+
+    first = registry.get("https://api.anthropic.com/v1/messages")
+    second = registry.get("https://api.anthropic.com/v1/messages/count_tokens")
+    insecure = registry.get("https://api.anthropic.com/v1/messages", verify=False)
+
+    assert first is second
+    assert insecure is not first
+    assert len(registry) == 2
+    await registry.aclose()
+
+
+def test_registry_keeps_explicit_zero_limits() -> None:
+    registry = HttpClientRegistry(max_keepalive_connections=0, keepalive_expiry=0, http2=False)
+
+    assert registry._limits.max_keepalive_connections == 0
+    assert registry._limits.keepalive_expiry == 0
+
+
+@pytest.mark.asyncio
+async def test_registry_separates_bedrock_regions() -> None:
+    registry = HttpClientRegistry(http2=False)
+
+    seoul = registry.bedrock("ap-northeast-2")
+    virginia = registry.bedrock("us-east-1")
+
+    assert seoul is not virginia
+    assert registry.bedrock("ap-northeast-2") is seoul
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_registry_aclose_closes_clients_and_recreates_on_demand() -> None:
+    registry = HttpClientRegistry(http2=False)
+    client = registry.get("https://api.anthropic.com")
+
+    await registry.aclose()
+
+    assert client.is_closed
+    assert len(registry) == 0
+    replacement = registry.get("https://api.anthropic.com")
+    assert replacement is not client
+    await registry.aclose()
+
+
+def test_registry_applies_keepalive_limits() -> None:
+    registry = HttpClientRegistry(
+        max_connections=7, max_keepalive_connections=3, keepalive_expiry=12.0, http2=False
+    )
+    pool = registry.get("https://api.anthropic.com")._transport._pool
+
+    assert pool._max_connections == 7
+    assert pool._max_keepalive_connections == 3
+    assert pool._keepalive_expiry == 12.0
+
+
+@pytest.mark.asyncio
+async def test_plan_adapters_share_pooled_client(proxy_deps) -> None:
+    first = PlanAdapter(headers={"x-api-key": "a"})
+    second = PlanAdapter(headers={"x-api-key": "b"})
+
+    assert first._client is second._client
+    assert len(proxy_deps.http_clients) == 1
+
+
+def test_bedrock_adapter_borrows_registry_client_per_region(proxy_deps) -> None:
+    adapter = BedrockAdapter(bedrock_key_repo=None)
+
+    assert adapter._client_for("us-west-2") is proxy_deps.http_clients.bedrock("us-west-2")
+    assert adapter._client_for("us-west-2") is not adapter._client_for("us-east-1")
+
+
+@pytest.mark.asyncio
+async def test_bedrock_adapter_leaves_injected_client_open(proxy_deps) -> None:
+    seen: list[str] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.host)
+        return httpx.Response(
+            200,
+            json={
+                "output": {"message": {"content": [{"text": "ok"}]}},
+                "usage": {"inputTokens": 1, "outputTokens": 1},
+                "stopReason": "end_turn",
+            },
+        )
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    adapter = BedrockAdapter(bedrock_key_repo=None, client=client)
+
+    async def _fake_key(_access_key_id):
+        return "bedrock-key"
+
+    adapter._get_decrypted_key = _fake_key
+    ctx = RequestContext(
+        request_id="req-pool",
+        user_id=uuid4(),
+        access_key_id=uuid4(),
+        access_key_prefix="ak",
+        bedrock_region="us-west-2",
+        bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+        has_bedrock_key=True,
+    )
+    request = AnthropicRequest(model="claude-test", messages=[{"role": "user", "content": "hi"}])
+
+    result = await adapter.invoke(ctx, request)
+
+    assert result.response.content == [{"type": "text", "text": "ok"}]
+    assert seen == ["bedrock-runtime.us-west-2.amazonaws.com"]
+    assert not client.is_closed
+    await client.aclose()
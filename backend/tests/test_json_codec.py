@@ -0,0 +1,45 @@
+"""Tests for the pluggable JSON codec."""
+import json
+from pathlib import Path
+
+import pytest
+
+from src import json_codec
+from src.api.responses import FastJSONResponse
+
+FIXTURES = Path(__file__).parent / "fixtures" / "converse_stream"
+
+SAMPLES = [
+    {"type": "text_delta", "text": 'line "one"\nline\ttwo \\ 안녕하세요 🚀  '},
+    {"usage": {"input_tokens": 12, "output_tokens": 0}, "stop_sequence": None, "ok": True},
+    [1, -2, 3.5, "x", [], {}],
+    "\x00\x1f control",
+]
+
+
+@pytest.mark.parametrize("value", SAMPLES)
+def test_stdlib_fallback_emits_the_same_bytes(value) -> None:
+    assert json_codec._stdlib_dumps(value) == json_codec.dumps(value)
+
+
+@pytest.mark.parametrize("path", sorted(FIXTURES.glob("*.json")), ids=lambda p: p.stem)
+def test_backends_agree_on_converse_fixtures(path: Path) -> None:
+    raw = path.read_bytes()
+
+    assert json_codec.loads(raw) == json_codec._stdlib_loads(raw) == json.loads(raw)
+    assert json_codec._stdlib_loads(memoryview(raw)) == json.loads(raw)
+    assert json_codec.dumps(json.loads(raw)) == json_codec._stdlib_dumps(json.loads(raw))
+
+
+@pytest.mark.parametrize("loads", [json_codec.loads, json_codec._stdlib_loads])
+def test_decode_errors_are_value_errors(loads) -> None:
+    with pytest.raises(ValueError):
+        loads(b'{"type": ')
+
+
+def test_fast_json_response_renders_with_the_codec() -> None:
+    response = FastJSONResponse({"text": "안녕"}, status_code=429)
+
+    assert response.body == '{"text":"안녕"}'.encode()
+    assert response.headers["content-type"] == "application/json"
+    assert response.status_code == 429
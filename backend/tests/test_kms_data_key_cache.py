@@ -0,0 +1,150 @@
+"""Tests for off-loop KMS decryption, the data-key cache and Bedrock key warm-up."""
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from src.domain import BedrockKey
+from src.proxy import bedrock_adapter
+from src.proxy.bedrock_adapter import (
+    BedrockAdapter,
+    prime_bedrock_key_cache,
+    warm_bedrock_key_cache,
+)
+from src.proxy.cache import TTLCache
+from src.proxy.dependencies import ProxyDependencies, reset_proxy_deps, set_proxy_deps
+from src.security import KMSEnvelopeEncryption
+
+
+class StubKMS:
+    """Stands in for the boto3 KMS client; ``decrypt`` blocks like the real call."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.decrypt_calls = 0
+        self.threads: set[int] = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_data_key(self, KeyId: str, KeySpec: str) -> dict:  # noqa: N803
+        data_key = os.urandom(32)
+        return {"Plaintext": data_key, "CiphertextBlob": b"wrapped:" + data_key}
+
+    def decrypt(self, CiphertextBlob: bytes) -> dict:  # noqa: N803
+        with self._lock:
+            self.decrypt_calls += 1
+            self.threads.add(threading.get_ident())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if not CiphertextBlob.startswith(b"wrapped:"):
+            raise ValueError("InvalidCiphertextException")
+        return {"Plaintext": CiphertextBlob.removeprefix(b"wrapped:")}
+
+
+def _encryption(kms: StubKMS) -> KMSEnvelopeEncryption:
+    encryption = KMSEnvelopeEncryption(kms_key_id="alias/test")
+    encryption._client = kms
+    return encryption
+
+
+def _bedrock_key(encrypted_key: bytes) -> BedrockKey:
+    return BedrockKey(
+        access_key_id=uuid4(), encrypted_key=encrypted_key, key_hash="h", created_at=datetime.now()
+    )
+
+
+@pytest.fixture
+def deps():
+    deps = ProxyDependencies()
+    set_proxy_deps(deps)
+    yield deps
+    reset_proxy_deps()
+
+
+async def test_decrypt_async_round_trips_and_reuses_the_data_key() -> None:
+    kms = StubKMS()
+    encryption = _encryption(kms)
+    blob = encryption.encrypt("bedrock-secret")
+    data_keys = TTLCache(60)
+
+    assert await encryption.decrypt_async(blob, data_keys) == "bedrock-secret"
+    assert await encryption.decrypt_async(blob, data_keys) == "bedrock-secret"
+    assert kms.decrypt_calls == 1
+    assert encryption.decrypt(blob) == "bedrock-secret"
+
+
+async def test_concurrent_decrypts_share_one_kms_call() -> None:
+    kms = StubKMS(delay=0.05)
+    encryption = _encryption(kms)
+    blob = encryption.encrypt("bedrock-secret")
+    data_keys = TTLCache(60)
+
+    results = await asyncio.gather(
+        *(encryption.decrypt_async(blob, data_keys) for _ in range(10))
+    )
+
+    assert results == ["bedrock-secret"] * 10
+    assert kms.decrypt_calls == 1
+
+
+async def test_kms_call_runs_off_the_event_loop() -> None:
+    kms = StubKMS(delay=0.05)
+    encryption = _encryption(kms)
+    blob = encryption.encrypt("bedrock-secret")
+    ticks = 0
+
+    async def _ticker() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    ticker = asyncio.create_task(_ticker())
+    try:
+        assert await encryption.decrypt_async(blob) == "bedrock-secret"
+    finally:
+        ticker.cancel()
+
+    assert threading.get_ident() not in kms.threads
+    assert ticks > 1
+
+
+async def test_warm_up_fills_the_bedrock_key_cache_with_bounded_concurrency(deps) -> None:
+    kms = StubKMS(delay=0.02)
+    encryption = _encryption(kms)
+    keys = [_bedrock_key(encryption.encrypt(f"secret-{i}")) for i in range(6)]
+    broken = _bedrock_key(b"\x00\x03bad" + b"\x00" * 28)
+
+    warmed = await warm_bedrock_key_cache([*keys, broken], concurrency=2, encryption=encryption)
+
+    assert warmed == 6
+    assert kms.max_in_flight <= 2
+    for i, key in enumerate(keys):
+        assert deps.bedrock_key_cache.get(str(key.access_key_id)) == f"secret-{i}"
+    assert deps.bedrock_key_cache.get(str(broken.access_key_id)) is None
+
+
+async def test_primed_key_is_shared_with_an_adapter_that_needs_it(deps, monkeypatch) -> None:
+    kms = StubKMS(delay=0.02)
+    encryption = _encryption(kms)
+    monkeypatch.setattr(bedrock_adapter, "KMSEnvelopeEncryption", lambda: encryption)
+    bedrock_key = _bedrock_key(encryption.encrypt("bedrock-secret"))
+
+    prime_bedrock_key_cache(bedrock_key.access_key_id, bedrock_key.encrypted_key)
+    (task,) = bedrock_adapter._prime_tasks
+    await asyncio.sleep(0)
+    # No repository: the adapter must join the primed decrypt, not load again.
+    adapter = BedrockAdapter(bedrock_key_repo=None)
+
+    assert await adapter._get_decrypted_key(bedrock_key.access_key_id) == "bedrock-secret"
+    assert kms.decrypt_calls == 1
+    await task
+    assert not bedrock_adapter._prime_tasks
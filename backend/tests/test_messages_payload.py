@@ -0,0 +1,162 @@
+"""Tests for raw-bytes ``/v1/messages`` passthrough."""
+import json
+from uuid import uuid4
+
+import httpx
+import pytest
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from src.api.proxy_router import read_messages_payload
+from src.domain import AnthropicRequest, ErrorType
+from src.proxy.bedrock_adapter import BedrockAdapter
+from src.proxy.context import RequestContext
+from src.proxy.payload import MessagesPayload
+from src.proxy.plan_adapter import PlanAdapter
+
+BODY = json.dumps(
+    {
+        "model": "claude-sonnet-4-5",
+        "max_tokens": 1024,
+        "stream": True,
+        "metadata": {"user_id": "u-1"},
+        "messages": [{"role": "user", "content": "hi"}],
+    }
+).encode()
+
+
+def _ctx() -> RequestContext:
+    return RequestContext(
+        request_id="req-payload",
+        user_id=uuid4(),
+        access_key_id=uuid4(),
+        access_key_prefix="ak",
+        bedrock_region="us-east-1",
+        bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+        has_bedrock_key=True,
+    )
+
+
+def test_parse_reads_only_routing_fields() -> None:
+    payload = MessagesPayload.parse(BODY)
+
+    assert payload.model == "claude-sonnet-4-5"
+    assert payload.stream is True
+    assert payload.metadata == {"user_id": "u-1"}
+    assert payload._request is None
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"not json",
+        b"[]",
+        b'{"messages": []}',
+        b'{"model": "m", "stream": "yes"}',
+        b'{"model": "m", "metadata": []}',
+    ],
+)
+def test_parse_rejects_bodies_routing_cannot_use(body: bytes) -> None:
+    with pytest.raises(ValueError):
+        MessagesPayload.parse(body)
+
+
+def test_upstream_body_is_the_client_bytes_when_nothing_changes() -> None:
+    payload = MessagesPayload.parse(BODY)
+
+    assert payload.upstream_body() is BODY
+
+
+def test_upstream_body_drops_nulls_and_internal_fields() -> None:
+    body = b'{"model": "m", "messages": [], "system": null, "original_model": "x"}'
+
+    rewritten = json.loads(MessagesPayload.parse(body).upstream_body())
+
+    default_max_tokens = AnthropicRequest.model_fields["max_tokens"].default
+    assert rewritten == {"model": "m", "messages": [], "max_tokens": default_max_tokens}
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b'{"model": "m", "messages": [], "max_tokens": 10, "unknown": 1}',
+        b'{"model": "m", "messages": [], "max_tokens": null}',
+        b'{"model": "m", "messages": [], "system": null, "extra": {"a": 1}}',
+    ],
+)
+def test_upstream_body_matches_the_validated_request_dump(body: bytes) -> None:
+    payload = MessagesPayload.parse(body)
+
+    expected = payload.to_request().model_dump(
+        exclude_none=True, exclude={"original_model", "stream"}
+    )
+    assert json.loads(payload.upstream_body()) == expected
+
+
+def test_full_request_is_built_once_on_demand() -> None:
+    payload = MessagesPayload.parse(BODY)
+
+    request = payload.to_request()
+
+    assert isinstance(request, AnthropicRequest)
+    assert request.messages[0].content == "hi"
+    assert payload.to_request() is request
+
+
+async def test_plan_adapter_forwards_the_raw_bytes() -> None:
+    sent: list[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request.content)
+        return httpx.Response(
+            200,
+            json={
+                "id": "msg_1",
+                "type": "message",
+                "role": "assistant",
+                "content": [{"type": "text", "text": "ok"}],
+                "model": "claude-sonnet-4-5",
+                "stop_reason": "end_turn",
+                "usage": {"input_tokens": 1, "output_tokens": 1},
+            },
+        )
+
+    adapter = PlanAdapter(
+        api_key="plan-key", client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    payload = MessagesPayload.parse(BODY)
+
+    result = await adapter.invoke(_ctx(), payload)
+
+    assert result.response.content == [{"type": "text", "text": "ok"}]
+    assert sent == [BODY]
+    assert payload._request is None
+
+
+async def test_bedrock_fallback_reports_an_invalid_body_as_a_client_error() -> None:
+    adapter = BedrockAdapter(bedrock_key_repo=None, client=httpx.AsyncClient())
+
+    async def _fake_key(_access_key_id):
+        return "bedrock-key"
+
+    adapter._get_decrypted_key = _fake_key
+    payload = MessagesPayload.parse(b'{"model": "m", "messages": "not a list"}')
+
+    with pytest.raises(ValidationError):
+        payload.to_request()
+    result = await adapter.invoke(_ctx(), payload)
+
+    assert result.error_type == ErrorType.BEDROCK_VALIDATION
+    assert result.status_code == 400
+    assert result.retryable is False
+
+
+async def test_unreadable_body_is_a_422() -> None:
+    class DummyRequest:
+        async def body(self) -> bytes:
+            return b'{"stream": true}'
+
+    with pytest.raises(RequestValidationError) as excinfo:
+        await read_messages_payload(DummyRequest())
+
+    assert excinfo.value.errors()[0]["loc"] == ("body",)
@@ -0,0 +1,205 @@
+"""Tests for the batched in-process metrics aggregator."""
+import asyncio
+import io
+import json
+from uuid import uuid4
+
+import pytest
+
+from src.domain import AnthropicUsage
+from src.proxy.context import RequestContext
+from src.proxy.dependencies import ProxyDependencies, reset_proxy_deps, set_proxy_deps
+from src.proxy.metrics_aggregator import (
+    CloudWatchSink,
+    EmfSink,
+    MetricsAggregator,
+    create_metric_sink,
+)
+from src.proxy.router import ProxyResponse
+from src.proxy.usage import UsageRecorder
+
+
+class StubCloudWatch:
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+
+    def put_metric_data(self, **kwargs) -> None:
+        self.calls.append(kwargs)
+
+    def datums(self, name: str) -> list[dict]:
+        return [d for call in self.calls for d in call["MetricData"] if d["MetricName"] == name]
+
+
+def _response(**overrides) -> ProxyResponse:
+    fields = dict(
+        success=True,
+        response=None,
+        usage=AnthropicUsage(input_tokens=100, output_tokens=20),
+        provider="bedrock",
+        is_fallback=False,
+        status_code=200,
+    )
+    fields.update(overrides)
+    return ProxyResponse(**fields)
+
+
+@pytest.fixture
+def cloudwatch() -> StubCloudWatch:
+    return StubCloudWatch()
+
+
+@pytest.fixture
+def aggregator(cloudwatch: StubCloudWatch) -> MetricsAggregator:
+    return MetricsAggregator(
+        CloudWatchSink(region="us-east-1", client=cloudwatch), namespace="Test"
+    )
+
+
+async def test_counters_flush_as_statistic_sets(aggregator, cloudwatch) -> None:
+    for latency in (100, 200, 300):
+        aggregator.record(_response(), latency)
+    aggregator.record(_response(provider="plan", usage=None, error_type="rate_limit"), 50)
+
+    await aggregator.drain()
+
+    assert len(cloudwatch.calls) == 1
+    assert cloudwatch.calls[0]["Namespace"] == "Test"
+    requests = {
+        d["Dimensions"][0]["Value"]: d["StatisticValues"] for d in cloudwatch.datums("RequestCount")
+    }
+    assert requests["bedrock"] == {"SampleCount": 3, "Sum": 3, "Minimum": 1, "Maximum": 1}
+    assert requests["plan"]["SampleCount"] == 1
+    tokens = {
+        d["Dimensions"][0]["Value"]: d["StatisticValues"]["Sum"]
+        for d in cloudwatch.datums("BedrockTokensUsed")
+    }
+    assert tokens == {"input": 300, "output": 60}
+    [errors] = cloudwatch.datums("ErrorCount")
+    assert errors["Dimensions"] == [
+        {"Name": "ErrorType", "Value": "rate_limit"},
+        {"Name": "Provider", "Value": "plan"},
+    ]
+
+
+async def test_latency_flushes_as_values_and_counts(aggregator, cloudwatch) -> None:
+    for latency in (120, 120, 120, 4567, 4571):
+        aggregator.record(_response(), latency)
+
+    await aggregator.drain()
+
+    [latency] = cloudwatch.datums("RequestLatency")
+    assert latency["Unit"] == "Milliseconds"
+    # Rounded to three significant figures: 4567 and 4571 share a bucket.
+    assert dict(zip(latency["Values"], latency["Counts"])) == {120.0: 3.0, 4570.0: 2.0}
+
+
+async def test_flush_splits_into_batches_of_1000_datums(aggregator, cloudwatch) -> None:
+    for i in range(2500):
+        aggregator.record_value("Custom", 1, dimensions={"Key": f"k{i}"})
+
+    await aggregator.drain()
+
+    assert [len(call["MetricData"]) for call in cloudwatch.calls] == [1000, 1000, 500]
+    assert aggregator.stats.flushed_series == 2500
+
+
+async def test_distributions_split_at_150_distinct_values(aggregator, cloudwatch) -> None:
+    for latency in range(1, 401):
+        aggregator.record_value("Latency", latency, "Milliseconds", distribution=True)
+
+    await aggregator.drain()
+
+    assert [len(d["Values"]) for d in cloudwatch.datums("Latency")] == [150, 150, 100]
+
+
+async def test_full_queue_drops_and_counts(cloudwatch) -> None:
+    aggregator = MetricsAggregator(
+        CloudWatchSink(client=cloudwatch), namespace="Test", max_queue_size=2
+    )
+
+    results = [aggregator.record(_response(), 10) for _ in range(5)]
+
+    assert results == [True, True, False, False, False]
+    assert aggregator.stats.dropped == 3
+    assert aggregator.stats.queue_depth == 2
+
+
+async def test_background_task_flushes_on_interval(cloudwatch) -> None:
+    aggregator = MetricsAggregator(
+        CloudWatchSink(client=cloudwatch), namespace="Test", flush_interval=0.01
+    )
+    aggregator.start()
+    aggregator.record(_response(), 10)
+
+    for _ in range(100):
+        if cloudwatch.calls:
+            break
+        await asyncio.sleep(0.01)
+    await aggregator.drain()
+
+    assert cloudwatch.datums("RequestCount")
+    assert aggregator.stats.flushes >= 1
+    assert aggregator.record(_response(), 10) is False
+
+
+async def test_failed_publish_is_counted_not_raised() -> None:
+    class FailingClient:
+        def put_metric_data(self, **_kwargs):
+            raise RuntimeError("throttled")
+
+    aggregator = MetricsAggregator(CloudWatchSink(client=FailingClient()), namespace="Test")
+    aggregator.record(_response(), 10)
+
+    await aggregator.drain()
+
+    assert aggregator.stats.failed_flushes == 1
+
+
+async def test_emf_sink_writes_one_record_per_dimension_set() -> None:
+    stream = io.StringIO()
+    aggregator = MetricsAggregator(EmfSink(stream), namespace="Test")
+    aggregator.record(_response(is_fallback=True), 120)
+    aggregator.record(_response(), 80)
+
+    await aggregator.drain()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    by_provider = next(r for r in records if r.get("Provider") == "bedrock")
+    directive = by_provider["_aws"]["CloudWatchMetrics"][0]
+    assert directive["Namespace"] == "Test"
+    assert directive["Dimensions"] == [["Provider"]]
+    assert by_provider["RequestCount"] == 2
+    assert sorted(by_provider["RequestLatency"]) == [80.0, 120.0]
+    fallback = next(r for r in records if "FallbackCount" in r)
+    assert fallback["_aws"]["CloudWatchMetrics"][0]["Dimensions"] == [[]]
+    assert fallback["FallbackCount"] == 1
+
+
+def test_create_metric_sink() -> None:
+    assert isinstance(create_metric_sink("emf"), EmfSink)
+    assert create_metric_sink("none") is None
+    with pytest.raises(ValueError):
+        create_metric_sink("statsd")
+
+
+async def test_usage_recorder_records_into_aggregator(aggregator, cloudwatch) -> None:
+    set_proxy_deps(ProxyDependencies(metrics_aggregator=aggregator))
+    try:
+        recorder = UsageRecorder(token_usage_repo=None, usage_aggregate_repo=None)
+        ctx = RequestContext(
+            request_id="req_metrics",
+            user_id=uuid4(),
+            access_key_id=uuid4(),
+            access_key_prefix="ak_test",
+            bedrock_region="us-east-1",
+            bedrock_model="claude",
+            has_bedrock_key=False,
+        )
+        await recorder.record(ctx, _response(provider="plan", usage=None), 42, "claude")
+    finally:
+        reset_proxy_deps()
+
+    assert aggregator.stats.recorded == 1
+    await aggregator.drain()
+    assert cloudwatch.datums("RequestCount")
+
@@ -24,7 +24,7 @@ async def test_stream_bedrock_only_routes_to_bedrock(monkeypatch: pytest.MonkeyP
     bedrock_calls: list = []
 
     class FakeBedrockAdapter:
-        def __init__(self, _repo) -> None:
+        def __init__(self, **_kwargs) -> None:
             return None
 
         async def stream(self, ctx, request):
@@ -88,7 +88,7 @@ async def test_stream_bedrock_only_without_key_returns_503(
     bedrock_calls: list = []
 
     class FakeBedrockAdapter:
-        def __init__(self, _repo) -> None:
+        def __init__(self, **_kwargs) -> None:
             return None
 
         async def stream(self, ctx, request):
@@ -138,3 +138,70 @@ async def test_stream_bedrock_only_without_key_returns_503(
     assert isinstance(response, JSONResponse)
     assert response.status_code == 503
     assert not bedrock_calls
+
+
+@pytest.mark.asyncio
+async def test_stream_releases_the_session_before_streaming(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    events: list[str] = []
+
+    class FakeBedrockAdapter:
+        def __init__(self, **_kwargs) -> None:
+            return None
+
+        async def stream(self, ctx, request):
+            events.append("bedrock_stream")
+
+            async def _gen():
+                events.append("chunk")
+                yield b"data: {}\n\n"
+
+            return _gen()
+
+    async def _fake_check_budget(self, _user_id, *, fail_open: bool = True):
+        events.append("budget")
+        now = datetime.now(timezone.utc)
+        return _build_budget_result(None, Decimal("0"), now, now)
+
+    async def _fake_authenticate(_raw_key):
+        events.append("auth")
+        return RequestContext(
+            request_id="req-test",
+            user_id=uuid4(),
+            access_key_id=uuid4(),
+            access_key_prefix="ak",
+            bedrock_region="ap-northeast-2",
+            bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+            has_bedrock_key=True,
+            routing_strategy=RoutingStrategy.BEDROCK_ONLY,
+        )
+
+    class FakeAuthService:
+        authenticate = AsyncMock(side_effect=_fake_authenticate)
+
+    monkeypatch.setattr(proxy_router, "BedrockAdapter", FakeBedrockAdapter)
+    monkeypatch.setattr(proxy_router.BudgetService, "check_budget", _fake_check_budget)
+    session = AsyncMock()
+    session.close.side_effect = lambda: events.append("session_closed")
+
+    response = await proxy_router.proxy_messages(
+        access_key="ak_test",
+        request=AnthropicRequest(
+            model="claude-test", messages=[{"role": "user", "content": "hello"}], stream=True
+        ),
+        raw_request=DummyRequest(headers={"x-api-key": "test"}),
+        session=session,
+        auth_service=FakeAuthService(),
+    )
+    async for _chunk in response.body_iterator:
+        pass
+
+    assert events == [
+        "auth",
+        "session_closed",
+        "budget",
+        "session_closed",
+        "bedrock_stream",
+        "chunk",
+    ]
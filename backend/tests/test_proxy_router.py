@@ -43,7 +43,7 @@ def request_context():
 
 @pytest.fixture
 def anthropic_request():
-    return Mock(spec=AnthropicRequest)
+    return Mock(spec=AnthropicRequest, model="claude-test")
 
 @pytest.fixture(autouse=True)
 def setup_dependencies(mock_circuit_breaker):
@@ -0,0 +1,299 @@
+"""Tests for per-key and per-user rate limits."""
+import asyncio
+import importlib
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import fakeredis
+import pytest
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from src.domain import AnthropicRequest, RoutingStrategy
+from src.proxy.budget import _build_budget_result
+from src.proxy.context import RequestContext
+from src.proxy.dependencies import ProxyDependencies, reset_proxy_deps, set_proxy_deps
+from src.proxy.rate_limit import (
+    Bucket,
+    InMemoryRateLimitStore,
+    RateLimited,
+    RateLimiter,
+    RedisRateLimitStore,
+    StreamSlot,
+    create_rate_limit_store,
+    estimate_tokens,
+)
+
+proxy_router = importlib.import_module("src.api.proxy_router")
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _limiter(clock: FakeClock, store=None, **overrides) -> RateLimiter:
+    fields = dict(
+        key_requests_per_second=0.0,
+        user_requests_per_second=0.0,
+        request_burst_seconds=1.0,
+        key_tokens_per_minute=0,
+        user_tokens_per_minute=0,
+        key_max_streams=0,
+        user_max_streams=0,
+        stream_lease=600.0,
+        store=store or InMemoryRateLimitStore(clock),
+        store_timeout=0.05,
+    )
+    fields.update(overrides)
+    return RateLimiter(**fields)
+
+
+def _ctx(user_id=None) -> RequestContext:
+    return RequestContext(
+        request_id="req-limit",
+        user_id=user_id or uuid4(),
+        access_key_id=uuid4(),
+        access_key_prefix="ak",
+        bedrock_region="ap-northeast-2",
+        bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+        has_bedrock_key=True,
+    )
+
+
+async def test_request_bucket_admits_a_burst_then_paces() -> None:
+    clock = FakeClock()
+    limiter = _limiter(clock, key_requests_per_second=2.0, request_burst_seconds=2.0)
+    ctx = _ctx()
+
+    admitted = [await limiter.check(ctx, 1) for _ in range(4)]
+    refused = await limiter.check(ctx, 1)
+
+    assert admitted == [None] * 4
+    assert refused.limit == "key_requests"
+    assert refused.retry_after == pytest.approx(0.5)
+    assert refused.retry_after_header == "1"
+
+    clock.now += 0.5
+    assert await limiter.check(ctx, 1) is None
+
+
+async def test_token_bucket_charges_estimated_tokens() -> None:
+    clock = FakeClock()
+    limiter = _limiter(clock, key_tokens_per_minute=6000)
+    ctx = _ctx()
+
+    assert await limiter.check(ctx, 5000) is None
+    refused = await limiter.check(ctx, 2000)
+
+    assert refused.limit == "key_tokens"
+    # 1000 tokens short at 100 tokens/s.
+    assert refused.retry_after == pytest.approx(10.0)
+
+
+async def test_oversized_request_waits_for_a_full_bucket() -> None:
+    clock = FakeClock()
+    limiter = _limiter(clock, key_tokens_per_minute=600)
+    ctx = _ctx()
+
+    assert await limiter.check(ctx, 100_000) is None
+    assert (await limiter.check(ctx, 100_000)).retry_after == pytest.approx(60.0)
+
+
+async def test_refused_requests_cost_nothing_against_other_limits() -> None:
+    clock = FakeClock()
+    limiter = _limiter(clock, key_requests_per_second=1.0, user_requests_per_second=1.0)
+    user_id = uuid4()
+    first_key, second_key = _ctx(user_id), _ctx(user_id)
+
+    assert await limiter.check(first_key, 1) is None
+    # The user's bucket is empty, so the second key's own bucket isn't touched...
+    assert (await limiter.check(second_key, 1)).limit == "user_requests"
+
+    clock.now += 1.0
+    # ...and still has its request once the user's bucket refills.
+    assert await limiter.check(second_key, 1) is None
+
+
+async def test_disabled_limits_never_touch_the_store() -> None:
+    store = AsyncMock()
+    limiter = _limiter(FakeClock(), store=store)
+
+    assert await limiter.check(_ctx(), 1_000_000) is None
+    assert await limiter.acquire_stream(_ctx()) is None
+    store.take.assert_not_called()
+    store.acquire.assert_not_called()
+
+
+async def test_bucket_state_is_constant_per_key() -> None:
+    clock = FakeClock()
+    store = InMemoryRateLimitStore(clock)
+    limiter = _limiter(clock, store=store, key_requests_per_second=1000.0)
+    ctx = _ctx()
+
+    for _ in range(5000):
+        await limiter.check(ctx, 1)
+        clock.now += 0.001
+
+    assert len(store._full_at) == 1
+
+
+async def test_stream_slots_cap_concurrency_and_are_released() -> None:
+    clock = FakeClock()
+    limiter = _limiter(clock, key_max_streams=2)
+    ctx = _ctx()
+
+    first = await limiter.acquire_stream(ctx)
+    second = await limiter.acquire_stream(ctx)
+    third = await limiter.acquire_stream(ctx)
+
+    assert isinstance(first, StreamSlot) and isinstance(second, StreamSlot)
+    assert isinstance(third, RateLimited) and third.limit == "key_streams"
+
+    await limiter.release_stream(first)
+    assert isinstance(await limiter.acquire_stream(ctx), StreamSlot)
+
+
+async def test_unreleased_stream_slots_lapse_after_their_lease() -> None:
+    clock = FakeClock()
+    limiter = _limiter(clock, user_max_streams=1, stream_lease=60.0)
+    ctx = _ctx()
+
+    assert isinstance(await limiter.acquire_stream(ctx), StreamSlot)
+    assert isinstance(await limiter.acquire_stream(ctx), RateLimited)
+
+    clock.now += 61
+    assert isinstance(await limiter.acquire_stream(ctx), StreamSlot)
+
+
+async def test_store_errors_let_requests_through() -> None:
+    store = AsyncMock()
+    store.take.side_effect = ConnectionError("redis down")
+    limiter = _limiter(FakeClock(), store=store, key_requests_per_second=1.0)
+
+    assert await limiter.check(_ctx(), 1) is None
+
+
+async def test_redis_buckets_are_atomic_across_workers() -> None:
+    client = fakeredis.FakeAsyncRedis()
+    clock = FakeClock()
+    workers = [RedisRateLimitStore(client, key_prefix="test", clock=clock) for _ in range(4)]
+    bucket = Bucket("key:abc:requests", rate=1.0, capacity=5.0, cost=1)
+
+    results = await asyncio.gather(*(workers[i % 4].take([bucket]) for i in range(20)))
+
+    assert results.count(None) == 5
+    assert sorted(wait for _, wait in filter(None, results))[0] == pytest.approx(1.0)
+    # The key lives only until the bucket is full again.
+    assert 4900 < await client.pttl("test:ratelimit:key:abc:requests") <= 5000
+
+
+async def test_redis_stream_slots_are_capped_fleet_wide() -> None:
+    client = fakeredis.FakeAsyncRedis()
+    store = RedisRateLimitStore(client, key_prefix="test", clock=FakeClock())
+    pool = [("user:abc:streams", 3)]
+
+    results = await asyncio.gather(*(store.acquire(pool, f"t{i}", 60) for i in range(10)))
+    await store.release(["user:abc:streams"], "t0")
+
+    assert results.count(None) == 3
+    assert await client.zcard("test:ratelimit:user:abc:streams") == 2
+
+
+def test_create_store_by_url() -> None:
+    assert isinstance(create_rate_limit_store("memory://"), InMemoryRateLimitStore)
+    with pytest.raises(ValueError):
+        create_rate_limit_store("memcached://localhost")
+
+
+def test_token_estimate_never_rounds_to_free() -> None:
+    assert estimate_tokens(0) == 1
+    assert estimate_tokens(40_000) == 10_000
+
+
+class DummyRequest:
+    def __init__(self, headers: dict[str, str]):
+        self.headers = headers
+
+
+@pytest.fixture
+def limiter():
+    limiter = _limiter(FakeClock(), key_requests_per_second=1.0, key_max_streams=1)
+    set_proxy_deps(ProxyDependencies(rate_limiter=limiter))
+    yield limiter
+    reset_proxy_deps()
+
+
+def _authenticating(ctx: RequestContext):
+    class FakeAuthService:
+        authenticate = AsyncMock(return_value=ctx)
+
+    return FakeAuthService()
+
+
+async def test_proxy_messages_returns_anthropic_429_with_retry_after(limiter) -> None:
+    ctx = _ctx()
+    await limiter.check(ctx, 1)
+    request = AnthropicRequest(model="claude-test", messages=[{"role": "user", "content": "hi"}])
+
+    response = await proxy_router.proxy_messages(
+        access_key="ak_test",
+        request=request,
+        raw_request=DummyRequest(headers={"content-length": "100"}),
+        session=AsyncMock(),
+        auth_service=_authenticating(ctx),
+    )
+
+    assert isinstance(response, JSONResponse)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+    body = json.loads(response.body)
+    assert body["type"] == "error"
+    assert body["error"]["type"] == "rate_limit_error"
+    assert body["request_id"] == ctx.request_id
+
+
+async def test_stream_slot_is_held_until_the_stream_ends(monkeypatch, limiter) -> None:
+    class FakeBedrockAdapter:
+        def __init__(self, **_kwargs) -> None:
+            return None
+
+        async def stream(self, ctx, request):
+            async def _gen():
+                yield b"data: {}\n\n"
+
+            return _gen()
+
+    async def _fake_check_budget(self, _user_id, *, fail_open: bool = True):
+        now = datetime.now(timezone.utc)
+        return _build_budget_result(None, Decimal("0"), now, now)
+
+    monkeypatch.setattr(proxy_router, "BedrockAdapter", FakeBedrockAdapter)
+    monkeypatch.setattr(proxy_router.BudgetService, "check_budget", _fake_check_budget)
+    limiter.key_requests_per_second = 0.0
+    ctx = _ctx()
+    ctx.routing_strategy = RoutingStrategy.BEDROCK_ONLY
+    request = AnthropicRequest(
+        model="claude-test", messages=[{"role": "user", "content": "hi"}], stream=True
+    )
+
+    async def _send():
+        return await proxy_router.proxy_messages(
+            access_key="ak_test",
+            request=request,
+            raw_request=DummyRequest(headers={}),
+            session=AsyncMock(),
+            auth_service=_authenticating(ctx),
+        )
+
+    streaming = await _send()
+    assert isinstance(streaming, StreamingResponse)
+    assert (await _send()).status_code == 429
+
+    _ = [chunk async for chunk in streaming.body_iterator]
+    assert isinstance(await _send(), StreamingResponse)
@@ -0,0 +1,166 @@
+"""Tests for the prebuilt statements behind the hot repository lookups."""
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.db.models import AccessKeyModel, Base, BedrockKeyModel, UserModel
+from src.domain import RoutingStrategy, UserStatus
+from src.repositories import AccessKeyRepository, BedrockKeyRepository, UserRepository
+from src.repositories.access_key_repository import _AUTH_CONTEXT, _AUTH_CONTEXT_WITH_KEY
+from src.repositories.bedrock_key_repository import _ENCRYPTED_KEY_BY_ACCESS_KEY_ID
+from src.repositories.user_repository import _BUDGET_BY_ID
+
+
+def _session(row) -> AsyncMock:
+    result = MagicMock()
+    result.one_or_none = MagicMock(return_value=row)
+    result.scalar_one_or_none = MagicMock(return_value=row)
+    session = AsyncMock()
+    session.execute = AsyncMock(return_value=result)
+    return session
+
+
+def test_auth_context_is_one_statement_without_the_key_blob_by_default() -> None:
+    assert [column.name for column in _AUTH_CONTEXT.selected_columns] == [
+        "id",
+        "user_id",
+        "key_prefix",
+        "bedrock_region",
+        "bedrock_model",
+        "bedrock_regions",
+        "routing_strategy",
+        "monthly_budget_usd",
+        "month_usage",
+        "has_bedrock_key",
+    ]
+    assert list(_AUTH_CONTEXT_WITH_KEY.selected_columns)[-1].name == "encrypted_key"
+
+
+async def test_auth_context_reuses_prebuilt_statements() -> None:
+    row = SimpleNamespace(id=uuid4(), routing_strategy="plan_first")
+    session = _session(row)
+    repo = AccessKeyRepository(session)
+    month = (datetime(2025, 1, 1, tzinfo=timezone.utc), datetime(2025, 2, 1, tzinfo=timezone.utc))
+
+    assert await repo.get_auth_context("hash-a", *month) is row
+    await repo.get_auth_context("hash-b", *month, include_encrypted_key=True)
+
+    first, second = session.execute.await_args_list
+    assert first.args[0] is _AUTH_CONTEXT
+    assert second.args[0] is _AUTH_CONTEXT_WITH_KEY
+    assert first.args[1]["key_hash"] == "hash-a"
+    assert second.args[1]["month_start"] == month[0]
+
+
+async def test_user_lookup_builds_the_entity_from_a_row() -> None:
+    now = datetime.now(timezone.utc)
+    row = SimpleNamespace(
+        id=uuid4(),
+        name="alice",
+        description=None,
+        status="active",
+        routing_strategy="bedrock_only",
+        monthly_budget_usd=Decimal("25.00"),
+        created_at=now,
+        updated_at=now,
+        deleted_at=None,
+    )
+
+    user = await UserRepository(_session(row)).get_by_id(row.id)
+
+    assert user.id == row.id
+    assert user.status == UserStatus.ACTIVE
+    assert user.routing_strategy == RoutingStrategy.BEDROCK_ONLY
+    assert user.monthly_budget_usd == Decimal("25.00")
+
+
+async def test_bedrock_key_lookup_builds_the_entity_from_a_row() -> None:
+    row = SimpleNamespace(
+        access_key_id=uuid4(),
+        encrypted_key=b"blob",
+        key_hash="h",
+        created_at=datetime.now(timezone.utc),
+        rotated_at=None,
+    )
+    repo = BedrockKeyRepository(_session(row))
+
+    bedrock_key = await repo.get_by_access_key_id(row.access_key_id)
+
+    assert bedrock_key.access_key_id == row.access_key_id
+    assert bedrock_key.encrypted_key == b"blob"
+    assert await BedrockKeyRepository(_session(None)).get_by_access_key_id(uuid4()) is None
+
+
+def test_hot_lookups_select_only_the_columns_they_read() -> None:
+    assert [column.name for column in _BUDGET_BY_ID.selected_columns] == ["monthly_budget_usd"]
+    assert [column.name for column in _ENCRYPTED_KEY_BY_ACCESS_KEY_ID.selected_columns] == [
+        "encrypted_key"
+    ]
+
+
+async def test_hot_lookups_return_the_scalar() -> None:
+    user_session = _session(Decimal("25.00"))
+    key_session = _session(b"blob")
+
+    assert await UserRepository(user_session).get_monthly_budget(uuid4()) == Decimal("25.00")
+    assert await BedrockKeyRepository(key_session).get_encrypted_key(uuid4()) == b"blob"
+    assert user_session.execute.await_args.args[0] is _BUDGET_BY_ID
+    assert key_session.execute.await_args.args[0] is _ENCRYPTED_KEY_BY_ACCESS_KEY_ID
+
+
+def test_auth_context_selects_no_encrypted_key_for_plan_first_users() -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    month = {
+        "month_start": datetime(2025, 1, 1, tzinfo=timezone.utc),
+        "month_end": datetime(2025, 2, 1, tzinfo=timezone.utc),
+        "now": now,
+    }
+    with Session(engine) as session:
+        for strategy in ("plan_first", "bedrock_only"):
+            user = UserModel(
+                id=uuid4(),
+                name=strategy,
+                status="active",
+                routing_strategy=strategy,
+                created_at=now,
+                updated_at=now,
+            )
+            access_key = AccessKeyModel(
+                id=uuid4(),
+                user_id=user.id,
+                key_hash=f"hash-{strategy}",
+                key_prefix="ak",
+                status="active",
+                bedrock_region="us-east-1",
+                bedrock_model="m",
+                created_at=now,
+            )
+            session.add_all([user, access_key])
+            session.flush()
+            session.add(
+                BedrockKeyModel(
+                    access_key_id=access_key.id,
+                    encrypted_key=b"blob",
+                    key_hash="h",
+                    created_at=now,
+                )
+            )
+        session.commit()
+
+        plan_first = session.execute(
+            _AUTH_CONTEXT_WITH_KEY, {"key_hash": "hash-plan_first", **month}
+        ).one()
+        bedrock_only = session.execute(
+            _AUTH_CONTEXT_WITH_KEY, {"key_hash": "hash-bedrock_only", **month}
+        ).one()
+
+    assert plan_first.has_bedrock_key
+    assert plan_first.encrypted_key is None
+    assert bedrock_only.encrypted_key == b"blob"
@@ -0,0 +1,347 @@
+"""Tests for the two-level cache and cross-worker invalidation fan-out."""
+import asyncio
+import contextvars
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import fakeredis
+import pytest
+
+from src.domain import RoutingStrategy
+from src.proxy import budget as budget_module
+from src.proxy.auth import _CACHE_CODEC, AuthService, _CachedAccessKey
+from src.proxy.budget import (
+    _LEDGER_CODEC,
+    BudgetService,
+    CachedBudgetInfo,
+    budget_month_window,
+    record_budget_spend,
+)
+from src.proxy.cache import TwoLevelCache
+from src.proxy.dependencies import ProxyDependencies, reset_proxy_deps, set_proxy_deps
+from src.proxy.shared_cache import InMemoryCacheBackend, RedisCacheBackend, SharedCacheTier
+
+
+class Worker:
+    """One uvicorn worker's view: its own local caches plus a tier on a shared backend."""
+
+    def __init__(self, backend) -> None:
+        self.deps = ProxyDependencies()
+        self.tier = SharedCacheTier(backend, key_prefix="test", timeout=1.0, retry_delay=0.01)
+        self.tier.attach(*self.deps.shared_caches)
+
+    async def __aenter__(self) -> "Worker":
+        await self.tier.start()
+        return self
+
+    async def __aexit__(self, *_exc) -> None:
+        await self.tier.aclose()
+
+
+class SharedBackend(InMemoryCacheBackend):
+    """Lets several tiers share one stand-in; closing a tier must not close it."""
+
+    async def aclose(self) -> None:
+        return None
+
+
+class SlowDeleteBackend(SharedBackend):
+    """A backend whose deletes land only after a network round trip."""
+
+    async def delete(self, key: str) -> None:
+        await asyncio.sleep(0.01)
+        await super().delete(key)
+
+
+def _access_key_entry() -> _CachedAccessKey:
+    return _CachedAccessKey(
+        user_id=uuid4(),
+        access_key_id=uuid4(),
+        access_key_prefix="ak_test",
+        bedrock_region="ap-northeast-2",
+        bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+        has_bedrock_key=True,
+        routing_strategy=RoutingStrategy.BEDROCK_ONLY,
+    )
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_codec_round_trips_typed_fields() -> None:
+    ledger = CachedBudgetInfo(
+        user_id=uuid4(),
+        monthly_budget=None,
+        current_usage=Decimal("12.345678"),
+        period_start=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        period_end=datetime(2025, 1, 31, 23, 59, 59, tzinfo=timezone.utc),
+        cached_at=datetime.now(timezone.utc),
+    )
+    entry = _access_key_entry()
+
+    assert _LEDGER_CODEC.decode(_LEDGER_CODEC.encode(ledger)) == ledger
+    assert _CACHE_CODEC.decode(_CACHE_CODEC.encode(entry)) == entry
+
+
+@pytest.mark.asyncio
+async def test_second_worker_reads_through_shared_tier() -> None:
+    backend = SharedBackend()
+    entry = _access_key_entry()
+
+    async with Worker(backend) as a, Worker(backend) as b:
+        await a.deps.access_key_cache.aset("hash", entry, _CACHE_CODEC)
+
+        assert b.deps.access_key_cache.get("hash") is None
+        assert await b.deps.access_key_cache.aget("hash", _CACHE_CODEC) == entry
+        # Populated locally, so the next read does not go to the shared tier.
+        assert b.deps.access_key_cache.get("hash") == entry
+
+
+@pytest.mark.asyncio
+async def test_invalidate_fans_out_to_every_worker() -> None:
+    backend = SharedBackend()
+    entry = _access_key_entry()
+
+    async with Worker(backend) as a, Worker(backend) as b:
+        await a.deps.access_key_cache.aset("hash", entry, _CACHE_CODEC)
+        await b.deps.access_key_cache.aget("hash", _CACHE_CODEC)
+
+        a.deps.access_key_cache.invalidate("hash")
+        await _settle()
+
+        assert a.deps.access_key_cache.get("hash") is None
+        assert b.deps.access_key_cache.get("hash") is None
+        assert await b.deps.access_key_cache.aget("hash", _CACHE_CODEC) is None
+
+
+@pytest.mark.asyncio
+async def test_entries_without_codec_stay_local_but_invalidation_fans_out() -> None:
+    backend = SharedBackend()
+
+    async with Worker(backend) as a, Worker(backend) as b:
+        await a.deps.bedrock_key_cache.aset("key-id", "decrypted-secret")
+        b.deps.bedrock_key_cache.set("key-id", "decrypted-secret")
+
+        assert backend._data == {}
+        a.deps.bedrock_key_cache.invalidate("key-id")
+        await _settle()
+
+        assert b.deps.bedrock_key_cache.get("key-id") is None
+
+
+@pytest.mark.asyncio
+async def test_recorded_spend_reaches_every_worker() -> None:
+    backend = SharedBackend()
+    user_id = uuid4()
+    period_start, period_end = budget_month_window()
+    ledger = CachedBudgetInfo(
+        user_id=user_id,
+        monthly_budget=Decimal("10"),
+        current_usage=Decimal("9"),
+        period_start=period_start,
+        period_end=period_end,
+        cached_at=datetime.now(timezone.utc),
+    )
+
+    async with Worker(backend) as a, Worker(backend) as b:
+        await a.deps.budget_cache.aset(str(user_id), ledger, _LEDGER_CODEC)
+        await b.deps.budget_cache.aget(str(user_id), _LEDGER_CODEC)
+        set_proxy_deps(a.deps)
+        try:
+            await record_budget_spend(user_id, Decimal("0.60"))
+            # A's local copy has expired: the spend still lands in the shared tier.
+            a.deps.budget_cache.invalidate_local(str(user_id))
+            await record_budget_spend(user_id, Decimal("0.50"))
+        finally:
+            reset_proxy_deps()
+        await _settle()
+
+        assert b.deps.budget_cache.get(str(user_id)) is None
+        set_proxy_deps(b.deps)
+        try:
+            seen_by_b = await BudgetService(AsyncMock(), AsyncMock()).check_budget(user_id)
+        finally:
+            reset_proxy_deps()
+        assert seen_by_b.current_usage == Decimal("10.10")
+        assert seen_by_b.allowed is False
+
+
+@pytest.mark.asyncio
+async def test_month_rollover_does_not_read_last_month_back_from_the_shared_tier() -> None:
+    backend = SlowDeleteBackend()
+    user_id = uuid4()
+    period_start, _period_end = budget_month_window()
+    last_month = CachedBudgetInfo(
+        user_id=user_id,
+        monthly_budget=Decimal("10"),
+        current_usage=Decimal("9"),
+        period_start=period_start - timedelta(days=31),
+        period_end=period_start - timedelta(seconds=1),
+        cached_at=datetime.now(timezone.utc),
+    )
+    usage_repo = AsyncMock()
+    usage_repo.get_monthly_usage_total.return_value = Decimal("1")
+    user_repo = AsyncMock()
+    user_repo.get_monthly_budget.return_value = None
+
+    async with Worker(backend) as a:
+        await a.deps.budget_cache.aset(str(user_id), last_month, _LEDGER_CODEC)
+        set_proxy_deps(a.deps)
+        try:
+            result = await BudgetService(user_repo, usage_repo).check_budget(user_id)
+        finally:
+            reset_proxy_deps()
+
+        assert result.period_start == period_start
+        assert result.current_usage == Decimal("1")
+        shared = await a.deps.budget_cache.aget(str(user_id), _LEDGER_CODEC)
+        assert shared.period_start == period_start
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_fans_out_between_clients() -> None:
+    server = fakeredis.FakeServer()
+    backend_a = RedisCacheBackend(fakeredis.aioredis.FakeRedis(server=server))
+    backend_b = RedisCacheBackend(fakeredis.aioredis.FakeRedis(server=server))
+    user_id = str(uuid4())
+    ledger = CachedBudgetInfo(
+        user_id=uuid4(),
+        monthly_budget=Decimal("100"),
+        current_usage=Decimal("5"),
+        period_start=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        period_end=datetime(2025, 1, 31, tzinfo=timezone.utc),
+        cached_at=datetime.now(timezone.utc),
+    )
+
+    async with Worker(backend_a) as a, Worker(backend_b) as b:
+        await a.deps.budget_cache.aset(user_id, ledger, _LEDGER_CODEC)
+        assert await b.deps.budget_cache.aget(user_id, _LEDGER_CODEC) == ledger
+
+        a.deps.budget_cache.invalidate(user_id)
+        for _ in range(50):
+            if b.deps.budget_cache.get(user_id) is None:
+                break
+            await asyncio.sleep(0.01)
+
+        assert b.deps.budget_cache.get(user_id) is None
+        assert await backend_b.get(f"test:budget:{user_id}") is None
+
+
+@pytest.mark.asyncio
+async def test_shared_tier_failure_degrades_to_miss() -> None:
+    backend = SharedBackend()
+    backend.get = AsyncMock(side_effect=ConnectionError("redis down"))
+    backend.set = AsyncMock(side_effect=ConnectionError("redis down"))
+    cache = TwoLevelCache(60, "access_key")
+    tier = SharedCacheTier(backend, key_prefix="test", timeout=1.0)
+    tier.attach(cache)
+
+    await cache.aset("hash", _access_key_entry(), _CACHE_CODEC)
+    cache.invalidate_local("hash")
+
+    assert await cache.aget("hash", _CACHE_CODEC) is None
+
+
+class DroppingSubscription:
+    def __init__(self) -> None:
+        self.dropped = asyncio.Event()
+
+    async def __aiter__(self):
+        await self.dropped.wait()
+        raise ConnectionError("connection reset")
+        yield  # pragma: no cover
+
+    async def aclose(self) -> None:
+        return None
+
+
+@pytest.mark.asyncio
+async def test_resubscribe_clears_local_caches() -> None:
+    backend = SharedBackend()
+    first = DroppingSubscription()
+    subscribe = backend.subscribe
+    backend.subscribe = AsyncMock(side_effect=[first, await subscribe("test:cache-invalidate")])
+
+    async with Worker(backend) as worker:
+        worker.deps.access_key_cache.set("hash", _access_key_entry())
+        first.dropped.set()
+        for _ in range(50):
+            if worker.deps.access_key_cache.get("hash") is None:
+                break
+            await asyncio.sleep(0.01)
+
+        assert backend.subscribe.await_count == 2
+        assert worker.deps.access_key_cache.get("hash") is None
+
+
+@pytest.mark.asyncio
+async def test_authenticate_uses_entry_cached_by_another_worker() -> None:
+    backend = SharedBackend()
+    entry = _access_key_entry()
+
+    async with Worker(backend) as a, Worker(backend) as b:
+        service = AuthService(AsyncMock())
+        key_hash = service._hasher.hash("ak_raw")
+        await a.deps.access_key_cache.aset(key_hash, entry, _CACHE_CODEC)
+
+        set_proxy_deps(b.deps)
+        try:
+            service._access_key_repo = AsyncMock()
+            ctx = await service.authenticate("ak_raw")
+        finally:
+            reset_proxy_deps()
+
+        service._access_key_repo.get_auth_context.assert_not_called()
+        assert ctx.access_key_id == entry.access_key_id
+        assert ctx.routing_strategy == RoutingStrategy.BEDROCK_ONLY
+
+
+@pytest.mark.asyncio
+async def test_concurrent_spend_from_two_workers_is_not_lost(monkeypatch) -> None:
+    backend = SharedBackend()
+    user_id = uuid4()
+    period_start, period_end = budget_month_window()
+    ledger = CachedBudgetInfo(
+        user_id=user_id,
+        monthly_budget=Decimal("100"),
+        current_usage=Decimal("1"),
+        period_start=period_start,
+        period_end=period_end,
+        cached_at=datetime.now(timezone.utc),
+    )
+    # Each task sees its own worker's dependencies, as in separate processes.
+    current_deps: contextvars.ContextVar[ProxyDependencies] = contextvars.ContextVar("deps")
+    monkeypatch.setattr(budget_module, "get_proxy_deps", current_deps.get)
+
+    async def spend(worker: Worker) -> None:
+        current_deps.set(worker.deps)
+        await record_budget_spend(user_id, Decimal("0.10"))
+
+    async with Worker(backend) as a, Worker(backend) as b:
+        await a.deps.budget_cache.aset(str(user_id), ledger, _LEDGER_CODEC)
+        await asyncio.gather(*(spend(worker) for worker in (a, b) * 10))
+        await _settle()
+
+        current_deps.set(b.deps)
+        result = await BudgetService(AsyncMock(), AsyncMock()).check_budget(user_id)
+
+    assert result.current_usage == Decimal("3.00")
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_increments_atomically_across_clients() -> None:
+    server = fakeredis.FakeServer()
+    backends = [
+        RedisCacheBackend(fakeredis.aioredis.FakeRedis(server=server)) for _ in range(2)
+    ]
+
+    await asyncio.gather(*(backend.increment("spend", "0.10", 60) for backend in backends * 10))
+
+    client = fakeredis.aioredis.FakeRedis(server=server)
+    total = Decimal((await client.get("spend")).decode())
+    assert total.quantize(Decimal("0.000001")) == Decimal("2.00")
+    assert 0 < await client.ttl("spend") <= 60
@@ -2,18 +2,14 @@ from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
 from uuid import uuid4
-import sys
-from pathlib import Path
 
 import pytest
 
-root = Path(__file__).resolve().parents[1]
-sys.path.append(str(root))
-
 from src.domain import AnthropicUsage
 from src.domain.pricing import ModelPricing, PricingConfig
+from src.proxy import streaming_usage
 from src.proxy.context import RequestContext
-from src.proxy.streaming_usage import StreamingUsageCollector
+from src.proxy.streaming_usage import STREAM_TIMING_COLUMNS, StreamingUsageCollector, StreamTiming
 from src.proxy.usage import UsageRecorder
 
 
@@ -58,6 +54,62 @@ def test_streaming_usage_collector_captures_usage() -> None:
     assert usage.cache_creation_input_tokens == 1
 
 
+
+PLAN_STREAM = (
+    b'event: message_start\ndata: {"type":"message_start","message":{"usage":'
+    b'{"input_tokens":30,"cache_creation_input_tokens":7,"cache_read_input_tokens":11,'
+    b'"output_tokens":1}}}\n\n'
+    b'event: content_block_delta\ndata: {"type":"content_block_delta","index":0,'
+    b'"delta":{"type":"text_delta","text":"quote \\"message_delta\\" literally"}}\n\n'
+    b'event: message_delta\ndata: {"type":"message_delta","delta":{"stop_reason":"end_turn"},'
+    b'"usage":{"output_tokens":42}}\n\n'
+    b'event: message_stop\ndata: {"type":"message_stop"}\n\n'
+)
+
+
+def test_streaming_usage_collector_handles_any_chunk_boundary() -> None:
+    for size in (1, 2, 3, 7, 64, len(PLAN_STREAM)):
+        collector = StreamingUsageCollector()
+        for offset in range(0, len(PLAN_STREAM), size):
+            collector.feed(PLAN_STREAM[offset : offset + size])
+
+        assert collector.get_usage() == AnthropicUsage(
+            input_tokens=30,
+            output_tokens=42,
+            cache_read_input_tokens=11,
+            cache_creation_input_tokens=7,
+        ), size
+
+
+def test_streaming_usage_collector_only_decodes_usage_events(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    decoded: list[bytes] = []
+    real_loads = streaming_usage.loads
+
+    def _tracking_loads(payload):
+        decoded.append(payload)
+        return real_loads(payload)
+
+    monkeypatch.setattr(streaming_usage, "loads", _tracking_loads)
+    collector = StreamingUsageCollector()
+    collector.feed(PLAN_STREAM)
+
+    assert len(decoded) == 2
+    assert b"content_block_delta" not in b"".join(decoded)
+
+
+def test_streaming_usage_collector_releases_consumed_events() -> None:
+    collector = StreamingUsageCollector()
+    delta = b'data: {"type": "content_block_delta", "index": 0, "delta": {"text": "x"}}\n\n'
+
+    for _ in range(10_000):
+        collector.feed(delta)
+    collector.feed(delta[:10])
+
+    assert len(collector._buffer) == 10
+
+
 @pytest.mark.asyncio
 async def test_record_streaming_usage_records_cost(monkeypatch: pytest.MonkeyPatch) -> None:
     pricing = ModelPricing(
@@ -101,3 +153,120 @@ async def test_record_streaming_usage_records_cost(monkeypatch: pytest.MonkeyPat
 
     assert len(token_repo.calls) == 1
     assert len(agg_repo.calls) == 5
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _timed_stream(clock: FakeClock) -> StreamTiming:
+    timing = StreamTiming(started=0.0)
+    clock.now = 0.1
+    timing.begin_upstream()
+    clock.now = 0.35
+    timing.upstream_connected()
+    clock.now = 0.5
+    timing.feed(b'event: message_start\ndata: {"type": "message_start"}\n\nevent: content_bl')
+    clock.now = 0.8
+    # The content delta marker straddles two chunks.
+    timing.feed(b'ock_delta\ndata: {"type": "content_block_delta"}\n\n')
+    clock.now = 2.5
+    timing.feed(b'data: {"type": "content_block_delta"}\n\n')
+    timing.finish()
+    return timing
+
+
+def test_stream_timing_tracks_each_stage(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = FakeClock()
+    monkeypatch.setattr(streaming_usage.time, "perf_counter", clock)
+
+    timing = _timed_stream(clock)
+
+    assert timing.columns(output_tokens=400) == {
+        "upstream_connect_ms": 250,
+        "ttfb_ms": 500,
+        "ttft_ms": 800,
+        "stream_duration_ms": 2000,
+        "output_tokens_per_second": 200.0,
+    }
+    assert timing.total_ms == 2500
+
+
+def test_stream_timing_without_content_leaves_ttft_unset() -> None:
+    timing = StreamTiming()
+    timing.feed(b'data: {"type": "message_stop"}\n\n')
+    timing.finish()
+
+    columns = timing.columns(output_tokens=None)
+
+    assert columns["ttfb_ms"] is not None
+    assert columns["ttft_ms"] is None
+    assert columns["upstream_connect_ms"] is None
+    assert columns["output_tokens_per_second"] is None
+
+
+@pytest.mark.asyncio
+async def test_record_streaming_usage_persists_stream_timing(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    clock = FakeClock()
+    monkeypatch.setattr(streaming_usage.time, "perf_counter", clock)
+    token_repo = FakeTokenUsageRepository()
+    recorder = UsageRecorder(
+        token_repo, FakeUsageAggregateRepository(), metrics_emitter=DummyMetricsEmitter()
+    )
+    ctx = RequestContext(
+        request_id="req-timing",
+        user_id=uuid4(),
+        access_key_id=uuid4(),
+        access_key_prefix="ak",
+        bedrock_region="ap-northeast-2",
+        bedrock_model="anthropic.claude-haiku-4-5-20250514",
+        has_bedrock_key=True,
+    )
+    timing = _timed_stream(clock)
+
+    await recorder.record_streaming_usage(
+        ctx,
+        AnthropicUsage(input_tokens=10, output_tokens=400),
+        latency_ms=timing.total_ms,
+        model=ctx.bedrock_model,
+        is_fallback=False,
+        timing=timing,
+    )
+
+    row = token_repo.calls[0]
+    assert row["latency_ms"] == 2500
+    assert row["ttft_ms"] == 800
+    assert row["output_tokens_per_second"] == 200.0
+
+
+@pytest.mark.asyncio
+async def test_non_streaming_rows_carry_null_timing_columns() -> None:
+    token_repo = FakeTokenUsageRepository()
+    recorder = UsageRecorder(
+        token_repo, FakeUsageAggregateRepository(), metrics_emitter=DummyMetricsEmitter()
+    )
+    ctx = RequestContext(
+        request_id="req-plain",
+        user_id=uuid4(),
+        access_key_id=uuid4(),
+        access_key_prefix="ak",
+        bedrock_region="ap-northeast-2",
+        bedrock_model="anthropic.claude-haiku-4-5-20250514",
+        has_bedrock_key=True,
+    )
+
+    await recorder.record_streaming_usage(
+        ctx,
+        AnthropicUsage(input_tokens=10, output_tokens=5),
+        latency_ms=50,
+        model=ctx.bedrock_model,
+        is_fallback=False,
+    )
+
+    assert all(token_repo.calls[0][column] is None for column in STREAM_TIMING_COLUMNS)
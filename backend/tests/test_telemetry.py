@@ -0,0 +1,108 @@
+import importlib
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+from src.domain import ErrorType
+from src.proxy.dependencies import ProxyDependencies, reset_proxy_deps, set_proxy_deps
+from src.telemetry import observe_stream, sample_proxy_state, stage_timer
+
+proxy_router = importlib.import_module("src.api.proxy_router")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _value(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_stage_timer_observes_duration() -> None:
+    before = _value("proxy_stage_seconds_count", stage="test_stage")
+
+    with stage_timer("test_stage"):
+        pass
+
+    assert _value("proxy_stage_seconds_count", stage="test_stage") == before + 1
+
+
+def test_observe_stream_records_ttfb_and_throughput() -> None:
+    before = _value("proxy_stream_output_tokens_per_second_sum", provider="test")
+
+    observe_stream("test", 10.0, 10.5, 12.5, output_tokens=100, first_content_at=11.0)
+    observe_stream("test", 10.0, None, 12.5, output_tokens=100)
+
+    assert _value("proxy_stream_ttfb_seconds_count", provider="test") == 1
+    assert _value("proxy_stream_ttft_seconds_sum", provider="test") == 1.0
+    assert _value("proxy_stream_duration_seconds_sum", provider="test") == 2.0
+    assert _value("proxy_stream_output_tokens_per_second_sum", provider="test") == before + 50
+
+
+async def test_sample_proxy_state_exports_cache_and_circuit_state() -> None:
+    deps = ProxyDependencies()
+    before_hits = _value("proxy_cache_lookups_total", cache="budget", result="hit")
+    deps.budget_cache.set("user", "ledger")
+    deps.budget_cache.get("user")
+    deps.budget_cache.get("user")
+    deps.circuit_breaker.failure_threshold = 1
+    await deps.circuit_breaker.record_failure("key-1", ErrorType.SERVER_ERROR)
+
+    sample_proxy_state(deps)
+    # Re-sampling unchanged stats must not double count.
+    sample_proxy_state(deps)
+
+    assert _value("proxy_cache_lookups_total", cache="budget", result="hit") == before_hits + 2
+    assert _value("proxy_cache_entries", cache="budget") == 1
+    assert _value("proxy_circuits", state="open") == 1
+    assert _value("proxy_circuits", state="half_open") == 0
+
+
+async def test_metrics_endpoint_serves_exposition_format() -> None:
+    set_proxy_deps(ProxyDependencies())
+    try:
+        response = await proxy_router.metrics()
+    finally:
+        reset_proxy_deps()
+
+    assert response.media_type.startswith("text/plain")
+    assert b"proxy_stage_seconds" in response.body
+    assert b"proxy_circuits" in response.body
+
+
+def test_multiprocess_metrics_merge_across_workers(tmp_path: Path) -> None:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(BACKEND_DIR),
+        "PROMETHEUS_MULTIPROC_DIR": str(tmp_path),
+    }
+    worker = textwrap.dedent(
+        """
+        from src.telemetry import CIRCUITS, USAGE_QUEUE_DEPTH, stage_timer
+        for _ in range(3):
+            with stage_timer("mp_stage"):
+                pass
+        USAGE_QUEUE_DEPTH.set(5)
+        CIRCUITS.labels("open").set(2)
+        """
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], cwd=BACKEND_DIR, env=env, check=True)
+
+    scrape = "from src.telemetry import render_metrics; print(render_metrics()[0].decode())"
+    output = subprocess.run(
+        [sys.executable, "-c", scrape],
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+    assert 'proxy_stage_seconds_count{stage="mp_stage"} 6.0' in output
+    # Queue depth is a live sum; the workers exited without being marked dead.
+    assert "proxy_usage_queue_depth 10.0" in output
+    # Both workers see the same two open circuits: not four.
+    assert 'proxy_circuits{state="open"} 2.0' in output
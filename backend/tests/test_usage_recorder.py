@@ -165,6 +165,27 @@ async def test_record_usage_with_cost_increments_aggregates(
         assert agg_call["bucket_start"].tzinfo is not None
 
 
+@pytest.mark.asyncio
+async def test_record_usage_with_cost_prices_the_serving_region(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    recorder, token_repo, _agg_repo, ctx, response = _build_recorder_context(monkeypatch, None)
+    looked_up: list[str] = []
+
+    def _get_pricing(_model: str, region: str) -> None:
+        looked_up.append(region)
+        return None
+
+    monkeypatch.setattr(PricingConfig, "get_pricing", _get_pricing)
+    # Failed over from the key's ap-northeast-2.
+    ctx.served_region = "us-west-2"
+
+    await recorder._record_usage_with_cost(ctx, response, latency_ms=1, model=ctx.bedrock_model)
+
+    assert looked_up == ["us-west-2"]
+    assert token_repo.calls[0]["pricing_region"] == "us-west-2"
+
+
 # Feature: cost-visibility, Property 8: Error Resilience
 @pytest.mark.asyncio
 async def test_record_usage_with_cost_falls_back_to_zero_on_pricing_error(
@@ -100,10 +100,10 @@ class TestRecordMethodFlow:
     """Test the record() method's conditional flow."""
 
     @pytest.mark.asyncio
-    async def test_record_skips_db_for_non_bedrock_provider(
+    async def test_record_schedules_usage_for_plan_provider(
         self, monkeypatch: pytest.MonkeyPatch
     ) -> None:
-        """Verify record() does not write to DB for non-bedrock responses."""
+        """Verify record() persists Plan usage too."""
         task_names = _capture_task_names(monkeypatch)
         token_repo = FakeTokenUsageRepository()
         agg_repo = FakeUsageAggregateRepository()
@@ -122,16 +122,14 @@ class TestRecordMethodFlow:
             success=True,
             response=None,
             usage=AnthropicUsage(input_tokens=100, output_tokens=50),
-            provider="plan",  # Not bedrock
+            provider="plan",
             is_fallback=False,
             status_code=200,
         )
 
         await recorder.record(ctx, response, latency_ms=100, model=ctx.bedrock_model)
 
-        assert task_names == ["emit"]
-        assert len(token_repo.calls) == 0
-        assert len(agg_repo.calls) == 0
+        assert set(task_names) == {"emit", "_record_usage_with_cost"}
 
     @pytest.mark.asyncio
     async def test_record_skips_db_for_failed_responses(
@@ -303,6 +301,45 @@ class TestRecordUsageWithCostFlow:
             assert agg_call["cache_write_tokens"] == 50
             assert agg_call["cache_read_tokens"] == 100
 
+    @pytest.mark.asyncio
+    async def test_plan_usage_is_tagged_and_not_charged_to_budget(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Verify Plan usage is persisted under provider=plan without budget spend."""
+        spend_calls: list = []
+        monkeypatch.setattr(
+            usage_module,
+            "record_budget_spend",
+            AsyncMock(side_effect=lambda *args: spend_calls.append(args)),
+        )
+        token_repo = FakeTokenUsageRepository()
+        agg_repo = FakeUsageAggregateRepository()
+        recorder = UsageRecorder(token_repo, agg_repo, metrics_emitter=DummyMetricsEmitter())
+
+        ctx = RequestContext(
+            request_id="req-plan",
+            user_id=uuid4(),
+            access_key_id=uuid4(),
+            access_key_prefix="ak_test",
+            bedrock_region="ap-northeast-2",
+            bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+            has_bedrock_key=True,
+        )
+
+        await recorder.record_streaming_usage(
+            ctx,
+            AnthropicUsage(input_tokens=200, output_tokens=80),
+            latency_ms=900,
+            model="claude-sonnet-4-5-20250929",
+            is_fallback=False,
+            provider="plan",
+        )
+
+        assert token_repo.calls[0]["provider"] == "plan"
+        assert token_repo.calls[0]["total_tokens"] == 280
+        assert {call["provider"] for call in agg_repo.calls} == {"plan"}
+        assert spend_calls == []
+
     @pytest.mark.asyncio
     async def test_handles_none_cache_tokens(
         self, monkeypatch: pytest.MonkeyPatch
@@ -0,0 +1,348 @@
+"""Tests for the batched write-behind UsageWriter."""
+import asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from src.domain import AnthropicUsage
+from src.proxy import usage_writer as usage_writer_module
+from src.proxy.context import RequestContext
+from src.proxy.router import ProxyResponse
+from src.proxy.usage import UsageRecorder
+from src.proxy.usage_writer import UsageEvent, UsageWriter, sum_aggregate_deltas
+from src.repositories.usage_repository import TokenUsageRepository, UsageAggregateRepository
+
+
+class DummySession:
+    def __init__(self) -> None:
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        return False
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def rollback(self) -> None:
+        self.rollbacks += 1
+
+
+class FakeRepos:
+    def __init__(self) -> None:
+        self.token_batches: list[list[dict]] = []
+        self.aggregate_batches: list[list[dict]] = []
+        self.should_raise: Exception | None = None
+        # Rows with these request IDs fail the statement they are in.
+        self.bad_request_ids: set[str] = set()
+        # Raised by that many bulk_create calls before they start succeeding.
+        self.transient_errors: list[Exception] = []
+
+    def install(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        repos = self
+
+        class _TokenRepo:
+            def __init__(self, _session) -> None:
+                return None
+
+            async def bulk_create(self, rows):
+                if repos.should_raise:
+                    raise repos.should_raise
+                if repos.transient_errors:
+                    raise repos.transient_errors.pop(0)
+                if any(row["request_id"] in repos.bad_request_ids for row in rows):
+                    raise IntegrityError("INSERT", {}, Exception("fk violation"))
+                repos.token_batches.append(rows)
+
+        class _AggRepo:
+            def __init__(self, _session) -> None:
+                return None
+
+            async def bulk_increment(self, rows):
+                repos.aggregate_batches.append(rows)
+
+        monkeypatch.setattr(usage_writer_module, "TokenUsageRepository", _TokenRepo)
+        monkeypatch.setattr(usage_writer_module, "UsageAggregateRepository", _AggRepo)
+
+
+def _event(user_id, access_key_id, cost: str = "1.00", bucket_start=None) -> UsageEvent:
+    bucket_start = bucket_start or datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return UsageEvent(
+        token_usage={"request_id": f"req_{uuid4().hex[:8]}", "user_id": user_id},
+        aggregates=[
+            {
+                "bucket_type": "hour",
+                "bucket_start": bucket_start,
+                "user_id": user_id,
+                "access_key_id": access_key_id,
+                "total_requests": 1,
+                "total_input_tokens": 10,
+                "total_output_tokens": 5,
+                "total_tokens": 15,
+                "total_cache_write_tokens": 0,
+                "total_cache_read_tokens": 0,
+                "total_input_cost_usd": Decimal("0"),
+                "total_output_cost_usd": Decimal("0"),
+                "total_cache_write_cost_usd": Decimal("0"),
+                "total_cache_read_cost_usd": Decimal("0"),
+                "total_estimated_cost_usd": Decimal(cost),
+            }
+        ],
+    )
+
+
+def test_sum_aggregate_deltas_collapses_same_bucket_key() -> None:
+    user_id, key_id = uuid4(), uuid4()
+    other_bucket = datetime(2025, 1, 1, 1, tzinfo=timezone.utc)
+
+    rows = sum_aggregate_deltas(
+        [
+            _event(user_id, key_id, "1.00"),
+            _event(user_id, key_id, "2.50"),
+            _event(user_id, key_id, "4.00", bucket_start=other_bucket),
+        ]
+    )
+
+    assert len(rows) == 2
+    merged = next(r for r in rows if r["bucket_start"] != other_bucket)
+    assert merged["total_requests"] == 2
+    assert merged["total_tokens"] == 30
+    assert merged["total_estimated_cost_usd"] == Decimal("3.50")
+
+
+def test_sum_aggregate_deltas_keeps_providers_apart() -> None:
+    user_id, key_id = uuid4(), uuid4()
+    plan = _event(user_id, key_id, "2.00")
+    for row in plan.aggregates:
+        row["provider"] = "plan"
+
+    rows = sum_aggregate_deltas([_event(user_id, key_id), plan, _event(user_id, key_id)])
+
+    by_provider = {row.get("provider", "bedrock"): row for row in rows}
+    assert by_provider["bedrock"]["total_requests"] == 2
+    assert by_provider["plan"]["total_estimated_cost_usd"] == Decimal("2.00")
+
+
+@pytest.mark.asyncio
+async def test_writer_coalesces_events_into_one_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    repos = FakeRepos()
+    repos.install(monkeypatch)
+    session = DummySession()
+    writer = UsageWriter(lambda: session, max_queue_size=100, flush_interval=0.05)
+    user_id, key_id = uuid4(), uuid4()
+
+    writer.start()
+    for _ in range(5):
+        assert writer.submit(_event(user_id, key_id))
+    await writer.drain()
+
+    assert len(repos.token_batches) == 1
+    assert len(repos.token_batches[0]) == 5
+    assert len(repos.aggregate_batches[0]) == 1
+    assert repos.aggregate_batches[0][0]["total_requests"] == 5
+    assert session.commits == 1
+    stats = writer.stats
+    assert stats.flushed_events == 5
+    assert stats.flushed_batches == 1
+    assert stats.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_writer_respects_max_batch_size(monkeypatch: pytest.MonkeyPatch) -> None:
+    repos = FakeRepos()
+    repos.install(monkeypatch)
+    writer = UsageWriter(
+        lambda: DummySession(), max_queue_size=100, flush_interval=0.05, max_batch_size=2
+    )
+    user_id, key_id = uuid4(), uuid4()
+
+    for _ in range(5):
+        writer.submit(_event(user_id, key_id))
+    writer.start()
+    await writer.drain()
+
+    assert [len(batch) for batch in repos.token_batches] == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_writer_drops_and_counts_when_queue_full(monkeypatch: pytest.MonkeyPatch) -> None:
+    repos = FakeRepos()
+    repos.install(monkeypatch)
+    writer = UsageWriter(lambda: DummySession(), max_queue_size=2, flush_interval=0.05)
+    user_id, key_id = uuid4(), uuid4()
+
+    accepted = [writer.submit(_event(user_id, key_id)) for _ in range(3)]
+
+    assert accepted == [True, True, False]
+    assert writer.stats.dropped == 1
+    assert writer.stats.queue_depth == 2
+    await writer.drain()
+    assert writer.stats.flushed_events == 2
+    assert not writer.submit(_event(user_id, key_id))
+
+
+@pytest.mark.asyncio
+async def test_writer_rolls_back_and_counts_failed_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    repos = FakeRepos()
+    repos.should_raise = RuntimeError("db down")
+    repos.install(monkeypatch)
+    session = DummySession()
+    writer = UsageWriter(lambda: session, max_queue_size=10, flush_interval=0.05)
+
+    writer.start()
+    writer.submit(_event(uuid4(), uuid4()))
+    await writer.drain()
+
+    assert session.rollbacks == 1
+    assert writer.stats.failed_events == 1
+    assert writer.stats.flushed_events == 0
+
+
+@pytest.mark.asyncio
+async def test_writer_keeps_the_rest_of_a_batch_when_one_row_fails(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    repos = FakeRepos()
+    repos.install(monkeypatch)
+    writer = UsageWriter(lambda: DummySession(), max_queue_size=10, flush_interval=0.05)
+    user_id, key_id = uuid4(), uuid4()
+    events = [_event(user_id, key_id) for _ in range(5)]
+    repos.bad_request_ids.add(events[3].token_usage["request_id"])
+
+    writer.start()
+    for event in events:
+        writer.submit(event)
+    await writer.drain()
+
+    written = [row["request_id"] for batch in repos.token_batches for row in batch]
+    assert written == [e.token_usage["request_id"] for i, e in enumerate(events) if i != 3]
+    assert sum(row["total_requests"] for b in repos.aggregate_batches for row in b) == 4
+    assert writer.stats.failed_events == 1
+    assert writer.stats.flushed_events == 4
+
+
+@pytest.mark.asyncio
+async def test_writer_retries_a_batch_after_a_transient_error(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    repos = FakeRepos()
+    repos.transient_errors = [OperationalError("INSERT", {}, Exception("connection reset"))]
+    repos.install(monkeypatch)
+    writer = UsageWriter(
+        lambda: DummySession(), max_queue_size=10, flush_interval=0.05, retry_delay=0
+    )
+
+    writer.start()
+    for _ in range(3):
+        writer.submit(_event(uuid4(), uuid4()))
+    await writer.drain()
+
+    assert [len(batch) for batch in repos.token_batches] == [3]
+    assert writer.stats.failed_events == 0
+
+
+@pytest.mark.asyncio
+async def test_writer_gives_up_a_batch_when_the_database_stays_down(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    repos = FakeRepos()
+    repos.transient_errors = [ConnectionResetError("reset")] * 2
+    repos.install(monkeypatch)
+    session = DummySession()
+    writer = UsageWriter(lambda: session, max_queue_size=10, flush_interval=0.05, retry_delay=0)
+
+    writer.start()
+    for _ in range(4):
+        writer.submit(_event(uuid4(), uuid4()))
+    await writer.drain()
+
+    # One retry, then no splitting: the halves would fail the same way.
+    assert session.rollbacks == 2
+    assert writer.stats.failed_events == 4
+
+
+@pytest.mark.asyncio
+async def test_recorder_enqueues_instead_of_opening_session() -> None:
+    writer = UsageWriter(AsyncMock(), max_queue_size=10, flush_interval=0.05)
+    token_repo = AsyncMock()
+    agg_repo = AsyncMock()
+    metrics = AsyncMock()
+    recorder = UsageRecorder(token_repo, agg_repo, metrics_emitter=metrics, usage_writer=writer)
+    ctx = RequestContext(
+        request_id="req-writer",
+        user_id=uuid4(),
+        access_key_id=uuid4(),
+        access_key_prefix="ak",
+        bedrock_region="ap-northeast-2",
+        bedrock_model="anthropic.claude-sonnet-4-5-20250514",
+        has_bedrock_key=True,
+    )
+    response = ProxyResponse(
+        success=True,
+        response=None,
+        usage=AnthropicUsage(input_tokens=100, output_tokens=50),
+        provider="bedrock",
+        is_fallback=False,
+        status_code=200,
+    )
+
+    await recorder.record(ctx, response, latency_ms=10, model=ctx.bedrock_model)
+    await asyncio.sleep(0)
+
+    assert writer.stats.queue_depth == 1
+    event = writer._queue.get_nowait()
+    assert event.token_usage["request_id"] == "req-writer"
+    assert event.token_usage["timestamp"].tzinfo is not None
+    assert {row["bucket_type"] for row in event.aggregates} == {
+        "minute",
+        "hour",
+        "day",
+        "week",
+        "month",
+    }
+    token_repo.create.assert_not_called()
+    agg_repo.increment.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_bulk_statements_are_single_multi_row_upserts() -> None:
+    session = AsyncMock()
+    user_id, key_id = uuid4(), uuid4()
+    rows = sum_aggregate_deltas(
+        [_event(user_id, key_id), _event(uuid4(), key_id), _event(user_id, uuid4())]
+    )
+
+    await UsageAggregateRepository(session).bulk_increment(rows)
+    await TokenUsageRepository(session).bulk_create(
+        [
+            {
+                "request_id": "req-a",
+                "timestamp": datetime.now(timezone.utc),
+                "user_id": user_id,
+                "access_key_id": key_id,
+                "model": "m",
+                "input_tokens": 1,
+                "output_tokens": 1,
+                "total_tokens": 2,
+                "is_fallback": False,
+                "latency_ms": 1,
+            }
+        ]
+    )
+
+    assert session.execute.await_count == 2
+    upsert = str(session.execute.await_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    insert = str(session.execute.await_args_list[1].args[0].compile(dialect=postgresql.dialect()))
+    assert upsert.count("ON CONFLICT") == 1
+    assert "access_key_id, provider) DO UPDATE" in upsert
+    assert "excluded.total_estimated_cost_usd" in upsert
+    assert "VALUES" in upsert and upsert.count("), (") == 2
+    assert "ON CONFLICT (request_id) DO NOTHING" in insert
@@ -82,7 +82,7 @@ class ApiClient {
       method: 'PUT',
       body: JSON.stringify({ monthly_budget_usd }),
     });
-  updateUserRoutingStrategy = (id: string, routing_strategy: 'plan_first' | 'bedrock_only') =>
+  updateUserRoutingStrategy = (id: string, routing_strategy: RoutingStrategy) =>
     this.fetch<User>(`/admin/users/${id}/routing-strategy`, {
       method: 'PUT',
       body: JSON.stringify({ routing_strategy }),
@@ -93,7 +93,7 @@ class ApiClient {
     this.fetch<AccessKey[]>(`/admin/users/${userId}/access-keys`);
   createAccessKey = (
     userId: string,
-    data: { bedrock_region?: string; bedrock_model?: string } = {}
+    data: { bedrock_region?: string; bedrock_model?: string; bedrock_regions?: string } = {}
   ) =>
     this.fetch<AccessKey>(`/admin/users/${userId}/access-keys`, {
       method: 'POST',
@@ -144,12 +144,14 @@ class ApiClient {
 
 export const api = new ApiClient();
 
+export type RoutingStrategy = 'plan_first' | 'bedrock_only' | 'plan_hedged' | 'adaptive';
+
 export interface User {
   id: string;
   name: string;
   description: string | null;
   status: string;
-  routing_strategy: 'plan_first' | 'bedrock_only';
+  routing_strategy: RoutingStrategy;
   monthly_budget_usd?: string | null;
   created_at: string;
   updated_at: string;
@@ -171,6 +173,7 @@ export interface AccessKey {
   status: string;
   bedrock_region: string;
   bedrock_model: string;
+  bedrock_regions?: string | null;
   created_at: string;
   raw_key?: string;
   has_bedrock_key?: boolean;
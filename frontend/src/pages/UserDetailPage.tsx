@@ -1,7 +1,7 @@
 import { useEffect, useMemo, useState } from 'react';
 import { Link, useNavigate, useParams } from 'react-router-dom';
 import PageHeader from '@/components/PageHeader';
-import { api, AccessKey, UsageResponse, User, UserBudgetStatus } from '@/lib/api';
+import { api, AccessKey, RoutingStrategy, UsageResponse, User, UserBudgetStatus } from '@/lib/api';
 import {
   formatKstDate,
   resolveCustomRange,
@@ -22,6 +22,13 @@ const RANGE_PRESETS: { key: RangePreset; label: string }[] = [
   { key: 'custom', label: 'Custom' },
 ];
 
+const ROUTING_STRATEGY_LABELS: Record<RoutingStrategy, string> = {
+  plan_first: 'Plan First',
+  bedrock_only: 'Bedrock Only',
+  plan_hedged: 'Plan Hedged',
+  adaptive: 'Adaptive',
+};
+
 const numberFormatter = new Intl.NumberFormat('en-US');
 const currencyFormatter = new Intl.NumberFormat('en-US', {
   style: 'currency',
@@ -62,7 +69,7 @@ export default function UserDetailPage() {
   const [budgetSaving, setBudgetSaving] = useState(false);
   const [budgetError, setBudgetError] = useState('');
   const [budgetNotice, setBudgetNotice] = useState('');
-  const [routingStrategy, setRoutingStrategy] = useState<'plan_first' | 'bedrock_only'>('plan_first');
+  const [routingStrategy, setRoutingStrategy] = useState<RoutingStrategy>('plan_first');
   const [routingSaving, setRoutingSaving] = useState(false);
   const [routingNotice, setRoutingNotice] = useState('');
 
@@ -274,7 +281,7 @@ export default function UserDetailPage() {
     }
   };
 
-  const handleRoutingStrategyChange = async (newStrategy: 'plan_first' | 'bedrock_only') => {
+  const handleRoutingStrategyChange = async (newStrategy: RoutingStrategy) => {
     if (!id || routingSaving) return;
     setRoutingSaving(true);
     try {
@@ -372,7 +379,7 @@ export default function UserDetailPage() {
             </p>
           </div>
           <span className="inline-flex items-center rounded-full bg-accent/10 px-3 py-1 text-xs font-semibold text-accent">
-            {routingStrategy === 'plan_first' ? 'Plan First' : 'Bedrock Only'}
+            {ROUTING_STRATEGY_LABELS[routingStrategy]}
           </span>
         </div>
 
@@ -425,6 +432,54 @@ export default function UserDetailPage() {
               Skip Plan API entirely. All requests go directly to AWS Bedrock.
             </p>
           </button>
+          <button
+            type="button"
+            onClick={() => handleRoutingStrategyChange('plan_hedged')}
+            disabled={routingSaving}
+            className={[
+              'rounded-2xl border p-4 text-left transition',
+              routingStrategy === 'plan_hedged'
+                ? 'border-accent bg-accent/5 ring-2 ring-accent/20'
+                : 'border-line hover:border-accent/50 hover:bg-surface-2',
+            ].join(' ')}
+          >
+            <div className="flex items-center gap-2">
+              <div
+                className={[
+                  'h-4 w-4 rounded-full border-2',
+                  routingStrategy === 'plan_hedged' ? 'border-accent bg-accent' : 'border-muted',
+                ].join(' ')}
+              />
+              <span className="font-semibold text-ink">Plan Hedged</span>
+            </div>
+            <p className="mt-2 text-xs text-muted">
+              Like Plan First, but if Plan is slow to respond, Bedrock is raced in parallel and the faster one is used.
+            </p>
+          </button>
+          <button
+            type="button"
+            onClick={() => handleRoutingStrategyChange('adaptive')}
+            disabled={routingSaving}
+            className={[
+              'rounded-2xl border p-4 text-left transition',
+              routingStrategy === 'adaptive'
+                ? 'border-accent bg-accent/5 ring-2 ring-accent/20'
+                : 'border-line hover:border-accent/50 hover:bg-surface-2',
+            ].join(' ')}
+          >
+            <div className="flex items-center gap-2">
+              <div
+                className={[
+                  'h-4 w-4 rounded-full border-2',
+                  routingStrategy === 'adaptive' ? 'border-accent bg-accent' : 'border-muted',
+                ].join(' ')}
+              />
+              <span className="font-semibold text-ink">Adaptive</span>
+            </div>
+            <p className="mt-2 text-xs text-muted">
+              Route each request to whichever provider has been faster and more reliable recently, preferring Plan.
+            </p>
+          </button>
         </div>
 
         {routingNotice && (